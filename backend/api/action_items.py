@@ -0,0 +1,104 @@
+# api/action_items.py
+"""
+Ações dos riscos (RiskActionItem): o texto de Risk.resposta_risco dividido
+em ações, uma linha por ação, pareadas com os planos de ação do risco pela
+posição — o mesmo pareamento que a tela faz.
+
+As linhas são refeitas por risco quando o texto muda ou quando um plano
+entra, sai ou muda de posição (signals e gravações em lote). Carga inicial
+/ reconstrução: python manage.py sync_action_items.
+"""
+import re
+
+from django.db import transaction
+
+from .models import ActionPlan, Risk, RiskActionItem
+
+SPLIT_RE = re.compile(r"[\n;,•\u2022]+")
+
+# campos cuja alteração muda o pareamento
+CAMPOS_RISCO = {"resposta_risco"}
+CAMPOS_PLANO = {"risco", "ordem_manual", "prazo"}
+
+LOTE = 500
+
+
+# mesma lógica de split da tela, mas tolerante a \r e bullets
+def dividir_acoes(texto):
+    """Divide o campo resposta_risco em ações individuais."""
+    if not texto:
+        return []
+    return [
+        t.strip() for t in SPLIT_RE.split(texto) if t and t.strip() and t.strip() != "-"
+    ]
+
+
+def _posicao(lista, i):
+    return lista[i] if i < len(lista) else None
+
+
+def _sincronizar_lote(risco_ids):
+    textos = dict(
+        Risk.objects.filter(pk__in=risco_ids).values_list("pk", "resposta_risco")
+    )
+    por_id, por_ordem = {}, {}
+    planos = ActionPlan.objects.filter(risco_id__in=textos).values_list(
+        "pk", "risco_id"
+    )
+    for pk, risco_id in planos.order_by("risco_id", "id"):
+        por_id.setdefault(risco_id, []).append(pk)
+    for pk, risco_id in planos:  # ordenação padrão (ordem_manual, prazo, id)
+        por_ordem.setdefault(risco_id, []).append(pk)
+
+    novos = []
+    for risco_id, texto in textos.items():
+        pid, pordem = por_id.get(risco_id, []), por_ordem.get(risco_id, [])
+        novos.extend(
+            RiskActionItem(
+                risco_id=risco_id,
+                posicao=i,
+                texto=acao,
+                plano_id=_posicao(pid, i),
+                plano_cronograma_id=_posicao(pordem, i),
+            )
+            for i, acao in enumerate(dividir_acoes(texto))
+        )
+
+    with transaction.atomic():
+        RiskActionItem.objects.filter(risco_id__in=risco_ids).delete()
+        RiskActionItem.objects.bulk_create(novos, batch_size=LOTE)
+    return len(novos)
+
+
+def sincronizar_acoes(risco_ids=(), plano_ids=()):
+    """
+    Refaz as ações dos riscos informados e dos riscos que hoje apontam para
+    os planos informados (um plano que trocou de risco deixa o antigo
+    desalinhado). Retorna o total de ações gravadas.
+    """
+    ids = {pk for pk in risco_ids if pk is not None}
+    plano_ids = [pk for pk in plano_ids if pk is not None]
+    if plano_ids:
+        ids.update(
+            RiskActionItem.objects.filter(plano_id__in=plano_ids).values_list(
+                "risco_id", flat=True
+            )
+        )
+        ids.update(
+            RiskActionItem.objects.filter(
+                plano_cronograma_id__in=plano_ids
+            ).values_list("risco_id", flat=True)
+        )
+    ids = sorted(ids)
+    return sum(_sincronizar_lote(ids[i : i + LOTE]) for i in range(0, len(ids), LOTE))
+
+
+def reconstruir_acoes():
+    """Refaz as ações de todos os riscos. Retorna o total gravado."""
+    RiskActionItem.objects.all().delete()
+    return sincronizar_acoes(Risk.objects.values_list("pk", flat=True))
+
+
+def afeta_acoes(campos, update_fields):
+    """O save com estes update_fields muda as ações ou o pareamento?"""
+    return update_fields is None or bool(campos & set(update_fields))
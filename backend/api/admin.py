@@ -6,8 +6,11 @@ from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from django.utils.html import format_html
 from django import forms
+from django.db import transaction
 
 from .utils.email import send_html_email
+from .risk_params import risk_params
+from .utils.transactions import coalesce_on_commit
 from .models import (
     User,
     DocumentosLGPD,
@@ -25,6 +28,19 @@ from .models import (
     CalendarEvent,
     LoginActivity,
     UserActivityLog,
+    DashboardSnapshot,
+    ExportJob,
+    AuditDailyRollup,
+    LoginDailyRollup,
+    AuditArchive,
+    SearchDocument,
+    SearchTerm,
+    RiskActionItem,
+    ChangeMarker,
+    AvatarRendition,
+    UserAvatar,
+    DocumentUpload,
+    DocumentBlob,
 )
 
 # ===== User admin =====
@@ -142,7 +158,13 @@ class DocumentosLGPDAdmin(admin.ModelAdmin):
     )
     list_filter = ("dimensao", "criticidade", "status", "proxima_revisao", "created_at")
     search_fields = ("atividade", "base_legal", "evidencia", "comentarios")
-    readonly_fields = ("criado_por", "created_at", "updated_at")  # <- travado
+    readonly_fields = (
+        "criado_por",
+        "created_at",
+        "updated_at",
+        "arquivo_nome",
+        "arquivo_sha256",
+    )  # <- travado
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
     list_per_page = 25
@@ -154,7 +176,7 @@ class DocumentosLGPDAdmin(admin.ModelAdmin):
         ),
         ("Revisão e comentários", {"fields": ("proxima_revisao", "comentarios")}),
         ("Status", {"fields": ("criticidade", "status")}),
-        ("Anexo", {"fields": ("arquivo",)}),
+        ("Anexo", {"fields": ("arquivo", "arquivo_nome", "arquivo_sha256")}),
         (
             "Auditoria",
             {
@@ -300,32 +322,44 @@ class InventarioDadosAdmin(admin.ModelAdmin):
 
 
 # ===== Parametrizações =====
+class ParametrizacaoAdmin(admin.ModelAdmin):
+    """
+    Ações em massa (ex.: excluir selecionados) alteram vários itens numa só
+    transação: a reclassificação dos riscos e a troca da versão da
+    parametrização são agendadas uma vez (coalesce_on_commit).
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        with coalesce_on_commit(), transaction.atomic():
+            return super().changelist_view(request, extra_context)
+
+
 @admin.register(LikelihoodItem)
-class LikelihoodItemAdmin(admin.ModelAdmin):
+class LikelihoodItemAdmin(ParametrizacaoAdmin):
     list_display = ("value", "label_pt")
     search_fields = ("label_pt",)
 
 
 @admin.register(ImpactItem)
-class ImpactItemAdmin(admin.ModelAdmin):
+class ImpactItemAdmin(ParametrizacaoAdmin):
     list_display = ("value", "label_pt")
     search_fields = ("label_pt",)
 
 
 @admin.register(ControlEffectivenessItem)
-class ControlEffectivenessItemAdmin(admin.ModelAdmin):
+class ControlEffectivenessItemAdmin(ParametrizacaoAdmin):
     list_display = ("value", "label_pt", "reduction_min", "reduction_max")
     search_fields = ("label_pt",)
 
 
 @admin.register(RiskLevelBand)
-class RiskLevelBandAdmin(admin.ModelAdmin):
+class RiskLevelBandAdmin(ParametrizacaoAdmin):
     list_display = ("name", "min_score", "max_score", "color")
     search_fields = ("name",)
 
 
 @admin.register(Instruction)
-class InstructionAdmin(admin.ModelAdmin):
+class InstructionAdmin(ParametrizacaoAdmin):
     list_display = ("title", "updated_at")
     search_fields = ("title",)
 
@@ -363,17 +397,26 @@ class RiskAdmin(admin.ModelAdmin):
     list_filter = (
         "setor",
         "risco_residual",
+        "risco_residual_manual",
         "tipo_controle",
         "probabilidade",
         "impacto",
     )
     search_fields = ("matriz_filial", "setor", "processo", "risco_fator")
     date_hierarchy = "criado_em"
-    readonly_fields = ("pontuacao",)
+    readonly_fields = ("pontuacao", "risco_residual_manual")
     autocomplete_fields = ("probabilidade", "impacto", "eficacia")
     inlines = [ActionPlanInline]
     list_display_links = ("id", "matriz_filial")
 
+    def save_model(self, request, obj, form, change):
+        # mesma regra do RiskSerializer: nível escolhido aqui não segue as faixas
+        if "risco_residual" in form.changed_data or not change:
+            obj.risco_residual_manual = risk_params().nivel_manual(
+                obj.risco_residual, obj.probabilidade, obj.impacto
+            )
+        super().save_model(request, obj, form, change)
+
     def add_plano_acao(self, obj):
         url = reverse("admin:api_actionplan_add") + f"?risco={obj.id}"
         return format_html('<a class="button" href="{}">➕ Plano</a>', url)
@@ -535,3 +578,138 @@ class UserActivityLogAdmin(admin.ModelAdmin):
     list_filter = ("modulo", "operacao", "resultado")
     search_fields = ("usuario__email", "detalhe", "ip")
     ordering = ("-timestamp",)
+
+
+@admin.register(DashboardSnapshot)
+class DashboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("data_referencia", "secao", "versao", "pendente", "atualizado_em")
+    list_filter = ("secao", "pendente")
+    readonly_fields = ("data_referencia", "secao", "payload", "versao", "atualizado_em")
+    ordering = ("-data_referencia", "secao")
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "usuario", "status", "criado_em", "expira_em")
+    list_filter = ("tipo", "status")
+    search_fields = ("usuario__email", "nome_arquivo", "erro")
+    readonly_fields = ("criado_em", "iniciado_em", "concluido_em")
+    ordering = ("-criado_em",)
+
+
+@admin.register(AuditDailyRollup)
+class AuditDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("data", "modulo", "operacao", "resultado", "total")
+    list_filter = ("modulo", "operacao", "resultado")
+    date_hierarchy = "data"
+
+
+@admin.register(LoginDailyRollup)
+class LoginDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("data", "total", "usuarios_distintos")
+    date_hierarchy = "data"
+
+
+@admin.register(AuditArchive)
+class AuditArchiveAdmin(admin.ModelAdmin):
+    list_display = ("tabela", "mes", "linhas", "arquivo", "criado_em")
+    list_filter = ("tabela",)
+    readonly_fields = (
+        "tabela",
+        "mes",
+        "arquivo",
+        "linhas",
+        "primeiro_registro",
+        "ultimo_registro",
+        "sha256",
+        "criado_em",
+    )
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ("tipo", "objeto_id", "titulo", "setor", "atualizado_em")
+    list_filter = ("tipo",)
+    search_fields = ("titulo", "setor")
+    readonly_fields = (
+        "tipo",
+        "objeto_id",
+        "titulo",
+        "resumo",
+        "conteudo",
+        "setor",
+        "dono",
+        "atualizado_em",
+    )
+
+
+@admin.register(SearchTerm)
+class SearchTermAdmin(admin.ModelAdmin):
+    list_display = ("modelo", "objeto_id", "termo", "peso")
+    list_filter = ("modelo",)
+    search_fields = ("termo",)
+    readonly_fields = ("modelo", "objeto_id", "termo", "peso")
+
+
+@admin.register(RiskActionItem)
+class RiskActionItemAdmin(admin.ModelAdmin):
+    list_display = ("risco", "posicao", "texto", "plano", "plano_cronograma")
+    search_fields = ("texto", "risco__risco_fator")
+    list_select_related = ("risco", "plano", "plano_cronograma")
+    readonly_fields = ("risco", "posicao", "texto", "plano", "plano_cronograma")
+
+
+@admin.register(ChangeMarker)
+class ChangeMarkerAdmin(admin.ModelAdmin):
+    list_display = ("modelo", "alterado_em")
+    readonly_fields = ("modelo", "alterado_em")
+
+
+@admin.register(AvatarRendition)
+class AvatarRenditionAdmin(admin.ModelAdmin):
+    list_display = ("usuario", "tamanho", "sha256", "criado_em")
+    list_select_related = ("usuario",)
+    search_fields = ("usuario__email",)
+    exclude = ("dados",)
+    readonly_fields = ("usuario", "tamanho", "origem", "sha256", "mime", "criado_em")
+
+
+@admin.register(UserAvatar)
+class UserAvatarAdmin(admin.ModelAdmin):
+    list_display = ("usuario", "mime", "sha256", "atualizado_em")
+    list_select_related = ("usuario",)
+    search_fields = ("usuario__email",)
+    exclude = ("dados",)
+    readonly_fields = ("usuario", "mime", "sha256", "atualizado_em")
+
+
+@admin.register(DocumentUpload)
+class DocumentUploadAdmin(admin.ModelAdmin):
+    list_display = (
+        "nome_arquivo",
+        "documento",
+        "usuario",
+        "status",
+        "recebido",
+        "tamanho",
+        "expira_em",
+    )
+    list_filter = ("status",)
+    search_fields = ("nome_arquivo", "usuario__email")
+    readonly_fields = ("criado_em", "atualizado_em")
+    ordering = ("-criado_em",)
+
+
+@admin.register(DocumentBlob)
+class DocumentBlobAdmin(admin.ModelAdmin):
+    list_display = ("sha256", "tamanho", "referencias", "criado_em", "atualizado_em")
+    list_filter = ("referencias",)
+    search_fields = ("sha256",)
+    readonly_fields = (
+        "sha256",
+        "arquivo",
+        "tamanho",
+        "referencias",
+        "criado_em",
+        "atualizado_em",
+    )
@@ -0,0 +1,334 @@
+# api/audit_storage.py
+"""
+Armazenamento de longo prazo da auditoria (UserActivityLog e LoginActivity).
+
+- Resumos diários (AuditDailyRollup / LoginDailyRollup) alimentam os painéis
+  de auditoria sem varrer a tabela de logs inteira.
+- Linhas mais antigas que AUDIT_RETENTION_DAYS saem do banco para arquivos
+  .jsonl.gz mensais em AUDIT_ARCHIVE_DIR, catalogados em AuditArchive.
+  Antes de arquivar, os dias envolvidos são consolidados nos resumos.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .conditional import marcar_alterado
+from .dashboard_snapshot import invalidate_dashboard_snapshot
+from .models import (
+    AuditArchive,
+    AuditDailyRollup,
+    LoginActivity,
+    LoginDailyRollup,
+    UserActivityLog,
+)
+from .timeseries import serie_mensal, somar_series
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_CHUNK_SIZE = 5000
+
+# tabela -> (modelo, campo de data)
+ARQUIVAVEIS = {
+    "useractivitylog": (UserActivityLog, "timestamp"),
+    "loginactivity": (LoginActivity, "data_login"),
+}
+
+
+def _inicio_do_dia(dia):
+    return timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min))
+
+
+def _intervalo_dia(dia):
+    return _inicio_do_dia(dia), _inicio_do_dia(dia + datetime.timedelta(days=1))
+
+
+# ============================================================
+# Resumos diários
+# ============================================================
+
+
+def rollup_day(dia):
+    """(Re)calcula os resumos de um dia local. Idempotente."""
+    inicio, fim = _intervalo_dia(dia)
+
+    atividades = (
+        UserActivityLog.objects.filter(timestamp__gte=inicio, timestamp__lt=fim)
+        .values("modulo", "operacao", "resultado")
+        .annotate(total=Count("id"), usuarios=Count("email", distinct=True))
+        .order_by()
+    )
+    logins = LoginActivity.objects.filter(
+        data_login__gte=inicio, data_login__lt=fim
+    ).aggregate(total=Count("id"), usuarios=Count("email", distinct=True))
+
+    with transaction.atomic():
+        AuditDailyRollup.objects.filter(data=dia).delete()
+        AuditDailyRollup.objects.bulk_create(
+            [
+                AuditDailyRollup(
+                    data=dia,
+                    modulo=a["modulo"],
+                    operacao=a["operacao"],
+                    resultado=a["resultado"],
+                    total=a["total"],
+                    usuarios_distintos=a["usuarios"],
+                )
+                for a in atividades
+            ]
+        )
+        if logins["total"]:
+            LoginDailyRollup.objects.update_or_create(
+                data=dia,
+                defaults={
+                    "total": logins["total"],
+                    "usuarios_distintos": logins["usuarios"],
+                },
+            )
+        else:
+            LoginDailyRollup.objects.filter(data=dia).delete()
+
+
+def _ultimo_dia_arquivado():
+    """Dia local do registro mais recente já arquivado (ou None)."""
+    ultimo = AuditArchive.objects.aggregate(m=Max("ultimo_registro"))["m"]
+    return timezone.localdate(ultimo) if ultimo else None
+
+
+def rollup_pending(ate=None, desde=None):
+    """
+    Consolida os dias ainda não resumidos até `ate` (padrão: ontem).
+    O último dia já resumido é recalculado, pois pode ter recebido eventos
+    gravados em lote depois da consolidação. Dias já arquivados nunca são
+    recalculados: as linhas saíram da tabela e o resumo é o que sobrou.
+    """
+    ate = ate or timezone.localdate() - datetime.timedelta(days=1)
+
+    if desde is None:
+        ultimo = max(
+            filter(
+                None,
+                [
+                    AuditDailyRollup.objects.aggregate(m=Max("data"))["m"],
+                    LoginDailyRollup.objects.aggregate(m=Max("data"))["m"],
+                ],
+            ),
+            default=None,
+        )
+        if ultimo:
+            desde = ultimo
+        else:
+            primeiros = [
+                UserActivityLog.objects.aggregate(m=Min("timestamp"))["m"],
+                LoginActivity.objects.aggregate(m=Min("data_login"))["m"],
+            ]
+            primeiros = [timezone.localdate(p) for p in primeiros if p]
+            if not primeiros:
+                return 0
+            desde = min(primeiros)
+
+    arquivado = _ultimo_dia_arquivado()
+    if arquivado and desde <= arquivado:
+        desde = arquivado + datetime.timedelta(days=1)
+
+    dias = 0
+    dia = desde
+    while dia <= ate:
+        rollup_day(dia)
+        dia += datetime.timedelta(days=1)
+        dias += 1
+    return dias
+
+
+def resumo_auditoria(inicio, fim):
+    """
+    Totais por dia/módulo/operação/resultado entre `inicio` e `fim` (datas locais).
+    Dias já consolidados vêm dos resumos; os demais (ex.: hoje) da tabela de logs.
+    """
+    ultimo = AuditDailyRollup.objects.aggregate(m=Max("data"))["m"]
+    linhas = []
+    if ultimo and inicio <= ultimo:
+        linhas.extend(
+            AuditDailyRollup.objects.filter(
+                data__gte=inicio, data__lte=min(fim, ultimo)
+            )
+            .values("data", "modulo", "operacao", "resultado", "total")
+            .order_by("data", "modulo", "operacao", "resultado")
+        )
+
+    ao_vivo = max(inicio, ultimo + datetime.timedelta(days=1)) if ultimo else inicio
+    if ao_vivo <= fim:
+        linhas.extend(
+            UserActivityLog.objects.filter(
+                timestamp__gte=_inicio_do_dia(ao_vivo),
+                timestamp__lt=_inicio_do_dia(fim + datetime.timedelta(days=1)),
+            )
+            .annotate(data=TruncDate("timestamp"))
+            .values("data", "modulo", "operacao", "resultado")
+            .annotate(total=Count("id"))
+            .order_by("data", "modulo", "operacao", "resultado")
+        )
+    return linhas
+
+
+def resumo_logins(inicio, fim):
+    """Logins e usuários distintos por dia entre `inicio` e `fim` (datas locais)."""
+    ultimo = LoginDailyRollup.objects.aggregate(m=Max("data"))["m"]
+    dias = []
+    if ultimo and inicio <= ultimo:
+        dias.extend(
+            LoginDailyRollup.objects.filter(
+                data__gte=inicio, data__lte=min(fim, ultimo)
+            )
+            .values("data", "total", "usuarios_distintos")
+            .order_by("data")
+        )
+
+    ao_vivo = max(inicio, ultimo + datetime.timedelta(days=1)) if ultimo else inicio
+    if ao_vivo <= fim:
+        dias.extend(
+            LoginActivity.objects.filter(
+                data_login__gte=_inicio_do_dia(ao_vivo),
+                data_login__lt=_inicio_do_dia(fim + datetime.timedelta(days=1)),
+            )
+            .annotate(data=TruncDate("data_login"))
+            .values("data")
+            .annotate(
+                total=Count("id"), usuarios_distintos=Count("email", distinct=True)
+            )
+            .order_by("data")
+        )
+    return dias
+
+
+def logins_por_mes(meses=None, hoje=None):
+    """
+    Logins por mês (últimos `meses` meses; None = todo o histórico).
+    Dias já consolidados vêm dos resumos (as linhas podem ter sido
+    arquivadas); os demais da tabela de logins.
+    """
+    ultimo = LoginDailyRollup.objects.aggregate(m=Max("data"))["m"]
+    consolidados, ao_vivo = [], LoginActivity.objects.all()
+    if ultimo:
+        consolidados = serie_mensal(
+            LoginDailyRollup.objects.filter(data__lte=ultimo),
+            "data",
+            {"total": Sum("total")},
+            meses=meses,
+            hoje=hoje,
+            preencher=False,
+        )
+        ao_vivo = ao_vivo.filter(
+            data_login__gte=_inicio_do_dia(ultimo + datetime.timedelta(days=1))
+        )
+    return somar_series(
+        consolidados,
+        serie_mensal(
+            ao_vivo,
+            "data_login",
+            {"total": None},
+            meses=meses,
+            hoje=hoje,
+            preencher=False,
+        ),
+        meses=meses,
+        hoje=hoje,
+    )
+
+
+# ============================================================
+# Arquivamento
+# ============================================================
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for bloco in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _archive_range(tabela, model, campo, inicio, fim):
+    """Grava as linhas de [inicio, fim) num .jsonl.gz e as remove da tabela."""
+    qs = model.objects.filter(**{f"{campo}__gte": inicio, f"{campo}__lt": fim})
+    if not qs.exists():
+        return None
+
+    pasta = settings.AUDIT_ARCHIVE_DIR
+    os.makedirs(pasta, exist_ok=True)
+    nome = f"{tabela}-{inicio:%Y-%m}-{timezone.now():%Y%m%d%H%M%S}.jsonl.gz"
+    path = os.path.join(pasta, nome)
+
+    linhas, max_pk = 0, None
+    primeiro = ultimo = None
+    with gzip.open(path, "wt", encoding="utf-8") as gz:
+        for row in qs.order_by("pk").values().iterator(chunk_size=ARCHIVE_CHUNK_SIZE):
+            gz.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            gz.write("\n")
+            linhas += 1
+            max_pk = row["id"]
+            momento = row[campo]
+            primeiro = momento if primeiro is None else min(primeiro, momento)
+            ultimo = momento if ultimo is None else max(ultimo, momento)
+
+    with transaction.atomic():
+        AuditArchive.objects.create(
+            tabela=tabela,
+            mes=timezone.localtime(inicio).date().replace(day=1),
+            arquivo=nome,
+            linhas=linhas,
+            primeiro_registro=primeiro,
+            ultimo_registro=ultimo,
+            sha256=_sha256(path),
+        )
+        # DELETE direto: linhas antigas não precisam dos signals de post_delete
+        # (o snapshot do dashboard é invalidado uma vez só, abaixo)
+        apagar = qs.filter(pk__lte=max_pk)
+        apagar._raw_delete(apagar.db)
+
+    if model is LoginActivity:
+        invalidate_dashboard_snapshot("LoginActivity")
+        marcar_alterado(LoginActivity)
+    return nome, linhas
+
+
+def archive_before(cutoff, dry_run=False):
+    """
+    Move para arquivos mensais as linhas anteriores a `cutoff` (datetime aware).
+    Retorna {tabela: [(mês, linhas), ...]}.
+    """
+    if not dry_run:
+        rollup_pending(ate=timezone.localdate(cutoff) - datetime.timedelta(days=1))
+
+    resultado = {}
+    for tabela, (model, campo) in ARQUIVAVEIS.items():
+        antigos = model.objects.filter(**{f"{campo}__lt": cutoff})
+        meses = (
+            antigos.annotate(mes=TruncMonth(campo))
+            .values("mes")
+            .annotate(linhas=Count("id"))
+            .order_by("mes")
+        )
+        resultado[tabela] = []
+        for m in meses:
+            inicio = m["mes"]
+            proximo = (inicio + datetime.timedelta(days=32)).replace(day=1)
+            fim = min(timezone.make_aware(proximo.replace(tzinfo=None)), cutoff)
+            if dry_run:
+                resultado[tabela].append((inicio.date(), m["linhas"]))
+                continue
+            arquivado = _archive_range(tabela, model, campo, inicio, fim)
+            if arquivado:
+                resultado[tabela].append((inicio.date(), arquivado[1]))
+                logger.info("Auditoria arquivada em %s (%s linhas)", *arquivado)
+    return resultado
@@ -1,80 +1,108 @@
-from django.http import HttpResponse, Http404
+from django.http import (
+    HttpResponse,
+    HttpResponseNotModified,
+    HttpResponseRedirect,
+    Http404,
+)
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.utils.http import parse_etags
 
-from api.models import User
+from api.avatars import AvatarInvalido, gerar_rendicoes, tamanhos
+from api.models import AvatarRendition, User, UserAvatar
 
-from io import BytesIO
-from PIL import Image
 import os
 
+# URL versionada pelo hash: o conteúdo nunca muda
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_PADRAO = "public, max-age=86400"
 
-def _get_avatar_bytes(user):
-    """
-    Garante que vamos trabalhar sempre com bytes,
-    mesmo que o avatar_data venha como memoryview (BinaryField).
-    """
-    if not user.avatar_data:
-        raise Http404("Avatar não encontrado.")
-
-    data = user.avatar_data
-
-    # Se vier como memoryview (caso comum em BinaryField)
-    if isinstance(data, memoryview):
-        data = data.tobytes()
-
-    return data
-
-
-def serve_avatar_full(request, pk):
-    user = get_object_or_404(User, pk=pk)
-    data = _get_avatar_bytes(user)
-
-    content_type = user.avatar_mime or "image/jpeg"
-
-    response = HttpResponse(data, content_type=content_type)
 
+def _headers(response, cache_control=CACHE_PADRAO, etag=None):
     # HEADERS PROFISSIONAIS
-    response["Cache-Control"] = "public, max-age=86400"
+    response["Cache-Control"] = cache_control
     response["Access-Control-Allow-Origin"] = "*"
     response["Cross-Origin-Resource-Policy"] = "cross-origin"
     response["X-Content-Type-Options"] = "nosniff"
-    response["Content-Length"] = str(len(data))
-    response["Content-Disposition"] = "inline"
-
+    if etag:
+        response["ETag"] = etag
+    if response.status_code == 200:
+        response["Content-Disposition"] = "inline"
+        response["Content-Length"] = str(len(response.content))
     return response
 
 
-def serve_avatar_thumb(request, pk):
-    user = get_object_or_404(User, pk=pk)
-    original_bytes = _get_avatar_bytes(user)
+def _nao_modificado(request, etag):
+    return etag in parse_etags(request.headers.get("If-None-Match", ""))
 
-    try:
-        img = Image.open(BytesIO(original_bytes))
 
-        # Garante formato compatível com JPEG (sem canal alpha)
-        if img.mode not in ("RGB", "L"):
-            img = img.convert("RGB")
+def _servir_rendicao(request, pk, tamanho, cache_control, origem=None):
+    """
+    Miniatura pronta (sem decodificar imagem). Com If-None-Match, a primeira
+    consulta não traz os bytes: a 304 sai sem ler o blob.
+    """
+    revalidando = "If-None-Match" in request.headers
+    campos = ["origem", "sha256", "mime"] + ([] if revalidando else ["dados"])
+    rendicoes = AvatarRendition.objects.filter(usuario_id=pk, tamanho=tamanho)
+    r = rendicoes.values(*campos).first()
+
+    if r is None:
+        # avatar anterior às miniaturas: gera uma vez e serve
+        user = get_object_or_404(User.objects.only("pk", "avatar_hash"), pk=pk)
+        if not UserAvatar.objects.filter(usuario_id=pk).exists():
+            raise Http404("Avatar não encontrado.")
+        try:
+            gerar_rendicoes(user)
+        except AvatarInvalido:
+            # imagem que o PIL não lê: serve o original
+            return HttpResponseRedirect(f"/avatar/full/{pk}/")
+        r = rendicoes.values("origem", "sha256", "mime", "dados").first()
+        if r is None:
+            raise Http404("Avatar não encontrado.")
+
+    if origem is not None and r["origem"] != origem:
+        # avatar trocado depois que a URL foi gerada: aponta para a atual
+        return _headers(
+            HttpResponseRedirect(f"/avatar/{pk}/{tamanho}/{r['origem']}/"),
+            cache_control="no-cache",
+        )
+
+    etag = f'"{r["sha256"]}"'
+    if _nao_modificado(request, etag):
+        return _headers(HttpResponseNotModified(), cache_control, etag)
+    if "dados" not in r:
+        r["dados"] = rendicoes.values_list("dados", flat=True).first()
+    dados = bytes(r["dados"])
+    return _headers(HttpResponse(dados, content_type=r["mime"]), cache_control, etag)
 
-        # thumbnail profissional (mantém proporção)
-        img.thumbnail((256, 256))
 
-        buffer = BytesIO()
-        img.save(buffer, format="JPEG", quality=85)
-        thumb_bytes = buffer.getvalue()
-    except Exception:
-        # fallback: usa o original se der problema
-        thumb_bytes = original_bytes
+def serve_avatar_full(request, pk):
+    # hash/mime primeiro: a 304 não carrega o blob
+    originais = UserAvatar.objects.filter(usuario_id=pk)
+    avatar = originais.values("sha256", "mime").first()
+    if avatar is None:
+        raise Http404("Avatar não encontrado.")
+    etag = f'"{avatar["sha256"]}"'
+    if _nao_modificado(request, etag):
+        return _headers(HttpResponseNotModified(), etag=etag)
 
-    response = HttpResponse(thumb_bytes, content_type="image/jpeg")
-    response["Cache-Control"] = "public, max-age=86400"
-    response["Access-Control-Allow-Origin"] = "*"
-    response["Cross-Origin-Resource-Policy"] = "cross-origin"
-    response["X-Content-Type-Options"] = "nosniff"
-    response["Content-Disposition"] = "inline"
-    response["Content-Length"] = str(len(thumb_bytes))
+    data = bytes(originais.values_list("dados", flat=True).first())
+    content_type = avatar["mime"] or "image/jpeg"
+
+    response = HttpResponse(data, content_type=content_type)
+    return _headers(response, etag=etag)
+
+
+def serve_avatar_thumb(request, pk):
+    """Rota antiga (sem hash): miniatura no tamanho padrão, revalidada por ETag."""
+    return _servir_rendicao(request, pk, settings.AVATAR_TAMANHO_PADRAO, CACHE_PADRAO)
 
-    return response
+
+def serve_avatar_rendition(request, pk, tamanho, origem):
+    """/avatar/<id>/<tamanho>/<hash>/ — URL das miniaturas no UserSerializer."""
+    if tamanho not in tamanhos():
+        raise Http404("Tamanho de avatar indisponível.")
+    return _servir_rendicao(request, pk, tamanho, CACHE_IMUTAVEL, origem=origem)
 
 
 def serve_avatar_placeholder(request):
@@ -96,11 +124,4 @@ def serve_avatar_placeholder(request):
         data = f.read()
 
     response = HttpResponse(data, content_type="image/png")
-    response["Cache-Control"] = "public, max-age=86400"
-    response["Access-Control-Allow-Origin"] = "*"
-    response["Cross-Origin-Resource-Policy"] = "cross-origin"
-    response["X-Content-Type-Options"] = "nosniff"
-    response["Content-Disposition"] = "inline"
-    response["Content-Length"] = str(len(data))
-
-    return response
+    return _headers(response)
@@ -0,0 +1,139 @@
+# api/avatars.py
+"""
+Miniaturas de avatar (AvatarRendition).
+
+A imagem enviada é decodificada uma única vez, no upload, e gravada em
+AVATAR_TAMANHOS (JPEG, lado máximo em px). Original (UserAvatar) e miniaturas
+ficam fora da tabela de usuários; em User só o hash. As rotas /avatar/ só
+copiam bytes prontos:
+
+- /avatar/<id>/<tamanho>/<hash>/  URL versionada pelo sha256 do original
+  (User.avatar_hash): cache "immutable" no navegador; ETag forte + 304;
+- /avatar/<id>/                    rota antiga (AVATAR_TAMANHO_PADRAO), com ETag.
+
+Avatares anteriores a este esquema têm as miniaturas geradas no primeiro
+acesso (ou de uma vez: python manage.py rebuild_avatar_renditions).
+"""
+import hashlib
+from collections import namedtuple
+from io import BytesIO
+
+from django.conf import settings
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .models import AvatarRendition, User, UserAvatar
+
+MIME_MINIATURA = "image/jpeg"
+
+# troca de avatar a gravar depois do save do usuário (dados=None: remoção)
+AvatarPendente = namedtuple("AvatarPendente", ["dados", "mime", "rendicoes"])
+
+
+class AvatarInvalido(ValueError):
+    """O arquivo enviado não pôde ser lido como imagem."""
+
+
+def tamanhos():
+    return sorted(set(settings.AVATAR_TAMANHOS) | {settings.AVATAR_TAMANHO_PADRAO})
+
+
+def sha256(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+def renderizar(original):
+    """{tamanho: bytes JPEG} para cada tamanho, decodificando o original uma vez."""
+    rendicoes = {}
+    try:
+        img = Image.open(BytesIO(original))
+        img = ImageOps.exif_transpose(img)  # fotos de celular "deitadas"
+        # JPEG não tem canal alpha
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        for tamanho in sorted(tamanhos(), reverse=True):
+            # do maior para o menor: cada miniatura parte da anterior
+            img.thumbnail((tamanho, tamanho), Image.LANCZOS)
+            buffer = BytesIO()
+            img.save(
+                buffer,
+                format="JPEG",
+                quality=settings.AVATAR_QUALIDADE,
+                optimize=True,
+            )
+            rendicoes[tamanho] = buffer.getvalue()
+    except Exception as exc:
+        raise AvatarInvalido(str(exc)) from exc
+    return rendicoes
+
+
+def definir_avatar(user, dados, mime):
+    """
+    Troca o avatar: renderiza as miniaturas e atualiza User.avatar_hash
+    (ainda sem salvar). Devolve o AvatarPendente para gravar_avatar() depois
+    do save. AvatarInvalido se os bytes não forem uma imagem.
+    """
+    rendicoes = renderizar(dados)
+    user.avatar_hash = sha256(dados)
+    return AvatarPendente(dados, mime or "", rendicoes)
+
+
+def remover_avatar(user):
+    user.avatar_hash = ""
+    return AvatarPendente(None, "", {})
+
+
+def gravar_avatar(user, pendente):
+    """Grava (ou remove) original e miniaturas do usuário já salvo."""
+    with transaction.atomic():
+        if pendente.dados is None:
+            UserAvatar.objects.filter(usuario=user).delete()
+        else:
+            UserAvatar.objects.update_or_create(
+                usuario=user,
+                defaults={
+                    "dados": pendente.dados,
+                    "mime": pendente.mime,
+                    "sha256": user.avatar_hash,
+                },
+            )
+        gravar_rendicoes(user, pendente.rendicoes)
+
+
+def gravar_rendicoes(user, rendicoes):
+    """Substitui as miniaturas do usuário (nenhuma, se `rendicoes` for vazio)."""
+    with transaction.atomic():
+        AvatarRendition.objects.filter(usuario=user).delete()
+        AvatarRendition.objects.bulk_create(
+            AvatarRendition(
+                usuario=user,
+                tamanho=tamanho,
+                origem=user.avatar_hash,
+                sha256=sha256(dados),
+                mime=MIME_MINIATURA,
+                dados=dados,
+            )
+            for tamanho, dados in rendicoes.items()
+        )
+
+
+def gerar_rendicoes(user):
+    """(Re)gera as miniaturas a partir do original gravado. Retorna quantas."""
+    original = UserAvatar.objects.filter(usuario=user).values("dados", "sha256").first()
+    if original is None:
+        gravar_rendicoes(user, {})
+        return 0
+    if user.avatar_hash != original["sha256"]:
+        user.avatar_hash = original["sha256"]
+        User.objects.filter(pk=user.pk).update(avatar_hash=user.avatar_hash)
+    rendicoes = renderizar(bytes(original["dados"]))
+    gravar_rendicoes(user, rendicoes)
+    return len(rendicoes)
+
+
+def avatar_path(user, tamanho=None):
+    """Caminho versionado da miniatura (None se o usuário não tem avatar)."""
+    if not user.avatar_hash:
+        return None
+    tamanho = tamanho or settings.AVATAR_TAMANHO_PADRAO
+    return f"/avatar/{user.pk}/{tamanho}/{user.avatar_hash}/"
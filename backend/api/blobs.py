@@ -0,0 +1,139 @@
+# api/blobs.py
+"""
+Referências e coleta dos anexos endereçados por conteúdo (DocumentBlob).
+
+- registrar_blob(): no pre_save do documento, antes de o arquivo ser gravado;
+- atualizar_referencias(): post_save / post_delete de DocumentosLGPD, com
+  F() (o contador anda na mesma transação da escrita);
+- coletar_lixo() (python manage.py gc_document_blobs): reconta as
+  referências (escritas fora dos signals, ex.: queryset.update), remove os
+  blobs sem referência e os arquivos que nenhuma linha aponta (uploads
+  interrompidos, anexos anteriores ao storage por conteúdo). Só entra o que
+  está parado há DOCUMENTOS_GC_HORAS: um upload em andamento não perde o blob.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.deletion import ProtectedError
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import DocumentBlob, DocumentosLGPD
+from .storage import PREFIXO, caminho_blob, documentos_storage
+
+# anexos gravados antes do storage por conteúdo (upload_to antigo)
+PASTA_LEGADO = "documentos"
+
+
+def registrar_blob(sha256, tamanho):
+    """DocumentBlob do conteúdo (criado se novo), marcado como em uso agora."""
+    blob, criado = DocumentBlob.objects.get_or_create(
+        sha256=sha256,
+        defaults={"arquivo": caminho_blob(sha256), "tamanho": tamanho},
+    )
+    if not criado:
+        # o GC não remove um blob que acabou de ganhar uso
+        DocumentBlob.objects.filter(pk=sha256).update(atualizado_em=timezone.now())
+    return blob
+
+
+def atualizar_referencias(anterior, atual):
+    if anterior == atual:
+        return
+    if atual:
+        DocumentBlob.objects.filter(pk=atual).update(
+            referencias=F("referencias") + 1, atualizado_em=timezone.now()
+        )
+    if anterior:
+        DocumentBlob.objects.filter(pk=anterior, referencias__gt=0).update(
+            referencias=F("referencias") - 1, atualizado_em=timezone.now()
+        )
+
+
+def _contagem():
+    """Documentos que apontam para o blob (contagem real, para OuterRef)."""
+    return Coalesce(
+        Subquery(
+            DocumentosLGPD.objects.filter(blob=OuterRef("pk"))
+            .order_by()
+            .values("blob")
+            .annotate(n=Count("pk"))
+            .values("n")
+        ),
+        0,
+    )
+
+
+def recontar_referencias():
+    """Acerta `referencias` pela contagem real. Retorna quantos blobs mudaram."""
+    contagem = _contagem()
+    return (
+        DocumentBlob.objects.annotate(n=contagem)
+        .exclude(referencias=F("n"))
+        .update(referencias=contagem)
+    )
+
+
+def _arquivos(storage, pasta):
+    try:
+        subpastas, arquivos = storage.listdir(pasta)
+    except FileNotFoundError:
+        return
+    for nome in arquivos:
+        yield f"{pasta}/{nome}"
+    for sub in subpastas:
+        yield from _arquivos(storage, f"{pasta}/{sub}")
+
+
+def coletar_lixo(horas=None, simular=False, agora=None):
+    """
+    Remove blobs sem referência e arquivos órfãos parados há `horas`.
+    Retorna {"recontados", "blobs", "arquivos", "bytes"}.
+    """
+    horas = settings.DOCUMENTOS_GC_HORAS if horas is None else horas
+    limite = (agora or timezone.now()) - timedelta(hours=horas)
+    storage = documentos_storage()
+    resultado = {"recontados": 0, "blobs": 0, "arquivos": 0, "bytes": 0}
+    if not simular:
+        resultado["recontados"] = recontar_referencias()
+
+    parados = DocumentBlob.objects.filter(referencias=0, atualizado_em__lt=limite)
+    # pela contagem real (no --dry-run os contadores não foram acertados)
+    candidatos = DocumentBlob.objects.annotate(n=_contagem()).filter(
+        n=0, atualizado_em__lt=limite
+    )
+    for sha256, nome, tamanho in candidatos.values_list("sha256", "arquivo", "tamanho"):
+        if not simular:
+            # condicional de novo: um upload pode ter pego o blob agora
+            try:
+                removidos, _ = parados.filter(pk=sha256).delete()
+            except ProtectedError:
+                continue
+            if not removidos:
+                continue
+            storage.delete(nome)
+        resultado["blobs"] += 1
+        resultado["bytes"] += tamanho
+
+    referenciados = set(DocumentBlob.objects.values_list("arquivo", flat=True))
+    referenciados.update(
+        DocumentosLGPD.objects.exclude(arquivo="")
+        .exclude(arquivo=None)
+        .values_list("arquivo", flat=True)
+    )
+    for pasta in (PREFIXO, PASTA_LEGADO):
+        for nome in _arquivos(storage, pasta):
+            if nome in referenciados:
+                continue
+            try:
+                if storage.get_modified_time(nome) >= limite:
+                    continue  # gravação em andamento
+                tamanho = storage.size(nome)
+                if not simular:
+                    storage.delete(nome)
+            except FileNotFoundError:
+                continue
+            resultado["arquivos"] += 1
+            resultado["bytes"] += tamanho
+    return resultado
@@ -0,0 +1,249 @@
+# api/bulk.py
+"""
+Gravação em lote (criar / atualizar / excluir) para as viewsets.
+
+- O lote inteiro é validado pelo serializer da viewset (as mesmas regras do
+  endpoint unitário); qualquer erro devolve 400 com um item por linha e nada
+  é gravado.
+- As chaves estrangeiras do lote são resolvidas com um único in_bulk por
+  campo, em vez de um SELECT por linha.
+- A gravação usa bulk_create / bulk_update numa única transação, e a
+  auditoria registra um só evento para o lote.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .conditional import marcar_alterado
+from .fulltext import reindexar
+from .global_search import sincronizar_documentos
+from .utils.transactions import coalesce_on_commit
+
+
+class _InBulk:
+    """
+    Faz as vezes do queryset de um PrimaryKeyRelatedField durante a validação
+    do lote: get(pk=...) é servido de um dicionário carregado de uma vez.
+    """
+
+    def __init__(self, queryset, pks):
+        self.model = queryset.model
+        self._objetos = queryset.in_bulk(pks)
+
+    def get(self, pk):
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except DjangoValidationError:
+            raise ValueError(pk)
+        try:
+            return self._objetos[pk]
+        except KeyError:
+            raise self.model.DoesNotExist
+        except TypeError:
+            raise ValueError(pk)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """ListSerializer que valida cada item contra a instância do seu `id`."""
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            self.child.instance = self.instance.get(data.get("id"))
+        self.child.initial_data = data
+        return super().run_child_validation(data)
+
+
+class BulkWriteMixin:
+    """
+    Adiciona /<recurso>/bulk/ à viewset:
+      POST   [ {...}, ... ]            → cria
+      PATCH  [ {"id": 1, ...}, ... ]   → atualiza (parcial)
+      DELETE {"ids": [1, 2, ...]}      → exclui
+
+    Hooks por viewset:
+      bulk_apply(obj, attrs)      aplica os dados validados (padrão: setattr)
+      bulk_prepare(objs)          campos calculados antes de gravar
+      bulk_computed_fields        campos calculados incluídos no bulk_update
+      bulk_after_write(objs)      invalidações (bulk_* não dispara signals)
+
+    Os índices de busca (api.fulltext e api.global_search) são atualizados
+    aqui mesmo.
+    """
+
+    bulk_computed_fields = ()
+
+    # ---------- hooks ----------
+    def bulk_apply(self, obj, attrs):
+        for field, value in attrs.items():
+            setattr(obj, field, value)
+
+    def bulk_prepare(self, objs):
+        pass
+
+    def bulk_after_write(self, objs):
+        pass
+
+    # ---------- helpers ----------
+    def _bulk_itens(self, request):
+        itens = request.data
+        if isinstance(itens, dict):
+            itens = itens.get("itens")
+        if not isinstance(itens, list) or not itens:
+            raise ValidationError({"detail": "Envie uma lista de registros."})
+        limite = settings.BULK_MAX_ITENS
+        if len(itens) > limite:
+            raise ValidationError({"detail": f"Máximo de {limite} registros por lote."})
+        if not all(isinstance(item, dict) for item in itens):
+            raise ValidationError({"detail": "Cada registro deve ser um objeto."})
+        return itens
+
+    def _bulk_serializer(self, itens, instances=None):
+        child = self.get_serializer(instance=None, partial=instances is not None)
+        # FKs do lote resolvidas com um in_bulk por campo
+        for name, field in child.fields.items():
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and (
+                not field.read_only
+            ):
+                try:
+                    pks = {
+                        item[name]
+                        for item in itens
+                        if item.get(name) not in (None, "")
+                        and not isinstance(item[name], bool)
+                    }
+                    field.queryset = _InBulk(field.get_queryset(), pks)
+                except (TypeError, ValueError, DjangoValidationError):
+                    pass  # pk inválido: a validação normal aponta o erro na linha
+        return BulkListSerializer(
+            child=child,
+            instance=instances,
+            data=itens,
+            partial=instances is not None,
+            context=self.get_serializer_context(),
+        )
+
+    def _bulk_log(self, request, operacao, ids):
+        self._log(
+            request,
+            operacao,
+            detalhe=f"Lote com {len(ids)} registro(s): "
+            + ", ".join(str(pk) for pk in ids),
+        )
+
+    # ---------- endpoint ----------
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        if request.method == "DELETE":
+            return self._bulk_delete(request)
+        if request.method == "PATCH":
+            return self._bulk_update(request)
+        return self._bulk_create(request)
+
+    def _bulk_create(self, request):
+        itens = self._bulk_itens(request)
+        serializer = self._bulk_serializer(itens)
+        serializer.is_valid(raise_exception=True)
+
+        model = self.get_queryset().model
+        objs = []
+        for attrs in serializer.validated_data:
+            obj = model()
+            self.bulk_apply(obj, attrs)
+            objs.append(obj)
+
+        with coalesce_on_commit(), transaction.atomic():
+            self.bulk_prepare(objs)
+            model.objects.bulk_create(objs, batch_size=settings.BULK_BATCH_SIZE)
+            reindexar(model, [obj.pk for obj in objs])
+            sincronizar_documentos(model, [obj.pk for obj in objs])
+            self.bulk_after_write(objs)
+            marcar_alterado(model)  # bulk_* não dispara signals
+
+        ids = [obj.pk for obj in objs]
+        self._bulk_log(request, "CREATE", ids)
+        return Response(
+            {"criados": len(ids), "ids": ids}, status=status.HTTP_201_CREATED
+        )
+
+    def _bulk_update(self, request):
+        itens = self._bulk_itens(request)
+        ids = [item.get("id") for item in itens]
+        if any(pk in (None, "") for pk in ids):
+            raise ValidationError({"detail": "Informe o id de cada registro."})
+        if len(set(map(str, ids))) != len(ids):
+            raise ValidationError({"detail": "Há ids repetidos no lote."})
+
+        with coalesce_on_commit(), transaction.atomic():
+            try:
+                instances = self.get_queryset().select_for_update().in_bulk(ids)
+            except (TypeError, ValueError, DjangoValidationError):
+                raise ValidationError({"detail": "Há ids inválidos no lote."})
+            # chaves do in_bulk já convertidas; o payload pode trazer "12"
+            por_id = {str(pk): obj for pk, obj in instances.items()}
+            faltando = [pk for pk in ids if str(pk) not in por_id]
+            if faltando:
+                raise ValidationError(
+                    {"detail": "Registros não encontrados.", "ids": faltando}
+                )
+            por_id = {pk: por_id[str(pk)] for pk in ids}
+
+            serializer = self._bulk_serializer(itens, instances=por_id)
+            serializer.is_valid(raise_exception=True)
+
+            campos = set(self.bulk_computed_fields)
+            objs = []
+            for item, attrs in zip(itens, serializer.validated_data):
+                obj = por_id[item["id"]]
+                self.bulk_apply(obj, attrs)
+                campos.update(attrs)
+                objs.append(obj)
+
+            model = self.get_queryset().model
+            for field in model._meta.concrete_fields:
+                if getattr(field, "auto_now", False):
+                    # bulk_update não passa por pre_save
+                    now = timezone.now()
+                    for obj in objs:
+                        setattr(obj, field.attname, now)
+                    campos.add(field.name)
+
+            self.bulk_prepare(objs)
+            if campos:
+                model.objects.bulk_update(
+                    objs, sorted(campos), batch_size=settings.BULK_BATCH_SIZE
+                )
+                reindexar(model, [obj.pk for obj in objs])
+                sincronizar_documentos(model, [obj.pk for obj in objs])
+            self.bulk_after_write(objs)
+            marcar_alterado(model)
+
+        ids = [obj.pk for obj in objs]
+        self._bulk_log(request, "UPDATE", ids)
+        return Response({"atualizados": len(ids), "ids": ids})
+
+    def _bulk_delete(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids:
+            raise ValidationError({"detail": 'Envie {"ids": [...]}.'})
+        if len(ids) > settings.BULK_MAX_ITENS:
+            raise ValidationError(
+                {"detail": f"Máximo de {settings.BULK_MAX_ITENS} registros por lote."}
+            )
+
+        with coalesce_on_commit(), transaction.atomic():
+            try:
+                qs = self.get_queryset().filter(pk__in=ids)
+                encontrados = list(qs.values_list("pk", flat=True))
+            except (TypeError, ValueError, DjangoValidationError):
+                raise ValidationError({"detail": "Há ids inválidos no lote."})
+            # o delete() em cascata dispara os signals de cada linha; as
+            # invalidações são agendadas uma vez só (coalesce_on_commit)
+            qs.delete()
+
+        self._bulk_log(request, "DELETE", encontrados)
+        return Response({"excluidos": len(encontrados), "ids": encontrados})
@@ -0,0 +1,222 @@
+# api/conditional.py
+"""
+GET condicional (ETag / Last-Modified) para as listagens e agregados.
+
+O front consulta as mesmas telas repetidamente; com If-None-Match (ou
+If-Modified-Since) a resposta é 304, sem serializar nada, enquanto os
+validadores não mudarem. Os validadores saem do banco, antes da consulta
+da resposta:
+
+- por queryset (já filtrado): COUNT + MAX da data de atualização
+  (atualizado_em / updated_at / data_atualizacao);
+- por modelo envolvido (o da view e os que o serializer embute): a marca de
+  ChangeMarker, trocada após o commit de qualquer escrita — cobre exclusões,
+  queryset.update() e modelos sem data de atualização;
+- a URL completa (filtros, página), o usuário e o formato aceito.
+
+As marcas ficam no banco (e não no cache local do processo) para valer em
+todos os workers.
+"""
+import hashlib
+from collections import namedtuple
+from functools import partial
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import ChangeMarker
+from .risk_params import risk_params
+from .utils.transactions import on_commit_once
+
+CAMPOS_ATUALIZACAO = ("atualizado_em", "updated_at", "data_atualizacao")
+
+# revalida sempre: a resposta pode mudar a qualquer escrita
+CACHE_CONTROL = "private, no-cache"
+
+Validadores = namedtuple("Validadores", ["etag", "ultima_alteracao"])
+
+
+# ============================================================
+# Marcas de alteração (escrita)
+# ============================================================
+
+_MARCADORES = {}
+
+
+def _gravar_marca(rotulo):
+    agora = timezone.now()
+    if not ChangeMarker.objects.filter(modelo=rotulo).update(alterado_em=agora):
+        ChangeMarker.objects.get_or_create(
+            modelo=rotulo, defaults={"alterado_em": agora}
+        )
+
+
+def marcar_alterado(*modelos):
+    """
+    Troca (após o commit) a marca de alteração dos modelos. Chamar nas
+    escritas que não disparam signals (bulk_create/update, queryset.update).
+    """
+    for model in modelos:
+        rotulo = model._meta.label_lower
+        marcar = _MARCADORES.get(rotulo)
+        if marcar is None:
+            # uma função por modelo: em coalesce_on_commit() (lotes, ações em
+            # massa) on_commit_once agenda uma só gravação por transação
+            marcar = _MARCADORES.setdefault(rotulo, partial(_gravar_marca, rotulo))
+        on_commit_once(marcar)
+
+
+# ============================================================
+# Validadores (leitura)
+# ============================================================
+
+
+def campo_atualizacao(model):
+    """Primeiro campo de CAMPOS_ATUALIZACAO que o modelo tem (ou None)."""
+    nomes = {f.name for f in model._meta.concrete_fields}
+    return next((c for c in CAMPOS_ATUALIZACAO if c in nomes), None)
+
+
+def validadores(request, *querysets, campo=None, modelos=(), extra=(), datas=()):
+    """
+    ETag (fraco) e data da última alteração para a resposta de `request`.
+
+    querysets: contagem + MAX(`campo`, padrão: campo_atualizacao do modelo);
+    modelos: outros modelos cujas marcas entram (dados embutidos);
+    extra: valores que também mudam a resposta (ex.: a data de hoje);
+    datas: datetimes que entram no Last-Modified.
+    """
+    partes = [*map(str, extra)]
+    ultimas = [d for d in datas if d]
+    rotulos = {m._meta.label_lower for m in modelos}
+
+    for qs in querysets:
+        rotulos.add(qs.model._meta.label_lower)
+        coluna = campo or campo_atualizacao(qs.model)
+        agregados = {"n": Count("pk")}
+        if coluna:
+            agregados["ultima"] = Max(coluna)
+        estado = qs.order_by().aggregate(**agregados)
+        partes.append(f"{estado['n']}:{estado.get('ultima') or ''}")
+        ultimas.append(estado.get("ultima"))
+
+    if rotulos:
+        alteracoes = dict(
+            ChangeMarker.objects.filter(modelo__in=rotulos).values_list(
+                "modelo", "alterado_em"
+            )
+        )
+        for rotulo in sorted(rotulos):
+            partes.append(f"{rotulo}@{alteracoes.get(rotulo) or ''}")
+            ultimas.append(alteracoes.get(rotulo))
+
+    estado = hashlib.sha1("|".join(partes).encode("utf-8")).hexdigest()
+    resposta = "|".join(
+        [
+            estado,
+            request.get_full_path(),
+            str(getattr(request.user, "pk", None) or ""),
+            getattr(request, "accepted_media_type", "") or "",
+        ]
+    )
+    etag = 'W/"%s"' % hashlib.sha1(resposta.encode("utf-8")).hexdigest()
+    ultimas = [d for d in ultimas if d]
+    return Validadores(etag, max(ultimas) if ultimas else None)
+
+
+def _timestamp(data):
+    return int(data.timestamp()) if data else None
+
+
+def aplicar_validadores(response, valid):
+    """ETag / Last-Modified / Cache-Control numa resposta 200 (ou 304)."""
+    if response.status_code in (200, 304):
+        response["ETag"] = valid.etag
+        if valid.ultima_alteracao:
+            response["Last-Modified"] = http_date(_timestamp(valid.ultima_alteracao))
+        response["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def resposta_condicional(request, valid, gerar, revalidacao=None):
+    """
+    304 se o cliente já tem a versão de `valid`; senão chama gerar() (que
+    monta a resposta) e anexa os validadores. Na 304 chama revalidacao(), se
+    houver — o ACCESS que gerar() registraria na 200.
+    """
+    resp = get_conditional_response(
+        request, etag=valid.etag, last_modified=_timestamp(valid.ultima_alteracao)
+    )
+    if resp is None:
+        resp = gerar()
+    elif revalidacao is not None:
+        revalidacao()
+    return aplicar_validadores(resp, valid)
+
+
+# ============================================================
+# Mixin das viewsets
+# ============================================================
+
+
+class ConditionalGetMixin:
+    """
+    list/retrieve com GET condicional. A 304 sai antes da paginação e do
+    serializer; o ACCESS é registrado do mesmo jeito, marcado como revalidação
+    (AuditLogMixin._log_revalidacao), para a auditoria não perder acessos.
+
+    condicional_modelos: modelos embutidos pelo serializer (ex.: planos no risco);
+    condicional_campo: data de alteração, se não for um de CAMPOS_ATUALIZACAO;
+    condicional_parametrizacao: a resposta usa os rótulos da parametrização
+    em memória (api.risk_params) — a versão carregada entra no ETag.
+    """
+
+    condicional_modelos = ()
+    condicional_campo = None
+    condicional_parametrizacao = False
+
+    def get_validadores(self, *querysets, extra=()):
+        if self.condicional_parametrizacao:
+            extra = (*extra, risk_params().config()[1])
+        return validadores(
+            self.request,
+            *querysets,
+            campo=self.condicional_campo,
+            modelos=self.condicional_modelos,
+            extra=extra,
+        )
+
+    def revalidacao(self, request, obj=None):
+        """Log ACCESS da 304 (se a view audita acessos), para resposta_condicional."""
+        registrar = getattr(self, "_log_revalidacao", None)
+        return partial(registrar, request, obj=obj) if registrar else None
+
+    def list(self, request, *args, **kwargs):
+        valid = self.get_validadores(self.filter_queryset(self.get_queryset()))
+        return resposta_condicional(
+            request,
+            valid,
+            partial(super().list, request, *args, **kwargs),
+            self.revalidacao(request),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        # get_object antes: 404 e permissões de objeto valem também para a 304
+        instance = self.get_object()
+        valid = self.get_validadores(self.get_queryset().filter(pk=instance.pk))
+        return resposta_condicional(
+            request,
+            valid,
+            partial(self.resposta_retrieve, request, instance),
+            self.revalidacao(request, instance),
+        )
+
+    def resposta_retrieve(self, request, instance):
+        """Resposta 200 do retrieve com o objeto já carregado (sem outro get_object)."""
+        proxima = getattr(super(), "resposta_retrieve", None)
+        if proxima is not None:
+            return proxima(request, instance)  # ex.: AuditLogMixin (log ACCESS)
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,386 @@
+# api/dashboard_snapshot.py
+"""
+Snapshot pré-calculado do Dashboard.
+
+O payload de /dashboard/ é dividido em seções. Cada seção é gravada em
+DashboardSnapshot (uma linha por data de referência + seção) e só é
+recalculada quando algum dos modelos dos quais depende é alterado.
+Assim a rota serve um documento já pronto, sem refazer os KPIs a cada login.
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import CharField, Case, Count, DateField, F, Q, Value, When
+from django.db.models.functions import Coalesce, Lower, NullIf, Trim
+from django.utils import timezone
+
+from .models import (
+    Risk,
+    ActionPlan,
+    DocumentosLGPD,
+    Checklist,
+    Incident,
+    LoginActivity,
+    DashboardSnapshot,
+    RiskActionItem,
+)
+from .pagination import LoginFeedKeysetPagination
+from .risk_stats import distribuicao_por_faixa, riscos_por_setor, top_riscos
+from .timeseries import serie_mensal
+from .utils.transactions import on_commit_once
+
+# Limite padrão do ranking de usuários (parâmetro ?limit= do dashboard)
+RANKING_LIMIT_PADRAO = 10
+
+
+# ============================================================
+# Seções do payload
+# ============================================================
+
+
+def _secao_indicadores(hoje):
+    """KPIs + Índice de Maturidade."""
+    daqui_30 = hoje + timedelta(days=30)
+
+    # === Percentuais para Conformidade (robusto e sem quebrar nada) ===
+    try:
+        # Checklist
+        total_checklist = Checklist.objects.count()
+        concl_checklist = Checklist.objects.filter(is_completed=True).count()
+        p_checklist = (
+            (concl_checklist * 100.0 / total_checklist) if total_checklist else 0.0
+        )
+
+        total_planos = ActionPlan.objects.count()
+        concl_planos = ActionPlan.objects.filter(status__in=["concluido"]).count()
+        p_acoes = (concl_planos * 100.0 / total_planos) if total_planos else 0.0
+
+        total_docs = DocumentosLGPD.objects.count()
+        docs_validos = DocumentosLGPD.objects.filter(proxima_revisao__gte=hoje).count()
+        p_docs = (docs_validos * 100.0 / total_docs) if total_docs else 0.0
+
+        # === Conformidade (revisada) ===
+        conformidade_calc = round(
+            (p_checklist * 0.5)  # maior peso → controles LGPD concluídos
+            + (p_acoes * 0.3)  # execução das ações corretivas
+            + (p_docs * 0.2),  # governança documental
+            1,
+        )
+
+    except Exception:
+        # fallback defensivo para não quebrar o dashboard
+        conformidade_calc = 75.0
+
+    # === Índice de Maturidade (simples e seguro) ===
+    try:
+        indice_maturidade = {
+            "indice": round((p_checklist * 0.6) + (p_acoes * 0.4), 1),
+            "percentAcoes": round(p_acoes, 1),
+            "percentChecklist": round(p_checklist, 1),
+        }
+    except Exception:
+        indice_maturidade = {
+            "indice": 0.0,
+            "percentAcoes": 0.0,
+            "percentChecklist": 0.0,
+        }
+
+    kpis = {
+        "conformidade": conformidade_calc,
+        "riscosMapeados": Risk.objects.count(),
+        "acoesAtrasadas": ActionPlan.objects.filter(
+            status__in=["nao_iniciado", "andamento"],
+            prazo__lt=hoje,
+        ).count(),
+        "docsVencendo30d": DocumentosLGPD.objects.filter(
+            proxima_revisao__range=(hoje, daqui_30)
+        ).count(),
+        "alertas": 0,
+    }
+
+    return {"kpis": kpis, "indiceMaturidade": indice_maturidade}
+
+
+def _secao_documentos(hoje):
+    """Documentos a vencer nos próximos 30 dias (tabela)."""
+    daqui_30 = hoje + timedelta(days=30)
+    documentos_vencendo_qs = (
+        DocumentosLGPD.objects.filter(proxima_revisao__range=(hoje, daqui_30))
+        .order_by("proxima_revisao")
+        .values("id", "evidencia", "criticidade", "proxima_revisao")
+    )
+    return {
+        "documentosVencimentos": [
+            {
+                "evidencia": d["evidencia"],
+                "criticidade": d["criticidade"],
+                "proxima_revisao": d["proxima_revisao"],
+            }
+            for d in documentos_vencendo_qs
+        ]
+    }
+
+
+def _secao_riscos(hoje):
+    """Distribuição (pelas faixas de RiskLevelBand), riscos por setor e Top 5."""
+    riscos = Risk.objects.all()
+    return {
+        "riscosDistribuicao": distribuicao_por_faixa(riscos),
+        "riscosPorSetor": riscos_por_setor(riscos),
+        "topRiscos": top_riscos(riscos, limite=5),
+    }
+
+
+def _secao_acoes(hoje):
+    """Status das ações e Timeline de execução (pelas ações de RiskActionItem)."""
+    # ===== Ações Status (pareamento por id) =====
+    # 🔹 Se prazo passou e não foi concluído, conta como atrasado
+    status_expr = Case(
+        When(
+            Q(plano__prazo__lt=hoje) & ~Q(plano__status__in=["concluido", "atrasado"]),
+            then=Value("atrasado"),
+        ),
+        When(Q(plano__isnull=True) | Q(plano__status=""), then=Value("nao_iniciado")),
+        default=F("plano__status"),
+        output_field=CharField(),
+    )
+    status_data = dict(
+        RiskActionItem.objects.order_by()
+        .annotate(situacao=status_expr)
+        .values("situacao")
+        .annotate(total=Count("pk"))
+        .values_list("situacao", "total")
+    )
+
+    # 🔹 Ordem e rótulos fixos (humanizados só aqui)
+    label_map = {
+        "concluido": "Concluído",
+        "andamento": "Em andamento",
+        "nao_iniciado": "Não iniciado",
+        "atrasado": "Atrasado",
+    }
+    acoesStatus = [
+        {"name": label_map[k], "value": status_data.get(k, 0)} for k in label_map
+    ]
+
+    return {
+        "acoesStatus": acoesStatus,
+        "acoesTimeline": timeline_acoes(
+            hoje, meses=settings.DASHBOARD_SERIES_MESES or None
+        ),
+    }
+
+
+def timeline_acoes(hoje, meses=None, por=None):
+    """
+    Ações por mês do prazo do plano pareado (ordenação padrão dos planos):
+    planejadas (todas), em andamento, concluídas e atrasadas. Sem plano (ou
+    sem prazo) a ação entra no mês de hoje como não iniciada.
+    """
+    concluidas = ["concluido", "concluida", "concluídas", "concluidas"]
+    concluida = Q(situacao__in=concluidas)
+    andamento = Q(situacao__in=["andamento", "em andamento"])
+    atrasada = Q(situacao__in=["atrasada", "atrasado"]) | Q(prazo_ref__lt=hoje)
+    acoes = RiskActionItem.objects.alias(
+        prazo_ref=Coalesce(
+            "plano_cronograma__prazo", Value(hoje, output_field=DateField())
+        ),
+        situacao=Lower(
+            Trim(
+                Coalesce(
+                    NullIf("plano_cronograma__status", Value("")),
+                    Value("nao_iniciado"),
+                )
+            )
+        ),
+    )
+    return serie_mensal(
+        acoes,
+        "prazo_ref",
+        {
+            "planejadas": None,  # Toda ação conta como planejada
+            "andamento": ~concluida & andamento,
+            "concluidas": concluida,
+            "atrasadas": ~concluida & ~andamento & atrasada,
+        },
+        meses=meses,
+        hoje=hoje,
+        por=por,
+    )
+
+
+def _secao_incidentes(hoje):
+    """Incidentes ao longo do tempo (pela data de registro)."""
+    return {
+        "incidentesTimeline": serie_mensal(
+            Incident.objects.all(),
+            "data_registro",
+            meses=settings.DASHBOARD_SERIES_MESES or None,
+            hoje=hoje,
+        )
+    }
+
+
+def ranking_usuarios(limit=RANKING_LIMIT_PADRAO):
+    """Ranking de usuários mais ativos (por número de logins)."""
+    rankingUsuarios_qs = (
+        LoginActivity.objects.values("usuario__first_name", "usuario__email")
+        .annotate(total=Count("id"))
+        .order_by("-total")[:limit]
+    )
+    return [
+        {
+            "nome": r["usuario__first_name"] or r["usuario__email"],
+            "acessos": r["total"],
+        }
+        for r in rankingUsuarios_qs
+    ]
+
+
+def logins_recentes():
+    """Logins da janela de LOGINS_RECENTES_DIAS, só com as colunas do feed."""
+    desde = timezone.now() - timedelta(days=settings.LOGINS_RECENTES_DIAS)
+    return LoginActivity.objects.filter(data_login__gte=desde).values(
+        "email",
+        "data_login",
+        "usuario__first_name",
+        "usuario__last_name",
+        "usuario__email",
+        "usuario__role",
+    )
+
+
+def projetar_login(linha):
+    """Linha de logins_recentes() -> item do feed (usuário excluído não quebra)."""
+    nome = f"{linha['usuario__first_name'] or ''} {linha['usuario__last_name'] or ''}"
+    return {
+        "usuario": nome.strip()
+        or linha["usuario__email"]
+        or linha["email"]
+        or "Usuário removido",
+        "funcao": linha["usuario__role"] or "-",
+        "quando": timezone.localtime(linha["data_login"]).strftime("%d/%m/%Y %H:%M"),
+    }
+
+
+def _secao_acessos(hoje):
+    """Últimos acessos (primeira página do feed) e ranking de usuários."""
+    linhas, proximo = LoginFeedKeysetPagination().first_page(logins_recentes())
+    return {
+        "loginsRecentes": [projetar_login(linha) for linha in linhas],
+        # cursor da página seguinte em /dashboard/logins-recentes/
+        "loginsRecentesCursor": proximo,
+        "rankingUsuarios": ranking_usuarios(),
+    }
+
+
+# Seção -> função que calcula as chaves correspondentes do payload
+SECOES = {
+    "indicadores": _secao_indicadores,
+    "documentos": _secao_documentos,
+    "riscos": _secao_riscos,
+    "acoes": _secao_acoes,
+    "incidentes": _secao_incidentes,
+    "acessos": _secao_acessos,
+}
+
+# Modelo alterado -> seções que precisam ser recalculadas
+DEPENDENCIAS = {
+    "Risk": ("indicadores", "riscos", "acoes"),
+    "ActionPlan": ("indicadores", "acoes"),
+    "DocumentosLGPD": ("indicadores", "documentos"),
+    "Checklist": ("indicadores",),
+    "Incident": ("incidentes",),
+    "LoginActivity": ("acessos",),
+    "RiskLevelBand": ("riscos",),
+    "User": ("acessos",),  # nome/e-mail/função nos últimos acessos e no ranking
+}
+
+
+# ============================================================
+# Leitura / recálculo
+# ============================================================
+
+
+def _json_ready(payload):
+    """Normaliza o payload (datas etc.) para o mesmo formato que fica gravado."""
+    return json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+
+
+def _refresh_secao(hoje, secao, snapshot):
+    """
+    Recalcula uma seção e grava o resultado.
+    O UPDATE é condicionado à versão lida ANTES do cálculo: se alguma escrita
+    invalidou a seção nesse meio-tempo, ela continua pendente para a próxima leitura.
+    """
+    payload = _json_ready(SECOES[secao](hoje))
+    DashboardSnapshot.objects.filter(pk=snapshot.pk, versao=snapshot.versao).update(
+        payload=payload, pendente=False, atualizado_em=timezone.now()
+    )
+    return payload
+
+
+def get_dashboard_payload(hoje=None):
+    """
+    Retorna o payload completo do Dashboard para a data informada.
+    Seções válidas são lidas direto do banco; as pendentes são recalculadas.
+    """
+    hoje = hoje or timezone.localdate()
+    snapshots = {
+        s.secao: s for s in DashboardSnapshot.objects.filter(data_referencia=hoje)
+    }
+
+    if len(snapshots) < len(SECOES):
+        # primeiro acesso do dia: cria as linhas e descarta os dias anteriores
+        DashboardSnapshot.objects.filter(data_referencia__lt=hoje).delete()
+        for secao in SECOES:
+            if secao not in snapshots:
+                snapshots[secao], _ = DashboardSnapshot.objects.get_or_create(
+                    data_referencia=hoje, secao=secao
+                )
+
+    data = {}
+    for secao, snapshot in snapshots.items():
+        if secao not in SECOES:
+            continue
+        if snapshot.pendente:
+            data.update(_refresh_secao(hoje, secao, snapshot))
+        else:
+            data.update(snapshot.payload)
+    return data
+
+
+def rebuild_dashboard_snapshot(hoje=None):
+    """Marca todas as seções do dia como pendentes e recalcula o payload."""
+    hoje = hoje or timezone.localdate()
+    DashboardSnapshot.objects.filter(data_referencia=hoje).update(
+        pendente=True, versao=F("versao") + 1
+    )
+    return get_dashboard_payload(hoje)
+
+
+_MARCADORES = {}
+
+
+def invalidate_dashboard_snapshot(model_name):
+    """
+    Marca como pendentes as seções que dependem de `model_name`.
+    Executa após o commit para não segurar lock nas linhas do snapshot
+    durante a transação de quem escreveu.
+    """
+    secoes = DEPENDENCIAS.get(model_name)
+    if not secoes:
+        return
+
+    marcar = _MARCADORES.get(model_name)
+    if marcar is None:
+        # uma função por modelo: em coalesce_on_commit() o lote agenda uma só
+        def marcar():
+            DashboardSnapshot.objects.filter(secao__in=secoes).update(
+                pendente=True, versao=F("versao") + 1
+            )
+
+        marcar = _MARCADORES.setdefault(model_name, marcar)
+    on_commit_once(marcar)
@@ -0,0 +1,340 @@
+# api/document_uploads.py
+"""
+Envio dos arquivos de DocumentosLGPD: em partes, retomável e deduplicado.
+
+Protocolo (em /documentos/<id>/upload-sessoes/, admin/dpo):
+
+  POST   {nome, tamanho[, sha256]}  -> 201 {id, recebido: 0, parte_max, ...}
+         (conteúdo já guardado com esse sha256: sessão já "concluido",
+         sem enviar nenhum byte)
+  PUT    <sessao>/  corpo = bytes da parte; cabeçalho Upload-Offset (ou
+         ?offset=) igual a `recebido`, senão 409 com o offset atual
+  GET    <sessao>/                  -> {recebido, ...} (retomar após falha)
+  POST   <sessao>/concluir/ {sha256} -> documento atualizado
+  DELETE <sessao>/                  -> cancela
+
+As partes são gravadas direto no arquivo da sessão (DOCUMENTOS_UPLOAD_DIR),
+um bloco por vez: nem a parte nem o arquivo inteiro passam pela memória.
+Na conclusão o SHA-256 é conferido e o arquivo montado é movido para o
+storage.
+
+Deduplicação (pre_save de DocumentosLGPD: vale também para o upload simples,
+o serializer e o admin): o arquivo vai para o storage por conteúdo
+(api/storage.py) e o documento aponta para o DocumentBlob do seu sha256;
+conteúdo já guardado não é gravado de novo.
+
+Sessões abandonadas: python manage.py cleanup_document_uploads.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows (dev): sem flock; o UPDATE condicional ainda vale
+    fcntl = None
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .blobs import registrar_blob
+from .models import DocumentBlob, DocumentosLGPD, DocumentUpload
+
+BLOCO = 64 * 1024
+
+
+class UploadInvalido(ValueError):
+    """Pedido de upload recusado (mensagem vai para o cliente)."""
+
+
+class OffsetConflitante(Exception):
+    """Parte enviada fora de ordem; `recebido` é o offset esperado."""
+
+    def __init__(self, recebido):
+        super().__init__(recebido)
+        self.recebido = recebido
+
+
+class _ArquivoMontado(File):
+    """Arquivo da sessão, já com sha256 conferido."""
+
+    def __init__(self, caminho, nome, sha256):
+        super().__init__(open(caminho, "rb"), name=nome)
+        self.caminho = caminho
+        self.sha256 = sha256
+
+    # com temporary_file_path o FileSystemStorage move o arquivo (sem copiar)
+    def temporary_file_path(self):
+        return self.caminho
+
+
+# ============================================================
+# Conteúdo e deduplicação
+# ============================================================
+
+
+def sha256_arquivo(arquivo):
+    """sha256 (hex) de um arquivo aberto/UploadedFile, lido em blocos."""
+    h = hashlib.sha256()
+    if hasattr(arquivo, "chunks"):
+        for bloco in arquivo.chunks(BLOCO):
+            h.update(bloco)
+    else:
+        for bloco in iter(lambda: arquivo.read(BLOCO), b""):
+            h.update(bloco)
+    arquivo.seek(0)
+    return h.hexdigest()
+
+
+def preparar_arquivo(doc):
+    """
+    pre_save de DocumentosLGPD: nome, sha256 e DocumentBlob do arquivo
+    recém-atribuído. Se o conteúdo já está no storage, o documento só passa
+    a apontar para ele (o FileField não grava nada).
+    """
+    # referência anterior, para o contador no post_save (api/blobs.py)
+    doc._blob_anterior = (
+        DocumentosLGPD.objects.filter(pk=doc.pk).values_list("blob", flat=True).first()
+        if doc.pk
+        else None
+    )
+    arquivo = doc.arquivo
+    if not arquivo:
+        doc.arquivo_nome = doc.arquivo_sha256 = ""
+        doc.blob = None
+        return
+    if arquivo._committed:
+        return  # arquivo não mudou (ou anexar_blob já preencheu tudo)
+
+    conteudo = arquivo.file
+    sha256 = getattr(conteudo, "sha256", None) or sha256_arquivo(conteudo)
+    doc.arquivo_nome = os.path.basename(arquivo.name)[:255]
+    doc.arquivo_sha256 = sha256
+    doc.blob = registrar_blob(sha256, conteudo.size)
+    if arquivo.storage.exists(doc.blob.arquivo):
+        doc.arquivo = doc.blob.arquivo
+    # senão o FileField grava em blob.arquivo (documento_upload_to)
+
+
+def anexar_blob(doc, blob, nome):
+    """Aponta `doc` para um conteúdo já guardado (sem receber os bytes)."""
+    registrar_blob(blob.sha256, blob.tamanho)
+    doc.arquivo = blob.arquivo
+    doc.blob = blob
+    doc.arquivo_nome = nome[:255]
+    doc.arquivo_sha256 = blob.sha256
+    doc.save()
+    return doc
+
+
+def blob_conhecido(sha256, tamanho):
+    """DocumentBlob com esse conteúdo e o arquivo em disco (ou None)."""
+    sha256 = str(sha256 or "").strip().lower()
+    if not sha256:
+        return None
+    blob = DocumentBlob.objects.filter(sha256=sha256, tamanho=tamanho).first()
+    if blob and DocumentosLGPD._meta.get_field("arquivo").storage.exists(blob.arquivo):
+        return blob
+    return None
+
+
+# ============================================================
+# Sessões de upload em partes
+# ============================================================
+
+
+def caminho_parcial(sessao):
+    return os.path.join(settings.DOCUMENTOS_UPLOAD_DIR, f"{sessao.pk}.part")
+
+
+def _remover_parcial(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def iniciar_upload(doc, user, nome, tamanho, sha256=None):
+    nome = os.path.basename(str(nome or "").strip())
+    if not nome:
+        raise UploadInvalido("Informe o nome do arquivo.")
+    try:
+        tamanho = int(tamanho)
+    except (TypeError, ValueError):
+        raise UploadInvalido("Informe o tamanho do arquivo em bytes.")
+    if tamanho <= 0:
+        raise UploadInvalido("Arquivo vazio.")
+    if tamanho > settings.DOCUMENTOS_UPLOAD_MAX:
+        raise UploadInvalido(
+            f"Arquivo maior que o permitido ({settings.DOCUMENTOS_UPLOAD_MAX} bytes)."
+        )
+
+    sessao = DocumentUpload(
+        documento=doc,
+        usuario=user if user and user.is_authenticated else None,
+        nome_arquivo=nome[:255],
+        tamanho=tamanho,
+        expira_em=timezone.now()
+        + timedelta(hours=settings.DOCUMENTOS_UPLOAD_TTL_HOURS),
+    )
+
+    blob = blob_conhecido(sha256, tamanho)
+    if blob is not None:
+        # conteúdo já guardado: conclui sem transferir nada
+        with transaction.atomic():
+            anexar_blob(doc, blob, sessao.nome_arquivo)
+            sessao.recebido = tamanho
+            sessao.status = DocumentUpload.STATUS_CONCLUIDO
+            sessao.save()
+        return sessao
+
+    sessao.save()
+    os.makedirs(settings.DOCUMENTOS_UPLOAD_DIR, exist_ok=True)
+    open(caminho_parcial(sessao), "wb").close()
+    return sessao
+
+
+def _sessao_aberta(sessao_id, travar=True):
+    """
+    Sessão aberta e no prazo. travar=True: select_for_update, chamar dentro
+    de transaction.atomic.
+    """
+    sessoes = DocumentUpload.objects
+    if travar:
+        sessoes = sessoes.select_for_update()
+    sessao = sessoes.get(pk=sessao_id)
+    if sessao.status != DocumentUpload.STATUS_ABERTO:
+        raise UploadInvalido("Upload já concluído.")
+    if sessao.expira_em <= timezone.now():
+        raise UploadInvalido("Upload expirado. Inicie novamente.")
+    return sessao
+
+
+def _travar_parcial(arquivo):
+    """Trava exclusiva (flock) do .part; False se outra parte está sendo gravada."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True  # solta ao fechar o arquivo
+
+
+def gravar_parte(sessao_id, offset, stream, comprimento):
+    """
+    Grava `comprimento` bytes de `stream` a partir de `offset`. Se a conexão
+    cair no meio, o que chegou fica valendo: o cliente retoma de `recebido`.
+
+    Os bytes chegam fora de transação (nenhuma linha travada durante a
+    transferência), com o .part travado: duas partes da mesma sessão ao mesmo
+    tempo dão 409. `recebido` só avança com UPDATE ... WHERE recebido=offset.
+    """
+    sessao = _sessao_aberta(sessao_id, travar=False)
+    if offset != sessao.recebido:
+        raise OffsetConflitante(sessao.recebido)
+    if comprimento <= 0:
+        raise UploadInvalido("Parte vazia.")
+    if comprimento > settings.DOCUMENTOS_UPLOAD_PARTE_MAX:
+        raise UploadInvalido(
+            f"Parte maior que {settings.DOCUMENTOS_UPLOAD_PARTE_MAX} bytes."
+        )
+    if offset + comprimento > sessao.tamanho:
+        raise UploadInvalido("A parte ultrapassa o tamanho informado.")
+
+    try:
+        destino = open(caminho_parcial(sessao), "r+b")
+    except FileNotFoundError:
+        raise UploadInvalido("Upload expirado. Inicie novamente.")
+    with destino:
+        if not _travar_parcial(destino):
+            raise OffsetConflitante(sessao.recebido)
+        # já com a trava: outra parte pode ter avançado o offset antes dela
+        sessao.refresh_from_db(fields=["recebido", "status"])
+        if sessao.status != DocumentUpload.STATUS_ABERTO:
+            raise UploadInvalido("Upload já concluído.")
+        if offset != sessao.recebido:
+            raise OffsetConflitante(sessao.recebido)
+
+        escritos = 0
+        try:
+            destino.seek(offset)
+            while escritos < comprimento:
+                bloco = stream.read(min(BLOCO, comprimento - escritos))
+                if not bloco:
+                    break
+                destino.write(bloco)
+                escritos += len(bloco)
+            destino.flush()
+        except OSError:
+            pass  # conexão caiu: grava o que chegou
+        agora = timezone.now()
+        avancou = DocumentUpload.objects.filter(
+            pk=sessao.pk, recebido=offset, status=DocumentUpload.STATUS_ABERTO
+        ).update(recebido=offset + escritos, atualizado_em=agora)
+
+    if not avancou:
+        # concluída/cancelada enquanto os bytes chegavam
+        atual = (
+            DocumentUpload.objects.filter(
+                pk=sessao.pk, status=DocumentUpload.STATUS_ABERTO
+            )
+            .values_list("recebido", flat=True)
+            .first()
+        )
+        if atual is None:
+            raise UploadInvalido("Upload já concluído.")
+        raise OffsetConflitante(atual)
+    sessao.recebido = offset + escritos
+    sessao.atualizado_em = agora
+    return sessao
+
+
+def concluir_upload(sessao_id, sha256):
+    """Confere o checksum e anexa o arquivo montado ao documento."""
+    sha256 = str(sha256 or "").strip().lower()
+    if not sha256:
+        raise UploadInvalido("Informe o sha256 do arquivo.")
+
+    with transaction.atomic():
+        sessao = _sessao_aberta(sessao_id)
+        if sessao.recebido != sessao.tamanho:
+            raise UploadInvalido(
+                f"Upload incompleto: {sessao.recebido} de {sessao.tamanho} bytes."
+            )
+        caminho = caminho_parcial(sessao)
+        with open(caminho, "rb") as f:
+            calculado = sha256_arquivo(f)
+        doc = None
+        if calculado == sha256:
+            doc = DocumentosLGPD.objects.select_for_update().get(pk=sessao.documento_id)
+            with _ArquivoMontado(caminho, sessao.nome_arquivo, calculado) as conteudo:
+                doc.arquivo = conteudo
+                doc.save()
+            sessao.status = DocumentUpload.STATUS_CONCLUIDO
+            sessao.save(update_fields=["status", "atualizado_em"])
+
+    if doc is None:
+        # conteúdo corrompido não se conserta retomando: recomeça do zero
+        cancelar_upload(sessao)
+        raise UploadInvalido("Checksum não confere. Envie o arquivo novamente.")
+    # movido para o storage, ou sobrando (conteúdo deduplicado)
+    _remover_parcial(caminho)
+    return doc
+
+
+def cancelar_upload(sessao):
+    caminho = caminho_parcial(sessao)  # antes do delete (que zera o pk)
+    sessao.delete()
+    _remover_parcial(caminho)
+
+
+def cleanup_expired_uploads(now=None):
+    """Apaga as sessões vencidas (e as partes em disco). Retorna quantas."""
+    now = now or timezone.now()
+    vencidas = list(DocumentUpload.objects.filter(expira_em__lt=now))
+    for sessao in vencidas:
+        cancelar_upload(sessao)
+    return len(vencidas)
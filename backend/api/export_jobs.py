@@ -0,0 +1,252 @@
+# api/export_jobs.py
+"""
+Fila de exportações em segundo plano (sem broker: a própria tabela ExportJob é a fila).
+
+- O endpoint /exportacoes/ só registra o pedido (tipo + query params) e responde 202.
+- O comando `process_export_jobs` reivindica os jobs pendentes com UPDATE condicional
+  e os renderiza num pool de processos, reaproveitando as mesmas actions de exportação
+  das viewsets (mesmos filtros, escopo por papel e formato de arquivo).
+- O arquivo gerado fica em MEDIA_ROOT/exports/ até `expira_em`; depois é removido.
+"""
+import logging
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.request import Request
+
+from .conditional import marcar_alterado
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+# tipo -> (viewset, action). As actions são as mesmas servidas de forma síncrona.
+EXPORT_TIPOS = {
+    "inventario_csv": ("InventarioDadosViewSet", "export_csv"),
+    "inventario_xlsx": ("InventarioDadosViewSet", "export_xlsx"),
+    "inventario_pdf": ("InventarioDadosViewSet", "export_pdf"),
+    "ranking_csv": ("RiskViewSet", "export_ranking_csv"),
+    "ranking_xlsx": ("RiskViewSet", "export_ranking_xlsx"),
+    "ranking_pdf": ("RiskViewSet", "export_ranking_pdf"),
+    "heatmap_csv": ("RiskViewSet", "export_heatmap_csv"),
+}
+
+# parâmetros que não fazem sentido fora da listagem paginada
+PARAMETROS_IGNORADOS = {"page", "page_size", "format"}
+
+FILENAME_RE = re.compile(r'filename="([^"]+)"')
+
+
+def limpar_parametros(parametros):
+    """Normaliza os query params recebidos (dict de str ou lista de str)."""
+    limpos = {}
+    for key, value in (parametros or {}).items():
+        key = str(key)
+        if key in PARAMETROS_IGNORADOS:
+            continue
+        if isinstance(value, (list, tuple)):
+            limpos[key] = [str(v) for v in value]
+        elif value is not None:
+            limpos[key] = str(value)
+    return limpos
+
+
+def build_export_view(tipo, user, parametros=None):
+    """
+    Monta a viewset da exportação com uma requisição GET sintética
+    (usuário + query params), como se a chamada viesse do cliente.
+    """
+    from . import views
+
+    viewset_name, action_name = EXPORT_TIPOS[tipo]
+
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    query = QueryDict(mutable=True)
+    for key, value in limpar_parametros(parametros).items():
+        if isinstance(value, list):
+            query.setlist(key, value)
+        else:
+            query[key] = value
+    http_request.GET = query
+
+    request = Request(http_request)
+    request.user = user
+
+    view = getattr(views, viewset_name)(
+        request=request,
+        args=(),
+        kwargs={},
+        format_kwarg=None,
+        action=action_name,
+    )
+    return view, request
+
+
+def check_export_permission(tipo, user, parametros=None):
+    """Aplica as mesmas permissões da action síncrona (levanta APIException)."""
+    view, request = build_export_view(tipo, user, parametros)
+    view.check_permissions(request)
+
+
+# ============================================================
+# Fila
+# ============================================================
+
+
+def claim_jobs(limit):
+    """
+    Reivindica até `limit` jobs pendentes. O UPDATE condicional garante que
+    dois workers (mesmo em máquinas diferentes) nunca peguem o mesmo job.
+    """
+    if limit <= 0:
+        return []
+
+    ids = list(
+        ExportJob.objects.filter(status=ExportJob.STATUS_PENDENTE)
+        .order_by("criado_em", "id")
+        .values_list("id", flat=True)[: limit * 2]
+    )
+    claimed = []
+    for pk in ids:
+        updated = ExportJob.objects.filter(
+            pk=pk, status=ExportJob.STATUS_PENDENTE
+        ).update(
+            status=ExportJob.STATUS_PROCESSANDO,
+            iniciado_em=timezone.now(),
+            tentativas=F("tentativas") + 1,
+        )
+        if updated:
+            marcar_alterado(ExportJob)
+            claimed.append(pk)
+            if len(claimed) >= limit:
+                break
+    return claimed
+
+
+def requeue_stale_jobs():
+    """Devolve à fila jobs travados em 'processando' (worker encerrado no meio)."""
+    limite = timezone.now() - timedelta(minutes=settings.EXPORT_JOB_TIMEOUT_MINUTES)
+    travados = ExportJob.objects.filter(
+        status=ExportJob.STATUS_PROCESSANDO, iniciado_em__lt=limite
+    )
+    falhos = travados.filter(tentativas__gte=settings.EXPORT_JOB_MAX_TENTATIVAS).update(
+        status=ExportJob.STATUS_ERRO,
+        erro="Tempo limite excedido.",
+        concluido_em=timezone.now(),
+    )
+    reenfileirados = travados.update(status=ExportJob.STATUS_PENDENTE)
+    if falhos or reenfileirados:
+        marcar_alterado(ExportJob)
+    return reenfileirados, falhos
+
+
+def mark_failed(job_id, exc):
+    ExportJob.objects.filter(pk=job_id).exclude(
+        status=ExportJob.STATUS_CONCLUIDO
+    ).update(
+        status=ExportJob.STATUS_ERRO,
+        erro=str(exc)[:2000],
+        concluido_em=timezone.now(),
+    )
+    marcar_alterado(ExportJob)
+
+
+def _response_chunks(resp):
+    if getattr(resp, "streaming", False):
+        for chunk in resp.streaming_content:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    else:
+        yield resp.content
+
+
+def render_job(job_id):
+    """
+    Gera o arquivo de um job já reivindicado. Roda dentro do processo do pool.
+    """
+    job = ExportJob.objects.select_related("usuario").get(pk=job_id)
+    try:
+        if job.usuario is None:
+            raise PermissionError("Usuário do job não existe mais.")
+
+        view, request = build_export_view(job.tipo, job.usuario, job.parametros)
+        view.check_permissions(request)
+        resp = getattr(view, view.action)(request)
+
+        match = FILENAME_RE.search(resp.get("Content-Disposition", ""))
+        file_name = match.group(1) if match else f"{job.tipo}_{job.pk}"
+
+        with tempfile.TemporaryFile() as tmp:
+            try:
+                for chunk in _response_chunks(resp):
+                    tmp.write(chunk)
+            finally:
+                resp.close()
+            tmp.seek(0)
+            job.arquivo.save(file_name, File(tmp, name=file_name), save=False)
+
+        now = timezone.now()
+        job.status = ExportJob.STATUS_CONCLUIDO
+        job.nome_arquivo = file_name
+        job.mime = resp.get("Content-Type", "")
+        job.erro = ""
+        job.concluido_em = now
+        job.expira_em = now + timedelta(hours=settings.EXPORT_JOB_TTL_HOURS)
+        job.save(
+            update_fields=[
+                "arquivo",
+                "status",
+                "nome_arquivo",
+                "mime",
+                "erro",
+                "concluido_em",
+                "expira_em",
+            ]
+        )
+    except Exception as exc:
+        logger.exception("Falha ao processar exportação #%s", job_id)
+        mark_failed(job_id, exc)
+        return False
+    return True
+
+
+# ============================================================
+# Expiração
+# ============================================================
+
+
+def _apagar_arquivo(job):
+    if not job.arquivo:
+        return
+    pasta = None
+    try:
+        pasta = os.path.dirname(job.arquivo.path)
+    except NotImplementedError:
+        pass  # storage remoto: não há diretório local
+    job.arquivo.delete(save=False)
+    if pasta:
+        try:
+            os.rmdir(pasta)
+        except OSError:
+            pass
+
+
+def cleanup_expired_exports(now=None):
+    """Remove os arquivos vencidos e marca os jobs como expirados."""
+    now = now or timezone.now()
+    vencidos = ExportJob.objects.filter(
+        status=ExportJob.STATUS_CONCLUIDO, expira_em__lt=now
+    )
+    total = 0
+    for job in vencidos.iterator():
+        _apagar_arquivo(job)
+        job.status = ExportJob.STATUS_EXPIRADO
+        job.save(update_fields=["arquivo", "status"])
+        total += 1
+    return total
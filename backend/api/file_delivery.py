@@ -0,0 +1,198 @@
+# api/file_delivery.py
+"""
+Entrega dos arquivos enviados (DocumentosLGPD.arquivo) sem prender o worker
+no download inteiro.
+
+- ETag forte (sha256 do conteúdo, ou mtime + tamanho) e Last-Modified:
+  If-None-Match / If-Modified-Since respondem 304 sem abrir o arquivo;
+- Range: bytes=... (um intervalo, com If-Range): 206 só com o trecho pedido,
+  lido em blocos de DOCUMENTOS_CHUNK; intervalo fora do arquivo: 416;
+- arquivo inteiro: FileResponse (wsgi.file_wrapper: sendfile no gunicorn);
+- DOCUMENTOS_OFFLOAD = "x-accel-redirect" (nginx) ou "x-sendfile" (Apache,
+  lighttpd): o Django só confere a permissão e devolve o cabeçalho; o
+  servidor web envia o arquivo (e atende Range sozinho).
+
+A permissão é da view que chama entregar_arquivo() (SimpleRolePermission).
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    content_disposition_header,
+    http_date,
+    parse_http_date_safe,
+)
+
+OFFLOAD_ACCEL = "x-accel-redirect"
+OFFLOAD_SENDFILE = "x-sendfile"
+
+# arquivo protegido por permissão: o navegador guarda, mas sempre revalida
+CACHE_CONTROL = "private, no-cache"
+
+EXPOSE_HEADERS = "Content-Disposition, Content-Range, Accept-Ranges, ETag"
+
+
+class IntervaloInvalido(Exception):
+    """Range pedido fora do arquivo (416)."""
+
+
+def _estado(arquivo, versao=None):
+    """(tamanho, etag, modificado) sem abrir o arquivo."""
+    storage, nome = arquivo.storage, arquivo.name
+    try:
+        tamanho = storage.size(nome)
+    except OSError:
+        raise Http404("Arquivo não encontrado.")
+    try:
+        modificado = storage.get_modified_time(nome)
+    except NotImplementedError:
+        modificado = None
+    if versao:
+        return tamanho, f'"{versao}"', modificado
+    marca = int(modificado.timestamp() * 1_000_000) if modificado else 0
+    return tamanho, f'"{marca:x}-{tamanho:x}"', modificado
+
+
+def _intervalo(request, tamanho, etag, modificado):
+    """
+    (inicio, fim) inclusivos do Range pedido, ou None para o arquivo inteiro
+    (sem Range, Range que não entendemos, vários intervalos ou If-Range
+    desatualizado). IntervaloInvalido se não há bytes no intervalo.
+    """
+    cabecalho = request.headers.get("Range", "").strip()
+    if not cabecalho.startswith("bytes=") or "," in cabecalho:
+        return None
+
+    if_range = request.headers.get("If-Range", "").strip()
+    if if_range:
+        if if_range.startswith(('"', 'W/"')):
+            if if_range != etag:
+                return None
+        else:
+            data = parse_http_date_safe(if_range)
+            if not modificado or data is None or data < int(modificado.timestamp()):
+                return None
+
+    inicio, _, fim = cabecalho[len("bytes=") :].partition("-")
+    try:
+        if inicio.strip():
+            inicio = int(inicio)
+            fim = int(fim) if fim.strip() else None
+            if fim is not None and fim < inicio:
+                return None  # sintaxe inválida: ignora o Range
+            if inicio >= tamanho:
+                raise IntervaloInvalido
+            return inicio, tamanho - 1 if fim is None else min(fim, tamanho - 1)
+        sufixo = int(fim)  # bytes=-N: os últimos N bytes
+    except ValueError:
+        return None
+    if sufixo <= 0 or tamanho == 0:
+        raise IntervaloInvalido
+    return max(tamanho - sufixo, 0), tamanho - 1
+
+
+def _blocos(arquivo, inicio, comprimento):
+    with arquivo.storage.open(arquivo.name, "rb") as f:
+        f.seek(inicio)
+        restante = comprimento
+        while restante > 0:
+            bloco = f.read(min(settings.DOCUMENTOS_CHUNK, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def _cabecalhos(response, etag, modificado, disposicao=None):
+    response["ETag"] = etag
+    if modificado:
+        response["Last-Modified"] = http_date(int(modificado.timestamp()))
+    response["Cache-Control"] = CACHE_CONTROL
+    response["Accept-Ranges"] = "bytes"
+    response["Access-Control-Expose-Headers"] = EXPOSE_HEADERS
+    if disposicao:
+        response["Content-Disposition"] = disposicao
+    return response
+
+
+def _offload(arquivo, content_type):
+    """Resposta vazia com X-Accel-Redirect / X-Sendfile (None: sem offload)."""
+    modo = (settings.DOCUMENTOS_OFFLOAD or "").lower()
+    if not modo:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if modo == OFFLOAD_ACCEL:
+        prefixo = settings.DOCUMENTOS_ACCEL_PREFIXO.rstrip("/")
+        response["X-Accel-Redirect"] = f"{prefixo}/{quote(arquivo.name)}"
+    elif modo == OFFLOAD_SENDFILE:
+        try:
+            response["X-Sendfile"] = arquivo.storage.path(arquivo.name)
+        except NotImplementedError:
+            return None  # storage sem caminho local: o Django envia
+    else:
+        raise ImproperlyConfigured(
+            f"DOCUMENTOS_OFFLOAD inválido: {modo!r} "
+            f"(use '{OFFLOAD_ACCEL}', '{OFFLOAD_SENDFILE}' ou vazio)."
+        )
+    return response
+
+
+def entregar_arquivo(
+    request, arquivo, nome=None, content_type=None, anexo=True, versao=None
+):
+    """
+    Resposta de download de `arquivo` (FieldFile) para `request`: 304, 206,
+    416, 200 em streaming ou offload para o servidor web. `versao` (ex.: o
+    sha256 do conteúdo) vira o ETag.
+    """
+    nome = nome or os.path.basename(arquivo.name)
+    content_type = (
+        content_type or mimetypes.guess_type(nome)[0] or "application/octet-stream"
+    )
+    disposicao = content_disposition_header(anexo, nome)
+    tamanho, etag, modificado = _estado(arquivo, versao)
+
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(modificado.timestamp()) if modificado else None,
+    )
+    if response is not None:
+        return _cabecalhos(response, etag, modificado)
+
+    response = _offload(arquivo, content_type)
+    if response is not None:
+        return _cabecalhos(response, etag, modificado, disposicao)
+
+    try:
+        intervalo = _intervalo(request, tamanho, etag, modificado)
+    except IntervaloInvalido:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{tamanho}"
+        return _cabecalhos(response, etag, modificado)
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+        response["Content-Length"] = str(tamanho)
+        return _cabecalhos(response, etag, modificado, disposicao)
+
+    if intervalo is None:
+        response = FileResponse(
+            arquivo.storage.open(arquivo.name, "rb"), content_type=content_type
+        )
+        response.block_size = settings.DOCUMENTOS_CHUNK
+        return _cabecalhos(response, etag, modificado, disposicao)
+
+    inicio, fim = intervalo
+    comprimento = fim - inicio + 1
+    response = StreamingHttpResponse(
+        _blocos(arquivo, inicio, comprimento), status=206, content_type=content_type
+    )
+    response["Content-Length"] = str(comprimento)
+    response["Content-Range"] = f"bytes {inicio}-{fim}/{tamanho}"
+    return _cabecalhos(response, etag, modificado, disposicao)
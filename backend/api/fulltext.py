@@ -0,0 +1,323 @@
+# api/fulltext.py
+"""
+Busca textual (?search=) de Inventário, Riscos, Planos de Ação e Incidentes
+(e do índice da busca global, SearchDocument).
+
+- PostgreSQL: cada modelo tem a coluna search_vector (tsvector com pesos
+  A-D por campo) com índice GIN; a busca é um `@@` no índice e a ordenação
+  usa ts_rank. A coluna é recalculada após cada save (signals) e pelas
+  gravações em lote, com um UPDATE só.
+- Outros bancos (dev/SQLite): os mesmos campos e pesos alimentam um índice
+  invertido local (SearchTerm: termo -> registro), consultado por faixa de
+  prefixo no índice (modelo, termo).
+
+Nos dois casos cada palavra da busca casa por prefixo e todas precisam
+aparecer no registro. Carga inicial/reconstrução: rebuild_search_index.
+"""
+import operator
+import re
+import unicodedata
+from functools import reduce
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, router
+from django.db.models import Case, F, Max, OuterRef, Q, Subquery, Value, When
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from .models import (
+    ActionPlan,
+    Incident,
+    InventarioDados,
+    Risk,
+    SearchDocument,
+    SearchTerm,
+)
+
+# campo -> peso (A = mais relevante); "fk__campo" lê o registro relacionado
+CAMPOS_INDEXADOS = {
+    InventarioDados: {
+        "processo_negocio": "A",
+        "setor": "A",
+        "finalidade": "B",
+        "dados_pessoais": "B",
+        "unidade": "C",
+        "responsavel_email": "C",
+        "titulares": "C",
+        "base_legal": "D",
+    },
+    Risk: {
+        "risco_fator": "A",
+        "processo": "B",
+        "setor": "B",
+        "matriz_filial": "C",
+        "medidas_controle": "D",
+        "resposta_risco": "D",
+    },
+    ActionPlan: {
+        "como": "A",
+        "responsavel_execucao": "B",
+        "risco__risco_fator": "C",
+    },
+    Incident: {
+        "descricao": "A",
+        "fonte": "B",
+        "responsavel_analise": "B",
+        "acao_recomendada": "C",
+        "decisoes_resolucao": "C",
+    },
+    # busca global (api/global_search.py)
+    SearchDocument: {
+        "titulo": "A",
+        "resumo": "B",
+        "conteudo": "C",
+    },
+}
+
+# índice local: peso numérico somado no ranking
+PESOS_LOCAIS = {"A": 8, "B": 4, "C": 2, "D": 1}
+
+TAMANHO_MAX_TERMO = 40
+
+STOPWORDS = frozenset(
+    "a ao aos as com da das de do dos e em na nas no nos o os ou para pela "
+    "pelas pelo pelos por que se sem um uma umas uns".split()
+)
+
+
+def _dependentes():
+    """modelo relacionado -> [(modelo indexado, fk)] (ex.: Risk -> ActionPlan)."""
+    deps = {}
+    for model, campos in CAMPOS_INDEXADOS.items():
+        for caminho in campos:
+            if "__" in caminho:
+                fk = caminho.split("__", 1)[0]
+                rel = model._meta.get_field(fk).related_model
+                deps.setdefault(rel, []).append((model, fk))
+    return deps
+
+
+DEPENDENTES = _dependentes()
+
+
+# ============================================================
+# Termos
+# ============================================================
+
+
+def _palavras(texto, sem_acento):
+    texto = str(texto or "").lower()
+    if sem_acento:
+        texto = unicodedata.normalize("NFKD", texto)
+        texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return [
+        p[:TAMANHO_MAX_TERMO]
+        for p in re.split(r"[\W_]+", texto)
+        if len(p) > 1 and p not in STOPWORDS
+    ]
+
+
+def termos(texto):
+    """Palavras normalizadas (minúsculas, sem acento, sem stopwords)."""
+    return _palavras(texto, sem_acento=True)
+
+
+def _postgres(model):
+    return connections[router.db_for_write(model)].vendor == "postgresql"
+
+
+def _valor(obj, caminho):
+    for parte in caminho.split("__"):
+        obj = getattr(obj, parte, None)
+        if obj is None:
+            return ""
+    return obj
+
+
+# ============================================================
+# Manutenção do índice
+# ============================================================
+
+
+def _vetor(model):
+    """Expressão do search_vector (soma dos campos com seus pesos)."""
+    partes = []
+    for caminho, peso in CAMPOS_INDEXADOS[model].items():
+        if "__" in caminho:
+            fk, campo = caminho.split("__", 1)
+            rel = model._meta.get_field(fk).related_model
+            expr = Subquery(
+                rel.objects.filter(pk=OuterRef(fk)).order_by().values(campo)[:1]
+            )
+        else:
+            expr = F(caminho)
+        partes.append(SearchVector(expr, weight=peso, config=settings.FULLTEXT_CONFIG))
+    return reduce(operator.add, partes)
+
+
+def _indexar_local(qs):
+    model = qs.model
+    campos = CAMPOS_INDEXADOS[model]
+    rotulo = model._meta.label_lower
+    relacionados = sorted({c.split("__", 1)[0] for c in campos if "__" in c})
+
+    novos, ids = [], []
+    for obj in qs.select_related(*relacionados).iterator(chunk_size=500):
+        ids.append(obj.pk)
+        pesos = {}
+        for caminho, peso in campos.items():
+            for termo in termos(_valor(obj, caminho)):
+                pesos[termo] = max(pesos.get(termo, 0), PESOS_LOCAIS[peso])
+        novos.extend(
+            SearchTerm(modelo=rotulo, objeto_id=obj.pk, termo=t, peso=p)
+            for t, p in pesos.items()
+        )
+    for i in range(0, len(ids), 500):
+        SearchTerm.objects.filter(
+            modelo=rotulo, objeto_id__in=ids[i : i + 500]
+        ).delete()
+    SearchTerm.objects.bulk_create(novos, batch_size=500)
+
+
+def _reindexar_qs(qs):
+    if _postgres(qs.model):
+        qs.update(search_vector=_vetor(qs.model))
+    else:
+        _indexar_local(qs)
+
+
+def reindexar(model, pks):
+    """Recalcula o índice dos registros (e dos que citam o texto deles)."""
+    pks = [pk for pk in pks if pk is not None]
+    if not pks:
+        return
+    if model in CAMPOS_INDEXADOS:
+        _reindexar_qs(model.objects.filter(pk__in=pks))
+    for dep, fk in DEPENDENTES.get(model, ()):
+        _reindexar_qs(dep.objects.filter(**{f"{fk}__in": pks}))
+
+
+def remover_do_indice(model, pks):
+    """Tira registros excluídos do índice local (no PostgreSQL a coluna vai junto)."""
+    if model in CAMPOS_INDEXADOS and not _postgres(model):
+        SearchTerm.objects.filter(
+            modelo=model._meta.label_lower, objeto_id__in=list(pks)
+        ).delete()
+
+
+def reconstruir_indice(model):
+    """Recalcula o índice do modelo inteiro. Retorna o total de registros."""
+    if not _postgres(model):
+        SearchTerm.objects.filter(modelo=model._meta.label_lower).delete()
+    _reindexar_qs(model.objects.all())
+    return model.objects.count()
+
+
+def afeta_indice(model, update_fields):
+    """O save com estes update_fields muda o texto indexado (deste ou de dependentes)?"""
+    if update_fields is None:
+        return True
+    campos = set()
+    if model in CAMPOS_INDEXADOS:
+        campos.update(c.split("__", 1)[0] for c in CAMPOS_INDEXADOS[model])
+    for dep, fk in DEPENDENTES.get(model, ()):
+        campos.update(
+            c.split("__", 1)[1]
+            for c in CAMPOS_INDEXADOS[dep]
+            if c.startswith(f"{fk}__")
+        )
+    return bool(campos & set(update_fields))
+
+
+# ============================================================
+# Consulta
+# ============================================================
+
+
+def _buscar_postgres(qs, texto, ordenar):
+    palavras = _palavras(texto, sem_acento=False)
+    if not palavras:
+        return qs.none()
+    # cada palavra vira prefixo (:*) e todas são obrigatórias (&)
+    query = SearchQuery(
+        " & ".join(f"{p}:*" for p in palavras),
+        search_type="raw",
+        config=settings.FULLTEXT_CONFIG,
+    )
+    qs = qs.filter(search_vector=query)
+    if ordenar:
+        qs = qs.annotate(search_rank=SearchRank(F("search_vector"), query))
+    return qs
+
+
+def _buscar_local(qs, texto, ordenar):
+    palavras = termos(texto)
+    if not palavras:
+        return qs.none()
+
+    def prefixo(p):
+        # faixa [p, p + U+FFFF) = "começa com p", resolvida no índice (modelo, termo)
+        return Q(termo__gte=p, termo__lt=p + "￿")
+
+    por_palavra = {
+        f"p{i}": Max(Case(When(prefixo(p), then="peso"), default=Value(0)))
+        for i, p in enumerate(palavras)
+    }
+    ranking = (
+        SearchTerm.objects.filter(modelo=qs.model._meta.label_lower)
+        .filter(reduce(operator.or_, map(prefixo, palavras)))
+        .values("objeto_id")
+        .annotate(**por_palavra)
+        .filter(**{f"{nome}__gt": 0 for nome in por_palavra})
+        .annotate(rank=reduce(operator.add, (F(nome) for nome in por_palavra)))
+    )
+    qs = qs.filter(pk__in=ranking.values("objeto_id"))
+    if ordenar:
+        qs = qs.annotate(
+            search_rank=Subquery(
+                ranking.filter(objeto_id=OuterRef("pk")).values("rank")[:1]
+            )
+        )
+    return qs
+
+
+def buscar(qs, texto, ordenar=True):
+    """
+    Filtra `qs` pelas palavras de `texto`. Com ordenar=True anota
+    `search_rank` (maior = mais relevante). Sem palavra pesquisável
+    (só stopwords/letras soltas) não casa nada: quem chama decide o que fazer
+    (ver termos()).
+    """
+    if _postgres(qs.model):
+        return _buscar_postgres(qs, texto, ordenar)
+    return _buscar_local(qs, texto, ordenar)
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    ?search= pelo índice full-text, para os modelos de CAMPOS_INDEXADOS
+    (os demais seguem no SearchFilter padrão, com icontains).
+    Buscas sem palavra indexável (só stopwords ou letras soltas, ex.: "a", "x")
+    também caem no SearchFilter, pelos search_fields da view.
+    Sem ?ordering= explícito, os resultados vêm por relevância; a ordenação
+    já aplicada ao queryset vira critério de desempate. Por isso deve vir
+    depois do OrderingFilter em filter_backends.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if queryset.model not in CAMPOS_INDEXADOS:
+            return super().filter_queryset(request, queryset, view)
+
+        texto = request.query_params.get(self.search_param, "")
+        if not texto.strip():
+            return queryset
+        if not termos(texto):
+            return super().filter_queryset(request, queryset, view)
+
+        ordenar = not request.query_params.get(api_settings.ORDERING_PARAM)
+        queryset = buscar(queryset, texto, ordenar=ordenar)
+        if "search_rank" in queryset.query.annotations:
+            desempate = queryset.query.order_by or queryset.model._meta.ordering
+            queryset = queryset.order_by("-search_rank", *desempate)
+        return queryset
@@ -0,0 +1,271 @@
+# api/global_search.py
+"""
+Busca global (/api/v1/search/): um índice único (SearchDocument) com um
+documento por registro de Inventário, Riscos, Planos de Ação, Documentos
+LGPD, Incidentes e Ações de Monitoramento.
+
+- Cada módulo descreve em FONTES de onde saem título, resumo e conteúdo.
+- Os documentos são atualizados pelos signals de cada modelo (e pelas
+  gravações em lote); o texto é indexado por api.fulltext, como os demais.
+- A consulta é uma só sobre SearchDocument, restrita aos tipos que o
+  usuário pode listar (permission_classes/ROLE_PERMS da viewset do módulo).
+"""
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .fulltext import buscar, reindexar
+from .models import (
+    ActionPlan,
+    DocumentosLGPD,
+    Incident,
+    InventarioDados,
+    MonitoringAction,
+    Risk,
+    SearchDocument,
+)
+from .permissions import escopo_de_listagem
+
+TAMANHO_RESUMO = 300
+
+
+class Fonte:
+    """Como um modelo vira SearchDocument (caminhos "fk__campo" são aceitos)."""
+
+    def __init__(
+        self, model, viewset, titulo, resumo=(), conteudo=(), setor=None, dono=None
+    ):
+        self.model = model
+        self.viewset = viewset  # caminho pontuado (evita import circular)
+        self.titulo = titulo
+        self.resumo = resumo
+        self.conteudo = conteudo
+        self.setor = setor
+        self.dono = dono
+
+    @property
+    def caminhos(self):
+        return [self.titulo, *self.resumo, *self.conteudo, self.setor, self.dono]
+
+    @property
+    def relacionados(self):
+        return sorted({c.split("__", 1)[0] for c in self.caminhos if c and "__" in c})
+
+
+FONTES = {
+    "inventario": Fonte(
+        InventarioDados,
+        "api.views.InventarioDadosViewSet",
+        titulo="processo_negocio",
+        resumo=("finalidade",),
+        conteudo=(
+            "setor",
+            "unidade",
+            "responsavel_email",
+            "dados_pessoais",
+            "titulares",
+            "base_legal",
+        ),
+        setor="setor",
+        dono="criado_por",
+    ),
+    "risco": Fonte(
+        Risk,
+        "api.views.RiskViewSet",
+        titulo="risco_fator",
+        resumo=("setor", "processo"),
+        conteudo=("matriz_filial", "medidas_controle", "resposta_risco"),
+        setor="setor",
+    ),
+    "plano_acao": Fonte(
+        ActionPlan,
+        "api.views.ActionPlanViewSet",
+        titulo="como",
+        resumo=("risco__risco_fator",),
+        conteudo=("responsavel_execucao", "risco__setor", "risco__processo"),
+        setor="risco__setor",
+    ),
+    "documento": Fonte(
+        DocumentosLGPD,
+        "api.views.DocumentosLGPDViewSet",
+        titulo="atividade",
+        resumo=("base_legal",),
+        conteudo=("evidencia", "comentarios"),
+        dono="criado_por",
+    ),
+    "incidente": Fonte(
+        Incident,
+        "api.views.IncidentViewSet",
+        titulo="descricao",
+        resumo=("fonte", "responsavel_analise"),
+        conteudo=(
+            "acao_recomendada",
+            "recomendacoes_reportadas",
+            "decisoes_resolucao",
+        ),
+    ),
+    "monitoramento": Fonte(
+        MonitoringAction,
+        "api.views.MonitoringActionViewSet",
+        titulo="framework_requisito",
+        resumo=("escopo",),
+        conteudo=("criterio_avaliacao", "responsavel", "deficiencias", "corretivas"),
+    ),
+}
+
+TIPO_POR_MODELO = {fonte.model: tipo for tipo, fonte in FONTES.items()}
+
+
+def _dependentes():
+    """modelo relacionado -> [(tipo, fk)] (ex.: Risk -> planos de ação)."""
+    deps = {}
+    for tipo, fonte in FONTES.items():
+        for fk in fonte.relacionados:
+            rel = fonte.model._meta.get_field(fk).related_model
+            deps.setdefault(rel, []).append((tipo, fk))
+    return deps
+
+
+DEPENDENTES = _dependentes()
+
+
+# ============================================================
+# Manutenção do índice
+# ============================================================
+
+
+def _valor(obj, caminho):
+    for parte in caminho.split("__"):
+        obj = getattr(obj, parte, None)
+        if obj is None:
+            return ""
+    return str(obj).strip()
+
+
+def _documento(tipo, fonte, obj):
+    titulo = _valor(obj, fonte.titulo) or f"{fonte.model._meta.verbose_name} #{obj.pk}"
+    resumo = " · ".join(filter(None, (_valor(obj, c) for c in fonte.resumo)))
+    return SearchDocument(
+        tipo=tipo,
+        objeto_id=obj.pk,
+        titulo=titulo[:255],
+        resumo=resumo[:TAMANHO_RESUMO],
+        # o resumo é truncado: o texto inteiro também vai para o conteúdo
+        conteudo="\n".join(
+            filter(None, [resumo] + [_valor(obj, c) for c in fonte.conteudo])
+        ),
+        setor=_valor(obj, fonte.setor)[:120] if fonte.setor else "",
+        dono_id=getattr(obj, f"{fonte.dono}_id", None) if fonte.dono else None,
+    )
+
+
+def _sincronizar_qs(tipo, qs):
+    fonte = FONTES[tipo]
+    docs = [
+        _documento(tipo, fonte, obj)
+        for obj in qs.select_related(*fonte.relacionados).iterator(chunk_size=500)
+    ]
+    if not docs:
+        return
+    SearchDocument.objects.bulk_create(
+        docs,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["tipo", "objeto_id"],
+        update_fields=[
+            "titulo",
+            "resumo",
+            "conteudo",
+            "setor",
+            "dono",
+            "atualizado_em",
+        ],
+    )
+    ids = SearchDocument.objects.filter(
+        tipo=tipo, objeto_id__in=[d.objeto_id for d in docs]
+    ).values_list("pk", flat=True)
+    reindexar(SearchDocument, list(ids))
+
+
+def sincronizar_documentos(model, pks):
+    """Atualiza os documentos dos registros (e dos que citam o texto deles)."""
+    pks = [pk for pk in pks if pk is not None]
+    if not pks:
+        return
+    tipo = TIPO_POR_MODELO.get(model)
+    if tipo:
+        _sincronizar_qs(tipo, model.objects.filter(pk__in=pks))
+    for dep, fk in DEPENDENTES.get(model, ()):
+        _sincronizar_qs(dep, FONTES[dep].model.objects.filter(**{f"{fk}__in": pks}))
+
+
+def remover_documentos(model, pks):
+    tipo = TIPO_POR_MODELO.get(model)
+    if tipo:
+        docs = SearchDocument.objects.filter(tipo=tipo, objeto_id__in=list(pks))
+        docs.delete()  # post_delete limpa o índice textual
+
+
+def reconstruir_documentos():
+    """Recria todos os documentos. Retorna o total."""
+    SearchDocument.objects.all().delete()
+    for tipo, fonte in FONTES.items():
+        pks = list(fonte.model.objects.values_list("pk", flat=True))
+        for i in range(0, len(pks), 2000):
+            _sincronizar_qs(tipo, fonte.model.objects.filter(pk__in=pks[i : i + 2000]))
+    return SearchDocument.objects.count()
+
+
+def afeta_documentos(model, update_fields):
+    """O save com estes update_fields muda algum documento?"""
+    if update_fields is None:
+        return True
+    campos = set()
+    tipo = TIPO_POR_MODELO.get(model)
+    if tipo:
+        campos.update(c.split("__", 1)[0] for c in FONTES[tipo].caminhos if c)
+    for dep, fk in DEPENDENTES.get(model, ()):
+        campos.update(
+            c.split("__", 1)[1]
+            for c in FONTES[dep].caminhos
+            if c and c.startswith(f"{fk}__")
+        )
+    return bool(campos & set(update_fields))
+
+
+# ============================================================
+# Consulta
+# ============================================================
+
+
+def tipos_visiveis(request):
+    """{tipo: escopo} dos módulos que o usuário pode listar ('any' ou 'own')."""
+    tipos = {}
+    for tipo, fonte in FONTES.items():
+        view = import_string(fonte.viewset)(
+            request=request, action="list", args=(), kwargs={}, format_kwarg=None
+        )
+        escopo = escopo_de_listagem(request, view)
+        if escopo:
+            tipos[tipo] = escopo
+    return tipos
+
+
+def buscar_global(request, texto, tipos=None, limite=20):
+    """
+    Documentos que casam com `texto`, por relevância, nos módulos que o
+    usuário pode listar (opcionalmente só em `tipos`). Uma consulta só.
+    """
+    visiveis = tipos_visiveis(request)
+    if tipos:
+        visiveis = {t: e for t, e in visiveis.items() if t in tipos}
+    if not visiveis:
+        return SearchDocument.objects.none()
+
+    todos = [t for t, e in visiveis.items() if e == "any"]
+    proprios = [t for t, e in visiveis.items() if e == "own"]
+    escopo = Q(tipo__in=todos) | Q(tipo__in=proprios, dono=request.user)
+
+    qs = buscar(SearchDocument.objects.filter(escopo), texto)
+    if "search_rank" not in qs.query.annotations:
+        return qs  # nenhuma palavra pesquisável
+    return qs.order_by("-search_rank", "-atualizado_em")[:limite]
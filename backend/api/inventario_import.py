@@ -0,0 +1,168 @@
+# api/inventario_import.py
+"""
+Importação de Inventários de Dados a partir de planilhas (CSV/XLSX).
+
+Caminho inverso das exportações: os cabeçalhos são os mesmos rótulos de
+INVENTARIO_COLUNAS (um arquivo exportado pode ser reimportado). As linhas
+são lidas em streaming, validadas em blocos de INVENTARIO_IMPORT_CHUNK_SIZE
+com o InventarioDadosSerializer (mesmas regras do formulário) e as válidas
+gravadas com bulk_create. O retorno traz um relatório de erros por linha.
+
+Cada bloco é gravado na sua transação: se o arquivo deixar de ser legível
+no meio, os blocos anteriores ficam e o resultado parcial informa onde a
+leitura parou (erro_leitura).
+"""
+import itertools
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .conditional import marcar_alterado
+from .fulltext import reindexar
+from .global_search import sincronizar_documentos
+from .models import InventarioDados
+from .serializers import InventarioDadosSerializer
+from .utils.export import INVENTARIO_COLUNAS
+from .utils.spreadsheet_import import (
+    PlanilhaInvalida,
+    iter_planilha,
+    mapear_cabecalho,
+    normalizar_texto,
+    valor_celula,
+)
+
+# colunas das exportações que o sistema preenche sozinho
+COLUNAS_SOMENTE_LEITURA = {"id", "criado_por", "data_criacao", "data_atualizacao"}
+
+ROTULOS = dict(INVENTARIO_COLUNAS)
+
+
+def _mapa_choices():
+    """campo -> {valor ou rótulo normalizado: valor} dos campos com choices."""
+    mapas = {}
+    for field in InventarioDados._meta.concrete_fields:
+        if field.choices:
+            mapa = {}
+            for valor, rotulo in field.choices:
+                mapa[normalizar_texto(valor)] = valor
+                mapa[normalizar_texto(rotulo)] = valor
+            mapas[field.name] = mapa
+    return mapas
+
+
+def _erros_por_coluna(detalhe):
+    """Troca o nome do campo pelo rótulo da coluna (como aparece na planilha)."""
+    if not isinstance(detalhe, dict):
+        return {"linha": [str(e) for e in detalhe]}
+    return {
+        ROTULOS.get(campo, campo): [str(e) for e in mensagens]
+        for campo, mensagens in detalhe.items()
+    }
+
+
+class ResultadoImportacao:
+    def __init__(self):
+        self.linhas = 0
+        self.importados = 0
+        self.com_erro = 0
+        self.erros = []
+        self.colunas_desconhecidas = []
+        self.erro_leitura = None
+
+    def registrar_erro(self, linha, erros):
+        self.com_erro += 1
+        if len(self.erros) < settings.INVENTARIO_IMPORT_MAX_ERROS:
+            self.erros.append({"linha": linha, "erros": erros})
+
+    def as_dict(self):
+        return {
+            "linhas": self.linhas,
+            "importados": self.importados,
+            "com_erro": self.com_erro,
+            "erros": self.erros,
+            "erros_truncados": self.com_erro > len(self.erros),
+            "colunas_desconhecidas": self.colunas_desconhecidas,
+            "erro_leitura": self.erro_leitura,
+        }
+
+
+def _numerar_ate_erro(linhas, resultado):
+    """(número, valores) das linhas; para na primeira falha de leitura do arquivo."""
+    numero = 1  # linha 1 = cabeçalho
+    try:
+        for numero, valores in enumerate(linhas, start=2):
+            yield numero, valores
+    except PlanilhaInvalida as exc:
+        resultado.erro_leitura = f"Leitura interrompida após a linha {numero}: {exc}"
+
+
+def importar_inventario(fileobj, nome, usuario, context, dry_run=False):
+    """
+    Importa os inventários do arquivo. `context` é o contexto do serializer
+    (com a requisição POST, para valer a regra de campos obrigatórios).
+    Com dry_run=True só valida. Levanta PlanilhaInvalida se o arquivo não
+    puder ser lido ou o cabeçalho não tiver as colunas obrigatórias; uma falha
+    depois do cabeçalho só encerra a leitura (resultado.erro_leitura).
+    """
+    linhas = iter_planilha(fileobj, nome)
+    cabecalho = next(linhas, None)
+    if not cabecalho:
+        raise PlanilhaInvalida("Arquivo vazio.")
+
+    campos, desconhecidas = mapear_cabecalho(cabecalho, INVENTARIO_COLUNAS)
+    campos = [None if c in COLUNAS_SOMENTE_LEITURA else c for c in campos]
+    faltando = [
+        ROTULOS.get(c, c)
+        for c in InventarioDadosSerializer.CAMPOS_OBRIGATORIOS
+        if c not in campos
+    ]
+    if faltando:
+        raise PlanilhaInvalida(
+            "Colunas obrigatórias ausentes: " + ", ".join(faltando) + "."
+        )
+
+    resultado = ResultadoImportacao()
+    resultado.colunas_desconhecidas = desconhecidas
+
+    choices = _mapa_choices()
+    # um serializer só: os campos são montados uma vez para o arquivo todo
+    serializer = InventarioDadosSerializer(context=context)
+    tamanho = settings.INVENTARIO_IMPORT_CHUNK_SIZE
+
+    numeradas = _numerar_ate_erro(linhas, resultado)
+    while True:
+        bloco = list(itertools.islice(numeradas, tamanho))
+        if not bloco:
+            break
+
+        objs = []
+        for numero, valores in bloco:
+            dados = {}
+            for campo, valor in zip(campos, valores):
+                if campo is None:
+                    continue
+                valor = valor_celula(valor)
+                if valor is not None and campo in choices:
+                    valor = choices[campo].get(normalizar_texto(valor), valor)
+                dados[campo] = valor
+            if not any(v is not None for v in dados.values()):
+                continue  # linha em branco
+
+            resultado.linhas += 1
+            try:
+                attrs = serializer.run_validation(dados)
+            except ValidationError as exc:
+                resultado.registrar_erro(numero, _erros_por_coluna(exc.detail))
+                continue
+            objs.append(InventarioDados(criado_por=usuario, **attrs))
+
+        if objs and not dry_run:
+            with transaction.atomic():
+                InventarioDados.objects.bulk_create(objs)
+                reindexar(InventarioDados, [obj.pk for obj in objs])
+                sincronizar_documentos(InventarioDados, [obj.pk for obj in objs])
+                marcar_alterado(InventarioDados)
+        resultado.importados += len(objs)
+
+    return resultado
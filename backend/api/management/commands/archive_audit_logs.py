@@ -0,0 +1,49 @@
+# api/management/commands/archive_audit_logs.py
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.audit_storage import archive_before
+
+
+class Command(BaseCommand):
+    help = (
+        "Move os logs de auditoria e de login mais antigos que a retenção "
+        "para arquivos .jsonl.gz mensais (AUDIT_ARCHIVE_DIR)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=settings.AUDIT_RETENTION_DAYS,
+            help="Mantém no banco apenas os últimos N dias.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas mostra o que seria arquivado.",
+        )
+
+    def handle(self, *args, **options):
+        hoje = timezone.localdate()
+        limite = hoje - datetime.timedelta(days=options["dias"])
+        cutoff = timezone.make_aware(
+            datetime.datetime.combine(limite, datetime.time.min)
+        )
+
+        resultado = archive_before(cutoff, dry_run=options["dry_run"])
+
+        prefixo = "[dry-run] " if options["dry_run"] else ""
+        total = 0
+        for tabela, meses in resultado.items():
+            for mes, linhas in meses:
+                total += linhas
+                self.stdout.write(f"{prefixo}{tabela} {mes:%Y-%m}: {linhas} linha(s)")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefixo}{total} linha(s) anteriores a {limite:%d/%m/%Y} arquivada(s)."
+            )
+        )
@@ -0,0 +1,17 @@
+# api/management/commands/cleanup_document_uploads.py
+from django.core.management.base import BaseCommand
+
+from api.document_uploads import cleanup_expired_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove as sessões de upload em partes vencidas "
+        "(DOCUMENTOS_UPLOAD_TTL_HOURS) e as partes gravadas em disco."
+    )
+
+    def handle(self, *args, **options):
+        removidas = cleanup_expired_uploads()
+        self.stdout.write(
+            self.style.SUCCESS(f"Sessões de upload removidas: {removidas}.")
+        )
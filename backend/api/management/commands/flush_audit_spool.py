@@ -0,0 +1,20 @@
+# api/management/commands/flush_audit_spool.py
+from django.core.management.base import BaseCommand
+from api.utils.audit_buffer import audit_buffer, replay_spool
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava no banco os eventos de auditoria pendentes no spool em disco "
+        "(lotes que falharam ou de processos encerrados sem flush)."
+    )
+
+    def handle(self, *args, **options):
+        audit_buffer.flush()
+        total = replay_spool(include_orphans=True)
+        if total == 0:
+            self.stdout.write(self.style.SUCCESS("Nenhum evento pendente no spool."))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"{total} evento(s) de auditoria gravado(s).")
+            )
@@ -0,0 +1,36 @@
+# api/management/commands/gc_document_blobs.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.blobs import coletar_lixo
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconta as referências dos anexos (DocumentBlob) e remove os conteúdos "
+        "sem documento e os arquivos órfãos em disco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--horas",
+            type=int,
+            default=settings.DOCUMENTOS_GC_HORAS,
+            help="Só remove o que está sem uso há pelo menos N horas.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas informa o que seria removido.",
+        )
+
+    def handle(self, *args, **options):
+        r = coletar_lixo(horas=options["horas"], simular=options["dry_run"])
+        prefixo = "Seriam removidos" if options["dry_run"] else "Removidos"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefixo}: {r['blobs']} conteúdo(s) sem referência e "
+                f"{r['arquivos']} arquivo(s) órfão(s), {r['bytes']} bytes; "
+                f"{r['recontados']} contador(es) corrigido(s)."
+            )
+        )
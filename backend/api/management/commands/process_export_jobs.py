@@ -0,0 +1,123 @@
+# api/management/commands/process_export_jobs.py
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# intervalo entre as limpezas de arquivos expirados (segundos)
+CLEANUP_INTERVAL = 300
+
+
+def _init_worker():
+    # com spawn/forkserver o processo filho começa sem o Django configurado
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _run_job(job_id):
+    from api.export_jobs import render_job
+
+    try:
+        return render_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa a fila de exportações (ExportJob) num pool de processos "
+        "e remove os arquivos expirados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.EXPORT_JOB_WORKERS,
+            help="Quantidade de processos renderizando ao mesmo tempo.",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=2.0,
+            help="Intervalo (s) entre consultas à fila quando ociosa.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa os jobs pendentes e encerra (útil em cron).",
+        )
+        parser.add_argument(
+            "--cleanup-only",
+            action="store_true",
+            help="Apenas remove os arquivos expirados.",
+        )
+
+    def handle(self, *args, **options):
+        from api.export_jobs import (
+            claim_jobs,
+            cleanup_expired_exports,
+            mark_failed,
+            requeue_stale_jobs,
+        )
+
+        removidos = cleanup_expired_exports()
+        if removidos:
+            self.stdout.write(f"{removidos} exportação(ões) expirada(s) removida(s).")
+        if options["cleanup_only"]:
+            self.stdout.write(self.style.SUCCESS("Limpeza concluída."))
+            return
+
+        workers = max(1, options["workers"])
+        running = {}
+        ok = falhas = 0
+        last_cleanup = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            try:
+                while True:
+                    if time.monotonic() - last_cleanup > CLEANUP_INTERVAL:
+                        cleanup_expired_exports()
+                        last_cleanup = time.monotonic()
+
+                    requeue_stale_jobs()
+                    job_ids = claim_jobs(workers - len(running))
+                    if job_ids:
+                        # conexões abertas não podem ser herdadas pelos processos filhos
+                        connections.close_all()
+                    for job_id in job_ids:
+                        running[pool.submit(_run_job, job_id)] = job_id
+
+                    if not running:
+                        if options["once"]:
+                            break
+                        time.sleep(options["poll"])
+                        continue
+
+                    done, _ = wait(
+                        running, timeout=options["poll"], return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        job_id = running.pop(future)
+                        exc = future.exception()
+                        if exc is not None:
+                            # ex.: processo filho morto (BrokenProcessPool)
+                            mark_failed(job_id, exc)
+                            falhas += 1
+                        elif future.result():
+                            ok += 1
+                        else:
+                            falhas += 1
+            except KeyboardInterrupt:
+                self.stdout.write("Interrompido; aguardando jobs em andamento...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exportações processadas: {ok} concluída(s), {falhas} com erro."
+            )
+        )
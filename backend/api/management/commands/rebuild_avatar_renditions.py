@@ -0,0 +1,31 @@
+# api/management/commands/rebuild_avatar_renditions.py
+from django.core.management.base import BaseCommand
+
+from api.avatars import AvatarInvalido, gerar_rendicoes
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera novamente as miniaturas de avatar (AVATAR_TAMANHOS) de todos os "
+        "usuários com avatar. Necessário após mudar os tamanhos ou a qualidade."
+    )
+
+    def handle(self, *args, **options):
+        usuarios = invalidos = miniaturas = 0
+        com_avatar = User.objects.filter(avatar_original__isnull=False).only(
+            "pk", "avatar_hash"
+        )
+        for user in com_avatar.iterator(chunk_size=50):
+            try:
+                miniaturas += gerar_rendicoes(user)
+                usuarios += 1
+            except AvatarInvalido as exc:
+                invalidos += 1
+                self.stderr.write(f"Usuário {user.pk}: imagem ilegível ({exc}).")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Avatares: {usuarios} usuário(s), {miniaturas} miniatura(s) "
+                f"gerada(s); {invalidos} imagem(ns) ilegível(is)."
+            )
+        )
@@ -0,0 +1,29 @@
+# api/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+from api.fulltext import CAMPOS_INDEXADOS, reconstruir_indice
+from api.global_search import reconstruir_documentos
+from api.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói o índice da busca textual (search_vector no PostgreSQL, "
+        "SearchTerm nos demais bancos) de inventários, riscos, planos de ação "
+        "e incidentes, e o índice da busca global (SearchDocument)."
+    )
+
+    def handle(self, *args, **options):
+        for model in CAMPOS_INDEXADOS:
+            if model is SearchDocument:
+                continue  # recriado (e indexado) abaixo
+            total = reconstruir_indice(model)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model._meta.verbose_name_plural}: {total} registro(s) indexado(s)."
+                )
+            )
+
+        total = reconstruir_documentos()
+        self.stdout.write(
+            self.style.SUCCESS(f"Busca global: {total} documento(s) indexado(s).")
+        )
@@ -0,0 +1,20 @@
+# api/management/commands/reclassify_risk_bands.py
+from django.core.management.base import BaseCommand
+from api.services import reclassify_risk_bands
+
+
+class Command(BaseCommand):
+    help = (
+        "Reclassifica todos os riscos pelas faixas atuais (RiskLevelBand): "
+        "recalcula pontuação e nível (risco_residual) em SQL."
+    )
+
+    def handle(self, *args, **options):
+        resultado = reclassify_risk_bands()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['pontuacao']} pontuação(ões) e "
+                f"{resultado['risco_residual']} nível(is) atualizados "
+                f"em {resultado['segundos']:.3f}s."
+            )
+        )
@@ -0,0 +1,23 @@
+# api/management/commands/recompute_residual_scores.py
+from django.core.management.base import BaseCommand
+from api.services import recompute_residual_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula a pontuação residual (Risk.residual_pontuacao) de todos os riscos "
+        "a partir das faixas de redução atuais da eficácia do controle."
+    )
+
+    def handle(self, *args, **options):
+        updated = recompute_residual_scores()
+        if updated == 0:
+            self.stdout.write(
+                self.style.SUCCESS("Todas as pontuações residuais já estão corretas.")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{updated} risco(s) com pontuação residual atualizada."
+                )
+            )
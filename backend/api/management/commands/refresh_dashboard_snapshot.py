@@ -0,0 +1,18 @@
+# api/management/commands/refresh_dashboard_snapshot.py
+from django.core.management.base import BaseCommand
+from api.dashboard_snapshot import rebuild_dashboard_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o snapshot do Dashboard do dia atual "
+        "(útil em cron logo após a virada do dia)."
+    )
+
+    def handle(self, *args, **options):
+        data = rebuild_dashboard_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Snapshot do Dashboard atualizado ({len(data)} blocos)."
+            )
+        )
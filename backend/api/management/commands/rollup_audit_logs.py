@@ -0,0 +1,29 @@
+# api/management/commands/rollup_audit_logs.py
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from api.audit_storage import rollup_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Consolida os resumos diários de auditoria e de logins "
+        "(dias ainda não resumidos até ontem)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--desde",
+            help="Recalcula a partir desta data (AAAA-MM-DD); dias já arquivados ficam como estão.",
+        )
+
+    def handle(self, *args, **options):
+        desde = None
+        if options["desde"]:
+            try:
+                desde = datetime.date.fromisoformat(options["desde"])
+            except ValueError:
+                raise CommandError("Data inválida em --desde (use AAAA-MM-DD).")
+
+        dias = rollup_pending(desde=desde)
+        self.stdout.write(self.style.SUCCESS(f"{dias} dia(s) consolidado(s)."))
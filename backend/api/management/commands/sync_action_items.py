@@ -0,0 +1,18 @@
+# api/management/commands/sync_action_items.py
+from django.core.management.base import BaseCommand
+from api.action_items import reconstruir_acoes
+from api.dashboard_snapshot import invalidate_dashboard_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Recria as ações dos riscos (RiskActionItem) a partir de resposta_risco "
+        "e do pareamento com os planos de ação, e marca o Dashboard para recálculo."
+    )
+
+    def handle(self, *args, **options):
+        total = reconstruir_acoes()
+        invalidate_dashboard_snapshot("Risk")
+        self.stdout.write(
+            self.style.SUCCESS(f"Ações dos riscos: {total} ação(ões) gravada(s).")
+        )
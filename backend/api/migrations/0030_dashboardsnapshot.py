@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0029_user_avatar_data_user_avatar_mime"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data_referencia", models.DateField()),
+                ("secao", models.CharField(max_length=40)),
+                ("payload", models.JSONField(default=dict)),
+                ("versao", models.PositiveIntegerField(default=0)),
+                ("pendente", models.BooleanField(default=True)),
+                ("atualizado_em", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Snapshot do Dashboard",
+                "verbose_name_plural": "Snapshots do Dashboard",
+                "ordering": ["-data_referencia", "secao"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("data_referencia", "secao"),
+                        name="uniq_dashboard_snapshot_data_secao",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:18
+
+import api.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0030_dashboardsnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("inventario_csv", "Inventário (CSV)"),
+                            ("inventario_xlsx", "Inventário (XLSX)"),
+                            ("inventario_pdf", "Inventário (PDF)"),
+                            ("ranking_csv", "Ranking de Riscos (CSV)"),
+                            ("ranking_xlsx", "Ranking de Riscos (XLSX)"),
+                            ("ranking_pdf", "Ranking de Riscos (PDF)"),
+                            ("heatmap_csv", "Heatmap de Riscos (CSV)"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("parametros", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pendente", "Pendente"),
+                            ("processando", "Processando"),
+                            ("concluido", "Concluído"),
+                            ("erro", "Erro"),
+                            ("expirado", "Expirado"),
+                        ],
+                        default="pendente",
+                        max_length=20,
+                    ),
+                ),
+                ("tentativas", models.PositiveSmallIntegerField(default=0)),
+                ("erro", models.TextField(blank=True)),
+                (
+                    "arquivo",
+                    models.FileField(
+                        blank=True, null=True, upload_to=api.models.export_upload_to
+                    ),
+                ),
+                ("nome_arquivo", models.CharField(blank=True, max_length=255)),
+                ("mime", models.CharField(blank=True, max_length=100)),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                ("iniciado_em", models.DateTimeField(blank=True, null=True)),
+                ("concluido_em", models.DateTimeField(blank=True, null=True)),
+                ("expira_em", models.DateTimeField(blank=True, null=True)),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="export_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Exportação em segundo plano",
+                "verbose_name_plural": "Exportações em segundo plano",
+                "ordering": ["-criado_em"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "criado_em"],
+                        name="api_exportj_status_7ab861_idx",
+                    ),
+                    models.Index(
+                        fields=["usuario", "criado_em"],
+                        name="api_exportj_usuario_0cb575_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0031_exportjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="useractivitylog",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
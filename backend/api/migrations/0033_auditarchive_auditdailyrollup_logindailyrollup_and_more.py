@@ -0,0 +1,135 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0032_alter_useractivitylog_timestamp"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tabela",
+                    models.CharField(
+                        choices=[
+                            ("useractivitylog", "Log de Atividade de Usuário"),
+                            ("loginactivity", "Atividade de Login"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("mes", models.DateField(help_text="Primeiro dia do mês arquivado")),
+                ("arquivo", models.CharField(max_length=255)),
+                ("linhas", models.PositiveIntegerField(default=0)),
+                ("primeiro_registro", models.DateTimeField(blank=True, null=True)),
+                ("ultimo_registro", models.DateTimeField(blank=True, null=True)),
+                ("sha256", models.CharField(max_length=64)),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Arquivo de auditoria",
+                "verbose_name_plural": "Arquivos de auditoria",
+                "ordering": ["-mes", "tabela"],
+            },
+        ),
+        migrations.CreateModel(
+            name="AuditDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField()),
+                ("modulo", models.CharField(max_length=100)),
+                ("operacao", models.CharField(max_length=20)),
+                ("resultado", models.CharField(max_length=20)),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("usuarios_distintos", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Resumo diário de auditoria",
+                "verbose_name_plural": "Resumos diários de auditoria",
+                "ordering": ["-data", "modulo", "operacao"],
+            },
+        ),
+        migrations.CreateModel(
+            name="LoginDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField(unique=True)),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("usuarios_distintos", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Resumo diário de logins",
+                "verbose_name_plural": "Resumos diários de logins",
+                "ordering": ["-data"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="loginactivity",
+            index=models.Index(fields=["-data_login"], name="login_data_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="loginactivity",
+            index=models.Index(
+                fields=["email", "-data_login"], name="login_email_data_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="useractivitylog",
+            index=models.Index(fields=["-timestamp"], name="activity_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="useractivitylog",
+            index=models.Index(
+                fields=["modulo", "-timestamp"], name="activity_modulo_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="useractivitylog",
+            index=models.Index(
+                fields=["operacao", "-timestamp"], name="activity_operacao_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="useractivitylog",
+            index=models.Index(
+                fields=["email", "-timestamp"], name="activity_email_ts_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="auditdailyrollup",
+            constraint=models.UniqueConstraint(
+                fields=("data", "modulo", "operacao", "resultado"),
+                name="uniq_audit_rollup_dia",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0033_auditarchive_auditdailyrollup_logindailyrollup_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="risk",
+            index=models.Index(
+                fields=["-pontuacao", "-criado_em", "id"], name="risk_ranking_idx"
+            ),
+        ),
+    ]
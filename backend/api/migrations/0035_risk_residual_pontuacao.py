@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+def preencher_residual(apps, schema_editor):
+    # mesma regra de api.models.residual_score (copiada: migrações não usam o modelo atual)
+    Risk = apps.get_model("api", "Risk")
+    ControlEffectivenessItem = apps.get_model("api", "ControlEffectivenessItem")
+
+    Risk.objects.filter(eficacia__isnull=True).update(
+        residual_pontuacao=models.F("pontuacao")
+    )
+    pontuacoes = list(
+        Risk.objects.order_by().values_list("pontuacao", flat=True).distinct()
+    )
+    for item in ControlEffectivenessItem.objects.all():
+        avg = (item.reduction_min + item.reduction_max) / 2.0
+        for p in pontuacoes:
+            Risk.objects.filter(eficacia=item, pontuacao=p).update(
+                residual_pontuacao=int(round(p * (1 - (avg / 100.0))))
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0034_risk_risk_ranking_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="risk",
+            name="residual_pontuacao",
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(preencher_residual, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:46
+
+import operator
+from functools import reduce
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+# mesmos campos/pesos de api.fulltext.CAMPOS_INDEXADOS (copiados: migrações
+# não usam o modelo atual)
+CAMPOS = {
+    "inventariodados": {
+        "processo_negocio": "A",
+        "setor": "A",
+        "finalidade": "B",
+        "dados_pessoais": "B",
+        "unidade": "C",
+        "responsavel_email": "C",
+        "titulares": "C",
+        "base_legal": "D",
+    },
+    "risk": {
+        "risco_fator": "A",
+        "processo": "B",
+        "setor": "B",
+        "matriz_filial": "C",
+        "medidas_controle": "D",
+        "resposta_risco": "D",
+    },
+    "actionplan": {
+        "como": "A",
+        "responsavel_execucao": "B",
+        "risco__risco_fator": "C",
+    },
+    "incident": {
+        "descricao": "A",
+        "fonte": "B",
+        "responsavel_analise": "B",
+        "acao_recomendada": "C",
+        "decisoes_resolucao": "C",
+    },
+}
+
+
+def indexar_postgres(apps, schema_editor):
+    # índice GIN + carga inicial só no PostgreSQL; nos demais bancos o índice
+    # local é montado por: python manage.py rebuild_search_index
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for nome, campos in CAMPOS.items():
+        Model = apps.get_model("api", nome)
+        tabela = Model._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {tabela}_search_gin "
+            f"ON {tabela} USING gin (search_vector)"
+        )
+        partes = []
+        for caminho, peso in campos.items():
+            if "__" in caminho:
+                fk, campo = caminho.split("__", 1)
+                rel = Model._meta.get_field(fk).related_model
+                expr = models.Subquery(
+                    rel.objects.filter(pk=models.OuterRef(fk))
+                    .order_by()
+                    .values(campo)[:1]
+                )
+            else:
+                expr = models.F(caminho)
+            partes.append(
+                SearchVector(expr, weight=peso, config=settings.FULLTEXT_CONFIG)
+            )
+        Model.objects.update(search_vector=reduce(operator.add, partes))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0035_risk_residual_pontuacao"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="actionplan",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="incident",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="inventariodados",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="risk",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("modelo", models.CharField(max_length=40)),
+                ("objeto_id", models.PositiveBigIntegerField()),
+                ("termo", models.CharField(max_length=40)),
+                ("peso", models.PositiveSmallIntegerField()),
+            ],
+            options={
+                "verbose_name": "Termo de busca",
+                "verbose_name_plural": "Termos de busca",
+                "indexes": [
+                    models.Index(
+                        fields=["modelo", "termo"], name="api_searcht_modelo_b171a0_idx"
+                    ),
+                    models.Index(
+                        fields=["modelo", "objeto_id"],
+                        name="api_searcht_modelo_0deaa0_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(indexar_postgres, migrations.RunPython.noop),
+    ]
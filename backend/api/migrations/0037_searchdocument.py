@@ -0,0 +1,198 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:53
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+# mesmas fontes de api.global_search.FONTES (copiadas: migrações não usam o
+# modelo atual): tipo -> (modelo, título, resumo, conteúdo, setor, dono)
+FONTES = {
+    "inventario": (
+        "inventariodados",
+        "processo_negocio",
+        ("finalidade",),
+        (
+            "setor",
+            "unidade",
+            "responsavel_email",
+            "dados_pessoais",
+            "titulares",
+            "base_legal",
+        ),
+        "setor",
+        "criado_por",
+    ),
+    "risco": (
+        "risk",
+        "risco_fator",
+        ("setor", "processo"),
+        ("matriz_filial", "medidas_controle", "resposta_risco"),
+        "setor",
+        None,
+    ),
+    "plano_acao": (
+        "actionplan",
+        "como",
+        ("risco__risco_fator",),
+        ("responsavel_execucao", "risco__setor", "risco__processo"),
+        "risco__setor",
+        None,
+    ),
+    "documento": (
+        "documentoslgpd",
+        "atividade",
+        ("base_legal",),
+        ("evidencia", "comentarios"),
+        None,
+        "criado_por",
+    ),
+    "incidente": (
+        "incident",
+        "descricao",
+        ("fonte", "responsavel_analise"),
+        ("acao_recomendada", "recomendacoes_reportadas", "decisoes_resolucao"),
+        None,
+        None,
+    ),
+    "monitoramento": (
+        "monitoringaction",
+        "framework_requisito",
+        ("escopo",),
+        ("criterio_avaliacao", "responsavel", "deficiencias", "corretivas"),
+        None,
+        None,
+    ),
+}
+
+
+def _valor(obj, caminho):
+    for parte in caminho.split("__"):
+        obj = getattr(obj, parte, None)
+        if obj is None:
+            return ""
+    return str(obj).strip()
+
+
+def indexar_postgres(apps, schema_editor):
+    # índice GIN + carga inicial só no PostgreSQL; nos demais bancos os
+    # documentos são montados por: python manage.py rebuild_search_index
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    SearchDocument = apps.get_model("api", "SearchDocument")
+    tabela = SearchDocument._meta.db_table
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {tabela}_search_gin "
+        f"ON {tabela} USING gin (search_vector)"
+    )
+
+    for tipo, (nome, titulo, resumo, conteudo, setor, dono) in FONTES.items():
+        Model = apps.get_model("api", nome)
+        qs = Model.objects.all()
+        if nome == "actionplan":
+            qs = qs.select_related("risco")
+        docs = []
+        for obj in qs.iterator(chunk_size=500):
+            texto_resumo = " · ".join(filter(None, (_valor(obj, c) for c in resumo)))
+            docs.append(
+                SearchDocument(
+                    tipo=tipo,
+                    objeto_id=obj.pk,
+                    titulo=(
+                        _valor(obj, titulo) or f"{Model._meta.verbose_name} #{obj.pk}"
+                    )[:255],
+                    resumo=texto_resumo[:300],
+                    conteudo="\n".join(
+                        filter(
+                            None, [texto_resumo] + [_valor(obj, c) for c in conteudo]
+                        )
+                    ),
+                    setor=_valor(obj, setor)[:120] if setor else "",
+                    dono_id=getattr(obj, f"{dono}_id", None) if dono else None,
+                )
+            )
+        SearchDocument.objects.bulk_create(docs, batch_size=500)
+
+    config = settings.FULLTEXT_CONFIG
+    SearchDocument.objects.update(
+        search_vector=SearchVector("titulo", weight="A", config=config)
+        + SearchVector("resumo", weight="B", config=config)
+        + SearchVector("conteudo", weight="C", config=config)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0036_fulltext_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("inventario", "Inventário de Dados"),
+                            ("risco", "Risco"),
+                            ("plano_acao", "Plano de Ação"),
+                            ("documento", "Documento LGPD"),
+                            ("incidente", "Incidente"),
+                            ("monitoramento", "Ação de Monitoramento"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("objeto_id", models.PositiveBigIntegerField()),
+                ("titulo", models.CharField(max_length=255)),
+                ("resumo", models.CharField(blank=True, max_length=300)),
+                ("conteudo", models.TextField(blank=True)),
+                ("setor", models.CharField(blank=True, max_length=120)),
+                ("atualizado_em", models.DateTimeField(auto_now=True)),
+                (
+                    "search_vector",
+                    django.contrib.postgres.search.SearchVectorField(
+                        editable=False, null=True
+                    ),
+                ),
+                (
+                    "dono",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Documento da busca global",
+                "verbose_name_plural": "Documentos da busca global",
+                "indexes": [
+                    models.Index(
+                        fields=["tipo", "dono"], name="api_searchd_tipo_dff158_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("tipo", "objeto_id"),
+                        name="uniq_search_document_tipo_objeto",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(indexar_postgres, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:03
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# mesmo split de api.action_items (copiado: migrações não usam o código atual)
+SPLIT_RE = re.compile(r"[\n;,•\u2022]+")
+
+
+def _dividir(texto):
+    if not texto:
+        return []
+    return [
+        t.strip() for t in SPLIT_RE.split(texto) if t and t.strip() and t.strip() != "-"
+    ]
+
+
+def carregar_acoes(apps, schema_editor):
+    Risk = apps.get_model("api", "Risk")
+    ActionPlan = apps.get_model("api", "ActionPlan")
+    RiskActionItem = apps.get_model("api", "RiskActionItem")
+
+    por_id, por_ordem = {}, {}
+    planos = ActionPlan.objects.values_list("pk", "risco_id")
+    for pk, risco_id in planos.order_by("risco_id", "id"):
+        por_id.setdefault(risco_id, []).append(pk)
+    for pk, risco_id in planos.order_by("ordem_manual", "prazo", "id"):
+        por_ordem.setdefault(risco_id, []).append(pk)
+
+    novos = []
+    for risco_id, texto in Risk.objects.values_list("pk", "resposta_risco"):
+        pid, pordem = por_id.get(risco_id, []), por_ordem.get(risco_id, [])
+        for i, acao in enumerate(_dividir(texto)):
+            novos.append(
+                RiskActionItem(
+                    risco_id=risco_id,
+                    posicao=i,
+                    texto=acao,
+                    plano_id=pid[i] if i < len(pid) else None,
+                    plano_cronograma_id=pordem[i] if i < len(pordem) else None,
+                )
+            )
+    RiskActionItem.objects.bulk_create(novos, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0037_searchdocument"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RiskActionItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("posicao", models.PositiveSmallIntegerField()),
+                ("texto", models.TextField()),
+                (
+                    "plano",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="api.actionplan",
+                    ),
+                ),
+                (
+                    "plano_cronograma",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="api.actionplan",
+                    ),
+                ),
+                (
+                    "risco",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="acoes_itens",
+                        to="api.risk",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ação do risco",
+                "verbose_name_plural": "Ações dos riscos",
+                "ordering": ["risco", "posicao"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("risco", "posicao"),
+                        name="uniq_risk_action_item_posicao",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(carregar_acoes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0038_riskactionitem"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="loginactivity",
+            index=models.Index(fields=["-data_login", "-id"], name="login_data_id_idx"),
+        ),
+        migrations.RemoveIndex(
+            model_name="loginactivity",
+            name="login_data_idx",
+        ),
+    ]
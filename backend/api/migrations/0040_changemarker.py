@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0039_loginactivity_feed_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeMarker",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("modelo", models.CharField(max_length=100, unique=True)),
+                ("alterado_em", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Marca de alteração",
+                "verbose_name_plural": "Marcas de alteração",
+                "ordering": ["modelo"],
+            },
+        ),
+    ]
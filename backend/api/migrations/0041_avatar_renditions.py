@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:31
+
+import hashlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def preencher_avatar_hash(apps, schema_editor):
+    # só o hash (versão das URLs); as miniaturas saem no primeiro acesso
+    # ou em python manage.py rebuild_avatar_renditions
+    User = apps.get_model("api", "User")
+    com_avatar = User.objects.exclude(avatar_data=None).only("pk", "avatar_data")
+    for user in com_avatar.iterator(chunk_size=50):
+        dados = bytes(user.avatar_data)
+        if dados:
+            User.objects.filter(pk=user.pk).update(
+                avatar_hash=hashlib.sha256(dados).hexdigest()
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0040_changemarker"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="avatar_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.CreateModel(
+            name="AvatarRendition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tamanho", models.PositiveSmallIntegerField()),
+                ("origem", models.CharField(max_length=64)),
+                ("sha256", models.CharField(max_length=64)),
+                ("mime", models.CharField(default="image/jpeg", max_length=50)),
+                ("dados", models.BinaryField()),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="avatar_renditions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Miniatura de avatar",
+                "verbose_name_plural": "Miniaturas de avatar",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("usuario", "tamanho"),
+                        name="uniq_avatar_rendition_tamanho",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(preencher_avatar_hash, migrations.RunPython.noop),
+    ]
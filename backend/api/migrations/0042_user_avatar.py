@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:35
+
+import hashlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mover_para_user_avatar(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    UserAvatar = apps.get_model("api", "UserAvatar")
+    com_avatar = User.objects.exclude(avatar_data=None).only(
+        "pk", "avatar_data", "avatar_mime", "avatar_hash"
+    )
+    for user in com_avatar.iterator(chunk_size=50):
+        dados = bytes(user.avatar_data)
+        if not dados:
+            continue
+        sha = hashlib.sha256(dados).hexdigest()
+        UserAvatar.objects.update_or_create(
+            usuario_id=user.pk,
+            defaults={"dados": dados, "mime": user.avatar_mime or "", "sha256": sha},
+        )
+        if user.avatar_hash != sha:
+            User.objects.filter(pk=user.pk).update(avatar_hash=sha)
+
+
+def voltar_para_user(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    UserAvatar = apps.get_model("api", "UserAvatar")
+    for avatar in UserAvatar.objects.iterator(chunk_size=50):
+        User.objects.filter(pk=avatar.usuario_id).update(
+            avatar_data=avatar.dados, avatar_mime=avatar.mime or None
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0041_avatar_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserAvatar",
+            fields=[
+                (
+                    "usuario",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="avatar_original",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("dados", models.BinaryField()),
+                ("mime", models.CharField(blank=True, default="", max_length=50)),
+                ("sha256", models.CharField(max_length=64)),
+                ("atualizado_em", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Avatar",
+                "verbose_name_plural": "Avatares",
+            },
+        ),
+        migrations.RunPython(mover_para_user_avatar, voltar_para_user),
+        migrations.RemoveField(
+            model_name="user",
+            name="avatar_data",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="avatar_mime",
+        ),
+    ]
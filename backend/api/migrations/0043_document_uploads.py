@@ -0,0 +1,106 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:46
+
+import hashlib
+import os
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def preencher_arquivo(apps, schema_editor):
+    # nome e sha256 dos arquivos já enviados (base da deduplicação)
+    DocumentosLGPD = apps.get_model("api", "DocumentosLGPD")
+    com_arquivo = DocumentosLGPD.objects.exclude(arquivo="").exclude(arquivo=None)
+    for doc in com_arquivo.only("pk", "arquivo").iterator(chunk_size=100):
+        h = hashlib.sha256()
+        try:
+            with doc.arquivo.open("rb") as f:
+                for bloco in iter(lambda: f.read(64 * 1024), b""):
+                    h.update(bloco)
+        except OSError:
+            continue  # arquivo sumiu do disco: fica sem hash
+        DocumentosLGPD.objects.filter(pk=doc.pk).update(
+            arquivo_nome=os.path.basename(doc.arquivo.name)[:255],
+            arquivo_sha256=h.hexdigest(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0042_user_avatar"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentoslgpd",
+            name="arquivo_nome",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="documentoslgpd",
+            name="arquivo_sha256",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=64
+            ),
+        ),
+        migrations.CreateModel(
+            name="DocumentUpload",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("nome_arquivo", models.CharField(max_length=255)),
+                ("tamanho", models.PositiveBigIntegerField()),
+                ("recebido", models.PositiveBigIntegerField(default=0)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("aberto", "Aberto"), ("concluido", "Concluído")],
+                        default="aberto",
+                        max_length=20,
+                    ),
+                ),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                ("atualizado_em", models.DateTimeField(auto_now=True)),
+                ("expira_em", models.DateTimeField()),
+                (
+                    "documento",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="uploads",
+                        to="api.documentoslgpd",
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="document_uploads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Upload em partes",
+                "verbose_name_plural": "Uploads em partes",
+                "ordering": ["-criado_em"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "expira_em"],
+                        name="api_documen_status_31b39a_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(preencher_arquivo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:52
+
+import hashlib
+import os
+
+import api.models
+import api.storage
+import django.db.models.deletion
+from django.core.files import File
+from django.db import migrations, models
+
+
+def mover_para_blobs(apps, schema_editor):
+    # anexos existentes passam para o storage por conteúdo (um arquivo por
+    # sha256); os originais em documentos/ ficam para o gc_document_blobs
+    DocumentosLGPD = apps.get_model("api", "DocumentosLGPD")
+    DocumentBlob = apps.get_model("api", "DocumentBlob")
+    storage = api.storage.documentos_storage()
+    com_arquivo = DocumentosLGPD.objects.exclude(arquivo="").exclude(arquivo=None)
+    for doc in com_arquivo.iterator(chunk_size=100):
+        antigo = doc.arquivo.name
+        if antigo.startswith(f"{api.storage.PREFIXO}/"):
+            continue
+        try:
+            h = hashlib.sha256()
+            with storage.open(antigo, "rb") as f:
+                for bloco in iter(lambda: f.read(64 * 1024), b""):
+                    h.update(bloco)
+            sha256 = h.hexdigest()
+            nome = api.storage.caminho_blob(sha256)
+            with storage.open(antigo, "rb") as f:
+                storage.save(nome, File(f))
+            tamanho = storage.size(nome)
+        except OSError:
+            continue  # arquivo sumiu do disco: fica como está
+        DocumentBlob.objects.get_or_create(
+            sha256=sha256, defaults={"arquivo": nome, "tamanho": tamanho}
+        )
+        DocumentosLGPD.objects.filter(pk=doc.pk).update(
+            arquivo=nome,
+            blob_id=sha256,
+            arquivo_sha256=sha256,
+            arquivo_nome=doc.arquivo_nome or os.path.basename(antigo)[:255],
+        )
+    for blob in DocumentBlob.objects.all():
+        blob.referencias = DocumentosLGPD.objects.filter(blob=blob).count()
+        blob.save(update_fields=["referencias"])
+
+
+def voltar_para_documentos(apps, schema_editor):
+    # uma cópia por documento, com o nome enviado (como antes)
+    DocumentosLGPD = apps.get_model("api", "DocumentosLGPD")
+    storage = api.storage.documentos_storage()
+    for doc in DocumentosLGPD.objects.exclude(blob=None).iterator(chunk_size=100):
+        nome = doc.arquivo_nome or doc.blob_id
+        destino = doc.created_at.strftime("documentos/%Y/%m/") + nome
+        try:
+            with storage.open(doc.arquivo.name, "rb") as f:
+                destino = storage.save(destino, File(f))
+        except OSError:
+            continue
+        DocumentosLGPD.objects.filter(pk=doc.pk).update(arquivo=destino, blob=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0043_document_uploads"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="documentoslgpd",
+            name="arquivo",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=api.storage.documentos_storage,
+                upload_to=api.models.documento_upload_to,
+            ),
+        ),
+        migrations.CreateModel(
+            name="DocumentBlob",
+            fields=[
+                (
+                    "sha256",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("arquivo", models.CharField(max_length=100)),
+                ("tamanho", models.PositiveBigIntegerField(default=0)),
+                ("referencias", models.PositiveIntegerField(default=0)),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                ("atualizado_em", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Conteúdo de documento",
+                "verbose_name_plural": "Conteúdos de documentos",
+                "indexes": [
+                    models.Index(
+                        fields=["referencias", "atualizado_em"],
+                        name="api_documen_referen_b8ea56_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="documentoslgpd",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="documentos",
+                to="api.documentblob",
+            ),
+        ),
+        migrations.RunPython(mover_para_blobs, voltar_para_documentos),
+    ]
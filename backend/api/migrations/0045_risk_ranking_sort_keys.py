@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:10
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def preencher_valores(apps, schema_editor):
+    # valores atuais de probabilidade/impacto (chaves do ranking)
+    Risk = apps.get_model("api", "Risk")
+    LikelihoodItem = apps.get_model("api", "LikelihoodItem")
+    ImpactItem = apps.get_model("api", "ImpactItem")
+    Risk.objects.update(
+        probabilidade_valor=Subquery(
+            LikelihoodItem.objects.filter(pk=OuterRef("probabilidade_id")).values(
+                "value"
+            )[:1]
+        ),
+        impacto_valor=Subquery(
+            ImpactItem.objects.filter(pk=OuterRef("impacto_id")).values("value")[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0044_document_blobs"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="risk",
+            name="risk_ranking_idx",
+        ),
+        migrations.AddField(
+            model_name="risk",
+            name="impacto_valor",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="risk",
+            name="probabilidade_valor",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="risk",
+            index=models.Index(
+                fields=[
+                    "-pontuacao",
+                    "-impacto_valor",
+                    "-probabilidade_valor",
+                    "-criado_em",
+                    "id",
+                ],
+                name="risk_ranking_idx",
+            ),
+        ),
+        migrations.RunPython(preencher_valores, migrations.RunPython.noop),
+    ]
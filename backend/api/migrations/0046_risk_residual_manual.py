@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:38
+
+from django.db import migrations, models
+from django.db.models import Case, CharField, F, Value, When
+
+# nome da faixa -> nível (api.risk_params.NIVEL_POR_FAIXA, só as choices)
+NIVEIS = {
+    "baixo": "baixo",
+    "médio": "medio",
+    "medio": "medio",
+    "alto": "alto",
+}
+
+
+def marcar_manuais(apps, schema_editor):
+    # nível diferente do deduzido pelas faixas atuais: foi escolhido pelo usuário
+    Risk = apps.get_model("api", "Risk")
+    RiskLevelBand = apps.get_model("api", "RiskLevelBand")
+    whens = [
+        When(
+            pontuacao__gte=faixa.min_score,
+            pontuacao__lte=faixa.max_score,
+            then=Value(NIVEIS.get(faixa.name.strip().lower(), "")),
+        )
+        for faixa in RiskLevelBand.objects.order_by("min_score")
+    ]
+    derivado = Case(*whens, default=Value(""), output_field=CharField())
+    Risk.objects.exclude(risco_residual="").annotate(_nivel=derivado).exclude(
+        risco_residual=F("_nivel")
+    ).update(risco_residual_manual=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0045_risk_ranking_sort_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="risk",
+            name="risco_residual_manual",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(marcar_manuais, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,14 @@
 import uuid, os
 import datetime
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from .storage import caminho_blob, documentos_storage
+
 
 class CustomUserManager(BaseUserManager):
     use_in_migrations = True
@@ -42,6 +45,18 @@ def avatar_upload_to(instance, filename):
     return f"avatars/{uuid.uuid4().hex}{ext}"
 
 
+def export_upload_to(instance, filename):
+    # diretório aleatório por job: o nome do arquivo fica legível e a URL não é previsível
+    return f"exports/{uuid.uuid4().hex}/{filename}"
+
+
+def documento_upload_to(instance, filename):
+    # endereçado pelo conteúdo (sha256 preenchido no pre_save, api/document_uploads.py)
+    if instance.arquivo_sha256:
+        return caminho_blob(instance.arquivo_sha256)
+    return timezone.now().strftime("documentos/%Y/%m/") + filename
+
+
 class User(AbstractUser):
     """
     Modelo de usuário personalizado para o sistema LGPD.
@@ -64,8 +79,9 @@ class User(AbstractUser):
     )
     avatar = models.ImageField(upload_to=avatar_upload_to, null=True, blank=True)
 
-    avatar_data = models.BinaryField(null=True, blank=True)
-    avatar_mime = models.CharField(max_length=50, null=True, blank=True)
+    # sha256 do avatar original: versão nas URLs das miniaturas (api/avatars.py).
+    # Os bytes ficam em UserAvatar / AvatarRendition, fora desta tabela.
+    avatar_hash = models.CharField(max_length=64, blank=True, default="")
 
     # Campo para definir o papel do usuário (Admin, DPO, Gerente)
     USER_ROLES = (
@@ -220,6 +236,9 @@ class InventarioDados(models.Model):
         blank=True, null=True
     )  # único opcional no front; aqui também opcional no BD
 
+    # busca textual (api/fulltext.py): tsvector com índice GIN no PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Inventário de Dados"
         verbose_name_plural = "Inventários de Dados"
@@ -277,6 +296,20 @@ class ControlEffectivenessItem(models.Model):
         return f"{self.value} - {self.label_pt} ({self.reduction_min}-{self.reduction_max}%)"
 
 
+def residual_score(pontuacao, eficacia):
+    """
+    Pontuação residual estimada: inerente reduzida pela média da faixa
+    de redução da eficácia do controle. Sem eficácia, igual à inerente.
+    """
+    if eficacia is None:
+        return pontuacao
+    try:
+        avg = (eficacia.reduction_min + eficacia.reduction_max) / 2.0
+        return int(round(pontuacao * (1 - (avg / 100.0))))
+    except Exception:
+        return pontuacao
+
+
 class RiskLevelBand(models.Model):
     name = models.CharField(max_length=40)  # Baixo/Médio/Alto/Crítico
     color = models.CharField(max_length=7)  # "#C00000"
@@ -312,6 +345,12 @@ class Risk(models.Model):
     pontuacao = models.IntegerField(
         editable=False, default=0
     )  # prob * impacto (calculado)
+    # valores de probabilidade/impacto copiados dos itens (ordem do ranking
+    # sem join: o índice risk_ranking_idx cobre a ordenação inteira)
+    probabilidade_valor = models.IntegerField(editable=False, default=0)
+    impacto_valor = models.IntegerField(editable=False, default=0)
+    # pontuação após a eficácia do controle (calculada; ver residual_score)
+    residual_pontuacao = models.IntegerField(editable=False, default=0, db_index=True)
     medidas_controle = models.TextField(blank=True)
     tipo_controle = models.CharField(
         max_length=1, choices=[("C", "Preventivo"), ("D", "Detectivo")], blank=True
@@ -324,53 +363,89 @@ class Risk(models.Model):
         choices=[("baixo", "Baixo"), ("medio", "Médio"), ("alto", "Alto")],
         blank=True,
     )
+    # nível escolhido pelo usuário (RiskSerializer); senão acompanha as faixas
+    risco_residual_manual = models.BooleanField(default=False, editable=False)
     resposta_risco = models.TextField(blank=True)  # plano de ação
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
+    # busca textual (api/fulltext.py): tsvector com índice GIN no PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ["-criado_em"]
         verbose_name = "Risco"
         verbose_name_plural = "Riscos"
+        indexes = [
+            # ranking (pontuação, impacto, probabilidade, mais recente, id) —
+            # mesma ordem da paginação por cursor e das exportações
+            models.Index(
+                fields=[
+                    "-pontuacao",
+                    "-impacto_valor",
+                    "-probabilidade_valor",
+                    "-criado_em",
+                    "id",
+                ],
+                name="risk_ranking_idx",
+            ),
+        ]
 
     def __str__(self):
         # Mostra o texto do risco e o ID (ajuda na identificação)
         base = (self.risco_fator or "").strip()
         return f"{base} (#{self.pk})" if self.pk else base
 
-    def save(self, *args, **kwargs):
-        # calcula a pontuação inerente toda vez que salvar
+    def calcular_pontuacoes(self, params=None):
+        """
+        Pontuação inerente, residual e (se não for manual) o nível pelas faixas.
+        Usa a parametrização em memória; gravações em lote passam o snapshot.
+        """
+        if params is None:
+            from .risk_params import risk_params
+
+            params = risk_params()
+
         try:
-            p = int(self.probabilidade.value)
-            i = int(self.impacto.value)
-            self.pontuacao = p * i
+            prob = params.likelihood.get(self.probabilidade_id) or self.probabilidade
+            imp = params.impact.get(self.impacto_id) or self.impacto
+            self.probabilidade_valor = int(prob.value)
+            self.impacto_valor = int(imp.value)
+            self.pontuacao = self.probabilidade_valor * self.impacto_valor
         except Exception:
             # em caso de criação incompleta (FKs ainda não setadas)
             self.pontuacao = self.pontuacao or 0
 
-        # se o residual não foi informado, tenta deduzir pelas faixas
-        if not self.risco_residual:
-            try:
-                from .models import (
-                    RiskLevelBand,
-                )  # import local para evitar ordem de import
-
-                band = RiskLevelBand.objects.filter(
-                    min_score__lte=self.pontuacao, max_score__gte=self.pontuacao
-                ).first()
-                if band:
-                    nome = band.name.strip().lower()
-                    mapa = {
-                        "baixo": "baixo",
-                        "médio": "medio",
-                        "medio": "medio",
-                        "alto": "alto",
-                        "crítico": "critico",
-                        "critico": "critico",
-                    }
-                    self.risco_residual = mapa.get(nome, self.risco_residual)
-            except Exception:
-                pass
+        eficacia = None
+        if self.eficacia_id:
+            eficacia = params.effectiveness.get(self.eficacia_id) or self.eficacia
+        self.residual_pontuacao = residual_score(self.pontuacao, eficacia)
+
+        # nível não escolhido pelo usuário: o das faixas (sem faixa ou nível
+        # válido, fica como está)
+        if not self.risco_residual_manual:
+            self.risco_residual = (
+                params.nivel_residual(self.pontuacao) or self.risco_residual
+            )
+
+    def save(self, *args, **kwargs):
+        # calcula as pontuações toda vez que salvar
+        self.calcular_pontuacoes()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {
+            "pontuacao",
+            "eficacia",
+            "probabilidade",
+            "impacto",
+        }.intersection(update_fields):
+            kwargs["update_fields"] = {
+                *update_fields,
+                "residual_pontuacao",
+                "probabilidade_valor",
+                "impacto_valor",
+                "risco_residual",
+            }
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -426,6 +501,9 @@ class ActionPlan(models.Model):
         help_text="Define a ordem manual de exibição/prioridade dentro do risco.",
     )
 
+    # busca textual (api/fulltext.py): tsvector com índice GIN no PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Plano de Ação"
         verbose_name_plural = "Planos de Ação"
@@ -479,6 +557,50 @@ class ActionPlan(models.Model):
         super().save(*args, **kwargs)
 
 
+class RiskActionItem(models.Model):
+    """
+    Cada ação de Risk.resposta_risco (texto dividido por linha, ";", "," ou
+    marcador), na ordem do texto, com o plano de ação pareado pela posição.
+    Mantido por api/action_items.py a cada save de Risk/ActionPlan; alimenta
+    os blocos de ações do Dashboard com consultas agrupadas.
+    """
+
+    risco = models.ForeignKey(
+        "Risk", on_delete=models.CASCADE, related_name="acoes_itens"
+    )
+    posicao = models.PositiveSmallIntegerField()
+    texto = models.TextField()
+    # n-ésimo plano do risco por id ("Status das Ações")
+    plano = models.ForeignKey(
+        "ActionPlan",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    # n-ésimo plano do risco na ordenação padrão ("Timeline")
+    plano_cronograma = models.ForeignKey(
+        "ActionPlan",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+
+    class Meta:
+        verbose_name = "Ação do risco"
+        verbose_name_plural = "Ações dos riscos"
+        ordering = ["risco", "posicao"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["risco", "posicao"], name="uniq_risk_action_item_posicao"
+            )
+        ]
+
+    def __str__(self):
+        return f"Risco #{self.risco_id} · ação {self.posicao + 1}"
+
+
 class MonitoringAction(models.Model):
     framework_requisito = models.CharField(max_length=200)
     escopo = models.TextField()
@@ -513,6 +635,9 @@ class Incident(models.Model):
     data_encerramento = models.DateField(null=True, blank=True)
     fonte_informada = models.BooleanField(default=False)
 
+    # busca textual (api/fulltext.py): tsvector com índice GIN no PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Incidente"
         verbose_name_plural = "Incidentes"
@@ -560,7 +685,26 @@ class DocumentosLGPD(models.Model):
         max_length=2, choices=Status.choices, default=Status.NAO_INICIADO
     )
 
-    arquivo = models.FileField(upload_to="documentos/%Y/%m/", null=True, blank=True)
+    arquivo = models.FileField(
+        upload_to=documento_upload_to,
+        storage=documentos_storage,
+        null=True,
+        blank=True,
+    )
+    # conteúdo compartilhado (refcount); arquivo.name == blob.arquivo
+    blob = models.ForeignKey(
+        "DocumentBlob",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="documentos",
+    )
+    # nome enviado (o arquivo em disco pode ser compartilhado com outro documento)
+    arquivo_nome = models.CharField(max_length=255, blank=True, default="")
+    # sha256 do conteúdo: deduplicação dos envios (api/document_uploads.py)
+    arquivo_sha256 = models.CharField(
+        max_length=64, blank=True, default="", db_index=True
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -640,6 +784,11 @@ class LoginActivity(models.Model):
         ordering = ["-data_login"]
         verbose_name = "Atividade de Login"
         verbose_name_plural = "Atividades de Login"
+        indexes = [
+            # feed dos últimos acessos: keyset por (data_login, id) decrescente
+            models.Index(fields=["-data_login", "-id"], name="login_data_id_idx"),
+            models.Index(fields=["email", "-data_login"], name="login_email_data_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         # sempre salva o e-mail do usuário
@@ -711,13 +860,24 @@ class UserActivityLog(models.Model):
     # IP de origem
     ip = models.GenericIPAddressField(null=True, blank=True)
 
-    # data e hora da ação
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # data e hora da ação (preenchida no momento do evento, mesmo com gravação em lote)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["-timestamp"]
         verbose_name = "Log de Atividade de Usuário"
         verbose_name_plural = "Logs de Atividades de Usuários"
+        # a listagem de auditoria ordena por timestamp e filtra por estes campos
+        indexes = [
+            models.Index(fields=["-timestamp"], name="activity_ts_idx"),
+            models.Index(
+                fields=["modulo", "-timestamp"], name="activity_modulo_ts_idx"
+            ),
+            models.Index(
+                fields=["operacao", "-timestamp"], name="activity_operacao_ts_idx"
+            ),
+            models.Index(fields=["email", "-timestamp"], name="activity_email_ts_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if self.usuario and not self.email:
@@ -726,3 +886,384 @@ class UserActivityLog(models.Model):
 
     def __str__(self):
         return f"{self.timestamp:%Y-%m-%d %H:%M} — {self.modulo} — {self.operacao}"
+
+
+class AuditDailyRollup(models.Model):
+    """
+    Totais diários de UserActivityLog por módulo/operação/resultado.
+    Mantido por `manage.py rollup_audit_logs`; continua valendo depois que
+    as linhas originais são arquivadas.
+    """
+
+    data = models.DateField()
+    modulo = models.CharField(max_length=100)
+    operacao = models.CharField(max_length=20)
+    resultado = models.CharField(max_length=20)
+    total = models.PositiveIntegerField(default=0)
+    usuarios_distintos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-data", "modulo", "operacao"]
+        verbose_name = "Resumo diário de auditoria"
+        verbose_name_plural = "Resumos diários de auditoria"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["data", "modulo", "operacao", "resultado"],
+                name="uniq_audit_rollup_dia",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.data} — {self.modulo}/{self.operacao}: {self.total}"
+
+
+class LoginDailyRollup(models.Model):
+    """Totais diários de LoginActivity (logins e usuários distintos)."""
+
+    data = models.DateField(unique=True)
+    total = models.PositiveIntegerField(default=0)
+    usuarios_distintos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-data"]
+        verbose_name = "Resumo diário de logins"
+        verbose_name_plural = "Resumos diários de logins"
+
+    def __str__(self):
+        return f"{self.data} — {self.total} login(s)"
+
+
+class AuditArchive(models.Model):
+    """
+    Catálogo dos arquivos .jsonl.gz gerados por `manage.py archive_audit_logs`.
+    Cada arquivo guarda as linhas de um mês que saíram da tabela original.
+    """
+
+    TABELA_CHOICES = [
+        ("useractivitylog", "Log de Atividade de Usuário"),
+        ("loginactivity", "Atividade de Login"),
+    ]
+
+    tabela = models.CharField(max_length=30, choices=TABELA_CHOICES)
+    mes = models.DateField(help_text="Primeiro dia do mês arquivado")
+    arquivo = models.CharField(max_length=255)
+    linhas = models.PositiveIntegerField(default=0)
+    primeiro_registro = models.DateTimeField(null=True, blank=True)
+    ultimo_registro = models.DateTimeField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-mes", "tabela"]
+        verbose_name = "Arquivo de auditoria"
+        verbose_name_plural = "Arquivos de auditoria"
+
+    def __str__(self):
+        return f"{self.tabela} {self.mes:%Y-%m} ({self.linhas} linhas)"
+
+
+class DashboardSnapshot(models.Model):
+    """
+    Seção pré-calculada do payload do Dashboard.
+    Uma linha por (data de referência, seção); 'versao' é incrementada a cada
+    invalidação para que um recálculo concorrente não sobrescreva dados novos.
+    """
+
+    data_referencia = models.DateField()
+    secao = models.CharField(max_length=40)
+    payload = models.JSONField(default=dict)
+    versao = models.PositiveIntegerField(default=0)
+    pendente = models.BooleanField(default=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-data_referencia", "secao"]
+        verbose_name = "Snapshot do Dashboard"
+        verbose_name_plural = "Snapshots do Dashboard"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["data_referencia", "secao"],
+                name="uniq_dashboard_snapshot_data_secao",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.data_referencia} — {self.secao} (v{self.versao})"
+
+
+class ExportJob(models.Model):
+    """
+    Exportação processada em segundo plano (fila no próprio banco).
+    Criada via POST /exportacoes/ e renderizada pelo comando process_export_jobs.
+    """
+
+    TIPO_CHOICES = [
+        ("inventario_csv", "Inventário (CSV)"),
+        ("inventario_xlsx", "Inventário (XLSX)"),
+        ("inventario_pdf", "Inventário (PDF)"),
+        ("ranking_csv", "Ranking de Riscos (CSV)"),
+        ("ranking_xlsx", "Ranking de Riscos (XLSX)"),
+        ("ranking_pdf", "Ranking de Riscos (PDF)"),
+        ("heatmap_csv", "Heatmap de Riscos (CSV)"),
+    ]
+
+    STATUS_PENDENTE = "pendente"
+    STATUS_PROCESSANDO = "processando"
+    STATUS_CONCLUIDO = "concluido"
+    STATUS_ERRO = "erro"
+    STATUS_EXPIRADO = "expirado"
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, "Pendente"),
+        (STATUS_PROCESSANDO, "Processando"),
+        (STATUS_CONCLUIDO, "Concluído"),
+        (STATUS_ERRO, "Erro"),
+        (STATUS_EXPIRADO, "Expirado"),
+    ]
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="export_jobs",
+    )
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES)
+    # filtros/busca/ordenação repassados ao endpoint original (query params)
+    parametros = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDENTE
+    )
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True)
+
+    arquivo = models.FileField(upload_to=export_upload_to, null=True, blank=True)
+    nome_arquivo = models.CharField(max_length=255, blank=True)
+    mime = models.CharField(max_length=100, blank=True)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+    expira_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-criado_em"]
+        verbose_name = "Exportação em segundo plano"
+        verbose_name_plural = "Exportações em segundo plano"
+        indexes = [
+            models.Index(fields=["status", "criado_em"]),
+            models.Index(fields=["usuario", "criado_em"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} — {self.status} (#{self.pk})"
+
+
+class SearchDocument(models.Model):
+    """
+    Índice unificado da busca global (/api/v1/search/): um documento por
+    registro de cada módulo. Mantido por api/global_search.py (signals).
+    """
+
+    TIPO_CHOICES = [
+        ("inventario", "Inventário de Dados"),
+        ("risco", "Risco"),
+        ("plano_acao", "Plano de Ação"),
+        ("documento", "Documento LGPD"),
+        ("incidente", "Incidente"),
+        ("monitoramento", "Ação de Monitoramento"),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    objeto_id = models.PositiveBigIntegerField()
+    titulo = models.CharField(max_length=255)
+    resumo = models.CharField(max_length=300, blank=True)
+    conteudo = models.TextField(blank=True)
+    setor = models.CharField(max_length=120, blank=True)
+    # dono do registro de origem (escopo "own" das permissões)
+    dono = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    # busca textual (api/fulltext.py): tsvector com índice GIN no PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        verbose_name = "Documento da busca global"
+        verbose_name_plural = "Documentos da busca global"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tipo", "objeto_id"], name="uniq_search_document_tipo_objeto"
+            )
+        ]
+        indexes = [models.Index(fields=["tipo", "dono"])]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.objeto_id}: {self.titulo[:60]}"
+
+
+class SearchTerm(models.Model):
+    """
+    Índice invertido da busca textual quando o banco não é PostgreSQL (dev):
+    um termo normalizado por registro, com o maior peso entre os campos.
+    Mantido por api/fulltext.py.
+    """
+
+    modelo = models.CharField(max_length=40)  # "api.risk"
+    objeto_id = models.PositiveBigIntegerField()
+    termo = models.CharField(max_length=40)
+    peso = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = "Termo de busca"
+        verbose_name_plural = "Termos de busca"
+        indexes = [
+            models.Index(fields=["modelo", "termo"]),
+            models.Index(fields=["modelo", "objeto_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo}#{self.objeto_id}: {self.termo}"
+
+
+class ChangeMarker(models.Model):
+    """
+    Última alteração de cada modelo servido pela API (ETag das listagens,
+    api/conditional.py). Atualizada após o commit de qualquer escrita —
+    inclusive as que não mudam contagem nem data de atualização
+    (queryset.update(), modelos sem campo de data).
+    """
+
+    modelo = models.CharField(max_length=100, unique=True)  # "api.risk"
+    alterado_em = models.DateTimeField()
+
+    class Meta:
+        ordering = ["modelo"]
+        verbose_name = "Marca de alteração"
+        verbose_name_plural = "Marcas de alteração"
+
+    def __str__(self):
+        return f"{self.modelo} — {self.alterado_em:%d/%m/%Y %H:%M:%S}"
+
+
+class UserAvatar(models.Model):
+    """
+    Imagem original do avatar, fora da tabela de usuários: consultas de User
+    (listas, JWT, request.user, select_related) não carregam o blob. Só as
+    rotas /avatar/ leem esta tabela.
+    """
+
+    usuario = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="avatar_original"
+    )
+    dados = models.BinaryField()
+    mime = models.CharField(max_length=50, blank=True, default="")
+    sha256 = models.CharField(max_length=64)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Avatar"
+        verbose_name_plural = "Avatares"
+
+    def __str__(self):
+        return f"Avatar de {self.usuario_id}"
+
+
+class AvatarRendition(models.Model):
+    """
+    Miniatura do avatar pré-renderizada (uma por tamanho), gerada no upload
+    (api/avatars.py) e servida pelas rotas /avatar/ sem decodificar imagem.
+    """
+
+    usuario = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="avatar_renditions"
+    )
+    tamanho = models.PositiveSmallIntegerField()  # lado máximo, em px
+    origem = models.CharField(max_length=64)  # User.avatar_hash de quando foi gerada
+    sha256 = models.CharField(max_length=64)  # do conteúdo (ETag)
+    mime = models.CharField(max_length=50, default="image/jpeg")
+    dados = models.BinaryField()
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Miniatura de avatar"
+        verbose_name_plural = "Miniaturas de avatar"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["usuario", "tamanho"], name="uniq_avatar_rendition_tamanho"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} — {self.tamanho}px"
+
+
+class DocumentUpload(models.Model):
+    """
+    Envio em partes (retomável) do arquivo de um DocumentosLGPD. Os bytes
+    ficam em DOCUMENTOS_UPLOAD_DIR/<id>.part até a conclusão; `recebido` é o
+    próximo offset aceito.
+    """
+
+    STATUS_ABERTO = "aberto"
+    STATUS_CONCLUIDO = "concluido"
+    STATUS_CHOICES = [
+        (STATUS_ABERTO, "Aberto"),
+        (STATUS_CONCLUIDO, "Concluído"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    documento = models.ForeignKey(
+        DocumentosLGPD, on_delete=models.CASCADE, related_name="uploads"
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="document_uploads",
+    )
+    nome_arquivo = models.CharField(max_length=255)
+    tamanho = models.PositiveBigIntegerField()
+    recebido = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_ABERTO
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    expira_em = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-criado_em"]
+        verbose_name = "Upload em partes"
+        verbose_name_plural = "Uploads em partes"
+        indexes = [models.Index(fields=["status", "expira_em"])]
+
+    def __str__(self):
+        return f"{self.nome_arquivo} ({self.recebido}/{self.tamanho})"
+
+
+class DocumentBlob(models.Model):
+    """
+    Conteúdo de anexo guardado uma vez só (api/storage.py), pelo sha256.
+    `referencias` conta os DocumentosLGPD que apontam para ele; com zero,
+    gc_document_blobs remove o arquivo.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    arquivo = models.CharField(max_length=100)  # nome no storage
+    tamanho = models.PositiveBigIntegerField(default=0)
+    referencias = models.PositiveIntegerField(default=0)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    # último uso (nova referência): o GC só remove blobs parados há um tempo
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Conteúdo de documento"
+        verbose_name_plural = "Conteúdos de documentos"
+        indexes = [models.Index(fields=["referencias", "atualizado_em"])]
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.referencias} ref.)"
@@ -1,7 +1,181 @@
 # api/pagination.py
-from rest_framework.pagination import PageNumberPagination
+import base64
+import datetime
+import json
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class DefaultPagination(PageNumberPagination):
     page_size = 10                    # default
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) com ordenação composta.
+
+    Em vez de OFFSET, cada página filtra "depois da última linha vista"
+    pela tupla de ordenação, então a página 1 e a página 10.000 custam o mesmo
+    e inserções/remoções entre requisições não duplicam nem pulam linhas.
+
+    `ordering` = tupla de (campo, decrescente?); o último campo precisa ser único.
+    Aceita querysets de modelo ou de .values().
+    """
+    ordering = ()
+    page_size = 50                    # default
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    # ---------- cursor ----------
+    @staticmethod
+    def _json_default(value):
+        # isoformat completo: o DjangoJSONEncoder corta os microssegundos,
+        # e o cursor precisa do valor exato para não repetir/pular linhas
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        raise TypeError(f'{type(value).__name__} não serializável no cursor')
+
+    def encode_cursor(self, values, reverse=False):
+        payload = json.dumps({'v': values, 'r': reverse}, default=self._json_default)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(raw.encode('ascii')))
+            values = list(data['v'])
+            reverse = bool(data.get('r'))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            # datas voltam como texto ISO no JSON (data bem formada mas
+            # inexistente, ex. mês 13, também levanta ValueError)
+            values = [parse_datetime(v) or v if isinstance(v, str) else v for v in values]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # ---------- consulta ----------
+    def _keys(self):
+        return [f'_k{n}' for n in range(len(self.ordering))]
+
+    def _after(self, values, reverse):
+        """
+        Q de "vem depois de `values`": a < A OR (a = A AND (b < B OR ...)).
+        Escrito por extenso porque as direções podem variar por coluna.
+        """
+        keys = self._keys()
+        cond = None
+        for n in range(len(keys) - 1, -1, -1):
+            desc = self.ordering[n][1] != reverse
+            lookup = 'lt' if desc else 'gt'
+            passo = Q(**{f'{keys[n]}__{lookup}': values[n]})
+            if cond is not None:
+                passo |= Q(**{keys[n]: values[n]}) & cond
+            cond = passo
+        return cond
+
+    def _row_values(self, row):
+        if isinstance(row, dict):
+            return [row[k] for k in self._keys()]
+        return [getattr(row, k) for k in self._keys()]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        values, reverse = self.decode_cursor(request)
+        return self._page(queryset, self.get_page_size(request), values, reverse)
+
+    def first_page(self, queryset, size=None):
+        """
+        Primeira página fora de uma requisição (ex.: embutida num snapshot).
+        Retorna (linhas, cursor da próxima página ou None).
+        """
+        self.request = None
+        rows = self._page(queryset, size or self.page_size, None, False)
+        proximo = self.next_values
+        return rows, self.encode_cursor(proximo) if proximo is not None else None
+
+    def _page(self, queryset, size, values, reverse):
+        keys = self._keys()
+        qs = queryset.annotate(**{k: F(field) for k, (field, _) in zip(keys, self.ordering)})
+        qs = qs.order_by(*[
+            ('-' if desc != reverse else '') + k
+            for k, (_, desc) in zip(keys, self.ordering)
+        ])
+        if values is not None:
+            qs = qs.filter(self._after(values, reverse))
+
+        rows = list(qs[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        first = self._row_values(rows[0]) if rows else None
+        last = self._row_values(rows[-1]) if rows else None
+
+        # quem chegou por um cursor sempre tem para onde voltar
+        if reverse:
+            self.next_values = last
+            self.previous_values = first if has_more else None
+        else:
+            self.next_values = last if has_more else None
+            self.previous_values = first if values is not None else None
+        return rows
+
+    # ---------- resposta ----------
+    def _link(self, values, reverse):
+        if values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def get_next_link(self):
+        return self._link(self.next_values, False)
+
+    def get_previous_link(self):
+        return self._link(self.previous_values, True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class RankingKeysetPagination(KeysetPagination):
+    # mesma ordem do ranking/exportações, com id como desempate estável
+    ordering = (
+        ('pontuacao', True),
+        ('impacto_valor', True),
+        ('probabilidade_valor', True),
+        ('criado_em', True),
+        ('id', False),
+    )
+
+
+class LoginFeedKeysetPagination(KeysetPagination):
+    # últimos acessos: mais recentes primeiro, id como desempate
+    ordering = (
+        ('data_login', True),
+        ('id', True),
+    )
+    page_size = 20
+    max_page_size = 100
@@ -195,3 +195,27 @@ class SimpleRolePermission(BasePermission):
         if scope is True:
             return "any"
         return scope
+
+
+# --- Escopo de leitura (agregações sobre várias viewsets) ------------------
+
+
+def escopo_de_listagem(request, view):
+    """
+    Escopo do usuário na listagem da view ('any', 'own' ou None), segundo as
+    permission_classes dela (e ROLE_PERMS, quando usa SimpleRolePermission).
+    `view` deve ser uma instância com action="list" e o request atual.
+    Usado por quem junta dados de vários módulos (ex.: busca global).
+    """
+    escopo = "any"
+    for permission in view.get_permissions():
+        if not permission.has_permission(request, view):
+            return None
+        role_perms = getattr(view, "ROLE_PERMS", None)
+        if isinstance(permission, SimpleRolePermission) and role_perms:
+            scope = permission._scope_for(
+                role_perms, view.action, user_role(request.user), request
+            )
+            if scope == "own":
+                escopo = "own"
+    return escopo
@@ -0,0 +1,126 @@
+# api/risk_heatmap.py
+"""
+Heatmap de riscos (probabilidade x impacto).
+
+A matriz 5x5 sai de um único GROUP BY (probabilidade__value, impacto__value)
+e fica em cache por combinação de filtros. A chave leva as marcas de
+alteração (ChangeMarker, no banco) de Risk e dos itens dos eixos: uma
+escrita em qualquer worker troca a chave em todos, mesmo com cache local
+por processo. A versão local (invalidate_heatmap_cache) só descarta antes
+as matrizes do próprio processo.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import ChangeMarker, ImpactItem, LikelihoodItem, Risk
+from .risk_params import risk_params
+from .utils.transactions import on_commit_once
+
+HEATMAP_VERSION_KEY = "heatmap:versao"
+HEATMAP_CACHE_TTL = 60 * 10  # limita a defasagem se o cache não for compartilhado
+
+HEATMAP_SIZE = 5
+
+MODELOS_HEATMAP = tuple(m._meta.label_lower for m in (Risk, LikelihoodItem, ImpactItem))
+
+# parâmetros que não mudam a matriz (paginação/seção de lista)
+PARAMETROS_SEM_EFEITO = {"page", "page_size", "riscos", "ordering", "format"}
+
+
+def _versao():
+    versao = cache.get(HEATMAP_VERSION_KEY)
+    if versao is None:
+        # valor inicial distinto a cada "reset" do cache (evita reaproveitar chaves antigas)
+        cache.add(HEATMAP_VERSION_KEY, int(time.time() * 1000), None)
+        versao = cache.get(HEATMAP_VERSION_KEY)
+    return versao
+
+
+def _bump():
+    try:
+        cache.incr(HEATMAP_VERSION_KEY)
+    except ValueError:
+        cache.add(HEATMAP_VERSION_KEY, int(time.time() * 1000), None)
+
+
+def invalidate_heatmap_cache():
+    """Descarta as matrizes em cache (após o commit da transação atual)."""
+    on_commit_once(_bump)
+
+
+def _marcas():
+    """Marcas de alteração dos modelos da matriz (iguais em todos os workers)."""
+    alteracoes = ChangeMarker.objects.filter(modelo__in=MODELOS_HEATMAP).values_list(
+        "modelo", "alterado_em"
+    )
+    partes = [f"{rotulo}@{data.isoformat()}" for rotulo, data in sorted(alteracoes)]
+    return hashlib.sha1("|".join(partes).encode("utf-8")).hexdigest()
+
+
+def _chave_filtros(query_params):
+    partes = []
+    for key in sorted(query_params.keys()):
+        if key in PARAMETROS_SEM_EFEITO:
+            continue
+        valores = sorted(query_params.getlist(key))
+        partes.append(f"{key}={'|'.join(valores)}")
+    return hashlib.sha1("&".join(partes).encode("utf-8")).hexdigest()
+
+
+def compute_heatmap(qs):
+    """Calcula buckets/grid/points/total com uma única agregação."""
+    linhas = (
+        qs.order_by()
+        .values("probabilidade__value", "impacto__value")
+        .annotate(count=Count("id"))
+    )
+
+    grid = [[0 for _ in range(HEATMAP_SIZE + 1)] for _ in range(HEATMAP_SIZE + 1)]
+    buckets = {}
+    total = 0
+    for linha in linhas:
+        total += linha["count"]
+        p, i = linha["probabilidade__value"], linha["impacto__value"]
+        if p is None or i is None:
+            continue  # sem probabilidade/impacto: conta no total, fora da matriz
+        buckets[f"{p}-{i}"] = linha["count"]
+        if 1 <= p <= HEATMAP_SIZE and 1 <= i <= HEATMAP_SIZE:
+            grid[p][i] = linha["count"]
+
+    points = [
+        {"prob": p, "impact": i, "count": grid[p][i]}
+        for p in range(1, HEATMAP_SIZE + 1)
+        for i in range(1, HEATMAP_SIZE + 1)
+        if grid[p][i]
+    ]
+
+    return {
+        "buckets": buckets,
+        "grid": grid,
+        "points": points,
+        "axes": risk_params().axes(),
+        "total": total,
+    }
+
+
+def heatmap_grid(qs, query_params):
+    """
+    Matriz do heatmap para o queryset já filtrado, via cache. A chave leva as
+    marcas do banco: nunca é mais velha que a última escrita confirmada.
+    """
+    key = f"heatmap:{_versao()}:{_marcas()}:{_chave_filtros(query_params)}"
+    data = cache.get(key)
+    if data is None:
+        data = compute_heatmap(qs)
+        cache.set(key, data, HEATMAP_CACHE_TTL)
+    return data
+
+
+def heatmap_rows(grid):
+    """Linhas do CSV: prob desc, impacto desc (como o heatmap "de cima à direita")."""
+    for p in range(HEATMAP_SIZE, 0, -1):
+        for i in range(HEATMAP_SIZE, 0, -1):
+            yield [p, i, grid[p][i]]
@@ -0,0 +1,220 @@
+# api/risk_params.py
+"""
+Parametrização da Matriz de Riscos (probabilidade, impacto, eficácia, faixas
+e instruções) em memória do processo.
+
+As cinco tabelas mudam raramente, mas são lidas em toda gravação de Risk,
+no heatmap, na serialização dos riscos e em /risk-config/. O snapshot é
+carregado uma vez por processo e revalidado contra a versão gravada no
+banco (ChangeMarker "risk_params"), conferida no máximo a cada
+RISK_PARAMS_RECHECK segundos: vale para todos os workers e para escritas
+feitas fora do servidor web (admin, comandos, shell).
+
+A versão é trocada dentro da própria transação que altera os itens: os
+outros processos só a enxergam após o commit, e um rollback a desfaz.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import (
+    ChangeMarker,
+    ControlEffectivenessItem,
+    ImpactItem,
+    Instruction,
+    LikelihoodItem,
+    Risk,
+    RiskLevelBand,
+)
+from .utils.transactions import on_commit_once
+
+RISK_PARAMS_MARCA = "risk_params"  # ChangeMarker.modelo
+RISK_PARAMS_RECHECK = 2  # segundos entre conferências da versão no banco
+
+# nome da faixa -> valor de Risk.risco_residual
+NIVEL_POR_FAIXA = {
+    "baixo": "baixo",
+    "médio": "medio",
+    "medio": "medio",
+    "alto": "alto",
+    "crítico": "critico",
+    "critico": "critico",
+}
+
+
+def nivel_da_faixa(nome):
+    """
+    Valor de Risk.risco_residual para a faixa `nome`, ou None se o nome não
+    está no mapa ou o nível não é uma das choices do campo (ex.: "critico").
+    """
+    nivel = NIVEL_POR_FAIXA.get((nome or "").strip().lower())
+    escolhas = Risk._meta.get_field("risco_residual").choices
+    return nivel if nivel in {valor for valor, _ in escolhas} else None
+
+
+class RiskParams:
+    """Snapshot imutável da parametrização (instâncias indexadas por id)."""
+
+    def __init__(self, versao):
+        self.versao = versao
+        self.conferido_em = time.monotonic()
+        self.likelihood = {i.pk: i for i in LikelihoodItem.objects.order_by("value")}
+        self.impact = {i.pk: i for i in ImpactItem.objects.order_by("value")}
+        self.effectiveness = {
+            i.pk: i for i in ControlEffectivenessItem.objects.order_by("value")
+        }
+        self.bands = list(RiskLevelBand.objects.order_by("min_score"))
+        self.instructions = list(Instruction.objects.order_by("updated_at"))
+        self._config = None
+
+    # ---------- consultas ----------
+    def band_for_score(self, score):
+        """Primeira faixa (por min_score) que contém a pontuação."""
+        for band in self.bands:
+            if band.min_score <= score <= band.max_score:
+                return band
+        return None
+
+    def nivel_residual(self, score):
+        """Valor de risco_residual deduzido pelas faixas (ou None)."""
+        band = self.band_for_score(score)
+        if band is None:
+            return None
+        return nivel_da_faixa(band.name)
+
+    def nivel_manual(self, nivel, probabilidade, impacto):
+        """
+        `nivel` informado para um risco com estes itens é escolha do usuário?
+        Vazio ou igual ao deduzido pelas faixas, não.
+        """
+        if not nivel:
+            return False
+        if probabilidade is None or impacto is None:
+            return True
+        prob = self.likelihood.get(probabilidade.pk) or probabilidade
+        imp = self.impact.get(impacto.pk) or impacto
+        return nivel != self.nivel_residual(int(prob.value) * int(imp.value))
+
+    def axes(self):
+        """Eixos do heatmap (value + label_pt, em ordem crescente)."""
+        return {
+            "probabilidade": [
+                {"value": i.value, "label_pt": i.label_pt}
+                for i in self.likelihood.values()
+            ],
+            "impacto": [
+                {"value": i.value, "label_pt": i.label_pt} for i in self.impact.values()
+            ],
+        }
+
+    # ---------- /risk-config/ ----------
+    def config(self):
+        """Payload de /risk-config/ e seu ETag (montados uma vez por snapshot)."""
+        if self._config is None:
+            from .serializers import (
+                ControlEffectivenessItemSerializer,
+                ImpactItemSerializer,
+                InstructionSerializer,
+                LikelihoodItemSerializer,
+                RiskLevelBandSerializer,
+            )
+
+            data = {
+                "likelihood": LikelihoodItemSerializer(
+                    self.likelihood.values(), many=True
+                ).data,
+                "impact": ImpactItemSerializer(self.impact.values(), many=True).data,
+                "effectiveness": ControlEffectivenessItemSerializer(
+                    self.effectiveness.values(), many=True
+                ).data,
+                "bands": RiskLevelBandSerializer(self.bands, many=True).data,
+                "instructions": InstructionSerializer(
+                    self.instructions, many=True
+                ).data,
+            }
+            corpo = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+            etag = '"%s"' % hashlib.sha1(corpo.encode("utf-8")).hexdigest()
+            self._config = (data, etag)
+        return self._config
+
+
+_lock = threading.Lock()
+_snapshot = None
+# versão gravada pela transação em andamento desta thread (ainda não
+# commitada): o snapshot dela não é compartilhado com as outras requisições
+_local = threading.local()
+
+
+def _versao():
+    return (
+        ChangeMarker.objects.filter(modelo=RISK_PARAMS_MARCA)
+        .values_list("alterado_em", flat=True)
+        .first()
+    )
+
+
+def _gravar_versao():
+    versao = timezone.now()
+    if not ChangeMarker.objects.filter(modelo=RISK_PARAMS_MARCA).update(
+        alterado_em=versao
+    ):
+        ChangeMarker.objects.get_or_create(
+            modelo=RISK_PARAMS_MARCA, defaults={"alterado_em": versao}
+        )
+    return versao
+
+
+def _publicado():
+    """Após o commit: este processo recarrega já (os outros ao conferir)."""
+    global _snapshot
+
+    with _lock:
+        _snapshot = None
+    _local.versao = _local.snapshot = None
+
+
+def risk_params():
+    """Snapshot atual da parametrização (recarrega se a versão mudou)."""
+    global _snapshot
+
+    pendente = getattr(_local, "versao", None)
+    snap = _snapshot
+    agora = time.monotonic()
+    if (
+        pendente is None
+        and snap is not None
+        and agora - snap.conferido_em < RISK_PARAMS_RECHECK
+    ):
+        return snap
+
+    versao = _versao()
+    if pendente is not None:
+        if versao == pendente:
+            # dentro da transação que alterou os itens: snapshot só dela
+            local = getattr(_local, "snapshot", None)
+            if local is None or local.versao != versao:
+                local = _local.snapshot = RiskParams(versao)
+            return local
+        _local.versao = _local.snapshot = None  # rollback
+
+    if snap is not None and snap.versao == versao:
+        snap.conferido_em = agora
+        return snap
+
+    snap = RiskParams(versao)
+    with _lock:
+        _snapshot = snap
+    return snap
+
+
+def invalidate_risk_params():
+    """
+    Troca a versão na transação atual (post_save/post_delete dos itens);
+    após o commit todos os processos recarregam.
+    """
+    _local.versao = _gravar_versao()
+    on_commit_once(_publicado)
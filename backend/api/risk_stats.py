@@ -0,0 +1,83 @@
+# api/risk_stats.py
+"""
+Estatísticas de riscos calculadas no banco (Dashboard e /riscos/stats/by-band/).
+
+Todas recebem um queryset de Risk (já filtrado pela viewset, se for o caso)
+e devolvem só o resultado agregado: o custo em Python não cresce com o
+número de riscos.
+
+- Distribuição por faixa: uma consulta com um COUNT(...) FILTER por
+  RiskLevelBand (a primeira faixa, por min_score, que contém a pontuação).
+- Contagem por nível residual, riscos por setor e Top N.
+"""
+from django.db.models import Count, Q
+
+from .risk_params import risk_params
+
+NIVEIS_RESIDUAIS = ("baixo", "medio", "alto", "critico")
+
+SETOR_NAO_INFORMADO = "Não informado"
+
+
+def distribuicao_por_faixa(qs, bands=None):
+    """[{"name", "color", "value"}] por faixa, na ordem de min_score."""
+    if bands is None:
+        bands = risk_params().bands
+
+    contagens, anteriores = {}, Q()
+    for i, band in enumerate(bands):
+        faixa = Q(pontuacao__gte=band.min_score, pontuacao__lte=band.max_score)
+        # faixas sobrepostas: o risco conta só na primeira (como band_for_score)
+        contagens[f"f{i}"] = Count(
+            "pk", filter=faixa & ~anteriores if anteriores else faixa
+        )
+        anteriores |= faixa
+
+    totais = qs.order_by().aggregate(**contagens) if contagens else {}
+    return [
+        {"name": band.name, "color": band.color, "value": totais[f"f{i}"]}
+        for i, band in enumerate(bands)
+    ]
+
+
+def contagem_por_nivel(qs):
+    """{nivel: total} pelo risco_residual gravado (baixo/medio/alto/critico)."""
+    return qs.order_by().aggregate(
+        **{
+            nivel: Count("pk", filter=Q(risco_residual__iexact=nivel))
+            for nivel in NIVEIS_RESIDUAIS
+        }
+    )
+
+
+def riscos_por_setor(qs):
+    """[{"setor", "quantidade"}], do setor com mais riscos para o com menos."""
+    linhas = (
+        qs.order_by()
+        .values("setor")
+        .annotate(quantidade=Count("pk"))
+        .order_by("-quantidade", "setor")
+    )
+    return [
+        {"setor": r["setor"] or SETOR_NAO_INFORMADO, "quantidade": r["quantidade"]}
+        for r in linhas
+    ]
+
+
+def top_riscos(qs, limite=5):
+    """Os `limite` riscos de maior pontuação (id como desempate)."""
+    linhas = (
+        qs.exclude(pontuacao=None)
+        .order_by("-pontuacao", "id")
+        .values("id", "risco_fator", "pontuacao", "setor", "processo")[:limite]
+    )
+    return [
+        {
+            "id": r["id"],
+            "titulo": r["risco_fator"],
+            "score": r["pontuacao"],
+            "setor": r["setor"],
+            "owner": r["processo"],
+        }
+        for r in linhas
+    ]
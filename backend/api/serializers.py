@@ -1,15 +1,26 @@
 import os, mimetypes
 import datetime
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.validators import validate_email as core_validate_email
 from django.core.exceptions import ValidationError
 from django.contrib.auth import password_validation
+from django.db import transaction
+from .avatars import (
+    AvatarInvalido,
+    avatar_path,
+    definir_avatar,
+    gravar_avatar,
+    remover_avatar,
+    tamanhos as avatar_tamanhos,
+)
 from .models import (
     User,
     DocumentosLGPD,
+    DocumentUpload,
     Checklist,
     InventarioDados,
     Risk,
@@ -24,7 +35,10 @@ from .models import (
     CalendarEvent,
     LoginActivity,
     UserActivityLog,
+    ExportJob,
+    SearchDocument,
 )
+from .risk_params import risk_params
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -58,6 +72,7 @@ class UserSerializer(serializers.ModelSerializer):
     appointment_date = serializers.DateField(required=False)
     appointment_validity = serializers.DateField(required=False)
     avatar_url = serializers.SerializerMethodField()
+    avatar_urls = serializers.SerializerMethodField()
     remove_avatar = serializers.BooleanField(write_only=True, required=False)
 
     class Meta:
@@ -79,6 +94,7 @@ class UserSerializer(serializers.ModelSerializer):
             "last_login",
             "password",
             "avatar_url",
+            "avatar_urls",
             "remove_avatar",
             "current_password",
             "refresh",
@@ -95,11 +111,21 @@ class UserSerializer(serializers.ModelSerializer):
             return None
 
         # Sem avatar → placeholder
-        if not instance.avatar_data:
+        if not instance.avatar_hash:
             return request.build_absolute_uri("/avatar/placeholder/")
 
-        # Com avatar → thumbnail
-        return request.build_absolute_uri(f"/avatar/{instance.pk}/")
+        # Com avatar → miniatura pré-renderizada (URL muda a cada upload)
+        return request.build_absolute_uri(avatar_path(instance))
+
+    def get_avatar_urls(self, instance):
+        """{tamanho: url} das miniaturas (ex.: srcset); vazio sem avatar."""
+        request = self.context.get("request")
+        if not request or not instance.avatar_hash:
+            return {}
+        return {
+            str(t): request.build_absolute_uri(avatar_path(instance, t))
+            for t in avatar_tamanhos()
+        }
 
     def validate(self, data):
         """
@@ -268,14 +294,21 @@ class UserSerializer(serializers.ModelSerializer):
         # Upload de avatar via multipart
         avatar_file = request.FILES.get("avatar") if request else None
 
+        # miniaturas geradas aqui, uma vez; None = avatar não mudou
+        avatar = None
         if avatar_file:
-            instance.avatar_data = avatar_file.read()
-            instance.avatar_mime = avatar_file.content_type
+            try:
+                avatar = definir_avatar(
+                    instance, avatar_file.read(), avatar_file.content_type
+                )
+            except AvatarInvalido:
+                raise serializers.ValidationError(
+                    {"avatar": "Não foi possível ler a imagem enviada."}
+                )
 
         # Remover avatar
         if remove:
-            instance.avatar_data = None
-            instance.avatar_mime = None
+            avatar = remover_avatar(instance)
 
         # Update comum
         for attr, value in validated_data.items():
@@ -284,7 +317,10 @@ class UserSerializer(serializers.ModelSerializer):
         if new_password:
             instance.set_password(new_password)
 
-        instance.save()
+        with transaction.atomic():
+            instance.save()
+            if avatar is not None:
+                gravar_avatar(instance, avatar)
         return instance
 
 
@@ -297,6 +333,7 @@ class DocumentosLGPDSerializer(serializers.ModelSerializer):
     )
     status_display = serializers.CharField(source="get_status_display", read_only=True)
     arquivo_url = serializers.SerializerMethodField()
+    arquivo_download_url = serializers.SerializerMethodField()
     arquivo_name = serializers.SerializerMethodField()
     arquivo_mime = serializers.SerializerMethodField()
 
@@ -317,27 +354,40 @@ class DocumentosLGPDSerializer(serializers.ModelSerializer):
             "status_display",
             "arquivo",
             "arquivo_url",
+            "arquivo_download_url",
             "arquivo_name",
             "arquivo_mime",  # <-
+            "arquivo_sha256",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["created_at", "updated_at"]
+        read_only_fields = ["arquivo_sha256", "created_at", "updated_at"]
 
     def get_arquivo_url(self, obj):
+        # abre no navegador (inline), com o nome e o tipo do arquivo enviado:
+        # o blob em disco se chama só pelo sha256 e /media/ não o serve
+        url = self.get_arquivo_download_url(obj)
+        return f"{url}?inline=1" if url else None
+
+    def get_arquivo_download_url(self, obj):
+        # com permissão, Range e ETag (DocumentosLGPDViewSet.download)
         if obj.arquivo:
-            url = obj.arquivo.url
-            req = self.context.get("request")
-            return req.build_absolute_uri(url) if req else url
+            return reverse(
+                "api:documentos-download",
+                kwargs={"pk": obj.pk},
+                request=self.context.get("request"),
+            )
         return None
 
     def get_arquivo_name(self, obj):
-        return os.path.basename(obj.arquivo.name) if obj.arquivo else None
+        if not obj.arquivo:
+            return None
+        return obj.arquivo_nome or os.path.basename(obj.arquivo.name)
 
     def get_arquivo_mime(self, obj):
         if not obj.arquivo:
             return None
-        mt, _ = mimetypes.guess_type(obj.arquivo.name)
+        mt, _ = mimetypes.guess_type(self.get_arquivo_name(obj))
         return mt
 
     def create(self, validated_data):
@@ -345,6 +395,30 @@ class DocumentosLGPDSerializer(serializers.ModelSerializer):
         return DocumentosLGPD.objects.create(criado_por=user, **validated_data)
 
 
+class DocumentUploadSerializer(serializers.ModelSerializer):
+    """Sessão de upload em partes (api/document_uploads.py)."""
+
+    parte_max = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DocumentUpload
+        fields = [
+            "id",
+            "documento",
+            "nome_arquivo",
+            "tamanho",
+            "recebido",
+            "status",
+            "parte_max",
+            "criado_em",
+            "expira_em",
+        ]
+        read_only_fields = fields
+
+    def get_parte_max(self, obj):
+        return settings.DOCUMENTOS_UPLOAD_PARTE_MAX
+
+
 class ChecklistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Checklist
@@ -357,9 +431,47 @@ class InventarioDadosSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = InventarioDados
-        fields = "__all__"
+        exclude = ("search_vector",)
         read_only_fields = ("criado_por", "data_criacao", "data_atualizacao")
 
+    # todas as etapas, exceto "observacao"
+    CAMPOS_OBRIGATORIOS = (
+        # Etapa 1
+        "unidade",
+        "setor",
+        "responsavel_email",
+        "processo_negocio",
+        "finalidade",
+        "dados_pessoais",
+        "tipo_dado",
+        "origem",
+        "formato",
+        "impresso",
+        "titulares",
+        "dados_menores",
+        "base_legal",
+        # Etapa 2
+        "pessoas_acesso",
+        "atualizacoes",
+        "transmissao_interna",
+        "transmissao_externa",
+        "local_armazenamento_digital",
+        "controlador_operador",
+        "motivo_retencao",
+        "periodo_retencao",
+        "exclusao",
+        "forma_exclusao",
+        "transferencia_terceiros",
+        "quais_dados_transferidos",
+        "transferencia_internacional",
+        "empresa_terceira",
+        # Etapa 3
+        "adequado_contratualmente",
+        "paises_tratamento",
+        "medidas_seguranca",
+        "consentimentos",
+    )
+
     def validate(self, attrs):
         """
         POST/PUT: exige todos os campos obrigatórios (todas as etapas, exceto 'observacao').
@@ -368,42 +480,7 @@ class InventarioDadosSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         method = (getattr(request, "method", "") or "").upper()
 
-        required = [
-            # Etapa 1
-            "unidade",
-            "setor",
-            "responsavel_email",
-            "processo_negocio",
-            "finalidade",
-            "dados_pessoais",
-            "tipo_dado",
-            "origem",
-            "formato",
-            "impresso",
-            "titulares",
-            "dados_menores",
-            "base_legal",
-            # Etapa 2
-            "pessoas_acesso",
-            "atualizacoes",
-            "transmissao_interna",
-            "transmissao_externa",
-            "local_armazenamento_digital",
-            "controlador_operador",
-            "motivo_retencao",
-            "periodo_retencao",
-            "exclusao",
-            "forma_exclusao",
-            "transferencia_terceiros",
-            "quais_dados_transferidos",
-            "transferencia_internacional",
-            "empresa_terceira",
-            # Etapa 3
-            "adequado_contratualmente",
-            "paises_tratamento",
-            "medidas_seguranca",
-            "consentimentos",
-        ]
+        required = self.CAMPOS_OBRIGATORIOS
 
         if method == "PATCH":
             for f, v in attrs.items():
@@ -435,7 +512,7 @@ class ActionPlanSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ActionPlan
-        fields = "__all__"  # mantém compatibilidade total com os endpoints
+        exclude = ("search_vector",)  # mantém compatibilidade total com os endpoints
         extra_fields = ["status_display"]
 
     def get_status_display(self, obj):
@@ -498,20 +575,12 @@ class ActionPlanSerializer(serializers.ModelSerializer):
 # Serializer para o modelo MatrizRisco
 class RiskSerializer(serializers.ModelSerializer):
     # ------- extras de leitura p/ o front (mantidos) -------
-    probabilidade_value = serializers.IntegerField(
-        source="probabilidade.value", read_only=True
-    )
-    probabilidade_label = serializers.CharField(
-        source="probabilidade.label_pt", read_only=True
-    )
-    impacto_value = serializers.IntegerField(source="impacto.value", read_only=True)
-    impacto_label = serializers.CharField(source="impacto.label_pt", read_only=True)
-    eficacia_label = serializers.CharField(
-        source="eficacia.label_pt", read_only=True, default=None
-    )
-
-    # score residual estimado (se existir eficácia)
-    residual_pontuacao = serializers.SerializerMethodField()
+    # resolvidos pela parametrização em memória (sem join/consulta por risco)
+    probabilidade_value = serializers.SerializerMethodField()
+    probabilidade_label = serializers.SerializerMethodField()
+    impacto_value = serializers.SerializerMethodField()
+    impacto_label = serializers.SerializerMethodField()
+    eficacia_label = serializers.SerializerMethodField()
 
     # “existe_controle” como você já tinha
     existe_controle = serializers.SerializerMethodField()
@@ -520,7 +589,7 @@ class RiskSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Risk
-        fields = "__all__"
+        exclude = ("search_vector",)
         # os extras acima já entram porque foram declarados no serializer
 
     def to_representation(self, instance):
@@ -542,19 +611,25 @@ class RiskSerializer(serializers.ModelSerializer):
     def get_existe_controle(self, obj):
         return bool(self._norm(getattr(obj, "medidas_controle", "")))
 
-    def get_residual_pontuacao(self, obj):
-        """
-        Estima pontuação residual com base na eficácia (média do range).
-        Se não houver eficácia, retorna a pontuação inerente.
-        """
-        if not obj.eficacia_id:
-            return obj.pontuacao
-        eff = obj.eficacia
-        try:
-            avg = (eff.reduction_min + eff.reduction_max) / 2.0
-            return int(round(obj.pontuacao * (1 - (avg / 100.0))))
-        except Exception:
-            return obj.pontuacao
+    @staticmethod
+    def _item(itens, pk, attr):
+        item = itens.get(pk)
+        return getattr(item, attr) if item else None
+
+    def get_probabilidade_value(self, obj):
+        return self._item(risk_params().likelihood, obj.probabilidade_id, "value")
+
+    def get_probabilidade_label(self, obj):
+        return self._item(risk_params().likelihood, obj.probabilidade_id, "label_pt")
+
+    def get_impacto_value(self, obj):
+        return self._item(risk_params().impact, obj.impacto_id, "value")
+
+    def get_impacto_label(self, obj):
+        return self._item(risk_params().impact, obj.impacto_id, "label_pt")
+
+    def get_eficacia_label(self, obj):
+        return self._item(risk_params().effectiveness, obj.eficacia_id, "label_pt")
 
     # ---------- validação ----------
     def validate(self, attrs):
@@ -625,6 +700,13 @@ class RiskSerializer(serializers.ModelSerializer):
 
         if errors:
             raise serializers.ValidationError(errors)
+        if "risco_residual" in attrs:
+            # vazio ou igual ao das faixas: o risco acompanha as faixas
+            attrs["risco_residual_manual"] = risk_params().nivel_manual(
+                attrs["risco_residual"],
+                attrs.get("probabilidade", getattr(inst, "probabilidade", None)),
+                attrs.get("impacto", getattr(inst, "impacto", None)),
+            )
         return attrs
 
     # ---------- create/update: recálculo e saneamento ----------
@@ -642,6 +724,8 @@ class RiskSerializer(serializers.ModelSerializer):
             instance.tipo_controle = ""
             instance.eficacia = None
 
+        # Risk.save inclui residual_pontuacao e os valores de prob/impacto
+        # nos update_fields
         instance.save(update_fields=["pontuacao", "tipo_controle", "eficacia"])
 
     def create(self, validated_data):
@@ -664,7 +748,7 @@ class MonitoringActionSerializer(serializers.ModelSerializer):
 class IncidentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Incident
-        fields = "__all__"
+        exclude = ("search_vector",)
 
 
 class LikelihoodItemSerializer(serializers.ModelSerializer):
@@ -722,3 +806,73 @@ class UserActivityLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserActivityLog
         fields = "__all__"
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "tipo",
+            "parametros",
+            "status",
+            "tentativas",
+            "erro",
+            "nome_arquivo",
+            "criado_em",
+            "iniciado_em",
+            "concluido_em",
+            "expira_em",
+            "download_url",
+        ]
+        read_only_fields = [
+            "status",
+            "tentativas",
+            "erro",
+            "nome_arquivo",
+            "criado_em",
+            "iniciado_em",
+            "concluido_em",
+            "expira_em",
+        ]
+
+    def validate_parametros(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError(
+                "Informe os filtros como objeto (nome: valor)."
+            )
+        return value
+
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.STATUS_CONCLUIDO:
+            return None
+        request = self.context.get("request")
+        url = f"/api/v1/exportacoes/{obj.pk}/download/"
+        return request.build_absolute_uri(url) if request else url
+
+
+class SearchDocumentSerializer(serializers.ModelSerializer):
+    """Resultado da busca global (/api/v1/search/)."""
+
+    tipo_label = serializers.CharField(source="get_tipo_display", read_only=True)
+    id = serializers.IntegerField(source="objeto_id", read_only=True)
+    relevancia = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SearchDocument
+        fields = [
+            "tipo",
+            "tipo_label",
+            "id",
+            "titulo",
+            "resumo",
+            "setor",
+            "atualizado_em",
+            "relevancia",
+        ]
+
+    def get_relevancia(self, obj):
+        rank = getattr(obj, "search_rank", None)
+        return round(float(rank), 4) if rank is not None else None
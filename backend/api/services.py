@@ -1,8 +1,26 @@
 # api/services.py
+import logging
+import time
+
 from django.utils import timezone
 from django.core.cache import cache
-from django.db.models import Q
-from .models import ActionPlan
+from django.db import transaction
+from django.db.models import CharField, Case, F, IntegerField, Q, Value, When
+from .models import (
+    ActionPlan,
+    ControlEffectivenessItem,
+    ImpactItem,
+    LikelihoodItem,
+    Risk,
+    RiskLevelBand,
+    residual_score,
+)
+from .conditional import marcar_alterado
+from .dashboard_snapshot import invalidate_dashboard_snapshot
+from .risk_heatmap import invalidate_heatmap_cache
+from .risk_params import nivel_da_faixa
+
+logger = logging.getLogger(__name__)
 
 # Chaves de cache (podem ir para settings)
 OVERDUE_LAST_RUN_KEY = "overdue:last_run_date"
@@ -20,7 +38,12 @@ def update_overdue_actions() -> int:
     qs = ActionPlan.objects.filter(prazo__lt=hoje).exclude(
         status__in=["concluido", "atrasado"]
     )
-    return qs.update(status="atrasado")
+    updated = qs.update(status="atrasado")
+    if updated:
+        # update() não dispara signals → invalida o snapshot manualmente
+        invalidate_dashboard_snapshot("ActionPlan")
+        marcar_alterado(ActionPlan)
+    return updated
 
 
 def update_overdue_actions_if_needed(force: bool = False) -> int:
@@ -47,3 +70,154 @@ def update_overdue_actions_if_needed(force: bool = False) -> int:
         return updated
     finally:
         cache.delete(OVERDUE_LOCK_KEY)
+
+
+def recompute_residual_scores(eficacia_ids=None) -> int:
+    """
+    Recalcula Risk.residual_pontuacao em SQL (um UPDATE por item de eficácia).
+    A pontuação inerente só assume poucos valores (prob x impacto), então o
+    resultado de residual_score é pré-calculado e aplicado via CASE.
+    Sem `eficacia_ids`, recalcula todos (inclusive riscos sem eficácia).
+    Retorna a quantidade de riscos cuja pontuação residual mudou.
+    """
+    pontuacoes = list(
+        Risk.objects.order_by().values_list("pontuacao", flat=True).distinct()
+    )
+    if not pontuacoes:
+        return 0
+
+    itens = ControlEffectivenessItem.objects.all()
+    if eficacia_ids is not None:
+        itens = itens.filter(pk__in=eficacia_ids)
+
+    updated = 0
+    for item in itens:
+        esperado = Case(
+            *[
+                When(pontuacao=p, then=Value(residual_score(p, item)))
+                for p in pontuacoes
+            ],
+            default=F("pontuacao"),
+            output_field=IntegerField(),
+        )
+        updated += (
+            Risk.objects.filter(eficacia=item)
+            .exclude(residual_pontuacao=esperado)
+            .update(residual_pontuacao=esperado)
+        )
+
+    if eficacia_ids is None:
+        # sem eficácia: residual = inerente
+        updated += (
+            Risk.objects.filter(eficacia__isnull=True)
+            .exclude(residual_pontuacao=F("pontuacao"))
+            .update(residual_pontuacao=F("pontuacao"))
+        )
+    if updated:
+        marcar_alterado(Risk)  # update() não dispara signals
+    return updated
+
+
+def reclassify_risk_bands() -> dict:
+    """
+    Reclassifica todos os riscos pelas faixas atuais (RiskLevelBand), em SQL:
+    - pontuacao = prob x impacto, via CASE sobre os pares de itens (e os
+      valores de prob/impacto copiados no risco, usados pelo ranking);
+    - residual_pontuacao acompanha a pontuação (recompute_residual_scores);
+    - risco_residual = nível da primeira faixa (por min_score) que contém a
+      pontuação, via CASE, em todos os riscos sem nível manual
+      (risco_residual_manual); sem faixa (ou nível) válido o campo fica
+      como está.
+    Só as linhas que mudam são escritas. Retorna as contagens e a duração.
+    """
+    inicio = time.monotonic()
+    resultado = {"pontuacao": 0, "residual_pontuacao": 0, "risco_residual": 0}
+
+    probabilidades = list(LikelihoodItem.objects.all())
+    impactos = list(ImpactItem.objects.all())
+    faixas = list(RiskLevelBand.objects.order_by("min_score"))
+
+    with transaction.atomic():
+        if probabilidades and impactos:
+            pontuacao = Case(
+                *[
+                    When(
+                        probabilidade_id=p.pk,
+                        impacto_id=i.pk,
+                        then=Value(p.value * i.value),
+                    )
+                    for p in probabilidades
+                    for i in impactos
+                ],
+                default=F("pontuacao"),
+                output_field=IntegerField(),
+            )
+            # valores copiados dos itens (ordem do ranking, risk_ranking_idx)
+            prob_valor = Case(
+                *[
+                    When(probabilidade_id=p.pk, then=Value(p.value))
+                    for p in probabilidades
+                ],
+                default=F("probabilidade_valor"),
+                output_field=IntegerField(),
+            )
+            imp_valor = Case(
+                *[When(impacto_id=i.pk, then=Value(i.value)) for i in impactos],
+                default=F("impacto_valor"),
+                output_field=IntegerField(),
+            )
+            resultado["pontuacao"] = (
+                Risk.objects.annotate(
+                    _pontuacao=pontuacao, _prob=prob_valor, _imp=imp_valor
+                )
+                .exclude(
+                    pontuacao=F("_pontuacao"),
+                    probabilidade_valor=F("_prob"),
+                    impacto_valor=F("_imp"),
+                )
+                .update(
+                    pontuacao=pontuacao,
+                    probabilidade_valor=prob_valor,
+                    impacto_valor=imp_valor,
+                )
+            )
+            if resultado["pontuacao"]:
+                resultado["residual_pontuacao"] = recompute_residual_scores()
+
+        if faixas:
+            whens = []
+            for faixa in faixas:
+                nivel = nivel_da_faixa(faixa.name)
+                whens.append(
+                    When(
+                        pontuacao__gte=faixa.min_score,
+                        pontuacao__lte=faixa.max_score,
+                        # faixa sem nível válido (fora do mapa ou das choices):
+                        # mantém (como Risk.save)
+                        then=Value(nivel) if nivel else F("risco_residual"),
+                    )
+                )
+            nivel = Case(*whens, default=F("risco_residual"), output_field=CharField())
+            # o nível escolhido pelo usuário é mantido
+            # (mesma regra de Risk.calcular_pontuacoes)
+            resultado["risco_residual"] = (
+                Risk.objects.filter(risco_residual_manual=False)
+                .exclude(risco_residual=nivel)
+                .update(risco_residual=nivel)
+            )
+
+        if any(resultado.values()):
+            # update() não dispara signals
+            invalidate_dashboard_snapshot("Risk")
+            invalidate_heatmap_cache()
+            marcar_alterado(Risk)
+
+    resultado["segundos"] = round(time.monotonic() - inicio, 3)
+    logger.info(
+        "Reclassificação de riscos por faixa: %s pontuação(ões), %s nível(is) "
+        "em %.3fs",
+        resultado["pontuacao"],
+        resultado["risco_residual"],
+        resultado["segundos"],
+    )
+    return resultado
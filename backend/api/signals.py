@@ -2,17 +2,57 @@
 import logging
 from django.conf import settings
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib.auth.signals import user_logged_in
+from django.core.signals import request_finished
 from django.contrib.auth.tokens import default_token_generator
 from django.utils import timezone
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 
 from .utils.email import send_html_email
-from .models import LoginActivity
+from .models import (
+    LoginActivity,
+    Risk,
+    ActionPlan,
+    DocumentosLGPD,
+    Checklist,
+    Incident,
+    LikelihoodItem,
+    ImpactItem,
+    ControlEffectivenessItem,
+    RiskLevelBand,
+    Instruction,
+    InventarioDados,
+    MonitoringAction,
+    CalendarEvent,
+    ExportJob,
+)
+from .action_items import CAMPOS_PLANO, CAMPOS_RISCO, afeta_acoes, sincronizar_acoes
+from .conditional import marcar_alterado
+from .dashboard_snapshot import invalidate_dashboard_snapshot
+from .blobs import atualizar_referencias
+from .document_uploads import preparar_arquivo
+from .fulltext import (
+    CAMPOS_INDEXADOS,
+    DEPENDENTES,
+    afeta_indice,
+    reindexar,
+    remover_do_indice,
+)
+from .global_search import (
+    DEPENDENTES as DEPENDENTES_BUSCA_GLOBAL,
+    TIPO_POR_MODELO,
+    afeta_documentos,
+    remover_documentos,
+    sincronizar_documentos,
+)
+from .utils.audit_buffer import audit_buffer
+from .risk_heatmap import invalidate_heatmap_cache
+from .risk_params import invalidate_risk_params
+from .utils.transactions import on_commit_once
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -84,3 +124,264 @@ def registrar_login(sender, request, user, **kwargs):
 
         logger = logging.getLogger(__name__)
         logger.warning(f"Falha ao registrar login de {user}: {e}")
+
+
+# ===== Snapshot do Dashboard =====
+# Qualquer escrita nos modelos abaixo marca as seções dependentes como pendentes.
+def invalidar_dashboard(sender, **kwargs):
+    invalidate_dashboard_snapshot(sender.__name__)
+
+
+for _model in (
+    Risk,
+    ActionPlan,
+    DocumentosLGPD,
+    Checklist,
+    Incident,
+    LoginActivity,
+    RiskLevelBand,
+    User,
+):
+    post_save.connect(
+        invalidar_dashboard,
+        sender=_model,
+        dispatch_uid=f"dashboard-save-{_model.__name__}",
+    )
+    post_delete.connect(
+        invalidar_dashboard,
+        sender=_model,
+        dispatch_uid=f"dashboard-delete-{_model.__name__}",
+    )
+
+
+# ===== Auditoria em lote =====
+# Ao fim de cada requisição (resposta já enviada) grava a fila se o lote venceu.
+@receiver(request_finished, dispatch_uid="audit-log-flush")
+def gravar_auditoria_pendente(sender, **kwargs):
+    try:
+        audit_buffer.flush_if_due()
+    except Exception as exc:
+        logger.warning(f"Falha ao gravar auditoria em lote: {exc}")
+
+
+# ===== Cache do Heatmap de Riscos =====
+def invalidar_heatmap(sender, **kwargs):
+    invalidate_heatmap_cache()
+
+
+for _model in (Risk, LikelihoodItem, ImpactItem):
+    post_save.connect(
+        invalidar_heatmap,
+        sender=_model,
+        dispatch_uid=f"heatmap-save-{_model.__name__}",
+    )
+    post_delete.connect(
+        invalidar_heatmap,
+        sender=_model,
+        dispatch_uid=f"heatmap-delete-{_model.__name__}",
+    )
+
+
+# ===== Parametrização da Matriz de Riscos (snapshot em memória) =====
+def invalidar_parametrizacao(sender, **kwargs):
+    invalidate_risk_params()
+
+
+for _model in (
+    LikelihoodItem,
+    ImpactItem,
+    ControlEffectivenessItem,
+    RiskLevelBand,
+    Instruction,
+):
+    post_save.connect(
+        invalidar_parametrizacao,
+        sender=_model,
+        dispatch_uid=f"risk-params-save-{_model.__name__}",
+    )
+    post_delete.connect(
+        invalidar_parametrizacao,
+        sender=_model,
+        dispatch_uid=f"risk-params-delete-{_model.__name__}",
+    )
+
+
+# ===== Pontuação residual dos riscos =====
+# Mudou a faixa de redução de uma eficácia → recalcula os riscos que a usam.
+@receiver(post_save, sender=ControlEffectivenessItem)
+def recalcular_residual_eficacia(sender, instance, created, **kwargs):
+    if created:
+        return  # nenhum risco aponta para um item recém-criado
+    from .services import recompute_residual_scores
+
+    pk = instance.pk
+    transaction.on_commit(lambda: recompute_residual_scores(eficacia_ids=[pk]))
+
+
+# Eficácia excluída → riscos ficam sem eficácia (SET_NULL não dispara signals)
+@receiver(post_delete, sender=ControlEffectivenessItem)
+def recalcular_residual_sem_eficacia(sender, instance, **kwargs):
+    from .services import recompute_residual_scores
+
+    transaction.on_commit(recompute_residual_scores)
+
+
+# ===== Reclassificação dos riscos por faixa =====
+# Faixas (ou valores de probabilidade/impacto) alteradas → reclassifica todos
+# os riscos em SQL após o commit; várias edições na mesma transação dentro de
+# coalesce_on_commit() (ex.: ações em massa no admin) disparam uma só.
+def _reclassificar_riscos():
+    from .services import reclassify_risk_bands
+
+    reclassify_risk_bands()
+
+
+def agendar_reclassificacao(sender, **kwargs):
+    on_commit_once(_reclassificar_riscos)
+
+
+for _model in (RiskLevelBand, LikelihoodItem, ImpactItem):
+    post_save.connect(
+        agendar_reclassificacao,
+        sender=_model,
+        dispatch_uid=f"reclassificar-save-{_model.__name__}",
+    )
+    post_delete.connect(
+        agendar_reclassificacao,
+        sender=_model,
+        dispatch_uid=f"reclassificar-delete-{_model.__name__}",
+    )
+
+
+# ===== Índice de busca textual =====
+def atualizar_indice_busca(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not afeta_indice(sender, update_fields):
+        return
+    reindexar(sender, [instance.pk])
+
+
+def remover_indice_busca(sender, instance, **kwargs):
+    remover_do_indice(sender, [instance.pk])
+
+
+for _model in set(CAMPOS_INDEXADOS) | set(DEPENDENTES):
+    post_save.connect(
+        atualizar_indice_busca,
+        sender=_model,
+        dispatch_uid=f"busca-save-{_model.__name__}",
+    )
+    post_delete.connect(
+        remover_indice_busca,
+        sender=_model,
+        dispatch_uid=f"busca-delete-{_model.__name__}",
+    )
+
+
+# ===== Busca global (SearchDocument) =====
+def atualizar_busca_global(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not afeta_documentos(sender, update_fields):
+        return
+    sincronizar_documentos(sender, [instance.pk])
+
+
+def remover_busca_global(sender, instance, **kwargs):
+    remover_documentos(sender, [instance.pk])
+
+
+for _model in set(TIPO_POR_MODELO) | set(DEPENDENTES_BUSCA_GLOBAL):
+    post_save.connect(
+        atualizar_busca_global,
+        sender=_model,
+        dispatch_uid=f"busca-global-save-{_model.__name__}",
+    )
+    post_delete.connect(
+        remover_busca_global,
+        sender=_model,
+        dispatch_uid=f"busca-global-delete-{_model.__name__}",
+    )
+
+
+# ===== Ações dos riscos (RiskActionItem) =====
+# Texto de resposta_risco ou posição dos planos mudou → refaz as ações do risco.
+@receiver(post_save, sender=Risk, dispatch_uid="acoes-risco-save")
+def sincronizar_acoes_risco(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not afeta_acoes(CAMPOS_RISCO, update_fields):
+        return
+    sincronizar_acoes([instance.pk])
+
+
+@receiver(post_save, sender=ActionPlan, dispatch_uid="acoes-plano-save")
+def sincronizar_acoes_plano(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not afeta_acoes(CAMPOS_PLANO, update_fields):
+        return
+    # plano_ids: o risco anterior, se o plano trocou de risco
+    sincronizar_acoes([instance.risco_id], plano_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=ActionPlan, dispatch_uid="acoes-plano-delete")
+def realinhar_acoes_plano(sender, instance, origin=None, **kwargs):
+    # exclusão do próprio risco: as ações saem junto, em cascata
+    if isinstance(origin, Risk) or getattr(origin, "model", None) is Risk:
+        return
+    sincronizar_acoes([instance.risco_id])
+
+
+# ===== GET condicional (ETag das listagens) =====
+# Por último: a marca só troca depois das invalidações acima (mesmo commit),
+# para um ETag novo nunca acompanhar um snapshot/índice ainda antigo.
+def marcar_alteracao(sender, **kwargs):
+    marcar_alterado(sender)
+
+
+for _model in (
+    User,
+    DocumentosLGPD,
+    Checklist,
+    InventarioDados,
+    Risk,
+    ActionPlan,
+    MonitoringAction,
+    Incident,
+    LikelihoodItem,
+    ImpactItem,
+    ControlEffectivenessItem,
+    RiskLevelBand,
+    CalendarEvent,
+    LoginActivity,
+    ExportJob,
+):
+    post_save.connect(
+        marcar_alteracao,
+        sender=_model,
+        dispatch_uid=f"alteracao-save-{_model.__name__}",
+    )
+    post_delete.connect(
+        marcar_alteracao,
+        sender=_model,
+        dispatch_uid=f"alteracao-delete-{_model.__name__}",
+    )
+
+
+# ============================================================
+# Arquivo dos documentos: sha256 + deduplicação (api/document_uploads.py)
+# ============================================================
+
+
+@receiver(pre_save, sender=DocumentosLGPD, dispatch_uid="documento-arquivo")
+def preparar_arquivo_documento(sender, instance, raw=False, **kwargs):
+    if not raw:
+        preparar_arquivo(instance)
+
+
+@receiver(post_save, sender=DocumentosLGPD, dispatch_uid="documento-blob-save")
+def contar_referencia_blob(sender, instance, raw=False, **kwargs):
+    if not raw:
+        atualizar_referencias(
+            getattr(instance, "_blob_anterior", None), instance.blob_id
+        )
+        instance._blob_anterior = instance.blob_id
+
+
+@receiver(post_delete, sender=DocumentosLGPD, dispatch_uid="documento-blob-delete")
+def descontar_referencia_blob(sender, instance, **kwargs):
+    atualizar_referencias(instance.blob_id, None)
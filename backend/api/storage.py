@@ -0,0 +1,71 @@
+# api/storage.py
+"""
+Storage endereçado por conteúdo dos arquivos de DocumentosLGPD.
+
+O nome do arquivo é o sha256 do conteúdo (blobs/ab/cd/<sha256>, em
+MEDIA_ROOT): o mesmo PDF anexado a vários documentos fica uma vez só em
+disco, e gravar um conteúdo que já existe não escreve nada. As referências
+ficam em DocumentBlob (api/blobs.py); arquivos sem referência são removidos
+por python manage.py gc_document_blobs.
+"""
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+PREFIXO = "blobs"
+
+
+def caminho_blob(sha256):
+    return f"{PREFIXO}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage em que nomes sob PREFIXO são endereços de conteúdo:
+    o nome não ganha sufixo quando já existe, e a gravação é pulada.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        if name.startswith(f"{PREFIXO}/"):
+            return name  # mesmo nome = mesmo conteúdo
+        return super().get_available_name(name, max_length=max_length)
+
+    def _save(self, name, content):
+        if not name.startswith(f"{PREFIXO}/"):
+            return super()._save(name, content)
+
+        caminho = self.path(name)
+        if os.path.exists(caminho):
+            return name  # conteúdo já guardado
+        pasta = os.path.dirname(caminho)
+        os.makedirs(pasta, exist_ok=True)
+
+        # grava ao lado e renomeia: nunca fica um blob pela metade no lugar
+        fd, temporario = tempfile.mkstemp(dir=pasta, prefix=".tmp-")
+        try:
+            if hasattr(content, "temporary_file_path"):
+                os.close(fd)
+                file_move_safe(
+                    content.temporary_file_path(), temporario, allow_overwrite=True
+                )
+            else:
+                with os.fdopen(fd, "wb") as destino:
+                    for bloco in content.chunks():
+                        destino.write(bloco)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporario, self.file_permissions_mode)
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        return name
+
+
+def documentos_storage():
+    """Storage de DocumentosLGPD.arquivo (callable: a migração guarda só a referência)."""
+    return ContentAddressedStorage()
@@ -1,3 +1,989 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from .blobs import coletar_lixo, recontar_referencias
+from .file_delivery import IntervaloInvalido, _intervalo
+from .models import (
+    DocumentBlob,
+    DocumentosLGPD,
+    ImpactItem,
+    InventarioDados,
+    LikelihoodItem,
+    Risk,
+    RiskLevelBand,
+    User,
+)
+from .storage import caminho_blob
+
+
+class ApiTestCase(TestCase):
+    """Usuário admin autenticado e os itens de parametrização (migrações)."""
+
+    def setUp(self):
+        # o banco volta a cada teste; as matrizes do heatmap em cache, não
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email="admin@example.com", password="x", role="admin", is_superuser=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.prob = {i.value: i for i in LikelihoodItem.objects.all()}
+        self.imp = {i.value: i for i in ImpactItem.objects.all()}
+
+    def criar_risco(self, prob=3, imp=3, setor="TI", **kwargs):
+        return Risk.objects.create(
+            matriz_filial="matriz",
+            setor=setor,
+            processo="processo",
+            risco_fator=f"fator {setor}",
+            probabilidade=self.prob[prob],
+            impacto=self.imp[imp],
+            **kwargs,
+        )
+
+
+# ============================================================
+# Ranking paginado por cursor (/ranking-riscos/)
+# ============================================================
+
+
+class RankingCursorTests(ApiTestCase):
+    URL = "/api/v1/ranking-riscos/"
+
+    def setUp(self):
+        super().setUp()
+        pares = [(p, i) for p in range(1, 6) for i in range(1, 6)]
+        # pontuações repetidas (ex.: 2x3 e 3x2) exercitam os desempates
+        for n, (p, i) in enumerate(pares + pares[:7]):
+            self.criar_risco(p, i, setor=f"S{n}")
+
+    def _percorrer(self, url, campo="next"):
+        ids, paginas = [], 0
+        while url:
+            data = self.client.get(url).json()
+            ids += [r["id"] for r in data["results"]]
+            url = data[campo]
+            paginas += 1
+        return ids, paginas
+
+    def test_paginas_seguem_a_ordem_da_lista_completa(self):
+        completa = [r["id"] for r in self.client.get(self.URL).json()]
+        ids, paginas = self._percorrer(f"{self.URL}?page_size=5")
+        self.assertEqual(ids, completa)
+        self.assertEqual(paginas, 7)
+
+    def test_previous_volta_pelas_mesmas_paginas(self):
+        url = f"{self.URL}?page_size=4"
+        while True:
+            data = self.client.get(url).json()
+            if not data["next"]:
+                break
+            url = data["next"]
+        volta = [r["id"] for r in data["results"]]
+        while data["previous"]:
+            data = self.client.get(data["previous"]).json()
+            volta = [r["id"] for r in data["results"]] + volta
+        ida, _ = self._percorrer(f"{self.URL}?page_size=4")
+        self.assertEqual(volta, ida)
+
+    def test_ordem_por_pontuacao_impacto_probabilidade(self):
+        linhas = self.client.get(f"{self.URL}?page_size=200&compacto=1").json()
+        chaves = [
+            (r["pontuacao"], r["impacto"], r["probabilidade"])
+            for r in linhas["results"]
+        ]
+        self.assertEqual(chaves, sorted(chaves, reverse=True))
+
+    def test_filtros_da_tela(self):
+        data = self.client.get(f"{self.URL}?page_size=50&impacto=2").json()
+        self.assertTrue(data["results"])
+        self.assertTrue(all(r["impacto"]["value"] == 2 for r in data["results"]))
+
+    def test_cursor_invalido_responde_404(self):
+        def cursor(valores):
+            payload = json.dumps({"v": valores, "r": False}).encode()
+            return base64.urlsafe_b64encode(payload).decode()
+
+        invalidos = [
+            "zzz",
+            cursor([1, 2]),  # quantidade de valores errada
+            # data bem formada mas inexistente
+            cursor([9, 3, 3, "2026-13-45T10:00:00", 1]),
+        ]
+        for valor in invalidos:
+            with self.subTest(cursor=valor):
+                resp = self.client.get(self.URL, {"cursor": valor})
+                self.assertEqual(resp.status_code, 404)
+
+    def test_valores_acompanham_a_parametrizacao(self):
+        from .services import reclassify_risk_bands
+
+        risco = self.criar_risco(5, 5, setor="X")
+        # update() não dispara a reclassificação automática
+        ImpactItem.objects.filter(pk=self.imp[5].pk).update(value=6)
+        reclassify_risk_bands()
+        risco.refresh_from_db()
+        self.assertEqual((risco.impacto_valor, risco.pontuacao), (6, 30))
+
+
+# ============================================================
+# Parametrização em memória (api/risk_params.py)
+# ============================================================
+
+
+class RiskParamsTests(ApiTestCase):
+    def test_escrita_de_outro_processo_invalida_o_snapshot(self):
+        from . import risk_params as rp
+
+        antes = rp.risk_params()
+        # update() + versão nova: como um comando/worker que não é este processo
+        LikelihoodItem.objects.filter(pk=self.prob[1].pk).update(label_pt="Rara")
+        rp._gravar_versao()
+        antes.conferido_em -= rp.RISK_PARAMS_RECHECK
+        depois = rp.risk_params()
+        self.assertIsNot(depois, antes)
+        self.assertEqual(depois.likelihood[self.prob[1].pk].label_pt, "Rara")
+
+    def test_transacao_que_altera_os_itens_enxerga_a_propria_escrita(self):
+        from . import risk_params as rp
+
+        rp.risk_params()
+        item = self.prob[2]
+        item.label_pt = "Improvável"
+        item.save()
+        self.assertEqual(rp.risk_params().likelihood[item.pk].label_pt, "Improvável")
+
+    def test_risk_config_responde_304(self):
+        etag = self.client.get("/api/v1/risk-config/")["ETag"]
+        for valor in (etag, "*", f'"outro", {etag}'):
+            with self.subTest(if_none_match=valor):
+                resp = self.client.get("/api/v1/risk-config/", HTTP_IF_NONE_MATCH=valor)
+                self.assertEqual(resp.status_code, 304)
+        resp = self.client.get("/api/v1/risk-config/", HTTP_IF_NONE_MATCH='"outro"')
+        self.assertEqual(resp.status_code, 200)
+
+
+# ============================================================
+# Reclassificação por faixa (services.reclassify_risk_bands)
+# ============================================================
+
+
+class ReclassificacaoTests(ApiTestCase):
+    def _mover_limite(self, baixo_ate):
+        """Baixo vai até `baixo_ate`, Médio começa logo depois (com os signals)."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for nome, campo, valor in (
+                ("Baixo", "max_score", baixo_ate),
+                ("Médio", "min_score", baixo_ate + 1),
+            ):
+                faixa = RiskLevelBand.objects.get(name=nome)
+                setattr(faixa, campo, valor)
+                faixa.save()
+
+    def _criar_pela_api(self, prob, imp, nivel):
+        item = {
+            "matriz_filial": "matriz",
+            "setor": "TI",
+            "processo": "processo",
+            "risco_fator": "fator",
+            "probabilidade": self.prob[prob].pk,
+            "impacto": self.imp[imp].pk,
+            "risco_residual": nivel,
+        }
+        resp = self.client.post("/api/v1/riscos/", item, format="json")
+        self.assertEqual(resp.status_code, 201, resp.content)
+        return Risk.objects.get(pk=resp.json()["id"])
+
+    def test_faixa_alterada_reclassifica_os_riscos_salvos(self):
+        derivado = self.criar_risco(2, 3)  # 6: Médio
+        confirmado = self._criar_pela_api(2, 3, "medio")  # igual ao das faixas
+        self.assertEqual(derivado.risco_residual, "medio")
+        self.assertFalse(confirmado.risco_residual_manual)
+
+        self._mover_limite(6)
+        for risco in (derivado, confirmado):
+            risco.refresh_from_db()
+            self.assertEqual(risco.risco_residual, "baixo")
+
+    def test_nivel_escolhido_pelo_usuario_e_mantido(self):
+        escolhido = self._criar_pela_api(1, 1, "alto")  # faixas: Baixo
+        self.assertTrue(escolhido.risco_residual_manual)
+        self._mover_limite(0)  # pontuação 1 passa a Médio
+        escolhido.refresh_from_db()
+        self.assertEqual(escolhido.risco_residual, "alto")
+
+        # voltar ao nível das faixas devolve o risco à reclassificação
+        resp = self.client.patch(
+            f"/api/v1/riscos/{escolhido.pk}/",
+            {"risco_residual": "medio"},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        escolhido.refresh_from_db()
+        self.assertFalse(escolhido.risco_residual_manual)
+
+    def test_so_grava_niveis_das_choices(self):
+        from .services import reclassify_risk_bands
+
+        critico = self.criar_risco(5, 5)  # faixa Crítico: sem nível nas choices
+        Risk.objects.update(risco_residual="")
+        reclassify_risk_bands()
+        critico.refresh_from_db()
+        self.assertEqual(critico.risco_residual, "")
+
+
+# ============================================================
+# Gravação em lote (/riscos/bulk/, api/bulk.py)
+# ============================================================
+
+
+class BulkRiscosTests(ApiTestCase):
+    URL = "/api/v1/riscos/bulk/"
+
+    def _item(self, n, prob=2, imp=3, **extra):
+        return {
+            "matriz_filial": "matriz",
+            "setor": f"S{n}",
+            "processo": "processo",
+            "risco_fator": f"fator {n}",
+            "probabilidade": self.prob[prob].pk,
+            "impacto": self.imp[imp].pk,
+            "risco_residual": "baixo",
+            **extra,
+        }
+
+    def test_cria_com_campos_calculados(self):
+        resp = self.client.post(
+            self.URL, [self._item(n) for n in range(5)], format="json"
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json()["criados"], 5)
+        riscos = Risk.objects.filter(pk__in=resp.json()["ids"])
+        self.assertEqual(
+            set(
+                riscos.values_list("pontuacao", "impacto_valor", "probabilidade_valor")
+            ),
+            {(6, 3, 2)},
+        )
+
+    def test_erro_em_uma_linha_nao_grava_nenhuma(self):
+        itens = [
+            self._item(0),
+            self._item(1, probabilidade=999999),
+            self._item(2, matriz_filial="x"),
+        ]
+        resp = self.client.post(self.URL, itens, format="json")
+        self.assertEqual(resp.status_code, 400)
+        erros = resp.json()
+        self.assertEqual(erros[0], {})
+        self.assertIn("probabilidade", erros[1])
+        self.assertIn("matriz_filial", erros[2])
+        self.assertFalse(Risk.objects.exists())
+
+    def test_atualiza_e_recalcula(self):
+        riscos = [self.criar_risco(1, 1, setor=f"S{n}") for n in range(3)]
+        itens = [{"id": r.pk, "impacto": self.imp[5].pk} for r in riscos]
+        resp = self.client.patch(self.URL, itens, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            set(Risk.objects.values_list("pontuacao", "impacto_valor")), {(5, 5)}
+        )
+
+    def test_atualizacao_invalida_desfaz_o_lote(self):
+        riscos = [self.criar_risco(1, 1, setor=f"S{n}") for n in range(3)]
+        itens = [
+            {"id": riscos[0].pk, "setor": "Novo"},
+            {"id": riscos[1].pk, "matriz_filial": "x"},
+        ]
+        resp = self.client.patch(self.URL, itens, format="json")
+        self.assertEqual(resp.status_code, 400)
+        riscos[0].refresh_from_db()
+        self.assertEqual(riscos[0].setor, "S0")
+
+        resp = self.client.patch(
+            self.URL, [{"id": 999999, "setor": "x"}], format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["ids"], ["999999"])
+
+    def test_exclui(self):
+        riscos = [self.criar_risco(setor=f"S{n}") for n in range(4)]
+        ids = [r.pk for r in riscos[:3]] + [999999]
+        resp = self.client.delete(self.URL, {"ids": ids}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["excluidos"], 3)
+        self.assertEqual(
+            list(Risk.objects.values_list("pk", flat=True)), [riscos[3].pk]
+        )
+
+    def test_lote_vazio_ou_grande_demais(self):
+        self.assertEqual(self.client.post(self.URL, [], format="json").status_code, 400)
+        with self.settings(BULK_MAX_ITENS=2):
+            resp = self.client.post(
+                self.URL, [self._item(n) for n in range(3)], format="json"
+            )
+        self.assertEqual(resp.status_code, 400)
+
+
+# ============================================================
+# Busca textual (?search=, api/fulltext.py)
+# ============================================================
+
+
+class BuscaTextualTests(ApiTestCase):
+    URL = "/api/v1/riscos/"
+
+    def _setores(self, busca):
+        data = self.client.get(self.URL, {"search": busca}).json()
+        linhas = data["results"] if isinstance(data, dict) else data
+        return sorted(r["setor"] for r in linhas)
+
+    def test_busca_por_prefixo_no_indice(self):
+        self.criar_risco(setor="Financeiro")
+        self.criar_risco(setor="Jurídico")
+        self.assertEqual(self._setores("finan"), ["Financeiro"])
+        self.assertEqual(self._setores("juridico"), ["Jurídico"])
+
+    def test_sem_palavra_indexavel_usa_search_fields(self):
+        self.criar_risco(setor="X")
+        self.criar_risco(setor="Compras")
+        # "x" (letra solta) e "a" (stopword) não entram no índice
+        self.assertEqual(self._setores("x"), ["X"])
+        self.assertEqual(self._setores("a"), ["Compras", "X"])  # "matriz"
+
+
+# ============================================================
+# GET condicional (api/conditional.py)
+# ============================================================
+
+
+class GetCondicionalTests(ApiTestCase):
+    def _revalidar(self, url):
+        etag = self.client.get(url)["ETag"]
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_dashboard_com_outro_limite_responde_304(self):
+        for url in ("/api/v1/dashboard/", "/api/v1/dashboard/?limit=5"):
+            with self.subTest(url=url):
+                self.assertEqual(self._revalidar(url).status_code, 304)
+
+    @override_settings(AUDIT_LOG_BUFFERED=False)
+    def test_304_registra_access_como_revalidacao(self):
+        from .models import UserActivityLog
+        from .utils.activity import DETALHE_REVALIDACAO
+
+        risco = self.criar_risco()
+        for url in (
+            "/api/v1/riscos/",
+            f"/api/v1/riscos/{risco.pk}/",
+            "/api/v1/dashboard/",
+            "/api/v1/heatmap-riscos/",
+        ):
+            with self.subTest(url=url):
+                UserActivityLog.objects.all().delete()
+                self.assertEqual(self._revalidar(url).status_code, 304)
+                acessos = list(
+                    UserActivityLog.objects.filter(operacao="ACCESS")
+                    .order_by("id")
+                    .values_list("detalhe", flat=True)
+                )
+                self.assertEqual(acessos, ["", DETALHE_REVALIDACAO])
+
+    def test_304_de_outra_pagina_nao_registra_access(self):
+        from .models import UserActivityLog
+
+        self.criar_risco()
+        self.criar_risco(setor="RH")
+        url = "/api/v1/riscos/?page=2&page_size=1"
+        with override_settings(AUDIT_LOG_BUFFERED=False):
+            self.assertEqual(self._revalidar(url).status_code, 304)
+        self.assertFalse(UserActivityLog.objects.filter(operacao="ACCESS").exists())
+
+    def test_dashboard_mostra_o_nome_novo_do_usuario(self):
+        from .models import LoginActivity
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LoginActivity.objects.create(
+                usuario=self.admin, email=self.admin.email, data_login=timezone.now()
+            )
+        url = "/api/v1/dashboard/"
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.first_name = "Ana"
+            self.admin.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        dados = resp.json()
+        self.assertEqual(dados["loginsRecentes"][0]["usuario"], "Ana")
+        self.assertEqual(dados["rankingUsuarios"][0]["nome"], "Ana")
+
+    def test_retrieve_carrega_o_objeto_uma_vez(self):
+        from .views import RiskViewSet
+
+        risco = self.criar_risco()
+        url = f"/api/v1/riscos/{risco.pk}/"
+        original = RiskViewSet.get_object
+        with mock.patch.object(
+            RiskViewSet, "get_object", autospec=True, side_effect=original
+        ) as get_object:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["id"], risco.pk)
+        self.assertEqual(get_object.call_count, 1)
+        self.assertEqual(self._revalidar(url).status_code, 304)
+
+
+# ============================================================
+# Cache do heatmap (api/risk_heatmap.py)
+# ============================================================
+
+
+class HeatmapCacheTests(ApiTestCase):
+    URL = "/api/v1/riscos/heatmap/export/csv/"
+
+    def _contagem(self, prob, imp):
+        resp = self.client.get(self.URL)
+        self.assertEqual(resp.status_code, 200)
+        conteudo = b"".join(resp.streaming_content).decode("utf-8-sig")
+        linhas = csv.reader(conteudo.splitlines())
+        return next(int(c) for p, i, c in linhas if (p, i) == (str(prob), str(imp)))
+
+    def test_escrita_em_outro_worker_troca_a_matriz_do_export(self):
+        self.criar_risco(prob=2, imp=4)
+        self.assertEqual(self._contagem(2, 4), 1)
+
+        # outro processo: a versão local do cache não muda, só a marca do banco
+        with mock.patch("api.risk_heatmap._bump"):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.criar_risco(prob=2, imp=4)
+        self.assertEqual(self._contagem(2, 4), 2)
+
+
+# ============================================================
+# Download de documentos (api/file_delivery.py)
+# ============================================================
+
+
+class ArquivosTestCase(ApiTestCase):
+    """MEDIA_ROOT e DOCUMENTOS_UPLOAD_DIR temporários, apagados no fim do teste."""
+
+    def setUp(self):
+        super().setUp()
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        midia = override_settings(
+            MEDIA_ROOT=os.path.join(pasta, "media"),
+            DOCUMENTOS_UPLOAD_DIR=os.path.join(pasta, "partes"),
+        )
+        midia.enable()
+        self.addCleanup(midia.disable)
+
+    def criar_documento(self, conteudo, nome="evidencia.pdf"):
+        return DocumentosLGPD.objects.create(
+            dimensao="GPV", atividade="Política", arquivo=ContentFile(conteudo, nome)
+        )
+
+
+class IntervaloTests(SimpleTestCase):
+    ETAG = '"abc"'
+    MODIFICADO = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def _intervalo(self, range_="", if_range="", tamanho=100):
+        headers = {"Range": range_} if range_ else {}
+        if if_range:
+            headers["If-Range"] = if_range
+        request = RequestFactory().get("/", headers=headers)
+        return _intervalo(request, tamanho, self.ETAG, self.MODIFICADO)
+
+    def test_intervalos_validos(self):
+        casos = {
+            "bytes=0-9": (0, 9),
+            "bytes=90-": (90, 99),
+            "bytes=95-500": (95, 99),  # fim além do arquivo: corta
+            "bytes=-10": (90, 99),
+            "bytes=-500": (0, 99),
+        }
+        for range_, esperado in casos.items():
+            with self.subTest(range=range_):
+                self.assertEqual(self._intervalo(range_), esperado)
+
+    def test_arquivo_inteiro_quando_o_range_nao_se_aplica(self):
+        for range_ in ("", "items=0-9", "bytes=0-9,20-29", "bytes=9-0", "bytes=a-b"):
+            with self.subTest(range=range_):
+                self.assertIsNone(self._intervalo(range_))
+
+    def test_if_range(self):
+        depois = http_date(self.MODIFICADO.timestamp() + 60)
+        antes = http_date(self.MODIFICADO.timestamp() - 60)
+        self.assertEqual(self._intervalo("bytes=0-9", self.ETAG), (0, 9))
+        self.assertEqual(self._intervalo("bytes=0-9", depois), (0, 9))
+        self.assertIsNone(self._intervalo("bytes=0-9", '"outro"'))
+        self.assertIsNone(self._intervalo("bytes=0-9", antes))
+
+    def test_fora_do_arquivo(self):
+        for range_, tamanho in (
+            ("bytes=100-", 100),
+            ("bytes=-0", 100),
+            ("bytes=-5", 0),
+        ):
+            with self.subTest(range=range_):
+                with self.assertRaises(IntervaloInvalido):
+                    self._intervalo(range_, tamanho=tamanho)
+
+
+class DownloadDocumentoTests(ArquivosTestCase):
+    CONTEUDO = bytes(range(256)) * 4
+
+    def setUp(self):
+        super().setUp()
+        self.doc = self.criar_documento(self.CONTEUDO)
+        self.url = f"/api/v1/documentos/{self.doc.pk}/download/"
+
+    def _corpo(self, resp):
+        return b"".join(resp.streaming_content)
+
+    def test_trecho_206(self):
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp["Content-Range"], f"bytes 10-19/{len(self.CONTEUDO)}")
+        self.assertEqual(self._corpo(resp), self.CONTEUDO[10:20])
+
+    def test_if_range_desatualizado_devolve_o_arquivo_inteiro(self):
+        resp = self.client.get(
+            self.url, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"outro"'
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self._corpo(resp), self.CONTEUDO)
+
+    def test_fora_do_arquivo_416(self):
+        resp = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.CONTEUDO)}-")
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp["Content-Range"], f"bytes */{len(self.CONTEUDO)}")
+
+    def test_media_nao_serve_documentos(self):
+        storage = self.doc.arquivo.storage
+        publico = storage.save("avatars/foto.txt", ContentFile(b"ok"))
+        self.assertEqual(Client().get(f"/media/{publico}").status_code, 200)
+
+        self.assertTrue(storage.exists(self.doc.arquivo.name))
+        for caminho in (self.doc.arquivo.name, f"avatars/../{self.doc.arquivo.name}"):
+            with self.subTest(caminho=caminho):
+                resp = Client().get(f"/media/{caminho}")
+                self.assertEqual(resp.status_code, 404)
+
+
+# ============================================================
+# Upload em partes (api/document_uploads.py)
+# ============================================================
+
+
+class UploadEmPartesTests(ArquivosTestCase):
+    CONTEUDO = os.urandom(3000)
+
+    def setUp(self):
+        super().setUp()
+        self.doc = DocumentosLGPD.objects.create(dimensao="GPV", atividade="Política")
+        base = f"/api/v1/documentos/{self.doc.pk}/upload-sessoes/"
+        data = self.client.post(
+            base, {"nome": "ata.pdf", "tamanho": len(self.CONTEUDO)}, format="json"
+        ).json()
+        self.url = f"{base}{data['id']}/"
+
+    def _parte(self, offset, tamanho=1000):
+        return self.client.put(
+            self.url,
+            self.CONTEUDO[offset : offset + tamanho],
+            content_type="application/octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_partes_em_ordem_e_conclusao(self):
+        for offset in (0, 1000, 2000):
+            resp = self._parte(offset)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp["Upload-Offset"], str(offset + 1000))
+        resp = self.client.post(
+            f"{self.url}concluir/",
+            {"sha256": hashlib.sha256(self.CONTEUDO).hexdigest()},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.doc.refresh_from_db()
+        with self.doc.arquivo.open("rb") as f:
+            self.assertEqual(f.read(), self.CONTEUDO)
+
+    def test_offset_fora_de_ordem_409(self):
+        self._parte(0)
+        resp = self._parte(0)
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()["recebido"], 1000)
+
+    def test_parte_concorrente_409_sem_avancar(self):
+        import fcntl
+
+        from .document_uploads import caminho_parcial
+        from .models import DocumentUpload
+
+        sessao = DocumentUpload.objects.get()
+        with open(caminho_parcial(sessao), "r+b") as outra:
+            fcntl.flock(outra.fileno(), fcntl.LOCK_EX)  # parte em andamento
+            resp = self._parte(0)
+        self.assertEqual(resp.status_code, 409)
+        sessao.refresh_from_db()
+        self.assertEqual(sessao.recebido, 0)
+        self.assertEqual(self._parte(0).status_code, 200)
+
+
+# ============================================================
+# Anexos por conteúdo (api/storage.py, api/blobs.py)
+# ============================================================
+
+
+class BlobsTests(ArquivosTestCase):
+    def _blob(self, conteudo):
+        return DocumentBlob.objects.get(sha256=hashlib.sha256(conteudo).hexdigest())
+
+    def test_mesmo_conteudo_guardado_uma_vez(self):
+        a = self.criar_documento(b"conteudo", "a.pdf")
+        b = self.criar_documento(b"conteudo", "b.pdf")
+        self.assertEqual(a.arquivo.name, b.arquivo.name)
+        self.assertEqual((a.arquivo_nome, b.arquivo_nome), ("a.pdf", "b.pdf"))
+        self.assertEqual(self._blob(b"conteudo").referencias, 2)
+
+        b.arquivo = ContentFile(b"outro", "b.pdf")
+        b.save()
+        a.delete()
+        self.assertEqual(self._blob(b"conteudo").referencias, 0)
+        self.assertEqual(self._blob(b"outro").referencias, 1)
+
+    def test_recontar_referencias(self):
+        doc = self.criar_documento(b"conteudo")
+        DocumentosLGPD.objects.filter(pk=doc.pk).update(blob=None)  # sem signals
+        self.assertEqual(recontar_referencias(), 1)
+        self.assertEqual(self._blob(b"conteudo").referencias, 0)
+        self.assertEqual(recontar_referencias(), 0)
+
+    def test_coleta_so_o_que_esta_parado(self):
+        mantido = self.criar_documento(b"mantido")
+        solto = self.criar_documento(b"solto")
+        nome_solto = solto.arquivo.name
+        solto.delete()
+        storage = mantido.arquivo.storage
+        orfao = storage.save(caminho_blob("f" * 64), ContentFile(b"orfao"))
+
+        # dentro do prazo: nada sai
+        self.assertEqual(coletar_lixo(horas=1)["blobs"], 0)
+        depois = timezone.now() + datetime.timedelta(hours=2)
+        simulado = coletar_lixo(horas=1, agora=depois, simular=True)
+        self.assertEqual((simulado["blobs"], simulado["arquivos"]), (1, 1))
+        self.assertTrue(storage.exists(nome_solto) and storage.exists(orfao))
+
+        resultado = coletar_lixo(horas=1, agora=depois)
+        self.assertEqual((resultado["blobs"], resultado["arquivos"]), (1, 1))
+        self.assertFalse(storage.exists(nome_solto) or storage.exists(orfao))
+        self.assertTrue(storage.exists(mantido.arquivo.name))
+        self.assertTrue(DocumentBlob.objects.filter(pk=mantido.arquivo_sha256).exists())
+
+    def test_arquivo_url_passa_pela_api(self):
+        doc = self.criar_documento(b"%PDF-1.4", "ata.pdf")
+        data = self.client.get(f"/api/v1/documentos/{doc.pk}/").json()
+        self.assertTrue(
+            data["arquivo_url"].endswith(f"/documentos/{doc.pk}/download/?inline=1")
+        )
+        resp = self.client.get(data["arquivo_url"])
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        self.assertIn("ata.pdf", resp["Content-Disposition"])
+        self.assertTrue(resp["Content-Disposition"].startswith("inline"))
+
+
+# ============================================================
+# Resumos e arquivamento da auditoria (api/audit_storage.py)
+# ============================================================
+
+
+class AuditoriaArquivadaTests(TestCase):
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        arquivos = override_settings(AUDIT_ARCHIVE_DIR=pasta)
+        arquivos.enable()
+        self.addCleanup(arquivos.disable)
+
+    def test_rollup_depois_do_arquivamento_mantem_os_resumos(self):
+        from .audit_storage import archive_before, rollup_pending
+        from .models import AuditDailyRollup, UserActivityLog
+
+        hoje = timezone.localdate()
+        antigo = hoje - datetime.timedelta(days=100)
+        momento = timezone.make_aware(
+            datetime.datetime.combine(antigo, datetime.time(10))
+        )
+        for _ in range(3):
+            UserActivityLog.objects.create(
+                modulo="riscos", operacao="ACCESS", timestamp=momento
+            )
+        cutoff = timezone.make_aware(
+            datetime.datetime.combine(
+                hoje - datetime.timedelta(days=90), datetime.time.min
+            )
+        )
+
+        archive_before(cutoff)
+        self.assertFalse(UserActivityLog.objects.exists())
+        resumo = list(AuditDailyRollup.objects.values_list("data", "total"))
+        self.assertEqual(resumo, [(antigo, 3)])
+
+        rollup_pending()
+        self.assertEqual(
+            list(AuditDailyRollup.objects.values_list("data", "total")), resumo
+        )
+
+
+# ============================================================
+# Auditoria em lote (api/utils/audit_buffer.py)
+# ============================================================
+
+
+class AuditBufferTests(TestCase):
+    def setUp(self):
+        self.spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool, ignore_errors=True)
+        config = override_settings(
+            AUDIT_LOG_SPOOL_DIR=self.spool, AUDIT_LOG_BATCH_SIZE=2
+        )
+        config.enable()
+        self.addCleanup(config.disable)
+
+    def _evento(self, operacao="ACCESS"):
+        from .utils.audit_buffer import build_event
+
+        return build_event(usuario=None, modulo="riscos", operacao=operacao)
+
+    def _arquivos(self, padrao="*"):
+        return sorted(
+            os.path.basename(p) for p in glob.glob(os.path.join(self.spool, padrao))
+        )
+
+    def _buffer(self):
+        from .utils.audit_buffer import AuditBuffer
+
+        buffer = AuditBuffer()
+        patcher = mock.patch.object(buffer, "_ensure_timer")  # sem thread no teste
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return buffer
+
+    def test_lote_cheio_em_transacao_fica_para_a_thread(self):
+        from .models import UserActivityLog
+
+        buffer = self._buffer()
+        buffer.enqueue(self._evento())
+        buffer.enqueue(self._evento())  # lote cheio, mas o TestCase está em atomic
+
+        self.assertFalse(UserActivityLog.objects.exists())
+        self.assertTrue(buffer._wake.is_set())
+        self.assertEqual(len(self._arquivos("*.open")), 1)  # spool intacto
+        self.assertTrue(buffer.is_due())
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(UserActivityLog.objects.count(), 2)
+        self.assertEqual(self._arquivos(), [])
+
+    def test_lote_cheio_fora_de_transacao_grava_na_hora(self):
+        from .models import UserActivityLog
+
+        buffer = self._buffer()
+        with mock.patch("api.utils.audit_buffer.connection") as conexao:
+            conexao.in_atomic_block = False
+            buffer.enqueue(self._evento())
+            buffer.enqueue(self._evento())
+
+        self.assertEqual(UserActivityLog.objects.count(), 2)
+        self.assertFalse(buffer._wake.is_set())
+        self.assertEqual(self._arquivos(), [])
+
+    def test_falha_no_banco_deixa_o_lote_para_o_replay(self):
+        from .models import UserActivityLog
+        from .utils.audit_buffer import replay_spool
+
+        buffer = self._buffer()
+        buffer.enqueue(self._evento("CREATE"))
+        with mock.patch(
+            "api.utils.audit_buffer.bulk_insert_events", side_effect=RuntimeError
+        ), self.assertLogs("api.utils.audit_buffer", "ERROR"):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(self._arquivos("*.jsonl")), 1)
+
+        self.assertEqual(replay_spool(), 1)
+        self.assertEqual(
+            list(UserActivityLog.objects.values_list("operacao", flat=True)),
+            ["CREATE"],
+        )
+        self.assertEqual(self._arquivos(), [])
+
+    def test_replay_ignora_linha_truncada_e_orfaos_recentes(self):
+        from .models import UserActivityLog
+        from .utils.audit_buffer import replay_spool
+
+        with open(os.path.join(self.spool, "1-1-1.jsonl"), "w") as fh:
+            fh.write(json.dumps(self._evento()) + "\n")
+            fh.write('{"modulo": "ris')  # queda do processo no meio da linha
+        recente = os.path.join(self.spool, "2-1-1.open")
+        with open(recente, "w") as fh:
+            fh.write(json.dumps(self._evento()) + "\n")
+
+        with self.assertLogs("api.utils.audit_buffer", "WARNING"):
+            self.assertEqual(replay_spool(), 1)
+        self.assertEqual(UserActivityLog.objects.count(), 1)
+        self.assertEqual(self._arquivos(), ["2-1-1.open"])  # pode ser de processo vivo
+
+        antigo = time.time() - 3600
+        os.utime(recente, (antigo, antigo))
+        self.assertEqual(replay_spool(), 1)
+        self.assertEqual(UserActivityLog.objects.count(), 2)
+        self.assertEqual(self._arquivos(), [])
+
+
+# ============================================================
+# Importação de inventários (api/inventario_import.py)
+# ============================================================
+
+
+class ImportacaoInventarioTests(ApiTestCase):
+    URL = "/api/v1/inventarios/import/"
+
+    def _dados(self, **kwargs):
+        from .serializers import InventarioDadosSerializer
+
+        dados = {}
+        for nome in InventarioDadosSerializer.CAMPOS_OBRIGATORIOS:
+            field = InventarioDados._meta.get_field(nome)
+            dados[nome] = field.choices[0][0] if field.choices else f"{nome} teste"
+        dados["responsavel_email"] = "dpo@example.com"
+        dados.update(kwargs)
+        return dados
+
+    def _csv(self, *linhas, encoding="utf-8", cabecalho_ascii=False):
+        from .utils.export import INVENTARIO_COLUNAS
+
+        # cabeçalho pelos rótulos das exportações (ou pelos nomes dos campos)
+        titulos = [
+            campo if cabecalho_ascii else rotulo for campo, rotulo in INVENTARIO_COLUNAS
+        ]
+        saida = [";".join(titulos)]
+        for dados in linhas:
+            saida.append(
+                ";".join(str(dados.get(campo) or "") for campo, _ in INVENTARIO_COLUNAS)
+            )
+        return ("\n".join(saida) + "\n").encode(encoding)
+
+    def _importar(self, conteudo, nome="inventarios.csv", query=""):
+        arquivo = ContentFile(conteudo, name=nome)
+        return self.client.post(
+            self.URL + query, {"arquivo": arquivo}, format="multipart"
+        )
+
+    def _exportar(self, formato):
+        resp = self.client.get(f"/api/v1/inventarios/export/{formato}/")
+        self.assertEqual(resp.status_code, 200)
+        if resp.streaming:
+            return b"".join(resp.streaming_content)
+        return resp.content
+
+    def test_reimporta_o_proprio_export(self):
+        for formato in ("csv", "xlsx"):
+            with self.subTest(formato=formato):
+                InventarioDados.objects.all().delete()
+                InventarioDados.objects.create(
+                    criado_por=self.admin, **self._dados(setor="Jurídico")
+                )
+                conteudo = self._exportar(formato)
+                InventarioDados.objects.all().delete()
+
+                resp = self._importar(conteudo, f"inventarios.{formato}")
+                self.assertEqual(resp.status_code, 200, resp.content)
+                self.assertEqual(resp.json()["importados"], 1)
+                self.assertIsNone(resp.json()["erro_leitura"])
+                inv = InventarioDados.objects.get()
+                self.assertEqual(inv.setor, "Jurídico")
+                self.assertEqual(inv.criado_por, self.admin)
+
+    def test_erros_por_linha_e_dry_run(self):
+        from .utils.export import INVENTARIO_COLUNAS
+
+        rotulo = dict(INVENTARIO_COLUNAS)["setor"]
+        conteudo = self._csv(self._dados(), self._dados(setor=""), self._dados())
+
+        resp = self._importar(conteudo, query="?dry_run=1")
+        self.assertEqual(resp.status_code, 200)
+        dados = resp.json()
+        self.assertEqual((dados["linhas"], dados["importados"]), (3, 2))
+        self.assertTrue(dados["dry_run"])
+        self.assertEqual(dados["erros"][0]["linha"], 3)
+        self.assertIn(rotulo, dados["erros"][0]["erros"])
+        self.assertFalse(InventarioDados.objects.exists())
+
+        resp = self._importar(conteudo)
+        self.assertEqual(resp.json()["importados"], 2)
+        self.assertEqual(InventarioDados.objects.count(), 2)
+
+    def test_cp1252_depois_da_amostra(self):
+        from .utils.spreadsheet_import import AMOSTRA_BYTES
+
+        # início em ASCII (detectado como UTF-8), acentos do Excel só no fim
+        linhas = [
+            self._dados(observacao="x" * 500) for _ in range(AMOSTRA_BYTES // 500)
+        ]
+        linhas.append(self._dados(setor="Produção"))
+        conteudo = self._csv(*linhas, encoding="cp1252", cabecalho_ascii=True)
+        self.assertGreater(conteudo.find("Produção".encode("cp1252")), AMOSTRA_BYTES)
+
+        resp = self._importar(conteudo)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.json()["importados"], len(linhas))
+        self.assertTrue(InventarioDados.objects.filter(setor="Produção").exists())
+
+    @override_settings(INVENTARIO_IMPORT_CHUNK_SIZE=1, AUDIT_LOG_BUFFERED=False)
+    def test_falha_de_leitura_no_meio_devolve_o_parcial(self):
+        from .models import UserActivityLog
+
+        conteudo = self._csv(
+            self._dados(setor="Primeiro"),
+            self._dados(observacao="x" * (csv.field_size_limit() + 1)),
+            self._dados(setor="Depois"),
+        )
+        resp = self._importar(conteudo)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        dados = resp.json()
+        self.assertEqual(dados["importados"], 1)
+        self.assertIn("após a linha 2", dados["erro_leitura"])
+        self.assertEqual(
+            list(InventarioDados.objects.values_list("setor", flat=True)),
+            ["Primeiro"],
+        )
+        log = UserActivityLog.objects.get(operacao="CREATE")
+        self.assertEqual(log.resultado, "ERROR")
+        self.assertIn("após a linha 2", log.detalhe)
@@ -0,0 +1,149 @@
+# api/timeseries.py
+"""
+Séries mensais calculadas no banco (Dashboard e /dashboard/series/).
+
+Um GROUP BY por TruncMonth, com uma contagem condicional por coluna da
+série. Os meses são datas (o primeiro dia do mês) até a montagem do
+resultado: o rótulo exibido ("Oct/25", que o front traduz) não depende do
+locale do servidor e a ordem é a cronológica.
+
+- meses=N limita aos últimos N meses até o mês de hoje (meses futuros com
+  dados, como prazos de planos, continuam na série);
+- preencher=True inclui, zerados, os meses sem registros;
+- por="campo" devolve uma série por valor do campo (ex.: setor).
+"""
+import datetime
+
+from django.db.models import Aggregate, Count, DateField, DateTimeField, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+# abreviações fixas (C locale), no formato que o front já traduz (traduzMes)
+ROTULOS_MES = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+def somar_meses(mes, n):
+    """Primeiro dia do mês `n` meses depois (ou antes, se negativo) de `mes`."""
+    total = mes.year * 12 + mes.month - 1 + n
+    return datetime.date(total // 12, total % 12 + 1, 1)
+
+
+def inicio_da_janela(meses, hoje=None):
+    """Primeiro dia do mês mais antigo da janela dos últimos `meses` meses."""
+    hoje = hoje or timezone.localdate()
+    return somar_meses(hoje.replace(day=1), -(meses - 1))
+
+
+def rotulo_mes(mes):
+    return f"{ROTULOS_MES[mes.month - 1]}/{mes:%y}"
+
+
+def _agregado(filtro):
+    if filtro is None:
+        return Count("pk")
+    if isinstance(filtro, Aggregate):
+        return filtro
+    return Count("pk", filter=filtro)
+
+
+def _montar(por_mes, colunas, meses, hoje, preencher):
+    """{mes: {coluna: n}} -> lista em ordem cronológica."""
+    if preencher and (por_mes or meses):
+        if meses:
+            hoje = hoje or timezone.localdate()
+            inicio = inicio_da_janela(meses, hoje)
+            fim = max([*por_mes, hoje.replace(day=1)])
+        else:
+            inicio, fim = min(por_mes), max(por_mes)
+        mes = inicio
+        while mes <= fim:
+            por_mes.setdefault(mes, {})
+            mes = somar_meses(mes, 1)
+    return [
+        {
+            "periodo": f"{mes:%Y-%m}",
+            "mes": rotulo_mes(mes),
+            **{c: por_mes[mes].get(c) or 0 for c in colunas},
+        }
+        for mes in sorted(por_mes)
+    ]
+
+
+def serie_mensal(
+    qs, data, contagens=None, *, meses=None, hoje=None, por=None, preencher=True
+):
+    """
+    Série mensal de `qs` pela data `data` (nome do campo ou expressão).
+
+    contagens: {coluna: Q | agregado | None}; Q conta as linhas que casam,
+    None conta todas (padrão: {"qtd": None}).
+    Retorna [{"periodo": "2025-10", "mes": "Oct/25", coluna: n, ...}] ou,
+    com `por`, {valor do campo: [...]} (todas no mesmo intervalo de meses).
+    """
+    contagens = contagens or {"qtd": None}
+    hoje = hoje or timezone.localdate()
+
+    qs = qs.order_by().alias(_data=F(data) if isinstance(data, str) else data)
+    qs = qs.filter(_data__isnull=False)
+    if meses:
+        inicio = inicio_da_janela(meses, hoje)
+        if isinstance(qs.query.annotations["_data"].output_field, DateTimeField):
+            inicio = timezone.make_aware(
+                datetime.datetime.combine(inicio, datetime.time.min)
+            )
+        qs = qs.filter(_data__gte=inicio)
+
+    grupos = ["_mes", por] if por else ["_mes"]
+    linhas = (
+        qs.annotate(_mes=TruncMonth("_data", output_field=DateField()))
+        .values(*grupos)
+        .annotate(**{c: _agregado(f) for c, f in contagens.items()})
+        .order_by(*grupos)
+    )
+
+    colunas = list(contagens)
+    if not por:
+        por_mes = {linha.pop("_mes"): linha for linha in linhas}
+        return _montar(por_mes, colunas, meses, hoje, preencher)
+
+    por_grupo, todos = {}, set()
+    for linha in linhas:
+        mes = linha.pop("_mes")
+        por_grupo.setdefault(linha.pop(por), {})[mes] = linha
+        todos.add(mes)
+    series = {}
+    for grupo, por_mes in por_grupo.items():
+        if preencher:
+            # mesmo intervalo para todos os grupos
+            por_mes.update({m: {} for m in todos - set(por_mes)})
+        series[grupo] = _montar(por_mes, colunas, meses, hoje, preencher)
+    return series
+
+
+def somar_series(*series, meses=None, hoje=None, preencher=True):
+    """Soma séries mensais (mesmas colunas) mês a mês, ex.: resumos + tabela viva."""
+    por_mes, colunas = {}, []
+    for serie in series:
+        for ponto in serie:
+            mes = datetime.date.fromisoformat(f"{ponto['periodo']}-01")
+            acumulado = por_mes.setdefault(mes, {})
+            for coluna, valor in ponto.items():
+                if coluna in ("periodo", "mes"):
+                    continue
+                if coluna not in colunas:
+                    colunas.append(coluna)
+                acumulado[coluna] = acumulado.get(coluna, 0) + valor
+    return _montar(por_mes, colunas, meses, hoje, preencher)
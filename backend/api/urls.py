@@ -26,6 +26,8 @@ from .views import (
     HeatmapRiscoViewSet,
     LoginActivityViewSet,
     UserActivityLogViewSet,
+    ExportJobViewSet,
+    GlobalSearchViewSet,
 )
 
 from .views_dashboard import DashboardViewSet
@@ -52,6 +54,8 @@ router.register(r"calendarevent", CalendarEventViewSet, basename="calendarevent"
 router.register(r"dashboard", DashboardViewSet, basename="dashboard")
 router.register(r"audit/logins", LoginActivityViewSet, basename="audit-logins")
 router.register(r"audit/acoes", UserActivityLogViewSet, basename="audit-acoes")
+router.register(r"exportacoes", ExportJobViewSet, basename="exportacoes")
+router.register(r"search", GlobalSearchViewSet, basename="search")
 
 
 urlpatterns = [
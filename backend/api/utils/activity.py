@@ -1,9 +1,14 @@
 from datetime import timedelta
 from django.utils import timezone
+from rest_framework.response import Response
 
-from api.models import UserActivityLog, LoginActivity
+from api.models import LoginActivity
+from api.utils.audit_buffer import record_activity
 from api.utils.request_utils import get_client_ip, get_user_agent
 
+# detalhe do ACCESS de uma resposta 304 (GET condicional)
+DETALHE_REVALIDACAO = "revalidação (304): tela já carregada, sem alterações"
+
 
 def log_login_activity(request, user):
     """
@@ -38,19 +43,18 @@ class AuditLogMixin:
         return self.audit_module or self.__class__.__name__.lower()
 
     def _log(self, request, operacao, obj=None, detalhe="", resultado="SUCCESS"):
+        # entra na fila de auditoria (gravação em lote fora do caminho da resposta)
         user = request.user if request.user.is_authenticated else None
-        email = getattr(user, "email", None)
 
-        UserActivityLog.objects.create(
+        record_activity(
             usuario=user,
-            email=email,
             modulo=self.get_audit_module(),
             view_name=self.__class__.__name__,
             operacao=operacao,
             registro_id=str(getattr(obj, "pk", "")) if obj else None,
             ip=get_client_ip(request),
             resultado=resultado,
-            detalhe=str(detalhe)[:5000],
+            detalhe=detalhe,
         )
 
     # ---------- CORRETO E DEFINITIVO ----------
@@ -72,6 +76,10 @@ class AuditLogMixin:
         # View SEM paginação (Dashboard, Heatmap, Ranking, etc.)
         self._log(request, "ACCESS", obj=obj, detalhe=detalhe)
 
+    def _log_revalidacao(self, request, obj=None):
+        """ACCESS de uma 304: mesma regra de página, marcado como revalidação."""
+        self._log_access(request, obj=obj, detalhe=DETALHE_REVALIDACAO)
+
     # -----------------------------
     # CREATE / UPDATE / DELETE
     # -----------------------------
@@ -104,6 +112,11 @@ class AuditLogMixin:
         return super().list(request, *args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
-        response = super().retrieve(request, *args, **kwargs)
-        self._log(request, "ACCESS", obj=self.get_object())  # 🔹 Uma vez só
-        return response
+        # mesmo fluxo do RetrieveModelMixin, reaproveitando o objeto no log
+        return self.resposta_retrieve(request, self.get_object())
+
+    def resposta_retrieve(self, request, instance):
+        """Resposta do retrieve para um objeto já carregado (e o log ACCESS)."""
+        serializer = self.get_serializer(instance)
+        self._log(request, "ACCESS", obj=instance)  # 🔹 Uma vez só
+        return Response(serializer.data)
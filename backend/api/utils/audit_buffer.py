@@ -0,0 +1,331 @@
+# api/utils/audit_buffer.py
+"""
+Gravação assíncrona em lote dos logs de auditoria (UserActivityLog).
+
+- Cada evento vai para uma fila em memória do processo e é gravado com bulk_create
+  quando a fila atinge AUDIT_LOG_BATCH_SIZE, quando o evento mais antigo passa de
+  AUDIT_LOG_FLUSH_SECONDS (thread de fundo) ou ao fim da requisição, se já vencido.
+- Lote cheio dentro de uma transação (atomic) não é gravado ali: um rollback
+  levaria os eventos, com o spool já apagado. A thread de fundo é acordada e
+  grava com a conexão dela.
+- Antes de entrar na fila o evento é anexado a um arquivo JSONL ("spool") em
+  AUDIT_LOG_SPOOL_DIR. O arquivo só é apagado depois que o lote foi gravado no banco;
+  se o banco falhar ou o processo cair, os eventos são reprocessados por
+  replay_spool() / `manage.py flush_audit_spool`.
+
+Ciclo de vida dos arquivos do spool:
+  <pid>-<seq>.open      segmento recebendo eventos
+  <pid>-<seq>.flushing  lote sendo gravado
+  <pid>-<seq>.jsonl     lote cuja gravação falhou (pendente de reprocessamento)
+"""
+import atexit
+import datetime
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# segmentos .open/.flushing sem escrita há mais que isso pertencem a processo encerrado
+ORPHAN_AGE_SECONDS = 600
+
+# intervalo mínimo entre reprocessamentos automáticos do spool
+REPLAY_INTERVAL_SECONDS = 60
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def build_event(
+    *,
+    usuario,
+    modulo,
+    operacao,
+    view_name=None,
+    registro_id=None,
+    ip=None,
+    resultado="SUCCESS",
+    detalhe="",
+):
+    """Monta o evento já serializável (vai para o spool como JSON)."""
+    return {
+        "usuario_id": getattr(usuario, "pk", None),
+        "email": getattr(usuario, "email", None),
+        "modulo": modulo,
+        "view_name": view_name,
+        "operacao": operacao,
+        "registro_id": registro_id,
+        "ip": ip,
+        "resultado": resultado,
+        "detalhe": str(detalhe)[:5000],
+        "timestamp": timezone.now().isoformat(),
+    }
+
+
+def bulk_insert_events(events, check_users=True):
+    """Grava os eventos num único bulk_create (em lotes de AUDIT_LOG_BATCH_SIZE)."""
+    from api.models import User, UserActivityLog
+
+    if not events:
+        return 0
+
+    user_ids = {e["usuario_id"] for e in events if e.get("usuario_id")}
+    if check_users and user_ids:
+        # usuário pode ter sido excluído entre o evento e a gravação (FK SET_NULL)
+        existentes = set(
+            User.objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+        )
+    else:
+        existentes = user_ids
+
+    objs = []
+    for e in events:
+        usuario_id = e.get("usuario_id")
+        objs.append(
+            UserActivityLog(
+                usuario_id=usuario_id if usuario_id in existentes else None,
+                email=e.get("email"),
+                modulo=e["modulo"],
+                view_name=e.get("view_name"),
+                operacao=e["operacao"],
+                registro_id=e.get("registro_id"),
+                ip=e.get("ip"),
+                resultado=e.get("resultado") or "SUCCESS",
+                detalhe=e.get("detalhe"),
+                timestamp=datetime.datetime.fromisoformat(e["timestamp"]),
+            )
+        )
+    UserActivityLog.objects.bulk_create(
+        objs, batch_size=_setting("AUDIT_LOG_BATCH_SIZE", 200)
+    )
+    return len(objs)
+
+
+def _read_spool_file(path):
+    events = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                # última linha truncada por queda do processo
+                logger.warning(
+                    "Linha inválida ignorada no spool de auditoria: %s", path
+                )
+    return events
+
+
+def replay_spool(include_orphans=True):
+    """
+    Regrava no banco os segmentos pendentes do spool.
+    Cada arquivo é reivindicado por rename, então vários processos podem chamar
+    esta função ao mesmo tempo sem duplicar eventos.
+    """
+    spool_dir = _setting("AUDIT_LOG_SPOOL_DIR", None)
+    if not spool_dir or not os.path.isdir(spool_dir):
+        return 0
+
+    candidatos = glob.glob(os.path.join(spool_dir, "*.jsonl"))
+    if include_orphans:
+        limite = time.time() - ORPHAN_AGE_SECONDS
+        for pattern in ("*.open", "*.flushing", "*.replay-*"):
+            for path in glob.glob(os.path.join(spool_dir, pattern)):
+                try:
+                    if os.path.getmtime(path) < limite:
+                        candidatos.append(path)
+                except OSError:
+                    pass
+
+    total = 0
+    for path in candidatos:
+        claimed = f"{path.rsplit('.', 1)[0]}.replay-{uuid.uuid4().hex}"
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            continue  # outro processo já pegou
+        try:
+            total += bulk_insert_events(_read_spool_file(claimed))
+        except Exception:
+            logger.exception("Falha ao reprocessar spool de auditoria %s", path)
+            os.rename(claimed, f"{path.rsplit('.', 1)[0]}.jsonl")
+            continue
+        os.remove(claimed)
+    return total
+
+
+class AuditBuffer:
+    """Fila de eventos de auditoria do processo atual (thread-safe)."""
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._events = []
+        self._first_at = None
+        self._segment = None
+        self._segment_path = None
+        self._seq = 0
+        self._timer = None
+        self._wake = threading.Event()
+        self._last_replay = 0.0
+
+    def _check_fork(self):
+        # processo filho (fork) começa com fila vazia; os eventos do pai são do pai
+        if self._pid != os.getpid():
+            self._reset()
+
+    # ---------- spool ----------
+    def _spool_write(self, event):
+        spool_dir = _setting("AUDIT_LOG_SPOOL_DIR", None)
+        if not spool_dir:
+            return
+        if self._segment is None:
+            os.makedirs(spool_dir, exist_ok=True)
+            self._seq += 1
+            self._segment_path = os.path.join(
+                spool_dir, f"{self._pid}-{int(time.time())}-{self._seq}.open"
+            )
+            self._segment = open(self._segment_path, "a", encoding="utf-8")
+        self._segment.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._segment.flush()
+        if _setting("AUDIT_LOG_SPOOL_FSYNC", False):
+            os.fsync(self._segment.fileno())
+
+    def _close_segment(self):
+        """Fecha o segmento atual e o renomeia para .flushing (chamar com o lock)."""
+        if self._segment is None:
+            return None
+        self._segment.close()
+        flushing = self._segment_path[: -len(".open")] + ".flushing"
+        os.replace(self._segment_path, flushing)
+        self._segment = None
+        self._segment_path = None
+        return flushing
+
+    # ---------- fila ----------
+    def enqueue(self, event):
+        self._check_fork()
+        with self._lock:
+            try:
+                self._spool_write(event)
+            except OSError:
+                logger.exception("Falha ao gravar evento no spool de auditoria")
+            self._events.append(event)
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            cheio = len(self._events) >= _setting("AUDIT_LOG_BATCH_SIZE", 200)
+        self._ensure_timer()
+        if cheio:
+            if connection.in_atomic_block:
+                self._wake.set()  # fora da transação de quem registrou
+            else:
+                self.flush()
+
+    def is_due(self):
+        with self._lock:
+            if not self._events:
+                return False
+            if len(self._events) >= _setting("AUDIT_LOG_BATCH_SIZE", 200):
+                return True
+            idade = time.monotonic() - self._first_at
+            return idade >= _setting("AUDIT_LOG_FLUSH_SECONDS", 5)
+
+    def flush_if_due(self):
+        self._check_fork()
+        if self.is_due():
+            self.flush()
+
+    def flush(self):
+        """Grava tudo o que estiver na fila. Retorna a quantidade gravada."""
+        self._check_fork()
+        with self._lock:
+            events, self._events = self._events, []
+            self._first_at = None
+            segment = self._close_segment()
+        if not events:
+            return 0
+
+        try:
+            total = bulk_insert_events(events)
+        except Exception:
+            logger.exception("Falha ao gravar %s evento(s) de auditoria", len(events))
+            if segment:
+                # fica pendente para replay_spool()
+                os.replace(segment, segment[: -len(".flushing")] + ".jsonl")
+            return 0
+
+        if segment:
+            os.remove(segment)
+
+        # aproveita que o banco respondeu para reprocessar lotes que falharam antes
+        if time.monotonic() - self._last_replay > REPLAY_INTERVAL_SECONDS:
+            self._last_replay = time.monotonic()
+            try:
+                replay_spool(include_orphans=False)
+            except Exception:
+                logger.exception("Falha ao reprocessar spool de auditoria")
+        return total
+
+    # ---------- thread de fundo ----------
+    def _ensure_timer(self):
+        if self._timer is not None and self._timer.is_alive():
+            return
+        with self._lock:
+            if self._timer is not None and self._timer.is_alive():
+                return
+            self._timer = threading.Thread(
+                target=self._run_timer, name="audit-log-flusher", daemon=True
+            )
+            self._timer.start()
+
+    def _run_timer(self):
+        intervalo = max(0.5, _setting("AUDIT_LOG_FLUSH_SECONDS", 5) / 2)
+        pid = self._pid
+        while pid == os.getpid():
+            self._wake.wait(intervalo)  # ou antes, se um lote encheu
+            self._wake.clear()
+            try:
+                if self.is_due():
+                    self.flush()
+            except Exception:
+                logger.exception("Falha no flush periódico da auditoria")
+            finally:
+                # conexões desta thread não são gerenciadas pelo ciclo de requisição
+                connections.close_all()
+
+
+audit_buffer = AuditBuffer()
+
+
+def record_activity(**fields):
+    """
+    Registra um evento de auditoria. Com AUDIT_LOG_BUFFERED=False grava na hora
+    (comportamento original); caso contrário entra na fila em lote.
+    """
+    event = build_event(**fields)
+    if not _setting("AUDIT_LOG_BUFFERED", True):
+        bulk_insert_events([event], check_users=False)
+        return
+    audit_buffer.enqueue(event)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        audit_buffer.flush()
+    except Exception:
+        logger.exception("Falha ao gravar auditoria no encerramento")
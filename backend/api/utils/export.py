@@ -0,0 +1,284 @@
+# api/utils/export.py
+"""
+Camada comum de exportação (CSV/XLSX/PDF).
+
+- Colunas e formatação de valores (bool/data/datetime) compartilhadas por todos os formatos.
+- Geradores de linhas que percorrem o queryset com iterator(), sem montar listas em memória.
+- Resposta CSV em streaming: o primeiro byte sai antes da consulta terminar.
+- XLSX em modo write-only do openpyxl (memória constante), gravado em arquivo temporário.
+"""
+import csv
+import datetime
+import tempfile
+from zoneinfo import ZoneInfo
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+BR_TZ = ZoneInfo("America/Sao_Paulo")
+
+# Quantidade de registros lidos do banco por vez (iterator)
+CHUNK_SIZE = 2000
+
+# Tamanho aproximado (em caracteres) de cada bloco enviado ao cliente
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+# ============================================================
+# Formatação
+# ============================================================
+
+
+def format_value(val):
+    """Converte um valor do modelo para o texto usado nos arquivos exportados."""
+    if val is None:
+        return ""
+    if isinstance(val, bool):
+        return "Sim" if val else "Não"
+    if isinstance(val, datetime.datetime):
+        if timezone.is_naive(val):
+            val = timezone.make_aware(val, timezone.get_default_timezone())
+        return timezone.localtime(val, BR_TZ).strftime("%d/%m/%Y %H:%M")
+    if isinstance(val, datetime.date):
+        return val.strftime("%d/%m/%Y")
+    return val
+
+
+def timestamp_br():
+    """Carimbo usado no nome dos arquivos: 03-09-2025_16h33min."""
+    dt = timezone.localtime(timezone.now(), timezone=BR_TZ)
+    return f"{dt.day:02d}-{dt.month:02d}-{dt.year}_{dt.hour:02d}h{dt.minute:02d}min"
+
+
+def set_attachment_headers(resp, file_name):
+    resp["Content-Disposition"] = (
+        f"attachment; filename*=UTF-8''{file_name}; filename=\"{file_name}\""
+    )
+    resp["Access-Control-Expose-Headers"] = "Content-Disposition"
+    return resp
+
+
+# ============================================================
+# Inventário de Dados
+# ============================================================
+
+INVENTARIO_COLUNAS = [
+    ("id", "ID"),
+    ("unidade", "Unidade"),
+    ("setor", "Setor"),
+    ("responsavel_email", "Responsável (E-mail)"),
+    ("processo_negocio", "Processo de Negócio"),
+    ("finalidade", "Finalidade"),
+    ("dados_pessoais", "Dados Pessoais"),
+    ("tipo_dado", "Tipo de Dado"),
+    ("origem", "Origem"),
+    ("formato", "Formato"),
+    ("impresso", "Impresso"),
+    ("titulares", "Titulares"),
+    ("dados_menores", "Dados de menores"),
+    ("base_legal", "Base Legal"),
+    ("pessoas_acesso", "Pessoas com Acesso"),
+    ("atualizacoes", "Atualizações (Quando)"),
+    ("transmissao_interna", "Transmissão Interna"),
+    ("transmissao_externa", "Transmissão Externa"),
+    ("local_armazenamento_digital", "Local Armazenamento (Digital)"),
+    ("controlador_operador", "Controlador/Operador"),
+    ("motivo_retencao", "Motivo Retenção"),
+    ("periodo_retencao", "Período Retenção"),
+    ("exclusao", "Exclusão"),
+    ("forma_exclusao", "Forma Exclusão"),
+    ("transferencia_terceiros", "Transf. a Terceiros"),
+    ("quais_dados_transferidos", "Quais Dados Transferidos"),
+    ("transferencia_internacional", "Transf. Internacional"),
+    ("empresa_terceira", "Empresa Terceira"),
+    ("adequado_contratualmente", "Adequado Contratualmente"),
+    ("paises_tratamento", "Países Tratamento"),
+    ("medidas_seguranca", "Medidas de Segurança"),
+    ("consentimentos", "Consentimentos"),
+    ("observacao", "Observação"),
+    ("criado_por", "Criado por (email)"),
+    ("data_criacao", "Data Criação"),
+    ("data_atualizacao", "Última Atualização"),
+]
+
+
+def inventario_raw_value(obj, field):
+    if field == "criado_por":
+        return getattr(getattr(obj, "criado_por", None), "email", "") or ""
+    return getattr(obj, field, "")
+
+
+def inventario_rows(qs, cols=INVENTARIO_COLUNAS):
+    """Gera as linhas do inventário já formatadas, uma por registro."""
+    for obj in qs.iterator(chunk_size=CHUNK_SIZE):
+        yield [format_value(inventario_raw_value(obj, field)) for field, _ in cols]
+
+
+# ============================================================
+# Ranking de Riscos
+# ============================================================
+
+RANKING_ORDERING = (
+    "-pontuacao",
+    "-impacto_valor",
+    "-probabilidade_valor",
+    "-criado_em",
+)
+
+RANKING_CABECALHOS = [
+    "ID",
+    "Matriz/Filial",
+    "Setor",
+    "Processo",
+    "Risco e Fator de Risco",
+    "Prob (valor)",
+    "Prob (rótulo)",
+    "Impacto (valor)",
+    "Impacto (rótulo)",
+    "Pontuação",
+    "Risco Residual",
+    "Medidas de Controle",
+    "Tipo Ctrl (C/D)",
+    "Eficácia (rótulo)",
+    "Resposta ao Risco",
+    "Criado em",
+]
+
+
+def ranking_rows(qs):
+    """Linhas do ranking (CSV/XLSX). Espera queryset com select_related dos itens."""
+    for r in qs.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            r.id,
+            r.matriz_filial,
+            r.setor,
+            r.processo,
+            r.risco_fator,
+            getattr(getattr(r, "probabilidade", None), "value", None),
+            getattr(getattr(r, "probabilidade", None), "label_pt", None),
+            getattr(getattr(r, "impacto", None), "value", None),
+            getattr(getattr(r, "impacto", None), "label_pt", None),
+            r.pontuacao,
+            r.risco_residual,
+            r.medidas_controle or "",
+            r.tipo_controle or "",
+            getattr(getattr(r, "eficacia", None), "label_pt", None) or "",
+            r.resposta_risco or "",
+            format_value(r.criado_em),
+        ]
+
+
+# ============================================================
+# CSV em streaming
+# ============================================================
+
+
+class _Echo:
+    """Pseudo-arquivo: o csv.writer devolve a linha em vez de gravá-la."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, headers=None):
+    """
+    Serializa as linhas em CSV (com BOM p/ Excel abrir acentos),
+    agrupando em blocos de ~STREAM_BUFFER_SIZE para não enviar uma linha por write.
+    """
+    writer = csv.writer(_Echo(), lineterminator="\n")
+
+    # BOM + cabe\u00e7alho saem de imediato, antes da primeira leitura do banco
+    yield "\ufeff" + (writer.writerow(headers) if headers else "")
+
+    buf, size = [], 0
+    for row in rows:
+        line = writer.writerow(row)
+        buf.append(line)
+        size += len(line)
+        if size >= STREAM_BUFFER_SIZE:
+            yield "".join(buf)
+            buf, size = [], 0
+
+    if buf:
+        yield "".join(buf)
+
+
+def streaming_csv_response(rows, file_name, headers=None):
+    resp = StreamingHttpResponse(
+        iter_csv(rows, headers), content_type="text/csv; charset=utf-8"
+    )
+    return set_attachment_headers(resp, file_name)
+
+
+# ============================================================
+# XLSX (write-only)
+# ============================================================
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def write_xlsx(
+    fileobj,
+    title,
+    headers,
+    rows,
+    *,
+    min_width=10,
+    max_width=50,
+    freeze_header=False,
+    autofilter=False,
+):
+    """
+    Grava uma planilha em `fileobj` usando Workbook(write_only=True).
+    As linhas são consumidas uma a uma (gerador), sem manter células em memória.
+    Retorna a quantidade de linhas de dados escritas.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+
+    # largura e congelamento precisam ser definidos antes da primeira linha
+    for col_idx, label in enumerate(headers, start=1):
+        width = max(min_width, min(max_width, len(str(label)) + 2))
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+    if freeze_header:
+        ws.freeze_panes = "A2"
+
+    header_font = Font(bold=True)
+    fill = PatternFill(start_color="E6F0FF", end_color="E6F0FF", fill_type="solid")
+    alignment = Alignment(horizontal="center", vertical="center")
+    header_row = []
+    for label in headers:
+        cell = WriteOnlyCell(ws, value=label)
+        cell.font = header_font
+        cell.fill = fill
+        cell.alignment = alignment
+        header_row.append(cell)
+    ws.append(header_row)
+
+    total = 0
+    for row in rows:
+        ws.append(row)
+        total += 1
+
+    # o autofiltro só é serializado no fechamento, então já sabemos o total
+    if autofilter:
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{total + 1}"
+
+    wb.save(fileobj)
+    return total
+
+
+def xlsx_response(title, headers, rows, file_name, **options):
+    """
+    Gera o XLSX num arquivo temporário e o devolve via FileResponse,
+    que envia em blocos e apaga o temporário ao fechar.
+    """
+    tmp = tempfile.TemporaryFile(suffix=".xlsx")
+    write_xlsx(tmp, title, headers, rows, **options)
+    tmp.seek(0)
+    resp = FileResponse(tmp, content_type=XLSX_CONTENT_TYPE)
+    return set_attachment_headers(resp, file_name)
@@ -0,0 +1,140 @@
+# api/utils/spreadsheet_import.py
+"""
+Leitura de planilhas (CSV/XLSX) para importação, linha a linha.
+
+- CSV: lido em streaming do arquivo enviado (sem carregar tudo em memória);
+  encoding (UTF-8, com ou sem BOM, ou cp1252 do Excel) e separador (, ou ;)
+  detectados pelo início do arquivo. Bytes inválidos em UTF-8 depois da
+  amostra são lidos como cp1252 (a importação já pode ter gravado blocos).
+- XLSX: openpyxl em modo read-only (as linhas são lidas do zip sob demanda).
+- Cabeçalhos casados pelos mesmos rótulos das exportações (ou pelo nome do campo).
+"""
+import codecs
+import csv
+import datetime
+import io
+import unicodedata
+
+from openpyxl import load_workbook
+
+# bytes do início do arquivo usados para detectar encoding/separador
+AMOSTRA_BYTES = 64 * 1024
+
+
+class PlanilhaInvalida(Exception):
+    """Arquivo que não pôde ser lido como planilha."""
+
+
+def normalizar_texto(valor):
+    """Minúsculas, sem acentos e com espaços colapsados (comparação de rótulos)."""
+    texto = unicodedata.normalize("NFKD", str(valor or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+def mapear_cabecalho(cabecalho, colunas):
+    """
+    Casa o cabeçalho do arquivo com `colunas` [(campo, rótulo), ...].
+    Retorna (campos, desconhecidas): um campo (ou None) por coluna do arquivo
+    e os títulos que não correspondem a nenhuma coluna conhecida.
+    """
+    conhecidos = {}
+    for campo, rotulo in colunas:
+        conhecidos[normalizar_texto(rotulo)] = campo
+        conhecidos.setdefault(normalizar_texto(campo), campo)
+
+    campos, desconhecidas, vistos = [], [], set()
+    for titulo in cabecalho:
+        campo = conhecidos.get(normalizar_texto(titulo))
+        if campo in vistos:
+            campo = None  # coluna repetida: vale a primeira
+        if campo is None and str(titulo or "").strip():
+            desconhecidas.append(str(titulo).strip())
+        if campo:
+            vistos.add(campo)
+        campos.append(campo)
+    return campos, desconhecidas
+
+
+def valor_celula(valor):
+    """Converte o valor lido (CSV/XLSX) para texto; vazio vira None."""
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        return "sim" if valor else "nao"
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    if isinstance(valor, datetime.datetime):
+        valor = valor.strftime("%d/%m/%Y %H:%M")
+    elif isinstance(valor, datetime.date):
+        valor = valor.strftime("%d/%m/%Y")
+    texto = str(valor).strip()
+    return texto or None
+
+
+# ============================================================
+# Leitores
+# ============================================================
+
+
+def _utf8_ou_cp1252(exc):
+    # trecho que não é UTF-8 depois da amostra: arquivo do Excel (cp1252)
+    trecho = exc.object[exc.start : exc.end]
+    return trecho.decode("cp1252", errors="replace"), exc.end
+
+
+codecs.register_error("utf8_ou_cp1252", _utf8_ou_cp1252)
+
+
+def _detectar_encoding(amostra):
+    if amostra.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        amostra.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # a amostra pode terminar no meio de um caractere multibyte
+        if exc.start < len(amostra) - 3:
+            return "cp1252"
+    return "utf-8"
+
+
+def iter_csv_rows(fileobj):
+    """Gera as linhas (listas de str) de um CSV binário."""
+    amostra = fileobj.read(AMOSTRA_BYTES)
+    fileobj.seek(0)
+    encoding = _detectar_encoding(amostra)
+
+    texto = amostra.decode(encoding, errors="ignore")
+    primeira_linha = texto.splitlines()[0] if texto else ""
+    delimitador = ";" if primeira_linha.count(";") > primeira_linha.count(",") else ","
+
+    erros = "utf8_ou_cp1252" if encoding.startswith("utf-8") else "replace"
+    stream = io.TextIOWrapper(fileobj, encoding=encoding, errors=erros, newline="")
+    try:
+        yield from csv.reader(stream, delimiter=delimitador)
+    except csv.Error as exc:
+        raise PlanilhaInvalida(f"CSV inválido: {exc}")
+    finally:
+        stream.detach()  # o arquivo enviado é fechado por quem o abriu
+
+
+def iter_xlsx_rows(fileobj):
+    """Gera as linhas (tuplas de valores) da primeira aba de um XLSX."""
+    try:
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:
+        raise PlanilhaInvalida(f"XLSX inválido: {exc}")
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def iter_planilha(fileobj, nome):
+    """Escolhe o leitor pela extensão do arquivo."""
+    extensao = str(nome or "").lower().rsplit(".", 1)[-1]
+    if extensao == "csv":
+        return iter_csv_rows(fileobj)
+    if extensao == "xlsx":
+        return iter_xlsx_rows(fileobj)
+    raise PlanilhaInvalida("Formato não suportado. Envie um arquivo .csv ou .xlsx.")
@@ -0,0 +1,35 @@
+# api/utils/transactions.py
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+_escopo = threading.local()
+
+
+@contextmanager
+def coalesce_on_commit():
+    """
+    Dentro do bloco, on_commit_once agenda cada função uma vez só.
+    Para escritas em lote, em que o mesmo signal dispara centenas de vezes
+    (ex.: delete em cascata) e cada disparo agendaria a mesma invalidação.
+    Usar em volta de um único transaction.atomic().
+    """
+    externo = getattr(_escopo, "funcs", None) is not None
+    if not externo:
+        _escopo.funcs = set()
+    try:
+        yield
+    finally:
+        if not externo:
+            _escopo.funcs = None
+
+
+def on_commit_once(func):
+    """transaction.on_commit; dentro de coalesce_on_commit(), sem repetir `func`."""
+    funcs = getattr(_escopo, "funcs", None)
+    if funcs is not None:
+        if func in funcs:
+            return
+        funcs.add(func)
+    transaction.on_commit(func)
@@ -1,11 +1,12 @@
 from api.utils.activity import log_login_activity, AuditLogMixin
 from api.utils.request_utils import get_client_ip
-from datetime import timedelta
-from rest_framework import viewsets, permissions, status, filters
+from datetime import date, timedelta
+from rest_framework import viewsets, permissions, status, filters, mixins
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.views import APIView
@@ -17,19 +18,16 @@ from django.contrib.auth.tokens import (
 )
 from django.http import FileResponse, Http404, HttpResponse
 from django.db import transaction
-from django.db.models import Count, F, Q
+from django.db.models import Count, F, Max, Q
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
-from zoneinfo import ZoneInfo
 from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, PatternFill
-from openpyxl.utils import get_column_letter
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib import colors
 from reportlab.platypus import (
@@ -44,14 +42,35 @@ from reportlab.platypus import (
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus.doctemplate import LayoutError
 from xml.sax.saxutils import escape
-from collections import Counter
 from .services import update_overdue_actions_if_needed
+from .export_jobs import check_export_permission, limpar_parametros
+from .fulltext import FullTextSearchFilter
+from .global_search import FONTES, buscar_global
+from .inventario_import import importar_inventario
+from .audit_storage import resumo_auditoria, resumo_logins
+from .bulk import BulkWriteMixin
+from .conditional import ConditionalGetMixin, resposta_condicional
+from .document_uploads import (
+    OffsetConflitante,
+    UploadInvalido,
+    cancelar_upload,
+    concluir_upload,
+    gravar_parte,
+    iniciar_upload,
+)
+from .file_delivery import entregar_arquivo
+from .action_items import sincronizar_acoes
+from .dashboard_snapshot import invalidate_dashboard_snapshot
+from .risk_heatmap import heatmap_grid, heatmap_rows, invalidate_heatmap_cache
+from .risk_params import risk_params
+from .risk_stats import contagem_por_nivel
 
 
 from .serializers import (
     MyTokenObtainPairSerializer,
     UserSerializer,
     DocumentosLGPDSerializer,
+    DocumentUploadSerializer,
     ChecklistSerializer,
     InventarioDadosSerializer,
     RiskSerializer,
@@ -61,10 +80,13 @@ from .serializers import (
     CalendarEventSerializer,
     LoginActivitySerializer,
     UserActivityLogSerializer,
+    ExportJobSerializer,
+    SearchDocumentSerializer,
 )
 from .models import (
     User,
     DocumentosLGPD,
+    DocumentUpload,
     Checklist,
     InventarioDados,
     Risk,
@@ -73,9 +95,11 @@ from .models import (
     Incident,
     LikelihoodItem,
     ImpactItem,
+    ControlEffectivenessItem,
     CalendarEvent,
     LoginActivity,
     UserActivityLog,
+    ExportJob,
 )
 from .permissions import (
     IsRoleAdmin,
@@ -84,12 +108,25 @@ from .permissions import (
     IsAdminOrDPO,
     SimpleRolePermission,
 )
-from .pagination import DefaultPagination
+from .pagination import DefaultPagination, RankingKeysetPagination
 
 from .utils.email import send_html_email
+from .utils.export import (
+    CHUNK_SIZE,
+    INVENTARIO_COLUNAS,
+    RANKING_CABECALHOS,
+    RANKING_ORDERING,
+    format_value,
+    inventario_raw_value,
+    inventario_rows,
+    ranking_rows,
+    set_attachment_headers,
+    streaming_csv_response,
+    timestamp_br,
+    xlsx_response,
+)
+from .utils.spreadsheet_import import PlanilhaInvalida
 
-import csv
-import datetime
 
 try:
     from rest_framework_simplejwt.tokens import RefreshToken
@@ -276,7 +313,7 @@ class CookieTokenLogoutView(APIView):
 
 
 # ViewSet para o modelo User
-class UserViewSet(AuditLogMixin, viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, AuditLogMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     parser_classes = (JSONParser, MultiPartParser, FormParser)
     queryset = User.objects.none()
@@ -567,7 +604,7 @@ class UserViewSet(AuditLogMixin, viewsets.ModelViewSet):
             )
 
 
-class DocumentosLGPDViewSet(AuditLogMixin, viewsets.ModelViewSet):
+class DocumentosLGPDViewSet(ConditionalGetMixin, AuditLogMixin, viewsets.ModelViewSet):
     queryset = DocumentosLGPD.objects.all().order_by("-created_at")
     serializer_class = DocumentosLGPDSerializer
     permission_classes = [SimpleRolePermission]
@@ -588,6 +625,10 @@ class DocumentosLGPDViewSet(AuditLogMixin, viewsets.ModelViewSet):
         "destroy": {"admin": "any", "dpo": "any"},
         # ações extras
         "upload": {"admin": "any", "dpo": "any"},
+        "upload_sessoes": {"admin": "any", "dpo": "any"},
+        "upload_sessao": {"admin": "any", "dpo": "any"},
+        "concluir_upload": {"admin": "any", "dpo": "any"},
+        "download": {"admin": "any", "dpo": "any", "user": "any"},
         "choices": {"admin": "any", "dpo": "any", "user": "any"},
         # fallback (opcional)
         "*": {"admin": "any", "dpo": "any"},
@@ -629,9 +670,129 @@ class DocumentosLGPDViewSet(AuditLogMixin, viewsets.ModelViewSet):
         doc.save()
         return Response(self.get_serializer(doc).data, status=status.HTTP_200_OK)
 
+    # ---------- Upload em partes (api/document_uploads.py) ----------
+
+    def _sessao_upload(self, doc, sessao):
+        return get_object_or_404(DocumentUpload, pk=sessao, documento=doc)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="upload-sessoes",
+        parser_classes=[JSONParser],
+    )
+    def upload_sessoes(self, request, pk=None):
+        """
+        Abre uma sessão: {"nome": "contrato.pdf", "tamanho": 52428800}. Com
+        "sha256" de um conteúdo já guardado, a sessão já volta concluída.
+        """
+        doc = self.get_object()
+        try:
+            sessao = iniciar_upload(
+                doc,
+                request.user,
+                request.data.get("nome"),
+                request.data.get("tamanho"),
+                sha256=request.data.get("sha256"),
+            )
+        except UploadInvalido as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            DocumentUploadSerializer(sessao).data, status=status.HTTP_201_CREATED
+        )
+
+    @action(
+        detail=True,
+        methods=["get", "put", "delete"],
+        url_path=r"upload-sessoes/(?P<sessao>[0-9a-f-]{36})",
+        parser_classes=[],  # PUT: corpo lido em blocos, sem parser
+    )
+    def upload_sessao(self, request, pk=None, sessao=None):
+        """
+        GET: offset para retomar; PUT: uma parte (corpo cru, cabeçalho
+        Upload-Offset); DELETE: cancela.
+        """
+        doc = self.get_object()
+        sessao = self._sessao_upload(doc, sessao)
+
+        if request.method == "GET":
+            return Response(DocumentUploadSerializer(sessao).data)
+        if request.method == "DELETE":
+            cancelar_upload(sessao)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        offset = request.headers.get(
+            "Upload-Offset", request.query_params.get("offset")
+        )
+        try:
+            offset = int(offset)
+            comprimento = int(request.META.get("CONTENT_LENGTH") or 0)
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "Informe o offset da parte (cabeçalho Upload-Offset)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            sessao = gravar_parte(sessao.pk, offset, request.stream, comprimento)
+        except OffsetConflitante as exc:
+            resp = Response(
+                {"detail": "Offset inesperado.", "recebido": exc.recebido},
+                status=status.HTTP_409_CONFLICT,
+            )
+            resp["Upload-Offset"] = str(exc.recebido)
+            return resp
+        except UploadInvalido as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        resp = Response(DocumentUploadSerializer(sessao).data)
+        resp["Upload-Offset"] = str(sessao.recebido)
+        return resp
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path=r"upload-sessoes/(?P<sessao>[0-9a-f-]{36})/concluir",
+        parser_classes=[JSONParser],
+    )
+    def concluir_upload(self, request, pk=None, sessao=None):
+        """Confere {"sha256": "..."} e anexa o arquivo ao documento."""
+        doc = self.get_object()
+        sessao = self._sessao_upload(doc, sessao)
+        try:
+            doc = concluir_upload(sessao.pk, request.data.get("sha256"))
+        except UploadInvalido as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(doc).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """
+        Arquivo do documento, com Range/ETag e em blocos (api/file_delivery.py).
+        ?inline=1 abre no navegador em vez de baixar.
+        """
+        doc = self.get_object()
+        if not doc.arquivo:
+            return Response(
+                {"detail": "Documento sem arquivo."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        inline = request.query_params.get("inline") in ("1", "true")
+        resp = entregar_arquivo(
+            request,
+            doc.arquivo,
+            nome=doc.arquivo_nome or None,
+            anexo=not inline,
+            versao=doc.arquivo_sha256 or None,
+        )
+        # um ACCESS por download (não por trecho nem por revalidação)
+        if resp.status_code == 200 or resp.get("Content-Range", "").startswith(
+            "bytes 0-"
+        ):
+            self._log(request, "ACCESS", obj=doc, detalhe="download")
+        return resp
+
 
 # ViewSet para gerenciar o checklist da LGPD
-class ChecklistViewSet(AuditLogMixin, viewsets.ModelViewSet):
+class ChecklistViewSet(ConditionalGetMixin, AuditLogMixin, viewsets.ModelViewSet):
     queryset = Checklist.objects.all().order_by("id")
     serializer_class = ChecklistSerializer
     audit_module = "checklist"
@@ -649,7 +810,7 @@ class ChecklistViewSet(AuditLogMixin, viewsets.ModelViewSet):
 
 
 # ViewSet para InventarioDados
-class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
+class InventarioDadosViewSet(ConditionalGetMixin, AuditLogMixin, viewsets.ModelViewSet):
     lookup_value_regex = r"\d+"
     queryset = InventarioDados.objects.select_related(
         "criado_por"
@@ -660,6 +821,7 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
     permission_classes = [SimpleRolePermission]
     pagination_class = DefaultPagination
     audit_module = "inventario"
+    condicional_modelos = (User,)  # criado_por (e-mail do autor)
 
     # Campo que identifica o "dono" do registro (para escopo 'own')
     OWN_FIELD = "criado_por"
@@ -677,14 +839,16 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
         "export_csv": {"admin": "any", "dpo": "any", "gerente": "any"},
         "export_xlsx": {"admin": "any", "dpo": "any", "gerente": "any"},
         "export_pdf": {"admin": "any", "dpo": "any", "gerente": "any"},
+        "importar": {"admin": "any", "dpo": "any", "gerente": "any"},
     }
 
     # Busca e ordenação no backend (DRF)
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        FullTextSearchFilter,  # depois da ordenação: relevância + desempate
     ]
+    # ?search= sem palavra indexável (FullTextSearchFilter): icontains nestes campos
     search_fields = [
         "unidade",
         "setor",
@@ -777,73 +941,15 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
         serializer.save(criado_por=self.request.user)
 
     def _export_cols_and_rows(self, qs):
-        """Reaproveita cabeçalhos e formatação (bool/data) para todos os formatos."""
-        cols = [
-            ("id", "ID"),
-            ("unidade", "Unidade"),
-            ("setor", "Setor"),
-            ("responsavel_email", "Responsável (E-mail)"),
-            ("processo_negocio", "Processo de Negócio"),
-            ("finalidade", "Finalidade"),
-            ("dados_pessoais", "Dados Pessoais"),
-            ("tipo_dado", "Tipo de Dado"),
-            ("origem", "Origem"),
-            ("formato", "Formato"),
-            ("impresso", "Impresso"),
-            ("titulares", "Titulares"),
-            ("dados_menores", "Dados de menores"),
-            ("base_legal", "Base Legal"),
-            ("pessoas_acesso", "Pessoas com Acesso"),
-            ("atualizacoes", "Atualizações (Quando)"),
-            ("transmissao_interna", "Transmissão Interna"),
-            ("transmissao_externa", "Transmissão Externa"),
-            ("local_armazenamento_digital", "Local Armazenamento (Digital)"),
-            ("controlador_operador", "Controlador/Operador"),
-            ("motivo_retencao", "Motivo Retenção"),
-            ("periodo_retencao", "Período Retenção"),
-            ("exclusao", "Exclusão"),
-            ("forma_exclusao", "Forma Exclusão"),
-            ("transferencia_terceiros", "Transf. a Terceiros"),
-            ("quais_dados_transferidos", "Quais Dados Transferidos"),
-            ("transferencia_internacional", "Transf. Internacional"),
-            ("empresa_terceira", "Empresa Terceira"),
-            ("adequado_contratualmente", "Adequado Contratualmente"),
-            ("paises_tratamento", "Países Tratamento"),
-            ("medidas_seguranca", "Medidas de Segurança"),
-            ("consentimentos", "Consentimentos"),
-            ("observacao", "Observação"),
-            ("criado_por", "Criado por (email)"),
-            ("data_criacao", "Data Criação"),
-            ("data_atualizacao", "Última Atualização"),
-        ]
-
-        br_tz = ZoneInfo("America/Sao_Paulo")
-        rows = []
-        for obj in qs.iterator():
-            row = []
-            for field, _ in cols:
-                if field == "criado_por":
-                    val = getattr(getattr(obj, "criado_por", None), "email", "") or ""
-                else:
-                    val = getattr(obj, field, "")
-
-                if isinstance(val, bool):
-                    val = "Sim" if val else "Não"
-                elif isinstance(val, datetime.datetime):
-                    if timezone.is_naive(val):
-                        val = timezone.make_aware(val, timezone.get_default_timezone())
-                    val = timezone.localtime(val, br_tz).strftime("%d/%m/%Y %H:%M")
-                elif isinstance(val, datetime.date):
-                    val = val.strftime("%d/%m/%Y")
-                row.append(val if val is not None else "")
-            rows.append(row)
-        return cols, rows
+        """
+        Reaproveita cabeçalhos e formatação (bool/data) para todos os formatos.
+        As linhas são um gerador (streaming), não uma lista.
+        """
+        return INVENTARIO_COLUNAS, inventario_rows(qs)
 
     @staticmethod
     def _timestamp_br():
-        br_tz = ZoneInfo("America/Sao_Paulo")
-        dt = timezone.localtime(timezone.now(), timezone=br_tz)
-        return f"{dt.day:02d}-{dt.month:02d}-{dt.year}_{dt.hour:02d}h{dt.minute:02d}min"
+        return timestamp_br()
 
     @action(detail=False, methods=["get"], url_path=r"export/csv")
     def export_csv(self, request):
@@ -852,18 +958,7 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
         headers = [label for _, label in cols]
 
         file_name = f"inventarios-{self._timestamp_br()}.csv"
-        resp = HttpResponse(content_type="text/csv; charset=utf-8")
-        resp["Content-Disposition"] = (
-            f"attachment; filename*=UTF-8''{file_name}; filename=\"{file_name}\""
-        )
-        resp["Access-Control-Expose-Headers"] = "Content-Disposition"
-        resp.write("\ufeff")  # BOM para Excel abrir acentos certinho
-
-        writer = csv.writer(resp, lineterminator="\n")
-        writer.writerow(headers)
-        for row in rows:
-            writer.writerow(row)
-        return resp
+        return streaming_csv_response(rows, file_name, headers=headers)
 
     @action(detail=False, methods=["get"], url_path=r"export/xlsx")
     def export_xlsx(self, request):
@@ -871,84 +966,63 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
         cols, rows = self._export_cols_and_rows(qs)
         headers = [label for _, label in cols]
 
-        output = BytesIO()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Inventários"
-
-        header_font = Font(bold=True)
-        fill = PatternFill(start_color="E6F0FF", end_color="E6F0FF", fill_type="solid")
-        for c, label in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=c, value=label)
-            cell.font = header_font
-            cell.fill = fill
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        for r, row in enumerate(rows, start=2):
-            for c, val in enumerate(row, start=1):
-                ws.cell(row=r, column=c, value=val)
+        file_name = f"inventarios-{self._timestamp_br()}.xlsx"
+        return xlsx_response("Inventários", headers, rows, file_name)
 
-        for col_idx, label in enumerate(headers, start=1):
-            width = max(10, min(50, len(str(label)) + 2))
-            ws.column_dimensions[get_column_letter(col_idx)].width = width
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def importar(self, request):
+        """
+        Importa inventários de um CSV/XLSX (campo "arquivo"), com os mesmos
+        cabeçalhos das exportações. ?dry_run=1 só valida, sem gravar.
+        Arquivo que fica ilegível no meio: 200 com o resultado parcial (os
+        blocos anteriores já foram gravados) e "erro_leitura" preenchido.
+        """
+        arquivo = request.FILES.get("arquivo")
+        if not arquivo:
+            raise ValidationError({"arquivo": "Envie um arquivo .csv ou .xlsx."})
+        dry_run = str(request.query_params.get("dry_run", "")).lower() in (
+            "1",
+            "true",
+            "sim",
+        )
 
-        wb.save(output)
-        output.seek(0)
+        try:
+            resultado = importar_inventario(
+                arquivo,
+                arquivo.name,
+                request.user,
+                self.get_serializer_context(),
+                dry_run=dry_run,
+            )
+        except PlanilhaInvalida as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        file_name = f"inventarios-{self._timestamp_br()}.xlsx"
-        resp = HttpResponse(
-            output.getvalue(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-        resp["Content-Disposition"] = (
-            f"attachment; filename*=UTF-8''{file_name}; filename=\"{file_name}\""
-        )
-        resp["Access-Control-Expose-Headers"] = "Content-Disposition"
-        return resp
+        if not dry_run:
+            detalhe = (
+                f"Importação de {arquivo.name}: {resultado.importados} "
+                f"importado(s), {resultado.com_erro} com erro"
+            )
+            if resultado.erro_leitura:
+                detalhe += f". {resultado.erro_leitura}"
+            self._log(
+                request,
+                "CREATE",
+                detalhe=detalhe,
+                resultado="ERROR" if resultado.erro_leitura else "SUCCESS",
+            )
+        return Response({**resultado.as_dict(), "dry_run": dry_run})
 
     @action(detail=False, methods=["get"], url_path=r"export/pdf")
     def export_pdf(self, request):
         qs = self.filter_queryset(self.get_queryset())
 
         # Mapeamento de campos (reutiliza a mesma ordem dos outros exports)
-        field_map = [
-            ("id", "ID"),
-            ("unidade", "Unidade"),
-            ("setor", "Setor"),
-            ("responsavel_email", "Responsável (E-mail)"),
-            ("processo_negocio", "Processo de Negócio"),
-            ("finalidade", "Finalidade"),
-            ("dados_pessoais", "Dados Pessoais"),
-            ("tipo_dado", "Tipo de Dado"),
-            ("origem", "Origem"),
-            ("formato", "Formato"),
-            ("impresso", "Impresso"),
-            ("titulares", "Titulares"),
-            ("dados_menores", "Dados de menores"),
-            ("base_legal", "Base Legal"),
-            ("pessoas_acesso", "Pessoas com Acesso"),
-            ("atualizacoes", "Atualizações (Quando)"),
-            ("transmissao_interna", "Transmissão Interna"),
-            ("transmissao_externa", "Transmissão Externa"),
-            ("local_armazenamento_digital", "Local Armazenamento (Digital)"),
-            ("controlador_operador", "Controlador/Operador"),
-            ("motivo_retencao", "Motivo Retenção"),
-            ("periodo_retencao", "Período Retenção"),
-            ("exclusao", "Exclusão"),
-            ("forma_exclusao", "Forma Exclusão"),
-            ("transferencia_terceiros", "Transf. a Terceiros"),
-            ("quais_dados_transferidos", "Quais Dados Transferidos"),
-            ("transferencia_internacional", "Transf. Internacional"),
-            ("empresa_terceira", "Empresa Terceira"),
-            ("adequado_contratualmente", "Adequado Contratualmente"),
-            ("paises_tratamento", "Países Tratamento"),
-            ("medidas_seguranca", "Medidas de Segurança"),
-            ("consentimentos", "Consentimentos"),
-            ("observacao", "Observação"),
-            ("criado_por", "Criado por (email)"),
-            ("data_criacao", "Data Criação"),
-            ("data_atualizacao", "Última Atualização"),
-        ]
+        field_map = INVENTARIO_COLUNAS
 
         # Estilos
         styles = getSampleStyleSheet()
@@ -973,19 +1047,9 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
             spaceBefore=0,
         )
 
-        # Helpers de formatação
-        br_tz = ZoneInfo("America/Sao_Paulo")
-
+        # Helpers de formatação (mesma camada dos exports CSV/XLSX)
         def fmt_val(v):
-            if isinstance(v, bool):
-                return "Sim" if v else "Não"
-            if isinstance(v, datetime.datetime):
-                if timezone.is_naive(v):
-                    v = timezone.make_aware(v, timezone.get_default_timezone())
-                return timezone.localtime(v, br_tz).strftime("%d/%m/%Y %H:%M")
-            if isinstance(v, datetime.date):
-                return v.strftime("%d/%m/%Y")
-            return "" if v is None else str(v)
+            return str(format_value(v))
 
         # Montagem do PDF (cartões)
         buffer = BytesIO()
@@ -1022,10 +1086,7 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
             # Constrói pares (label, value)
             pairs = []
             for field, label in field_map:
-                if field == "criado_por":
-                    v = getattr(getattr(obj, "criado_por", None), "email", "") or ""
-                else:
-                    v = getattr(obj, field, "")
+                v = inventario_raw_value(obj, field)
                 pairs.append(
                     (
                         Paragraph(escape(label), label_style),
@@ -1084,9 +1145,7 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
         doc.build(story)
 
         # Nome do arquivo “03-09-2025_16h33min”
-        dt_now = timezone.localtime(timezone.now(), timezone=br_tz)
-        ts = f"{dt_now.day:02d}-{dt_now.month:02d}-{dt_now.year}_{dt_now.hour:02d}h{dt_now.minute:02d}min"
-        file_name = f"inventarios-{ts}.pdf"
+        file_name = f"inventarios-{self._timestamp_br()}.pdf"
 
         pdf_bytes = buffer.getvalue()
         buffer.close()
@@ -1099,12 +1158,32 @@ class InventarioDadosViewSet(AuditLogMixin, viewsets.ModelViewSet):
         return resp
 
 
-# ViewSet para MatrizRisco
-class RiskViewSet(AuditLogMixin, viewsets.ModelViewSet):
-    queryset = Risk.objects.all().select_related("probabilidade", "impacto", "eficacia")
-    serializer_class = RiskSerializer
-    permission_classes = [IsAdminOrDPO]
-    audit_module = "riscos"
+class RiskFilterMixin:
+    """
+    Filtros de Risk compartilhados pela matriz, pelas exportações e pelo heatmap
+    (mesmos query params em todos os endpoints).
+    """
+
+    filter_backends = [
+        DjangoFilterBackend,
+        filters.OrderingFilter,
+        FullTextSearchFilter,  # depois da ordenação: relevância + desempate
+    ]
+    filterset_fields = {
+        "matriz_filial": ["exact", "icontains"],
+        # "setor": ["exact", "icontains"],
+        "processo": ["exact", "icontains"],
+        "risco_residual": ["exact"],
+        "tipo_controle": ["exact"],
+        "probabilidade": ["exact"],
+        "impacto": ["exact"],
+        "pontuacao": ["exact", "gte", "lte"],
+        "residual_pontuacao": ["exact", "gte", "lte"],
+    }
+    # ?search= sem palavra indexável (FullTextSearchFilter): icontains nestes campos
+    search_fields = ["risco_fator", "processo", "setor", "matriz_filial"]
+    ordering_fields = ["pontuacao", "residual_pontuacao", "criado_em", "atualizado_em"]
+    ordering = ["-criado_em"]
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -1124,231 +1203,115 @@ class RiskViewSet(AuditLogMixin, viewsets.ModelViewSet):
 
         return qs
 
-    # filtros/busca/ordenação padrão
-    filter_backends = [
-        DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter,
-    ]
-    filterset_fields = {
-        "matriz_filial": ["exact", "icontains"],
-        # "setor": ["exact", "icontains"],
-        "processo": ["exact", "icontains"],
-        "risco_residual": ["exact"],
-        "tipo_controle": ["exact"],
-        "probabilidade": ["exact"],
-        "impacto": ["exact"],
-    }
-    search_fields = ["risco_fator", "processo", "setor", "matriz_filial"]
-    ordering_fields = ["pontuacao", "criado_em", "atualizado_em"]
-    ordering = ["-criado_em"]
 
-    def perform_create(self, serializer):
-        # não passar 'criado_por' (o modelo Risk não tem esse campo)
-        serializer.save()
+# ViewSet para MatrizRisco
+class RiskViewSet(
+    BulkWriteMixin,
+    ConditionalGetMixin,
+    RiskFilterMixin,
+    AuditLogMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Risk.objects.all()
+    serializer_class = RiskSerializer
+    permission_classes = [IsAdminOrDPO]
+    audit_module = "riscos"
 
-    @action(detail=False, methods=["get"], url_path=r"ranking/export/xlsx")
-    def export_ranking_xlsx(self, request):
-        qs = self.filter_queryset(self.get_queryset()).order_by(
-            "-pontuacao", "-impacto__value", "-probabilidade__value", "-criado_em"
-        )
+    # GET condicional: planos embutidos + rótulos da parametrização
+    condicional_modelos = (
+        ActionPlan,
+        LikelihoodItem,
+        ImpactItem,
+        ControlEffectivenessItem,
+    )
+    condicional_parametrizacao = True
+
+    # ===== Lote (/riscos/bulk/) =====
+    bulk_computed_fields = (
+        "pontuacao",
+        "probabilidade_valor",
+        "impacto_valor",
+        "residual_pontuacao",
+        "risco_residual",
+        "tipo_controle",
+        "eficacia",
+    )
 
-        headers = [
-            "ID",
-            "Matriz/Filial",
-            "Setor",
-            "Processo",
-            "Risco e Fator de Risco",
-            "Prob (valor)",
-            "Prob (rótulo)",
-            "Impacto (valor)",
-            "Impacto (rótulo)",
-            "Pontuação",
-            "Risco Residual",
-            "Medidas de Controle",
-            "Tipo Ctrl (C/D)",
-            "Eficácia (rótulo)",
-            "Resposta ao Risco",
-            "Criado em",
-        ]
+    def bulk_prepare(self, objs):
+        # mesmo saneamento/cálculo do serializer + Risk.save, sem um save por linha
+        params = risk_params()
+        for obj in objs:
+            if not (obj.medidas_controle or "").strip():
+                obj.tipo_controle = ""
+                obj.eficacia = None
+            obj.calcular_pontuacoes(params)
 
-        br_tz = ZoneInfo("America/Sao_Paulo")
-        rows = []
-        for r in qs.iterator():
-            criado = (
-                timezone.localtime(r.criado_em, br_tz).strftime("%d/%m/%Y %H:%M")
-                if r.criado_em
-                else ""
-            )
-            rows.append(
-                [
-                    r.id,
-                    r.matriz_filial,
-                    r.setor,
-                    r.processo,
-                    r.risco_fator,
-                    getattr(getattr(r, "probabilidade", None), "value", None),
-                    getattr(getattr(r, "probabilidade", None), "label_pt", None),
-                    getattr(getattr(r, "impacto", None), "value", None),
-                    getattr(getattr(r, "impacto", None), "label_pt", None),
-                    r.pontuacao,
-                    r.risco_residual,
-                    r.medidas_controle or "",
-                    r.tipo_controle or "",
-                    getattr(getattr(r, "eficacia", None), "label_pt", None) or "",
-                    r.resposta_risco or "",
-                    criado,
-                ]
-            )
+    def bulk_after_write(self, objs):
+        sincronizar_acoes([obj.pk for obj in objs])
+        invalidate_dashboard_snapshot("Risk")
+        invalidate_heatmap_cache()
 
-        output = BytesIO()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Ranking de Riscos"
+    def get_queryset(self):
+        qs = super().get_queryset()
+        # o serializer resolve os itens pela parametrização em memória;
+        # só as exportações leem probabilidade/impacto/eficácia pelo join
+        if (self.action or "").startswith("export_"):
+            qs = qs.select_related("probabilidade", "impacto", "eficacia")
+        elif self.action == "bulk":
+            # RiskSerializer.validate lê a eficácia atual de cada risco
+            qs = qs.select_related("eficacia")
+        return qs
 
-        header_font = Font(bold=True)
-        fill = PatternFill(start_color="E6F0FF", end_color="E6F0FF", fill_type="solid")
-        for c, label in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=c, value=label)
-            cell.font = header_font
-            cell.fill = fill
-            cell.alignment = Alignment(horizontal="center", vertical="center")
+    def perform_create(self, serializer):
+        # não passar 'criado_por' (o modelo Risk não tem esse campo)
+        serializer.save()
 
-        for r_idx, row in enumerate(rows, start=2):
-            for c_idx, val in enumerate(row, start=1):
-                ws.cell(row=r_idx, column=c_idx, value=val)
+    @action(detail=False, methods=["get"], url_path=r"ranking/export/xlsx")
+    def export_ranking_xlsx(self, request):
+        qs = self.filter_queryset(self.get_queryset()).order_by(*RANKING_ORDERING)
 
+        file_name = f"ranking-riscos_{timestamp_br()}.xlsx"
         # largura de colunas + filtro + congelar cabeçalho
-        for col_idx, label in enumerate(headers, start=1):
-            width = max(12, min(60, len(str(label)) + 2))
-            ws.column_dimensions[get_column_letter(col_idx)].width = width
-        ws.freeze_panes = "A2"
-        ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{len(rows)+1}"
-
-        wb.save(output)
-        output.seek(0)
-
-        dt = timezone.localtime(timezone.now(), timezone=br_tz)
-        file_name = f"ranking-riscos_{dt:%d-%m-%Y_%Hh%Mmin}.xlsx"
-
-        resp = HttpResponse(
-            output.getvalue(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        return xlsx_response(
+            "Ranking de Riscos",
+            RANKING_CABECALHOS,
+            ranking_rows(qs),
+            file_name,
+            min_width=12,
+            max_width=60,
+            freeze_header=True,
+            autofilter=True,
         )
-        resp["Content-Disposition"] = (
-            f"attachment; filename*=UTF-8''{file_name}; filename=\"{file_name}\""
-        )
-        resp["Access-Control-Expose-Headers"] = "Content-Disposition"
-        return resp
 
     @action(detail=False, methods=["get"], url_path=r"ranking/export/csv")
     def export_ranking_csv(self, request):
-        qs = self.filter_queryset(self.get_queryset()).order_by(
-            "-pontuacao", "-impacto__value", "-probabilidade__value", "-criado_em"
-        )
-
-        headers = [
-            "ID",
-            "Matriz/Filial",
-            "Setor",
-            "Processo",
-            "Risco e Fator de Risco",
-            "Prob (valor)",
-            "Prob (rótulo)",
-            "Impacto (valor)",
-            "Impacto (rótulo)",
-            "Pontuação",
-            "Risco Residual",
-            "Medidas de Controle",
-            "Tipo Ctrl (C/D)",
-            "Eficácia (rótulo)",
-            "Resposta ao Risco",
-            "Criado em",
-        ]
-
-        br_tz = ZoneInfo("America/Sao_Paulo")
+        qs = self.filter_queryset(self.get_queryset()).order_by(*RANKING_ORDERING)
 
-        def rows_iter():
-            yield headers
-            for r in qs.iterator():
-                criado = (
-                    timezone.localtime(r.criado_em, br_tz).strftime("%d/%m/%Y %H:%M")
-                    if r.criado_em
-                    else ""
-                )
-                yield [
-                    r.id,
-                    r.matriz_filial,
-                    r.setor,
-                    r.processo,
-                    r.risco_fator,
-                    getattr(getattr(r, "probabilidade", None), "value", None),
-                    getattr(getattr(r, "probabilidade", None), "label_pt", None),
-                    getattr(getattr(r, "impacto", None), "value", None),
-                    getattr(getattr(r, "impacto", None), "label_pt", None),
-                    r.pontuacao,
-                    r.risco_residual,
-                    r.medidas_controle or "",
-                    r.tipo_controle or "",
-                    getattr(getattr(r, "eficacia", None), "label_pt", None) or "",
-                    r.resposta_risco or "",
-                    criado,
-                ]
-
-        # CSV em memória (com BOM p/ Excel abrir acentos)
-        resp = HttpResponse(content_type="text/csv; charset=utf-8")
-        br_now = timezone.localtime(timezone.now(), timezone=br_tz)
-        file_name = f"ranking-riscos_{br_now:%d-%m-%Y_%Hh%Mmin}.csv"
-        resp["Content-Disposition"] = (
-            f"attachment; filename*=UTF-8''{file_name}; filename=\"{file_name}\""
+        file_name = f"ranking-riscos_{timestamp_br()}.csv"
+        return streaming_csv_response(
+            ranking_rows(qs), file_name, headers=RANKING_CABECALHOS
         )
-        resp["Access-Control-Expose-Headers"] = "Content-Disposition"
-        resp.write("\ufeff")  # BOM
-
-        writer = csv.writer(resp, lineterminator="\n")
-        for row in rows_iter():
-            writer.writerow(row)
-        return resp
 
     @action(detail=False, methods=["get"], url_path=r"heatmap/export/csv")
     def export_heatmap_csv(self, request):
-        qs = self.filter_queryset(self.get_queryset())
-        buckets = {}
-        total = 0
-        for r in qs:
-            if not (r.probabilidade_id and r.impacto_id):
-                continue
-            p = r.probabilidade.value
-            i = r.impacto.value
-            key = f"{p}-{i}"
-            buckets[key] = buckets.get(key, 0) + 1
-            total += 1
+        # mesma engine (e cache, chaveado pelas marcas do banco) do
+        # /heatmap-riscos/, com os mesmos filtros — vale também para os jobs
+        grid = heatmap_grid(
+            self.filter_queryset(self.get_queryset()), request.query_params
+        )["grid"]
 
         headers = ["Probabilidade (1-5)", "Impacto (1-5)", "Contagem"]
-        pairs = []
-        # ordenar por prob desc e impacto desc (como heatmap “de cima à direita”)
-        for p in range(5, 0, -1):
-            for i in range(5, 0, -1):
-                key = f"{p}-{i}"
-                pairs.append((p, i, buckets.get(key, 0)))
-
-        resp = HttpResponse(content_type="text/csv; charset=utf-8")
-        br_tz = ZoneInfo("America/Sao_Paulo")
-        br_now = timezone.localtime(timezone.now(), timezone=br_tz)
-        file_name = f"heatmap-riscos_{br_now:%d-%m-%Y_%Hh%Mmin}.csv"
-        resp["Content-Disposition"] = (
-            f"attachment; filename*=UTF-8''{file_name}; filename=\"{file_name}\""
-        )
-        resp["Access-Control-Expose-Headers"] = "Content-Disposition"
-        resp.write("\ufeff")  # BOM
-
-        writer = csv.writer(resp, lineterminator="\n")
-        writer.writerow(headers)
-        for p, i, c in pairs:
-            writer.writerow([p, i, c])
-        writer.writerow([])
-        writer.writerow(["Total", "", total])
-        return resp
+
+        def rows_iter():
+            total = 0
+            for row in heatmap_rows(grid):
+                total += row[2]
+                yield row
+            yield []
+            yield ["Total", "", total]
+
+        file_name = f"heatmap-riscos_{timestamp_br()}.csv"
+        return streaming_csv_response(rows_iter(), file_name, headers=headers)
 
     @action(detail=False, methods=["get"], url_path=r"ranking/export/pdf")
     def export_ranking_pdf(self, request):
@@ -1357,9 +1320,7 @@ class RiskViewSet(AuditLogMixin, viewsets.ModelViewSet):
         Respeita os mesmos filtros do list().
         """
         # --- consulta (mesma ordenação do ranking) ---
-        qs = self.filter_queryset(self.get_queryset()).order_by(
-            "-pontuacao", "-impacto__value", "-probabilidade__value", "-criado_em"
-        )
+        qs = self.filter_queryset(self.get_queryset()).order_by(*RANKING_ORDERING)
 
         # --- cabeçalhos e linhas ---
         headers = [
@@ -1379,14 +1340,9 @@ class RiskViewSet(AuditLogMixin, viewsets.ModelViewSet):
             "Criado em",
         ]
 
-        br_tz = ZoneInfo("America/Sao_Paulo")
         rows = []
-        for r in qs.iterator():
-            criado = (
-                timezone.localtime(r.criado_em, br_tz).strftime("%d/%m/%Y %H:%M")
-                if r.criado_em
-                else ""
-            )
+        for r in qs.iterator(chunk_size=CHUNK_SIZE):
+            criado = format_value(r.criado_em)
             rows.append(
                 [
                     str(r.id or ""),
@@ -1506,15 +1462,10 @@ class RiskViewSet(AuditLogMixin, viewsets.ModelViewSet):
         buffer.close()
 
         # Nome do arquivo
-        dt_now = timezone.localtime(timezone.now(), timezone=br_tz)
-        file_name = f"ranking-riscos_{dt_now:%d-%m-%Y_%Hh%Mmin}.pdf"
+        file_name = f"ranking-riscos_{timestamp_br()}.pdf"
 
         resp = HttpResponse(pdf_bytes, content_type="application/pdf")
-        resp["Content-Disposition"] = (
-            f"attachment; filename*=UTF-8''{file_name}; filename=\"{file_name}\""
-        )
-        resp["Access-Control-Expose-Headers"] = "Content-Disposition"
-        return resp
+        return set_attachment_headers(resp, file_name)
 
     @action(detail=False, methods=["get"], url_path=r"stats/by-band")
     def stats_by_band(self, request):
@@ -1522,69 +1473,132 @@ class RiskViewSet(AuditLogMixin, viewsets.ModelViewSet):
         Contagem por faixa de risco residual (baixo/medio/alto/critico).
         """
         qs = self.filter_queryset(self.get_queryset())
-        counter = Counter((r.risco_residual or "").lower() for r in qs)
-        data = {
-            "baixo": counter.get("baixo", 0),
-            "medio": counter.get("medio", 0),
-            "alto": counter.get("alto", 0),
-            "critico": counter.get("critico", 0),
-        }
-        return Response(data)
+        return resposta_condicional(
+            request,
+            self.get_validadores(qs),
+            lambda: Response(contagem_por_nivel(qs)),
+        )
 
 
-class RankingRiscoViewSet(AuditLogMixin, viewsets.ViewSet):
+class RankingRiscoViewSet(ConditionalGetMixin, AuditLogMixin, viewsets.GenericViewSet):
+    """
+    Ranking de riscos: pontuação, impacto, probabilidade, mais recente (e id).
+
+    GET /ranking-riscos/                    lista completa (tela atual)
+    GET /ranking-riscos/?page_size=50       primeira página paginada por cursor
+    GET /ranking-riscos/?cursor=...         páginas seguintes/anteriores (next/previous)
+    ?compacto=1                             só as colunas da tabela resumida
+    ?probabilidade=, ?impacto=, ?pontuacao= valores exatos (filtros da tela)
+    """
+
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RankingKeysetPagination
     audit_module = "ranking_riscos"
 
-    def list(self, request):
-        self._log(request, "ACCESS")
+    queryset = Risk.objects.select_related("probabilidade", "impacto", "eficacia")
+    condicional_modelos = (LikelihoodItem, ImpactItem, ControlEffectivenessItem)
+
+    # colunas do modo compacto (lidas com .values(), sem montar instâncias)
+    CAMPOS_COMPACTOS = {
+        "id": "id",
+        "setor": "setor",
+        "processo": "processo",
+        "risco_fator": "risco_fator",
+        "pontuacao": "pontuacao",
+        "risco_residual": "risco_residual",
+        "probabilidade": "probabilidade_valor",
+        "impacto": "impacto_valor",
+    }
+
+    # filtro da tela -> campo copiado no risco (sem join, usa o índice)
+    FILTROS = {
+        "probabilidade": "probabilidade_valor",
+        "impacto": "impacto_valor",
+        "pontuacao": "pontuacao",
+    }
 
-        qs = Risk.objects.all().order_by(
-            "-pontuacao", "-impacto__value", "-probabilidade__value", "-criado_em"
+    def get_queryset(self):
+        qs = super().get_queryset()
+        for param, campo in self.FILTROS.items():
+            valor = self.request.query_params.get(param, "").strip()
+            if valor.isdigit():
+                qs = qs.filter(**{campo: int(valor)})
+        return qs
+
+    def list(self, request):
+        # ACCESS só na primeira página (sem cursor), também na 304
+        cursor = request.query_params.get("cursor")
+        revalidacao = None if cursor else self.revalidacao(request)
+        return resposta_condicional(
+            request,
+            self.get_validadores(self.get_queryset()),
+            lambda: self._listar(request),
+            revalidacao,
         )
 
-        data = []
-        for r in qs:
-            data.append(
+    def _listar(self, request):
+        params = request.query_params
+        paginado = "cursor" in params or "page_size" in params
+        if not params.get("cursor"):
+            self._log(request, "ACCESS")  # só na primeira página
+
+        compacto = params.get("compacto") in ("1", "true")
+        qs = self.get_queryset()
+        if compacto:
+            qs = qs.values(*self.CAMPOS_COMPACTOS.values())
+            serializar = self._compacto_dict
+        else:
+            serializar = self._ranking_dict
+
+        if paginado:
+            page = self.paginate_queryset(qs)
+            return self.get_paginated_response([serializar(r) for r in page])
+
+        # sem paginação: mantém o formato original (lista completa)
+        qs = qs.order_by(*RANKING_ORDERING, "id")
+        return Response([serializar(r) for r in qs.iterator(chunk_size=CHUNK_SIZE)])
+
+    def _compacto_dict(self, row):
+        return {k: row[campo] for k, campo in self.CAMPOS_COMPACTOS.items()}
+
+    @staticmethod
+    def _ranking_dict(r):
+        return {
+            "id": r.id,
+            "matriz_filial": r.matriz_filial,
+            "setor": r.setor,
+            "processo": r.processo,
+            "risco_fator": r.risco_fator,
+            "probabilidade": (
                 {
-                    "id": r.id,
-                    "matriz_filial": r.matriz_filial,
-                    "setor": r.setor,
-                    "processo": r.processo,
-                    "risco_fator": r.risco_fator,
-                    "probabilidade": (
-                        {
-                            "value": getattr(r.probabilidade, "value", None),
-                            "label": getattr(r.probabilidade, "label_pt", None),
-                        }
-                        if r.probabilidade_id
-                        else None
-                    ),
-                    "impacto": (
-                        {
-                            "value": getattr(r.impacto, "value", None),
-                            "label": getattr(r.impacto, "label_pt", None),
-                        }
-                        if r.impacto_id
-                        else None
-                    ),
-                    "pontuacao": r.pontuacao,
-                    "risco_residual": r.risco_residual,
-                    "medidas_controle": r.medidas_controle or "",
-                    "tipo_controle": r.tipo_controle or "",
-                    "eficacia_label": getattr(
-                        getattr(r, "eficacia", None), "label_pt", ""
-                    )
-                    or "",
-                    "resposta_risco": r.resposta_risco or "",
+                    "value": getattr(r.probabilidade, "value", None),
+                    "label": getattr(r.probabilidade, "label_pt", None),
                 }
-            )
-
-        return Response(data)
+                if r.probabilidade_id
+                else None
+            ),
+            "impacto": (
+                {
+                    "value": getattr(r.impacto, "value", None),
+                    "label": getattr(r.impacto, "label_pt", None),
+                }
+                if r.impacto_id
+                else None
+            ),
+            "pontuacao": r.pontuacao,
+            "risco_residual": r.risco_residual,
+            "medidas_controle": r.medidas_controle or "",
+            "tipo_controle": r.tipo_controle or "",
+            "eficacia_label": getattr(getattr(r, "eficacia", None), "label_pt", "")
+            or "",
+            "resposta_risco": r.resposta_risco or "",
+        }
 
 
 # ViewSet para PlanoAcao
-class ActionPlanViewSet(AuditLogMixin, viewsets.ModelViewSet):
+class ActionPlanViewSet(
+    BulkWriteMixin, ConditionalGetMixin, AuditLogMixin, viewsets.ModelViewSet
+):
     """
     ViewSet de Planos de Ação, refletindo exatamente os campos do modelo.
     """
@@ -1593,12 +1607,50 @@ class ActionPlanViewSet(AuditLogMixin, viewsets.ModelViewSet):
     serializer_class = ActionPlanSerializer
     permission_classes = [IsAdminOrDPO]
     audit_module = "plano-acao"
+    condicional_modelos = (Risk,)  # risco_risco_fator
+
+    # ===== Lote (/actionplan/bulk/) =====
+    bulk_computed_fields = ("status", "ordem_manual")
+
+    def bulk_apply(self, obj, attrs):
+        if obj.pk is None:
+            return super().bulk_apply(obj, attrs)
+        # como ActionPlanSerializer.update: campos vazios não sobrescrevem
+        super().bulk_apply(
+            obj, {k: v for k, v in attrs.items() if v != "" and v is not None}
+        )
+
+    def bulk_prepare(self, objs):
+        # ordem_manual sequencial por risco (um único MAX agrupado) e
+        # status 'atrasado' pelo prazo — as regras de ActionPlan.save
+        sem_ordem = [p for p in objs if p.ordem_manual is None and p.risco_id]
+        if sem_ordem:
+            ultimos = dict(
+                ActionPlan.objects.filter(risco_id__in={p.risco_id for p in sem_ordem})
+                .values("risco_id")
+                .annotate(m=Max("ordem_manual"))
+                .values_list("risco_id", "m")
+            )
+            for plano in sem_ordem:
+                ultimos[plano.risco_id] = (ultimos.get(plano.risco_id) or 0) + 1
+                plano.ordem_manual = ultimos[plano.risco_id]
+
+        hoje = timezone.localdate()
+        for plano in objs:
+            if plano.prazo and plano.prazo < hoje and plano.status != "concluido":
+                plano.status = "atrasado"
+
+    def bulk_after_write(self, objs):
+        sincronizar_acoes(
+            {obj.risco_id for obj in objs}, plano_ids=[obj.pk for obj in objs]
+        )
+        invalidate_dashboard_snapshot("ActionPlan")
 
     # ===== Filtros =====
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        FullTextSearchFilter,  # depois da ordenação: relevância + desempate
     ]
 
     filterset_fields = {
@@ -1607,6 +1659,7 @@ class ActionPlanViewSet(AuditLogMixin, viewsets.ModelViewSet):
         "risco": ["exact"],  # FK direta
     }
 
+    # ?search= sem palavra indexável (FullTextSearchFilter): icontains nestes campos
     search_fields = [
         "como",
         "responsavel_execucao",
@@ -1690,7 +1743,9 @@ class ActionPlanViewSet(AuditLogMixin, viewsets.ModelViewSet):
         return Response({"detail": "ok"})
 
 
-class ActionPlanControleView(AuditLogMixin, viewsets.ReadOnlyModelViewSet):
+class ActionPlanControleView(
+    ConditionalGetMixin, AuditLogMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Endpoint SOMENTE para a tela Controle de Ações.
 
@@ -1708,9 +1763,18 @@ class ActionPlanControleView(AuditLogMixin, viewsets.ReadOnlyModelViewSet):
     audit_module = "controle_plano_acao"
     pagination_class = None
     audit_ignore_models = ["Risk"]
+    condicional_modelos = (
+        ActionPlan,
+        LikelihoodItem,
+        ImpactItem,
+        ControlEffectivenessItem,
+    )
+    condicional_parametrizacao = True
 
 
-class MonitoringActionViewSet(AuditLogMixin, viewsets.ModelViewSet):
+class MonitoringActionViewSet(
+    ConditionalGetMixin, AuditLogMixin, viewsets.ModelViewSet
+):
     queryset = MonitoringAction.objects.all()
     serializer_class = MonitoringActionSerializer
     permission_classes = [IsAdminOrDPO]
@@ -1726,7 +1790,7 @@ class MonitoringActionViewSet(AuditLogMixin, viewsets.ModelViewSet):
     ordering = ["-data_monitoramento"]
 
 
-class IncidentViewSet(AuditLogMixin, viewsets.ModelViewSet):
+class IncidentViewSet(ConditionalGetMixin, AuditLogMixin, viewsets.ModelViewSet):
     queryset = Incident.objects.all()
     serializer_class = IncidentSerializer
     permission_classes = [IsAdminOrDPO]
@@ -1734,9 +1798,10 @@ class IncidentViewSet(AuditLogMixin, viewsets.ModelViewSet):
 
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        FullTextSearchFilter,  # depois da ordenação: relevância + desempate
     ]
+    # ?search= sem palavra indexável (FullTextSearchFilter): icontains nestes campos
     search_fields = ["descricao", "fonte", "responsavel_analise", "decisoes_resolucao"]
     ordering_fields = ["data_registro", "data_encerramento", "numero_registro"]
     ordering = ["-data_registro"]
@@ -1746,130 +1811,89 @@ class RiskConfigView(APIView):
     """
     Retorna a parametrização usada pela Matriz de Riscos.
     GET /risk-config/
+
+    Servida do snapshot em memória (api.risk_params), com ETag:
+    o front reenvia If-None-Match e recebe 304 enquanto nada mudar.
     """
 
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        from .models import (
-            LikelihoodItem,
-            ImpactItem,
-            ControlEffectivenessItem,
-            RiskLevelBand,
-            Instruction,
-        )
-        from .serializers import (
-            LikelihoodItemSerializer,
-            ImpactItemSerializer,
-            ControlEffectivenessItemSerializer,
-            RiskLevelBandSerializer,
-            InstructionSerializer,
-        )
+        data, etag = risk_params().config()
+        resp = get_conditional_response(request, etag=etag) or Response(data)
+        resp["ETag"] = etag
+        # revalida sempre (a parametrização pode mudar a qualquer momento)
+        resp["Cache-Control"] = "private, no-cache"
+        return resp
 
-        likelihood = LikelihoodItem.objects.all().order_by("value")
-        impact = ImpactItem.objects.all().order_by("value")
-        effectiveness = ControlEffectivenessItem.objects.all().order_by("value")
-        bands = RiskLevelBand.objects.all().order_by("min_score")
-        instructions = Instruction.objects.all().order_by("updated_at")
-
-        data = {
-            "likelihood": LikelihoodItemSerializer(likelihood, many=True).data,
-            "impact": ImpactItemSerializer(impact, many=True).data,
-            "effectiveness": ControlEffectivenessItemSerializer(
-                effectiveness, many=True
-            ).data,
-            "bands": RiskLevelBandSerializer(bands, many=True).data,
-            "instructions": InstructionSerializer(instructions, many=True).data,
-        }
-        return Response(data)
 
+class HeatmapRiscoViewSet(
+    ConditionalGetMixin, RiskFilterMixin, AuditLogMixin, viewsets.GenericViewSet
+):
+    """
+    Retorna:
+    - buckets: contagem por prob-impact
+    - grid, points
+    - axes: labels PT de probabilidade/impacto
+    - total
+    - riscos (opcional, ?riscos=1): página da lista de riscos
+      (compatível com o Ranking; aceita page/page_size)
+
+    Aceita os mesmos filtros de /riscos/ (setor, processo, search...).
+    A matriz vem de um GROUP BY e fica em cache até a próxima escrita em Risk.
+    """
 
-class HeatmapRiscoViewSet(AuditLogMixin, viewsets.ViewSet):
+    queryset = Risk.objects.all()
     permission_classes = [IsAdminOrDPO]
+    pagination_class = DefaultPagination
+    condicional_modelos = (LikelihoodItem, ImpactItem)
+    condicional_parametrizacao = True
 
     audit_module = "heatmap_riscos"
 
     def list(self, request):
-        self._log(request, "ACCESS")
-        """
-        Retorna:
-        - riscos: lista completa (compatível com o Ranking)
-        - buckets: contagem por prob-impact
-        - grid, points
-        - axes: labels PT de probabilidade/impacto
-        """
-        qs = Risk.objects.select_related("probabilidade", "impacto").all()
+        qs = self.filter_queryset(self.get_queryset())
+        valid = self.get_validadores(qs)
+        return resposta_condicional(
+            request,
+            valid,
+            lambda: self._listar(request, qs),
+            self.revalidacao(request),
+        )
 
-        # --- LISTA COMPLETA DE RISCOS (compatível com ranking-riscos) ---
-        riscos_list = []
-        for r in qs:
-            riscos_list.append(
-                {
-                    "id": r.id,
-                    "matriz_filial": r.matriz_filial,
-                    "setor": r.setor,
-                    "processo": r.processo,
-                    "risco_fator": r.risco_fator,
-                    "probabilidade": (
-                        {
-                            "value": getattr(r.probabilidade, "value", None),
-                            "label": getattr(r.probabilidade, "label_pt", None),
-                        }
-                        if r.probabilidade_id
-                        else None
-                    ),
-                    "impacto": (
-                        {
-                            "value": getattr(r.impacto, "value", None),
-                            "label": getattr(r.impacto, "label_pt", None),
-                        }
-                        if r.impacto_id
-                        else None
-                    ),
-                    "pontuacao": r.pontuacao,
-                    "risco_residual": r.risco_residual,
-                }
-            )
+    def _listar(self, request, qs):
+        self._log_access(request)
 
-        # --- buckets ---
-        buckets = {}
-        for r in qs:
-            if not (r.probabilidade_id and r.impacto_id):
-                continue
-            p = r.probabilidade.value
-            i = r.impacto.value
-            key = f"{p}-{i}"
-            buckets[key] = buckets.get(key, 0) + 1
-
-        # --- grid / points ---
-        size = 5
-        grid = [[0 for _ in range(size + 1)] for _ in range(size + 1)]
-        points = []
-
-        for key, count in buckets.items():
-            p_str, i_str = key.split("-")
-            p, i = int(p_str), int(i_str)
-
-            if 1 <= p <= 5 and 1 <= i <= 5:
-                grid[p][i] = count
-                points.append({"prob": p, "impact": i, "count": count})
-
-        # --- eixos ---
-        probs = list(
-            LikelihoodItem.objects.order_by("value").values("value", "label_pt")
-        )
-        imps = list(ImpactItem.objects.order_by("value").values("value", "label_pt"))
+        # matriz em cache pelas marcas do banco: nunca mais velha que o ETag
+        data = dict(heatmap_grid(qs, request.query_params))
 
-        return Response(
-            {
-                "riscos": riscos_list,  # <- PARA O FRONTEND ATUAL
-                "buckets": buckets,
-                "grid": grid,
-                "points": points,
-                "axes": {"probabilidade": probs, "impacto": imps},
-                "total": qs.count(),
-            }
-        )
+        if request.query_params.get("riscos") in ("1", "true"):
+            page = self.paginate_queryset(qs)
+            data["riscos"] = self.get_paginated_response(
+                [self._risco_dict(r) for r in page]
+            ).data
+
+        return Response(data)
+
+    @staticmethod
+    def _risco_dict(r):
+        # labels vêm da parametrização em memória (a lista não faz join)
+        params = risk_params()
+        prob = params.likelihood.get(r.probabilidade_id)
+        imp = params.impact.get(r.impacto_id)
+        return {
+            "id": r.id,
+            "matriz_filial": r.matriz_filial,
+            "setor": r.setor,
+            "processo": r.processo,
+            "risco_fator": r.risco_fator,
+            "probabilidade": (
+                {"value": prob.value, "label": prob.label_pt} if prob else None
+            ),
+            "impacto": {"value": imp.value, "label": imp.label_pt} if imp else None,
+            "pontuacao": r.pontuacao,
+            "risco_residual": r.risco_residual,
+        }
 
 
 # ===========================
@@ -2072,7 +2096,7 @@ class InviteSetPasswordView(APIView):
         )
 
 
-class CalendarEventViewSet(AuditLogMixin, viewsets.ModelViewSet):
+class CalendarEventViewSet(ConditionalGetMixin, AuditLogMixin, viewsets.ModelViewSet):
     """
     Permite listar, criar, editar e excluir eventos do calendário.
     Apenas o usuário autenticado vê e gerencia seus próprios eventos.
@@ -2098,7 +2122,23 @@ class EnsureOverdueUpdatedView(APIView):
         )
 
 
-class LoginActivityViewSet(viewsets.ReadOnlyModelViewSet):
+def _periodo_resumo(request, dias_padrao=30):
+    """Lê ?inicio/?fim (AAAA-MM-DD) para os resumos diários de auditoria."""
+    hoje = timezone.localdate()
+    try:
+        fim = date.fromisoformat(request.query_params.get("fim") or str(hoje))
+        inicio = date.fromisoformat(
+            request.query_params.get("inicio")
+            or str(fim - timedelta(days=dias_padrao - 1))
+        )
+    except ValueError:
+        raise ValidationError({"detail": "Datas inválidas (use AAAA-MM-DD)."})
+    if inicio > fim:
+        raise ValidationError({"detail": "'inicio' deve ser anterior a 'fim'."})
+    return inicio, fim
+
+
+class LoginActivityViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Listagem de logins realizados no sistema.
     Acesso restrito a Admin e DPO.
@@ -2107,14 +2147,23 @@ class LoginActivityViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = LoginActivity.objects.all()
     serializer_class = LoginActivitySerializer
     permission_classes = [IsAdminOrDPO]
+    condicional_campo = "data_login"
 
     filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
     filterset_fields = ["email", "ip_address", "data_login"]
     ordering_fields = ["data_login", "email"]
     search_fields = ["email", "ip_address", "user_agent"]
 
+    @action(detail=False, methods=["get"], url_path="resumo")
+    def resumo(self, request):
+        """Logins por dia (?inicio=AAAA-MM-DD&fim=AAAA-MM-DD, padrão: 30 dias)."""
+        inicio, fim = _periodo_resumo(request)
+        return Response(
+            {"inicio": inicio, "fim": fim, "dias": resumo_logins(inicio, fim)}
+        )
+
 
-class UserActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
+class UserActivityLogViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Listagem de ações executadas no sistema.
     Acesso restrito a Admin e DPO.
@@ -2123,6 +2172,7 @@ class UserActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = UserActivityLog.objects.all()
     serializer_class = UserActivityLogSerializer
     permission_classes = [IsAdminOrDPO]
+    condicional_campo = "timestamp"
 
     filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
     filterset_fields = [
@@ -2144,3 +2194,125 @@ class UserActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
         "modulo",
         "detalhe",
     ]
+
+    @action(detail=False, methods=["get"], url_path="resumo")
+    def resumo(self, request):
+        """Ações por dia/módulo/operação (?inicio=...&fim=..., padrão: 30 dias)."""
+        inicio, fim = _periodo_resumo(request)
+        return Response(
+            {"inicio": inicio, "fim": fim, "linhas": resumo_auditoria(inicio, fim)}
+        )
+
+
+class ExportJobViewSet(
+    ConditionalGetMixin,
+    AuditLogMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Exportações em segundo plano.
+
+    POST /exportacoes/                 {"tipo": "ranking_xlsx", "parametros": {...}} -> 202
+    GET  /exportacoes/{id}/            status do job (pendente/processando/concluido/erro/expirado)
+    GET  /exportacoes/{id}/download/   arquivo gerado, enquanto não expirar
+
+    "parametros" são os mesmos query params aceitos pela exportação síncrona
+    (filtros, search, ordering). O processamento fica a cargo do comando
+    `process_export_jobs`.
+    """
+
+    serializer_class = ExportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DefaultPagination
+    audit_module = "exportacoes"
+
+    def get_queryset(self):
+        # cada usuário enxerga apenas as próprias exportações
+        return ExportJob.objects.filter(usuario=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        tipo = serializer.validated_data["tipo"]
+        parametros = limpar_parametros(serializer.validated_data.get("parametros"))
+        # mesmas regras de acesso da exportação síncrona correspondente
+        check_export_permission(tipo, request.user, parametros)
+
+        job = serializer.save(usuario=request.user, parametros=parametros)
+        self._log(request, "EXPORT", obj=job, detalhe=tipo)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        job = self.get_object()
+
+        expirado = job.status == ExportJob.STATUS_EXPIRADO or (
+            job.expira_em and job.expira_em <= timezone.now()
+        )
+        if expirado:
+            return Response(
+                {"detail": "Exportação expirada. Solicite novamente."},
+                status=status.HTTP_410_GONE,
+            )
+        if job.status != ExportJob.STATUS_CONCLUIDO or not job.arquivo:
+            return Response(
+                {"detail": "Exportação ainda não concluída.", "status": job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        resp = FileResponse(
+            job.arquivo.open("rb"),
+            content_type=job.mime or "application/octet-stream",
+        )
+        return set_attachment_headers(resp, job.nome_arquivo)
+
+
+class GlobalSearchViewSet(AuditLogMixin, viewsets.GenericViewSet):
+    """
+    Busca em todos os módulos de uma vez.
+
+    GET /search/?q=financeiro                     até `limite` resultados (padrão 20)
+    GET /search/?q=backup&tipo=risco,plano_acao   só nos tipos informados
+
+    Os resultados vêm por relevância, com o tipo e o id do registro de origem,
+    e só incluem módulos que o usuário pode listar.
+    """
+
+    serializer_class = SearchDocumentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    audit_module = "busca"
+
+    LIMITE_PADRAO = 20
+    LIMITE_MAXIMO = 50
+
+    def list(self, request):
+        texto = (request.query_params.get("q") or "").strip()
+        if not texto:
+            raise ValidationError({"q": "Informe o texto da busca."})
+
+        tipos = [
+            t.strip()
+            for t in (request.query_params.get("tipo") or "").split(",")
+            if t.strip()
+        ]
+        invalidos = [t for t in tipos if t not in FONTES]
+        if invalidos:
+            raise ValidationError(
+                {"tipo": f"Tipo(s) inválido(s): {', '.join(invalidos)}."}
+            )
+
+        try:
+            limite = int(request.query_params.get("limite") or self.LIMITE_PADRAO)
+        except ValueError:
+            limite = self.LIMITE_PADRAO
+        limite = max(1, min(limite, self.LIMITE_MAXIMO))
+
+        self._log_access(request, detalhe=texto[:200])
+        docs = buscar_global(request, texto, tipos=tipos, limite=limite)
+        return Response(
+            {"q": texto, "resultados": self.get_serializer(docs, many=True).data}
+        )
@@ -1,35 +1,59 @@
+import datetime
+from functools import partial
+
 from api.utils.activity import AuditLogMixin
-from collections import defaultdict
-from datetime import timedelta, datetime
+from django.apps import apps
+from django.conf import settings
+from django.urls import reverse
 from django.utils import timezone
-from django.db.models import Count
-import re
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .models import (
-    Risk,
-    ActionPlan,
-    DocumentosLGPD,
-    Checklist,
-    CalendarEvent,
-    MonitoringAction,
-    Incident,
-    LikelihoodItem,
-    ImpactItem,
-    LoginActivity,
+from rest_framework.utils.urls import replace_query_param
+from .audit_storage import logins_por_mes
+from .conditional import resposta_condicional, validadores
+from .dashboard_snapshot import (
+    DEPENDENCIAS,
+    get_dashboard_payload,
+    logins_recentes,
+    projetar_login,
+    ranking_usuarios,
+    timeline_acoes,
+    RANKING_LIMIT_PADRAO,
 )
+from .models import ActionPlan, Incident, LoginActivity, Risk, User
+from .pagination import LoginFeedKeysetPagination
+from .risk_stats import SETOR_NAO_INFORMADO
+from .timeseries import serie_mensal
+
+
+def _serie_incidentes(hoje, meses, por):
+    return serie_mensal(
+        Incident.objects.all(), "data_registro", meses=meses, hoje=hoje, por=por
+    )
+
 
-SPLIT_RE = re.compile(r"[\n;,•\u2022]+")
+def _serie_logins(hoje, meses, por):
+    return logins_por_mes(meses=meses, hoje=hoje)
 
 
-# helper: mesma lógica de split da tela, mas tolerante a \r e bullets
-def _split_acoes(texto):
-    """Divide o campo resposta_risco em ações individuais."""
-    if not texto:
-        return []
-    return [
-        t.strip() for t in SPLIT_RE.split(texto) if t and t.strip() and t.strip() != "-"
-    ]
+# ?serie= -> (função, campo de setor ou None se a série não tem setor, modelos lidos)
+SERIES = {
+    "acoes": (timeline_acoes, "risco__setor", (ActionPlan, Risk)),
+    "incidentes": (_serie_incidentes, None, (Incident,)),
+    "logins": (_serie_logins, None, (LoginActivity,)),
+}
+
+
+def _validadores_do_dia(request, hoje, modelos, *querysets):
+    """Validadores de um bloco do Dashboard: os modelos lidos + a data de hoje."""
+    inicio_do_dia = timezone.make_aware(
+        datetime.datetime.combine(hoje, datetime.time.min)
+    )
+    return validadores(
+        request, *querysets, modelos=modelos, extra=(hoje,), datas=(inicio_do_dia,)
+    )
 
 
 class DashboardViewSet(AuditLogMixin, viewsets.ViewSet):
@@ -37,299 +61,115 @@ class DashboardViewSet(AuditLogMixin, viewsets.ViewSet):
     GET /api/dashboard/
     Retorna os dados consolidados do Dashboard.
     Protegido por IsAuthenticated.
+
+    O payload vem do snapshot pré-calculado (api/dashboard_snapshot.py);
+    só as seções invalidadas desde a última leitura são recalculadas.
     """
 
     permission_classes = [permissions.IsAuthenticated]
     audit_module = "dashboard"
 
     def list(self, request):
-        self._log_access(request)
         hoje = timezone.localdate()
-        daqui_30 = hoje + timedelta(days=30)
-
-        # === Percentuais para Conformidade (robusto e sem quebrar nada) ===
-        try:
-            # Checklist
-            total_checklist = Checklist.objects.count()
-            concl_checklist = Checklist.objects.filter(is_completed=True).count()
-            p_checklist = (
-                (concl_checklist * 100.0 / total_checklist) if total_checklist else 0.0
-            )
-
-            total_planos = ActionPlan.objects.count()
-            concl_planos = ActionPlan.objects.filter(status__in=["concluido"]).count()
-            p_acoes = (concl_planos * 100.0 / total_planos) if total_planos else 0.0
-
-            total_docs = DocumentosLGPD.objects.count()
-            docs_validos = DocumentosLGPD.objects.filter(
-                proxima_revisao__gte=hoje
-            ).count()
-            p_docs = (docs_validos * 100.0 / total_docs) if total_docs else 0.0
-
-            # === Conformidade (revisada) ===
-            conformidade_calc = round(
-                (p_checklist * 0.5)  # maior peso → controles LGPD concluídos
-                + (p_acoes * 0.3)  # execução das ações corretivas
-                + (p_docs * 0.2),  # governança documental
-                1,
-            )
-
-        except Exception:
-            # fallback defensivo para não quebrar o dashboard
-            conformidade_calc = 75.0
-
-        # === Índice de Maturidade (simples e seguro) ===
-        try:
-            indice_maturidade = {
-                "indice": round((p_checklist * 0.6) + (p_acoes * 0.4), 1),
-                "percentAcoes": round(p_acoes, 1),
-                "percentChecklist": round(p_checklist, 1),
-            }
-        except Exception:
-            indice_maturidade = {
-                "indice": 0.0,
-                "percentAcoes": 0.0,
-                "percentChecklist": 0.0,
-            }
-
-        # ===== KPIs =====
-        kpis = {
-            "conformidade": conformidade_calc,
-            "riscosMapeados": Risk.objects.count(),
-            "acoesAtrasadas": ActionPlan.objects.filter(
-                status__in=["nao_iniciado", "andamento"],
-                prazo__lt=hoje,
-            ).count(),
-            "docsVencendo30d": DocumentosLGPD.objects.filter(
-                proxima_revisao__range=(hoje, daqui_30)
-            ).count(),
-            "alertas": 0,
-        }
-
-        # ===== Documentos a vencer (para tabela) =====
-        documentos_vencendo_qs = (
-            DocumentosLGPD.objects.filter(proxima_revisao__range=(hoje, daqui_30))
-            .order_by("proxima_revisao")
-            .values("id", "evidencia", "criticidade", "proxima_revisao")
+        ranking_limit = int(request.query_params.get("limit", RANKING_LIMIT_PADRAO))
+        # o ranking (com qualquer limite) sai de LoginActivity, já em DEPENDENCIAS
+        valid = _validadores_do_dia(
+            request, hoje, [apps.get_model("api", nome) for nome in DEPENDENCIAS]
         )
-        documentosVencimentos = [
-            {
-                "evidencia": d["evidencia"],
-                "criticidade": d["criticidade"],
-                "proxima_revisao": d["proxima_revisao"],
-            }
-            for d in documentos_vencendo_qs
-        ]
-
-        # ===== Distribuição de Riscos =====
-        baixo = medio = alto = critico = 0
-        for r in Risk.objects.all():
-            score = r.pontuacao or 0
-            if score == 0:
-                continue
-            elif score <= 6:
-                baixo += 1
-            elif score <= 12:
-                medio += 1
-            elif score <= 16:
-                alto += 1
-            else:
-                critico += 1
-
-        riscosDistribuicao = [
-            {"name": "Baixo", "value": baixo},
-            {"name": "Médio", "value": medio},
-            {"name": "Alto", "value": alto},
-            {"name": "Crítico", "value": critico},
-        ]
-
-        # ===== Riscos por Setor =====
-        riscosPorSetor_qs = (
-            Risk.objects.values("setor")
-            .annotate(quantidade=Count("id"))
-            .order_by("-quantidade")
-        )
-        riscosPorSetor = [
-            {"setor": r["setor"] or "Não informado", "quantidade": r["quantidade"]}
-            for r in riscosPorSetor_qs
-        ]
-
-        # ===== Top 5 Riscos =====
-        top_riscos_qs = (
-            Risk.objects.exclude(pontuacao=None)
-            .order_by("-pontuacao")[:5]
-            .values("id", "risco_fator", "pontuacao", "setor", "processo")
+        return resposta_condicional(
+            request,
+            valid,
+            lambda: self._payload(request, hoje, ranking_limit),
+            partial(self._log_revalidacao, request),
         )
-        topRiscos = [
-            {
-                "id": r["id"],
-                "titulo": r["risco_fator"],
-                "score": r["pontuacao"],
-                "setor": r["setor"],
-                "owner": r["processo"],
-            }
-            for r in top_riscos_qs
-        ]
-
-        # ===== Ações Status =====
-        status_data = defaultdict(int)
-        riscos = Risk.objects.prefetch_related("planos").all()
-        hoje = timezone.localdate()
 
-        for risco in riscos:
-            acoes = _split_acoes(risco.resposta_risco)
-            total_acoes = len(acoes)
-            planos = list(risco.planos.all().order_by("id"))
-
-            if total_acoes == 0:
-                continue
-
-            for i in range(total_acoes):
-                if i < len(planos):
-                    plano = planos[i]
-                    status = plano.status or "nao_iniciado"
-
-                    # 🔹 Se prazo passou e não foi concluído, marca como atrasado
-                    if (
-                        plano.prazo
-                        and plano.prazo < hoje
-                        and status not in {"concluido", "atrasado"}
-                    ):
-                        status = "atrasado"
-                else:
-                    status = "nao_iniciado"
-
-                status_data[status] += 1
-
-        # 🔹 Ordem e rótulos fixos (humanizados só aqui)
-        label_map = {
-            "concluido": "Concluído",
-            "andamento": "Em andamento",
-            "nao_iniciado": "Não iniciado",
-            "atrasado": "Atrasado",
-        }
+    def _payload(self, request, hoje, ranking_limit):
+        self._log_access(request)
 
-        acoesStatus = [
-            {"name": label_map[k], "value": status_data.get(k, 0)} for k in label_map
-        ]
+        data = get_dashboard_payload(hoje)
 
-        # ===== Timeline de Execução (Planejado × Concluído × Andamento × Atrasadas) =====
-        timeline = defaultdict(
-            lambda: {"planejadas": 0, "andamento": 0, "concluidas": 0, "atrasadas": 0}
+        # ===== Últimos acessos: link da próxima página do feed =====
+        cursor = data.pop("loginsRecentesCursor", None)
+        data["loginsRecentesNext"] = (
+            replace_query_param(
+                request.build_absolute_uri(reverse("api:dashboard-logins-recentes")),
+                LoginFeedKeysetPagination.cursor_query_param,
+                cursor,
+            )
+            if cursor
+            else None
         )
-        hoje = timezone.localdate()
-
-        for risco in Risk.objects.prefetch_related("planos"):
-            # 1️⃣ Extrai todas as ações descritas no campo texto
-            acoes_texto = _split_acoes(risco.resposta_risco)
-            total_texto = len(acoes_texto)
-
-            # 2️⃣ Obtém os planos cadastrados (ActionPlan)
-            planos = list(risco.planos.all())
 
-            # 3️⃣ Faz correspondência entre planos e ações
-            #    se houver menos planos do que ações no texto, as demais viram "não iniciadas"
-            for idx, acao in enumerate(acoes_texto):
-                if idx < len(planos):
-                    plano = planos[idx]
-                    prazo = plano.prazo or hoje
-                    status = (plano.status or "nao_iniciado").lower().strip()
-                else:
-                    prazo = hoje
-                    status = "nao_iniciado"
-
-                mes_label = prazo.strftime("%b/%y")
-                bucket = timeline[mes_label]
-
-                # Toda ação conta como planejada
-                bucket["planejadas"] += 1
+        # ===== Ranking de Usuários Mais Ativos =====
+        # o snapshot guarda o ranking com o limite padrão; outros limites são calculados na hora
+        if ranking_limit != RANKING_LIMIT_PADRAO:
+            data["rankingUsuarios"] = ranking_usuarios(ranking_limit)
 
-                # Normaliza status
-                if status in {"concluido", "concluida", "concluídas", "concluidas"}:
-                    bucket["concluidas"] += 1
-                elif status in {"andamento", "em andamento"}:
-                    bucket["andamento"] += 1
-                elif status in {"atrasada", "atrasado"} or (
-                    prazo < hoje
-                    and status
-                    not in {"concluido", "concluida", "concluídas", "concluidas"}
-                ):
-                    bucket["atrasadas"] += 1
+        return Response(data)
 
-        # 4) Converte para lista e ordena cronologicamente (formato "Oct/25")
-        acoesTimeline = [
-            {
-                "mes": k,
-                "planejadas": v["planejadas"],
-                "andamento": v["andamento"],
-                "concluidas": v["concluidas"],
-                "atrasadas": v["atrasadas"],
-            }
-            for k, v in sorted(
-                timeline.items(), key=lambda x: datetime.strptime(x[0], "%b/%y")
+    @action(detail=False, methods=["get"], url_path="logins-recentes")
+    def logins_recentes(self, request):
+        """
+        Feed dos últimos acessos (janela de LOGINS_RECENTES_DIAS), paginado
+        por cursor: ?cursor=... (links next/previous) e ?page_size= (até 100).
+        """
+        valid = _validadores_do_dia(
+            request, timezone.localdate(), (LoginActivity, User)
+        )
+        return resposta_condicional(request, valid, lambda: self._feed(request))
+
+    def _feed(self, request):
+        paginator = LoginFeedKeysetPagination()
+        linhas = paginator.paginate_queryset(logins_recentes(), request, view=self)
+        return paginator.get_paginated_response([projetar_login(l) for l in linhas])
+
+    @action(detail=False, methods=["get"], url_path="series")
+    def series(self, request):
+        """
+        Série mensal de um bloco do Dashboard.
+        ?serie=acoes|incidentes|logins   (obrigatório)
+        ?meses=12                        últimos N meses (padrão: DASHBOARD_SERIES_MESES)
+        ?por=setor                       uma série por setor (só ações)
+        """
+        nome = request.query_params.get("serie", "")
+        if nome not in SERIES:
+            raise ValidationError(
+                {"serie": f"Informe uma destas séries: {', '.join(SERIES)}."}
             )
-        ]
-
-        # ===== Incidentes ao longo do tempo =====
-        inc_timeline = defaultdict(lambda: {"qtd": 0})
-
-        # Usa a data de registro como referência temporal
-        for inc in Incident.objects.exclude(data_registro=None):
-            mes_label = inc.data_registro.strftime("%b/%y")  # Ex: "Nov/25"
-            inc_timeline[mes_label]["qtd"] += 1
+        funcao, campo_setor, modelos = SERIES[nome]
 
-        # Ordena cronologicamente
-        incidentesTimeline = [
-            {"mes": k, "qtd": v["qtd"]}
-            for k, v in sorted(
-                inc_timeline.items(),
-                key=lambda x: datetime.strptime(x[0], "%b/%y"),
+        meses = request.query_params.get("meses") or settings.DASHBOARD_SERIES_MESES
+        try:
+            meses = int(meses)
+        except (TypeError, ValueError):
+            raise ValidationError({"meses": "Informe um número inteiro de meses."})
+        if not 0 <= meses <= settings.SERIES_MAX_MESES:
+            raise ValidationError(
+                {"meses": f"Use de 0 (todo o histórico) a {settings.SERIES_MAX_MESES}."}
             )
-        ]
 
-        # ===== Últimos Acessos =====
-        logins_qs = LoginActivity.objects.select_related("usuario").order_by(
-            "-data_login"
-        )
-        loginsRecentes = [
-            {
-                "usuario": l.usuario.get_full_name() or l.usuario.email,
-                "funcao": getattr(l.usuario, "role", "-"),
-                "quando": timezone.localtime(l.data_login).strftime("%d/%m/%Y %H:%M"),
-            }
-            for l in logins_qs
-        ]
+        por = request.query_params.get("por")
+        if por not in (None, "", "setor"):
+            raise ValidationError({"por": "Agrupamento aceito: setor."})
+        if por and not campo_setor:
+            raise ValidationError({"por": f"A série '{nome}' não tem setor."})
 
-        # ===== Ranking de Usuários Mais Ativos =====
-        ranking_limit = int(request.query_params.get("limit", 10))  # 🔹 padrão: 10
-
-        rankingUsuarios_qs = (
-            LoginActivity.objects.values("usuario__first_name", "usuario__email")
-            .annotate(total=Count("id"))
-            .order_by("-total")[:ranking_limit]
+        hoje = timezone.localdate()
+        return resposta_condicional(
+            request,
+            _validadores_do_dia(request, hoje, modelos),
+            lambda: self._serie(request, nome, hoje, meses, por, funcao, campo_setor),
+            partial(self._log_revalidacao, request),
         )
 
-        rankingUsuarios = [
-            {
-                "nome": r["usuario__first_name"] or r["usuario__email"],
-                "acessos": r["total"],
-            }
-            for r in rankingUsuarios_qs
-        ]
-
-        # ===== Monta resposta =====
-        data = {
-            "kpis": kpis,
-            "riscosDistribuicao": riscosDistribuicao,
-            "riscosPorSetor": riscosPorSetor,
-            "topRiscos": topRiscos,
-            "acoesStatus": acoesStatus,
-            "acoesTimeline": acoesTimeline,
-            "documentosVencimentos": documentosVencimentos,
-            "incidentesTimeline": incidentesTimeline,
-            "loginsRecentes": loginsRecentes,
-            "rankingUsuarios": rankingUsuarios,
-            "indiceMaturidade": indice_maturidade,
-        }
-
-        return Response(data)
+    def _serie(self, request, nome, hoje, meses, por, funcao, campo_setor):
+        self._log_access(request)
+        dados = funcao(hoje, meses or None, campo_setor if por else None)
+        if por:
+            dados = [
+                {"setor": setor or SETOR_NAO_INFORMADO, "serie": serie}
+                for setor, serie in sorted(
+                    dados.items(), key=lambda item: (not item[0], item[0] or "")
+                )
+            ]
+        return Response({"serie": nome, "meses": meses or None, "dados": dados})
@@ -122,6 +122,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "camaleao.wsgi.application"
 
+# manage.py test: ajustes de ambiente de teste (camaleao/test_runner.py)
+TEST_RUNNER = "camaleao.test_runner.CamaleaoTestRunner"
+
 # ============================================================
 # 7️⃣ Banco de dados (SQLite local por padrão)
 # ============================================================
@@ -211,6 +214,124 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 SECURE_CROSS_ORIGIN_OPENER_POLICY = "same-origin"
 SECURE_CROSS_ORIGIN_EMBEDDER_POLICY = "require-corp"
 
+# ============================================================
+# 14️⃣ Exportações em segundo plano (fila no próprio banco)
+# ============================================================
+# - Jobs criados em /api/v1/exportacoes/ e processados por:
+#     python manage.py process_export_jobs
+# - Arquivos gerados ficam em MEDIA_ROOT/exports/ até expirar
+# ============================================================
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+EXPORT_JOB_TTL_HOURS = int(os.getenv("EXPORT_JOB_TTL_HOURS", "24"))
+# job em "processando" há mais que isso é considerado travado (worker caiu)
+EXPORT_JOB_TIMEOUT_MINUTES = int(os.getenv("EXPORT_JOB_TIMEOUT_MINUTES", "30"))
+EXPORT_JOB_MAX_TENTATIVAS = int(os.getenv("EXPORT_JOB_MAX_TENTATIVAS", "3"))
+
+# ============================================================
+# 15️⃣ Auditoria (UserActivityLog) gravada em lote
+# ============================================================
+# - Eventos ficam numa fila em memória e vão ao banco via bulk_create
+# - Cada evento é antes anexado ao spool em disco (nada se perde se o processo cair)
+# - Pendências do spool: python manage.py flush_audit_spool
+# ============================================================
+# (nos testes fica desligado: camaleao/settings/test.py e camaleao/test_runner.py)
+AUDIT_LOG_BUFFERED = os.getenv("AUDIT_LOG_BUFFERED", "True").lower() == "true"
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "200"))
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv("AUDIT_LOG_FLUSH_SECONDS", "5"))
+AUDIT_LOG_SPOOL_DIR = os.getenv(
+    "AUDIT_LOG_SPOOL_DIR", os.path.join(BASE_DIR, "audit_spool")
+)
+AUDIT_LOG_SPOOL_FSYNC = os.getenv("AUDIT_LOG_SPOOL_FSYNC", "False").lower() == "true"
+
+# Retenção: linhas mais antigas que isso vão para arquivos .jsonl.gz mensais
+#   python manage.py rollup_audit_logs    (resumos diários, rodar 1x/dia)
+#   python manage.py archive_audit_logs   (arquivamento)
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "365"))
+AUDIT_ARCHIVE_DIR = os.getenv(
+    "AUDIT_ARCHIVE_DIR", os.path.join(BASE_DIR, "audit_archive")
+)
+
+# ============================================================
+# 16️⃣ Gravação em lote (/riscos/bulk/, /actionplan/bulk/)
+# ============================================================
+BULK_MAX_ITENS = int(os.getenv("BULK_MAX_ITENS", "5000"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+
+# ============================================================
+# 17️⃣ Importação de planilhas (/inventarios/import/)
+# ============================================================
+# linhas validadas e gravadas (bulk_create) por bloco
+INVENTARIO_IMPORT_CHUNK_SIZE = int(os.getenv("INVENTARIO_IMPORT_CHUNK_SIZE", "1000"))
+# linhas com erro detalhadas no relatório (as demais só contam)
+INVENTARIO_IMPORT_MAX_ERROS = int(os.getenv("INVENTARIO_IMPORT_MAX_ERROS", "1000"))
+
+# ============================================================
+# 18️⃣ Busca textual (?search= de inventário, riscos, planos e incidentes)
+# ============================================================
+# - PostgreSQL: coluna search_vector + índice GIN (config de idioma abaixo)
+# - SQLite (dev): índice invertido local (SearchTerm)
+# - Carga inicial/reconstrução: python manage.py rebuild_search_index
+# ============================================================
+FULLTEXT_CONFIG = os.getenv("FULLTEXT_CONFIG", "portuguese")
+
+# ============================================================
+# 19️⃣ Séries mensais (Dashboard e /dashboard/series/)
+# ============================================================
+# janela das timelines do Dashboard em meses (0 = todo o histórico)
+DASHBOARD_SERIES_MESES = int(os.getenv("DASHBOARD_SERIES_MESES", "0"))
+# maior janela aceita em /dashboard/series/?meses=
+SERIES_MAX_MESES = int(os.getenv("SERIES_MAX_MESES", "60"))
+
+# ============================================================
+# 20️⃣ Últimos acessos (Dashboard e /dashboard/logins-recentes/)
+# ============================================================
+# só entram logins dos últimos N dias; o Dashboard traz a primeira página
+LOGINS_RECENTES_DIAS = int(os.getenv("LOGINS_RECENTES_DIAS", "30"))
+
+# ============================================================
+# 21️⃣ Miniaturas de avatar (geradas no upload, api/avatars.py)
+# ============================================================
+# lados máximos em px (ex.: "64,128,256"); mudou? rebuild_avatar_renditions
+AVATAR_TAMANHOS = tuple(
+    int(t) for t in os.getenv("AVATAR_TAMANHOS", "64,128,256").split(",") if t
+)
+# tamanho de avatar_url e da rota antiga /avatar/<id>/
+AVATAR_TAMANHO_PADRAO = int(os.getenv("AVATAR_TAMANHO_PADRAO", "256"))
+AVATAR_QUALIDADE = int(os.getenv("AVATAR_QUALIDADE", "85"))  # JPEG
+
+# ============================================================
+# 22️⃣ Download de documentos (/documentos/<id>/download/)
+# ============================================================
+# "" (o Django envia, em blocos), "x-accel-redirect" (nginx) ou "x-sendfile"
+DOCUMENTOS_OFFLOAD = os.getenv("DOCUMENTOS_OFFLOAD", "")
+# nginx: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+DOCUMENTOS_ACCEL_PREFIXO = os.getenv("DOCUMENTOS_ACCEL_PREFIXO", "/protected-media/")
+DOCUMENTOS_CHUNK = int(os.getenv("DOCUMENTOS_CHUNK", str(64 * 1024)))  # bytes
+
+# ============================================================
+# 23️⃣ Upload de documentos em partes (/documentos/<id>/upload-sessoes/)
+# ============================================================
+# - Partes montadas em disco até a conclusão; sessões abandonadas:
+#     python manage.py cleanup_document_uploads
+# - Mesmo sistema de arquivos que MEDIA_ROOT: a conclusão só move o arquivo
+# ============================================================
+DOCUMENTOS_UPLOAD_DIR = os.getenv(
+    "DOCUMENTOS_UPLOAD_DIR", os.path.join(BASE_DIR, "upload_spool")
+)
+DOCUMENTOS_UPLOAD_MAX = int(os.getenv("DOCUMENTOS_UPLOAD_MAX", str(1024**3)))
+DOCUMENTOS_UPLOAD_PARTE_MAX = int(
+    os.getenv("DOCUMENTOS_UPLOAD_PARTE_MAX", str(8 * 1024**2))
+)
+DOCUMENTOS_UPLOAD_TTL_HOURS = int(os.getenv("DOCUMENTOS_UPLOAD_TTL_HOURS", "24"))
+
+# ============================================================
+# 24️⃣ Anexos por conteúdo (MEDIA_ROOT/blobs/, api/storage.py)
+# ============================================================
+# - Um arquivo por sha256, compartilhado entre documentos (DocumentBlob)
+# - Sem referência há DOCUMENTOS_GC_HORAS: python manage.py gc_document_blobs
+# ============================================================
+DOCUMENTOS_GC_HORAS = int(os.getenv("DOCUMENTOS_GC_HORAS", "24"))
+
 print(
     f"[Camaleão] Ambiente ativo: {os.getenv('DJANGO_SETTINGS_MODULE')} | PASSWORD_RESET_TIMEOUT = {os.getenv('PASSWORD_RESET_TIMEOUT')} segundos"
 )
@@ -0,0 +1,7 @@
+from .dev import *
+
+# Testes (DJANGO_SETTINGS_MODULE=camaleao.settings.test, ex.: pytest-django)
+
+# auditoria gravada na hora: a fila em lote ficaria fora da transação de
+# cada teste (em manage.py test o camaleao/test_runner.py já faz isso)
+AUDIT_LOG_BUFFERED = False
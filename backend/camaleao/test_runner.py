@@ -0,0 +1,17 @@
+# camaleao/test_runner.py
+"""
+Runner de `manage.py test` (TEST_RUNNER).
+
+A auditoria em lote (AUDIT_LOG_BUFFERED) grava a fila fora da transação de
+cada teste, e o flush do encerramento já encontraria o banco de testes
+destruído: nos testes ela grava na hora, qualquer que seja o settings.
+Para outros runners (pytest-django etc.): camaleao.settings.test.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class CamaleaoTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.AUDIT_LOG_BUFFERED = False
@@ -1,14 +1,16 @@
+import posixpath
+
 from django.contrib import admin
 from django.urls import path, include, re_path
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.generic import RedirectView
 from django.conf import settings  # Importe settings
-from django.conf.urls.static import static  # Importe static
 from django.views.static import serve as static_serve
 
 from api.avatar_views import (
     serve_avatar_full,
     serve_avatar_thumb,
+    serve_avatar_rendition,
     serve_avatar_placeholder,
 )
 
@@ -27,24 +29,34 @@ urlpatterns = [
 # ==== ROTAS DE AVATAR (fora do DRF) ====
 urlpatterns += [
     path("avatar/<int:pk>/", serve_avatar_thumb, name="avatar-thumb"),
+    path(
+        "avatar/<int:pk>/<int:tamanho>/<str:origem>/",
+        serve_avatar_rendition,
+        name="avatar-rendition",
+    ),
     path("avatar/full/<int:pk>/", serve_avatar_full, name="avatar-full"),
     path("avatar/placeholder/", serve_avatar_placeholder, name="avatar-placeholder"),
 ]
 
-# === Servir mídia mesmo com DEBUG=False (modo produção local/túnel) ===
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-else:
-    urlpatterns += [
-        re_path(
-            r"^media/(?P<path>.*)$",
-            static_serve,
-            {
-                "document_root": settings.MEDIA_ROOT,
-                "show_indexes": False,
-            },
-        ),
-    ]
+# === Servir mídia (também com DEBUG=False: modo produção local/túnel) ===
+# Documentos e exportações só pela API, com permissão:
+# /api/v1/documentos/<id>/download/ e /api/v1/exportacoes/<id>/download/
+# (o caminho de um blob sai do arquivo_sha256 exposto na API)
+MIDIA_PROTEGIDA = ("blobs/", "documentos/", "exports/")
+
+
+def servir_midia(request, path):
+    caminho = posixpath.normpath(path).lstrip("/")
+    if caminho.startswith(MIDIA_PROTEGIDA):
+        raise Http404
+    return static_serve(
+        request, caminho, document_root=settings.MEDIA_ROOT, show_indexes=False
+    )
+
+
+urlpatterns += [
+    re_path(r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"), servir_midia),
+]
 
 # === Servir estáticos em modo produção local, se necessário ===
 if not settings.DEBUG:
@@ -0,0 +1,152 @@
+# backend/scripts/bench_risk_stats.py
+"""
+Benchmark: estatísticas de riscos em Python (laço/Counter) x agregação no banco.
+
+Uso (a partir de backend/):
+    python scripts/bench_risk_stats.py                  # 1k, 10k e 100k riscos
+    python scripts/bench_risk_stats.py --risks 5000 50000
+
+Roda num banco de teste descartável (o mesmo que o `manage.py test` criaria),
+com riscos sintéticos. Para cada volume mede o tempo, o número de consultas
+e o pico de memória alocada em Python (tracemalloc) de:
+  - distribuição por faixa + riscos por setor + Top 5 (seção do Dashboard);
+  - contagem por nível residual (/riscos/stats/by-band/).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "camaleao.settings.dev")
+
+SETORES = ["RH", "TI", "Jurídico", "Financeiro", "Comercial", "Marketing", ""]
+
+
+def _legacy_dashboard(Risk):
+    """Caminho anterior: uma passada em Python com limites fixos."""
+    baixo = medio = alto = critico = 0
+    for score in Risk.objects.values_list("pontuacao", flat=True):
+        score = score or 0
+        if score == 0:
+            continue
+        elif score <= 6:
+            baixo += 1
+        elif score <= 12:
+            medio += 1
+        elif score <= 16:
+            alto += 1
+        else:
+            critico += 1
+    return baixo + medio + alto + critico
+
+
+def _legacy_by_band(Risk):
+    """Caminho anterior: instancia todos os riscos para o Counter."""
+    counter = Counter((r.risco_residual or "").lower() for r in Risk.objects.all())
+    return sum(counter.values())
+
+
+def _sql_dashboard(Risk):
+    from api.risk_stats import distribuicao_por_faixa, riscos_por_setor, top_riscos
+
+    riscos = Risk.objects.all()
+    distribuicao = distribuicao_por_faixa(riscos)
+    riscos_por_setor(riscos)
+    top_riscos(riscos, limite=5)
+    return sum(f["value"] for f in distribuicao)
+
+
+def _sql_by_band(Risk):
+    from api.risk_stats import contagem_por_nivel
+
+    return sum(contagem_por_nivel(Risk.objects.all()).values())
+
+
+def _popular(n):
+    """Completa a tabela de riscos até `n` registros sintéticos."""
+    from api.models import ImpactItem, LikelihoodItem, Risk
+
+    probs = list(LikelihoodItem.objects.all())
+    imps = list(ImpactItem.objects.all())
+    rng = random.Random(n)
+    faltam = n - Risk.objects.count()
+    niveis = ["baixo", "medio", "alto", ""]
+    novos = []
+    for i in range(faltam):
+        p, im = rng.choice(probs), rng.choice(imps)
+        novos.append(
+            Risk(
+                matriz_filial="Matriz",
+                setor=rng.choice(SETORES),
+                processo=f"Processo {i % 50}",
+                risco_fator=f"Risco sintético {i}",
+                probabilidade=p,
+                impacto=im,
+                pontuacao=p.value * im.value,
+                risco_residual=rng.choice(niveis),
+            )
+        )
+    # bulk_create não dispara signals (índices de busca/dashboard)
+    Risk.objects.bulk_create(novos, batch_size=2000)
+
+
+def _medir(func, Risk):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as ctx:
+        total = func(Risk)
+    elapsed = time.perf_counter() - start
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, len(ctx.captured_queries), pico / 1024, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--risks", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from api.models import Risk
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    casos = (
+        ("dashboard", "python", _legacy_dashboard),
+        ("dashboard", "sql", _sql_dashboard),
+        ("by-band", "python", _legacy_by_band),
+        ("by-band", "sql", _sql_by_band),
+    )
+    try:
+        print(
+            f"{'riscos':>8} | {'caso':<9} | {'modo':<6} | {'tempo (ms)':>10} | {'consultas':>9} | {'pico Python (KB)':>16}"
+        )
+        print("-" * 74)
+        for n in sorted(args.risks):
+            _popular(n)
+            for caso, modo, func in casos:
+                elapsed, queries, pico, _ = _medir(func, Risk)
+                print(
+                    f"{n:>8} | {caso:<9} | {modo:<6} | {elapsed * 1000:>10.1f} | {queries:>9} | {pico:>16.1f}"
+                )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
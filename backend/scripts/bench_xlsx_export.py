@@ -0,0 +1,142 @@
+# backend/scripts/bench_xlsx_export.py
+"""
+Benchmark: exportação XLSX antiga (Workbook + ws.cell + BytesIO) x engine write-only.
+
+Uso (a partir de backend/):
+    python scripts/bench_xlsx_export.py                 # 10k, 100k e 500k linhas
+    python scripts/bench_xlsx_export.py --rows 10000 50000
+
+Cada caso roda num processo separado para medir o pico de memória (RSS) isolado.
+Usa linhas sintéticas com as mesmas 36 colunas do Inventário de Dados (sem banco).
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _fake_rows(n, ncols):
+    texto = "Lorem ipsum dolor sit amet, consectetur adipiscing elit"
+    for i in range(n):
+        yield [i] + [f"{texto} {i}-{c}" for c in range(1, ncols)]
+
+
+def _legacy(n, headers):
+    """Caminho anterior: workbook completo em memória + cópia do BytesIO."""
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    output = BytesIO()
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Inventários"
+
+    header_font = Font(bold=True)
+    fill = PatternFill(start_color="E6F0FF", end_color="E6F0FF", fill_type="solid")
+    for c, label in enumerate(headers, start=1):
+        cell = ws.cell(row=1, column=c, value=label)
+        cell.font = header_font
+        cell.fill = fill
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+
+    rows = list(_fake_rows(n, len(headers)))
+    for r, row in enumerate(rows, start=2):
+        for c, val in enumerate(row, start=1):
+            ws.cell(row=r, column=c, value=val)
+
+    for col_idx, label in enumerate(headers, start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = max(
+            10, min(50, len(str(label)) + 2)
+        )
+    ws.freeze_panes = "A2"
+    ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{len(rows) + 1}"
+
+    wb.save(output)
+    return len(output.getvalue())
+
+
+def _write_only(n, headers):
+    """Caminho novo: api.utils.export.write_xlsx gravando em arquivo temporário."""
+    from api.utils.export import write_xlsx
+
+    with tempfile.TemporaryFile(suffix=".xlsx") as tmp:
+        write_xlsx(
+            tmp,
+            "Inventários",
+            headers,
+            _fake_rows(n, len(headers)),
+            freeze_header=True,
+            autofilter=True,
+        )
+        return tmp.tell()
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return float("nan")
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux devolve KB; macOS devolve bytes
+    return kb / (1024 * 1024) if sys.platform == "darwin" else kb / 1024
+
+
+def _run_case(mode, n, queue):
+    from api.utils.export import INVENTARIO_COLUNAS
+
+    headers = [label for _, label in INVENTARIO_COLUNAS]
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    size = (_legacy if mode == "legacy" else _write_only)(n, headers)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, _peak_rss_mb() - baseline, size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 500_000]
+    )
+    parser.add_argument(
+        "--skip-legacy-above",
+        type=int,
+        default=None,
+        help="não roda o caminho antigo acima deste número de linhas",
+    )
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    print(
+        f"{'linhas':>8} | {'modo':<10} | {'tempo (s)':>9} | {'pico RSS (MB)':>13} | {'arquivo (MB)':>12}"
+    )
+    print("-" * 66)
+    for n in args.rows:
+        for mode in ("legacy", "write_only"):
+            if (
+                mode == "legacy"
+                and args.skip_legacy_above
+                and n > args.skip_legacy_above
+            ):
+                print(f"{n:>8} | {mode:<10} | {'-':>9} | {'(pulado)':>13} | {'-':>12}")
+                continue
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_case, args=(mode, n, queue))
+            proc.start()
+            elapsed, peak, size = queue.get()
+            proc.join()
+            print(
+                f"{n:>8} | {mode:<10} | {elapsed:>9.2f} | {peak:>13.1f} | {size / 1048576:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
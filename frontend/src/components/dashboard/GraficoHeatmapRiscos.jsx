@@ -2,8 +2,12 @@
 import React, { useEffect, useState, useCallback, useMemo, useRef } from 'react';
 import AxiosInstance from '../../components/Axios';
 
+// pontos desenhados no card do dashboard (as contagens vêm de data.grid)
+const PONTOS_MAX = 100;
+
 export default function HeatmapDashboard() {
   const [riscos, setRiscos] = useState([]);
+  const [grid, setGrid] = useState([]);
   const [loading, setLoading] = useState(true);
   const [tooltip, setTooltip] = useState(null);
   const tooltipRef = useRef(null);
@@ -12,10 +16,13 @@ export default function HeatmapDashboard() {
   const loadRiscos = useCallback(async () => {
     setLoading(true);
     try {
-      const { data } = await AxiosInstance.get('/heatmap-riscos/');
-      const results = data.riscos || [];
+      // matriz agregada no servidor + só a primeira página de riscos
+      const { data } = await AxiosInstance.get('/heatmap-riscos/', {
+        params: { riscos: 1, page_size: PONTOS_MAX },
+      });
 
-      setRiscos(results);
+      setRiscos(data.riscos?.results || []);
+      setGrid(data.grid || []);
     } catch (err) {
       console.error('Erro ao carregar riscos do dashboard:', err);
     } finally {
@@ -182,6 +189,18 @@ export default function HeatmapDashboard() {
                 });
               });
 
+              // Quadrantes com mais riscos do que os pontos desenhados: "+N"
+              const restantes = [];
+              for (let p = 1; p <= 5; p++) {
+                for (let i = 1; i <= 5; i++) {
+                  const total = Number(grid?.[p]?.[i]) || 0;
+                  const desenhados = grouped[`${p}-${i}`]?.length || 0;
+                  if (total > desenhados) {
+                    restantes.push({ p, i, n: total - desenhados });
+                  }
+                }
+              }
+
               // Repulsão leve
               const minDist = 9;
               for (let iter = 0; iter < 3; iter++) {
@@ -298,6 +317,21 @@ export default function HeatmapDashboard() {
                     )
                   )}
 
+                  {restantes.map(({ p, i, n }) => (
+                    <text
+                      key={`restantes-${p}-${i}`}
+                      x={scaleX(p)}
+                      y={Math.min(chartBounds.maxY, scaleY(i) + 22)}
+                      textAnchor="middle"
+                      fontSize="11"
+                      fontWeight="700"
+                      fill="#071744"
+                      pointerEvents="none"
+                    >
+                      +{n}
+                    </text>
+                  ))}
+
                   {/* === Pontos e Tooltip === */}
                   {allPoints.map((r) => {
                     const score = r.score ?? r.probabilidade * r.impacto;
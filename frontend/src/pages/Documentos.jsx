@@ -341,8 +341,9 @@ function FormularioAtividades() {
 
   const handleDownload = async (row) => {
     try {
-      if (!row.arquivo_url) return;
-      const url = absoluteFileUrl(row.arquivo_url);
+      if (!row.arquivo_download_url) return;
+      // rota da API (permissão + streaming); /media/ não serve documentos
+      const url = absoluteFileUrl(row.arquivo_download_url);
       const resp = await Axios.get(url, { responseType: 'blob' });
 
       const mime = resp.headers['content-type'] || row.arquivo_mime || undefined;
@@ -672,7 +673,7 @@ function FormularioAtividades() {
                             Ações
                           </Dropdown.Toggle>
                           <Dropdown.Menu>
-                            {r.arquivo_url && (
+                            {r.arquivo_download_url && (
                               <Dropdown.Item onClick={() => handleDownload(r)}>
                                 Download
                               </Dropdown.Item>
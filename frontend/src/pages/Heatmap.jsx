@@ -3,12 +3,18 @@ import Sidebar from '../components/Sidebar';
 import AxiosInstance from '../components/Axios';
 import PaginacaoRiscos from '../components/PaginacaoRiscos';
 
+// riscos desenhados por vez (a matriz/KPIs vêm agregados do servidor)
+const PONTOS_POR_PAGINA = 100;
+
 export default function Heatmap() {
   const [matrix, setMatrix] = useState(() => buildEmptyMatrix());
   const [loading, setLoading] = useState(true);
   const [errorMsg, setErrorMsg] = useState('');
   const [tooltip, setTooltip] = useState(null);
   const [riscos, setRiscos] = useState([]);
+  const [page, setPage] = useState(1);
+  const [count, setCount] = useState(0);
+  const totalPages = Math.max(1, Math.ceil(count / PONTOS_POR_PAGINA));
   const tooltipRef = React.useRef(null);
 
   function buildEmptyMatrix() {
@@ -21,7 +27,6 @@ export default function Heatmap() {
           probabilidade: prob,
           count: 0,
           scoreSum: 0,
-          riscosIds: [],
         });
       }
       m.push(row);
@@ -29,24 +34,15 @@ export default function Heatmap() {
     return m;
   }
 
-  const aggregateToMatrix = useCallback((riscosList) => {
+  // grid[prob][impacto] = quantidade (GROUP BY no servidor, em cache)
+  const gridToMatrix = useCallback((grid) => {
     const draft = buildEmptyMatrix();
-    riscosList.forEach((r) => {
-      const p =
-        typeof r.probabilidade === 'object'
-          ? Number(r.probabilidade.value)
-          : Number(r.probabilidade);
-      const i =
-        typeof r.impacto === 'object' ? Number(r.impacto.value) : Number(r.impacto);
-      if (p >= 1 && p <= 5 && i >= 1 && i <= 5 && !Number.isNaN(p) && !Number.isNaN(i)) {
-        const rowIndex = i - 1;
-        const colIndex = p - 1;
-        draft[rowIndex][colIndex].count += 1;
-        draft[rowIndex][colIndex].scoreSum += p * i;
-        if (r.id !== undefined && r.id !== null) {
-          draft[rowIndex][colIndex].riscosIds.push(r.id);
-        }
-      }
+    draft.forEach((row) => {
+      row.forEach((cell) => {
+        const n = Number(grid?.[cell.probabilidade]?.[cell.impacto]) || 0;
+        cell.count = n;
+        cell.scoreSum = n * cell.probabilidade * cell.impacto;
+      });
     });
     return draft;
   }, []);
@@ -55,20 +51,21 @@ export default function Heatmap() {
     setLoading(true);
     setErrorMsg('');
     try {
-      const { data } = await AxiosInstance.get('/heatmap-riscos/');
-      const allResults = data.riscos || [];
-
-      setRiscos(allResults);
+      // uma requisição: matriz agregada + só a página de riscos desenhada
+      const { data } = await AxiosInstance.get('/heatmap-riscos/', {
+        params: { riscos: 1, page, page_size: PONTOS_POR_PAGINA },
+      });
 
-      const aggregated = aggregateToMatrix(allResults);
-      setMatrix(aggregated);
+      setRiscos(data.riscos?.results || []);
+      setCount(data.riscos?.count ?? 0);
+      setMatrix(gridToMatrix(data.grid));
     } catch (err) {
       console.error('Erro ao carregar riscos:', err);
       setErrorMsg('Não foi possível carregar todos os dados de risco.');
     } finally {
       setLoading(false);
     }
-  }, [aggregateToMatrix]);
+  }, [gridToMatrix, page]);
 
   useEffect(() => {
     loadRiscos();
@@ -799,6 +796,47 @@ export default function Heatmap() {
               </>
             )}
           </div>
+
+          {/* Pontos desenhados em páginas (KPIs e matriz consideram todos) */}
+          {totalPages > 1 && (
+            <div
+              style={{
+                display: 'flex',
+                justifyContent: 'flex-end',
+                alignItems: 'center',
+                gap: '0.75rem',
+                fontSize: '0.8rem',
+                color: '#4a5568',
+              }}
+            >
+              <span>
+                Pontos {(page - 1) * PONTOS_POR_PAGINA + 1}–
+                {Math.min(page * PONTOS_POR_PAGINA, count)} de {count}
+              </span>
+              <button
+                type="button"
+                className="btn btn-sm btn-outline-secondary"
+                disabled={loading || page === 1}
+                onClick={() => {
+                  setTooltip(null);
+                  setPage((p) => Math.max(1, p - 1));
+                }}
+              >
+                Anterior
+              </button>
+              <button
+                type="button"
+                className="btn btn-sm btn-outline-secondary"
+                disabled={loading || page === totalPages}
+                onClick={() => {
+                  setTooltip(null);
+                  setPage((p) => Math.min(totalPages, p + 1));
+                }}
+              >
+                Próxima
+              </button>
+            </div>
+          )}
         </section>
       </main>
     </div>
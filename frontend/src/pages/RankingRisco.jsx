@@ -11,13 +11,13 @@ function RankingRisco() {
   const [rows, setRows] = useState([]);
   const [loading, setLoading] = useState(false);
   const [notice, setNotice] = useState(null); // {variant, text}
-  const [allRows, setAllRows] = useState([]);
 
-  // paginação
+  // paginação por cursor (/ranking-riscos/?page_size=&cursor=)
   const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(10);
-  const [count, setCount] = useState(0);
-  const totalPages = Math.max(1, Math.ceil(count / pageSize));
+  // cursores[n] = cursor da página n + 1 (a primeira não tem)
+  const [cursores, setCursores] = useState([null]);
+  const [proximoCursor, setProximoCursor] = useState(null);
 
   // filtros
   const [filterProb, setFilterProb] = useState('');
@@ -33,55 +33,43 @@ function RankingRisco() {
   const itemNumber = (idx) => (page - 1) * pageSize + idx + 1;
   const zebra = (idx) => (idx % 2 === 0 ? 'row-white' : 'row-blue');
 
-  const gotoPage = (p) => setPage(Math.min(Math.max(1, p), totalPages));
-  const renderPagination = () => {
-    const items = [];
-    const windowSize = 5;
-    const start = Math.max(1, page - Math.floor(windowSize / 2));
-    const end = Math.min(totalPages, start + windowSize - 1);
-    const realStart = Math.max(1, end - windowSize + 1);
+  // filtros/tamanho mudaram: volta para a primeira página
+  const resetPaging = () => {
+    setCursores([null]);
+    setPage(1);
+  };
 
-    items.push(
-      <Pagination.First key="first" disabled={page === 1} onClick={() => gotoPage(1)} />,
-      <Pagination.Prev
-        key="prev"
-        disabled={page === 1}
-        onClick={() => gotoPage(page - 1)}
-      />
-    );
-    if (realStart > 1) items.push(<Pagination.Ellipsis key="start-ellipsis" disabled />);
-    for (let p = realStart; p <= end; p++) {
-      items.push(
-        <Pagination.Item key={p} active={p === page} onClick={() => gotoPage(p)}>
-          {p}
-        </Pagination.Item>
-      );
-    }
-    if (end < totalPages) items.push(<Pagination.Ellipsis key="end-ellipsis" disabled />);
-    items.push(
-      <Pagination.Next
-        key="next"
-        disabled={page === totalPages}
-        onClick={() => gotoPage(page + 1)}
-      />,
-      <Pagination.Last
-        key="last"
-        disabled={page === totalPages}
-        onClick={() => gotoPage(totalPages)}
-      />
-    );
-    return <Pagination className="mb-0">{items}</Pagination>;
+  const gotoNext = () => {
+    if (!proximoCursor) return;
+    setCursores((prev) => [...prev.slice(0, page), proximoCursor]);
+    setPage(page + 1);
   };
 
-  const loadRows = async (targetPage = page, targetPageSize = pageSize) => {
+  const renderPagination = () => (
+    <Pagination className="mb-0">
+      <Pagination.First disabled={page === 1} onClick={() => setPage(1)} />
+      <Pagination.Prev disabled={page === 1} onClick={() => setPage(page - 1)} />
+      <Pagination.Item active>{page}</Pagination.Item>
+      <Pagination.Next disabled={!proximoCursor} onClick={gotoNext} />
+    </Pagination>
+  );
+
+  const cursorDe = (url) => (url ? new URL(url).searchParams.get('cursor') : null);
+
+  const loadRows = async () => {
     setLoading(true);
     try {
-      const { data } = await Axios.get('/ranking-riscos/');
+      // só a página exibida; ordem e filtros aplicados no servidor
+      const params = { page_size: pageSize };
+      if (cursores[page - 1]) params.cursor = cursores[page - 1];
+      if (filterProb) params.probabilidade = filterProb;
+      if (filterImpact) params.impacto = filterImpact;
+      if (filterScore !== '') params.pontuacao = filterScore;
 
-      // 🔹 já vem globalmente ordenado do backend
-      const allResults = Array.isArray(data) ? data : [];
+      const { data } = await Axios.get('/ranking-riscos/', { params });
 
-      setAllRows(allResults);
+      setRows(data.results || []);
+      setProximoCursor(cursorDe(data.next));
     } catch (e) {
       console.error(e);
       showMsg('danger', 'Falha ao carregar a listagem.');
@@ -91,52 +79,9 @@ function RankingRisco() {
   };
 
   useEffect(() => {
-    loadRows(page, pageSize);
+    loadRows();
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [page, pageSize]);
-
-  useEffect(() => {
-    let filtered = [...allRows];
-
-    // filtro probabilidade
-    if (filterProb) {
-      const probNum = Number(filterProb);
-      filtered = filtered.filter((r) => {
-        const v = r.probabilidade?.value ?? r.probabilidade;
-        return Number(v) === probNum;
-      });
-    }
-
-    // filtro impacto
-    if (filterImpact) {
-      const impactNum = Number(filterImpact);
-      filtered = filtered.filter((r) => {
-        const v = r.impacto?.value ?? r.impacto;
-        return Number(v) === impactNum;
-      });
-    }
-
-    // filtro pontuação
-    if (filterScore !== '') {
-      const scoreNum = Number(filterScore);
-      if (!Number.isNaN(scoreNum) && scoreNum >= 0) {
-        filtered = filtered.filter((r) => Number(r.pontuacao) === scoreNum);
-      }
-    }
-
-    const total = filtered.length;
-    setCount(total);
-
-    const totalPagesCalc = Math.max(1, Math.ceil(total / pageSize));
-    if (page > totalPagesCalc) {
-      setPage(totalPagesCalc);
-      return;
-    }
-
-    const startIdx = (page - 1) * pageSize;
-    const endIdx = startIdx + pageSize;
-    setRows(filtered.slice(startIdx, endIdx));
-  }, [allRows, filterProb, filterImpact, filterScore, page, pageSize]);
+  }, [page, pageSize, cursores, filterProb, filterImpact, filterScore]);
 
   return (
     <div className="d-flex" style={{ minHeight: '100vh' }}>
@@ -176,7 +121,7 @@ function RankingRisco() {
                       value={filterProb}
                       onChange={(e) => {
                         setFilterProb(e.target.value);
-                        setPage(1);
+                        resetPaging();
                       }}
                     >
                       <option value="">Todas</option>
@@ -198,7 +143,7 @@ function RankingRisco() {
                       value={filterImpact}
                       onChange={(e) => {
                         setFilterImpact(e.target.value);
-                        setPage(1);
+                        resetPaging();
                       }}
                     >
                       <option value="">Todos</option>
@@ -224,7 +169,7 @@ function RankingRisco() {
                         const raw = e.target.value;
                         if (raw === '') {
                           setFilterScore('');
-                          setPage(1);
+                          resetPaging();
                           return;
                         }
 
@@ -232,7 +177,7 @@ function RankingRisco() {
                         if (Number.isNaN(n) || n < 0) return;
 
                         setFilterScore(String(n));
-                        setPage(1);
+                        resetPaging();
                       }}
                     />
                   ),
@@ -242,7 +187,7 @@ function RankingRisco() {
                 setFilterProb('');
                 setFilterImpact('');
                 setFilterScore('');
-                setPage(1);
+                resetPaging();
               }}
             />
           </div>
@@ -256,7 +201,7 @@ function RankingRisco() {
                 value={pageSize}
                 onChange={(e) => {
                   const size = Number(e.target.value);
-                  setPage(1);
+                  resetPaging();
                   setPageSize(size);
                 }}
                 style={{ width: '80px' }}
@@ -365,7 +310,9 @@ function RankingRisco() {
         {/* rodapé */}
         <div className="list-footer">
           <div className="text-muted">
-            <strong>Total:</strong> {count} • Página {page} de {totalPages}
+            Página {page}
+            {rows.length > 0 &&
+              ` • itens ${itemNumber(0)}–${itemNumber(rows.length - 1)}`}
           </div>
           {renderPagination()}
         </div>
@@ -24,7 +24,9 @@ import {
 } from "react-native";
 import { LinearGradient } from "expo-linear-gradient";
 import * as DocumentPicker from "expo-document-picker";
-import * as FileSystem from "expo-file-system";
+// API clássica (downloadAsync com headers, getContentUriAsync)
+import * as FileSystem from "expo-file-system/legacy";
+import * as SecureStore from "expo-secure-store";
 import { useSafeAreaInsets } from "react-native-safe-area-context";
 
 // Se você já tem um axios configurado, mantenha isso:
@@ -326,7 +328,7 @@ export default function DocumentosScreen() {
     ]);
   };
 
-  // ===== DOWNLOAD (Expo Go fallback abre no navegador) =====
+  // ===== DOWNLOAD (rota da API: exige o token, então baixa e abre o local) =====
   const absoluteFileUrl = (maybeUrl) => {
     if (!maybeUrl) return null;
     if (/^https?:\/\//i.test(maybeUrl)) return maybeUrl;
@@ -336,16 +338,38 @@ export default function DocumentosScreen() {
 
   const handleDownload = async (row) => {
     try {
-      if (!row.arquivo_url) return;
-      const url = absoluteFileUrl(row.arquivo_url);
-      // Expo Go: abrir no navegador
-      const supported = await Linking.canOpenURL(url);
-      if (supported) {
-        await Linking.openURL(url);
+      if (!row.arquivo_download_url) return;
+      const url = absoluteFileUrl(row.arquivo_download_url);
+      const nome = (row.arquivo_name || `documento-${row.id}`).replace(
+        /[\\/:*?"<>|]+/g,
+        "_"
+      );
+      const access = await SecureStore.getItemAsync("access");
+      const { uri, status } = await FileSystem.downloadAsync(
+        url,
+        `${FileSystem.cacheDirectory}${nome}`,
+        { headers: access ? { Authorization: `Bearer ${access}` } : {} }
+      );
+      if (status === 401) {
+        showMsg("danger", "Sessão expirada. Entre novamente.", 6000);
+        return;
+      }
+      if (status !== 200) {
+        showMsg("danger", "Não foi possível baixar o arquivo.");
+        return;
+      }
+
+      // Android só abre o arquivo do app por content://
+      const local =
+        Platform.OS === "android"
+          ? await FileSystem.getContentUriAsync(uri)
+          : uri;
+      if (await Linking.canOpenURL(local)) {
+        await Linking.openURL(local);
         showMsg("success", "Abrindo arquivo…");
         return;
       }
-      showMsg("danger", "Não foi possível abrir o arquivo.");
+      showMsg("success", `Arquivo salvo: ${nome}`);
     } catch (e) {
       console.error(e);
       showMsg("danger", "Falha no download/abertura do arquivo.");
@@ -601,7 +625,7 @@ export default function DocumentosScreen() {
           </View>
         </View>
         <DropdownAcoes
-          hasFile={!!item.arquivo_url}
+          hasFile={!!item.arquivo_download_url}
           onDownload={() => handleDownload(item)}
           onUpload={() => handleUpload(item.id)}
           onEdit={() => openEdit(item)}